@@ -0,0 +1,235 @@
+# app/adaptive_concurrency.py - Adaptive (AIMD) concurrency limits for model calls
+"""
+One AdaptiveLimiter per model caps the calls in flight to that model. The
+limit is not fixed: it adapts to what the model currently sustains.
+
+- additive increase: every successful call whose latency is near its
+  stage's baseline raises the limit by 1/limit (about +1 per round of
+  calls), as long as the limit is actually being used
+- multiplicative decrease: an error, or a stage whose short-term latency
+  average exceeds MODEL_CONCURRENCY_TOLERANCE times its long-term average,
+  cuts the limit by MODEL_CONCURRENCY_BACKOFF. Calls started before the
+  last cut don't cut it again, so one congestion event means one decrease.
+
+Calls over the limit wait in FIFO order. They are rejected with
+ConcurrencyLimitRejected when the queue is full or no slot frees up within
+MODEL_CONCURRENCY_MAX_WAIT seconds. Current limits, calls in flight and
+rejections are exported as metrics.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict
+
+from google.adk.models import BaseLlm
+
+from observability.metrics import MODEL_CALLS_IN_FLIGHT, MODEL_CONCURRENCY_LIMIT, MODEL_LIMITER_REJECTIONS
+
+MODEL_CONCURRENCY_ENABLED = os.getenv("MODEL_CONCURRENCY_ENABLED", "true").lower() == "true"
+MODEL_CONCURRENCY_INITIAL = int(os.getenv("MODEL_CONCURRENCY_INITIAL", "16"))
+MODEL_CONCURRENCY_MIN = int(os.getenv("MODEL_CONCURRENCY_MIN", "1"))
+MODEL_CONCURRENCY_MAX = int(os.getenv("MODEL_CONCURRENCY_MAX", "256"))
+MODEL_CONCURRENCY_BACKOFF = float(os.getenv("MODEL_CONCURRENCY_BACKOFF", "0.75"))
+MODEL_CONCURRENCY_TOLERANCE = float(os.getenv("MODEL_CONCURRENCY_TOLERANCE", "1.5"))
+MODEL_CONCURRENCY_MAX_WAIT = float(os.getenv("MODEL_CONCURRENCY_MAX_WAIT", "30"))
+MODEL_CONCURRENCY_MAX_QUEUE = int(os.getenv("MODEL_CONCURRENCY_MAX_QUEUE", "1000"))
+
+# Latency averages per stage: the long-term one is the baseline
+SHORT_TERM_ALPHA = 0.2
+LONG_TERM_ALPHA = 0.02
+# Successful calls per stage before latency can cut the limit
+WARMUP_SAMPLES = 10
+
+class ConcurrencyLimitRejected(Exception):
+    """The model's limiter queue was full, or no slot freed up in time"""
+
+class _StageLatency:
+    __slots__ = ("samples", "short_term", "long_term")
+
+    def __init__(self, seconds: float):
+        self.samples = 1
+        self.short_term = seconds
+        self.long_term = seconds
+
+    def observe(self, seconds: float) -> None:
+        self.samples += 1
+        self.short_term += SHORT_TERM_ALPHA * (seconds - self.short_term)
+        self.long_term += LONG_TERM_ALPHA * (seconds - self.long_term)
+
+class AdaptiveLimiter:
+    """Concurrent call limit for one model, adjusted by call outcomes and latency"""
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = MODEL_CONCURRENCY_INITIAL,
+        min_limit: int = MODEL_CONCURRENCY_MIN,
+        max_limit: int = MODEL_CONCURRENCY_MAX,
+        backoff: float = MODEL_CONCURRENCY_BACKOFF,
+        tolerance: float = MODEL_CONCURRENCY_TOLERANCE,
+        max_wait: float = MODEL_CONCURRENCY_MAX_WAIT,
+        max_queue: int = MODEL_CONCURRENCY_MAX_QUEUE
+    ):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._latency: Dict[str, _StageLatency] = {}
+        self._last_decrease = float("-inf")
+        self._publish()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _publish(self) -> None:
+        MODEL_CONCURRENCY_LIMIT.labels(self.name).set(int(self.limit))
+        MODEL_CALLS_IN_FLIGHT.labels(self.name).set(self.in_flight)
+
+    def _reject(self, reason: str) -> None:
+        MODEL_LIMITER_REJECTIONS.labels(self.name, reason).inc()
+        raise ConcurrencyLimitRejected(
+            f"{self.name}: {reason} (limit {int(self.limit)}, {self.in_flight} in flight, {self.queued} queued)"
+        )
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the perf_counter time the call started"""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self._publish()
+            return time.perf_counter()
+        if self.queued >= self.max_queue:
+            self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait((waiter,), timeout=self.max_wait)
+        except asyncio.CancelledError:
+            if waiter.done():
+                # Granted just as the caller went away: hand the slot on
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            self._publish()
+            raise
+        if not waiter.done():
+            self._waiters.remove(waiter)
+            waiter.cancel()
+            self._reject("timeout")
+        self._publish()
+        return time.perf_counter()
+
+    def release(self, started: float, stage: str, outcome: str) -> None:
+        """
+        Free the slot of a call that started at started. outcome is "success",
+        "error" or "dropped" (cancelled, e.g. the losing hedge; no signal).
+        """
+        limit_in_use = self.in_flight >= self.limit / 2
+        self.in_flight -= 1
+        if outcome == "error":
+            self._decrease(started)
+        elif outcome == "success":
+            self._on_success(started, stage, time.perf_counter() - started, limit_in_use)
+        self._wake()
+        self._publish()
+
+    def _on_success(self, started: float, stage: str, seconds: float, limit_in_use: bool) -> None:
+        latency = self._latency.get(stage)
+        if latency is None:
+            self._latency[stage] = latency = _StageLatency(seconds)
+        else:
+            latency.observe(seconds)
+        if latency.samples >= WARMUP_SAMPLES and latency.short_term > self.tolerance * latency.long_term:
+            self._decrease(started)
+        elif limit_in_use:
+            # Growing a limit nobody reaches would only hide the next overload
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def _decrease(self, started: float) -> None:
+        if started < self._last_decrease:
+            return
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self._last_decrease = time.perf_counter()
+
+    @asynccontextmanager
+    async def slot(self, stage: str = "unknown"):
+        """Hold a slot for the block; exceptions count as errors, cancellation as no signal"""
+        started = await self.acquire()
+        outcome = "dropped"
+        try:
+            yield
+            outcome = "success"
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self.release(started, stage, outcome)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"limit": int(self.limit), "in_flight": self.in_flight, "queued": self.queued}
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+
+def get_model_limiter(model: str) -> AdaptiveLimiter:
+    """The process-wide limiter for model, created on first use"""
+    limiter = _limiters.get(model)
+    if limiter is None:
+        limiter = _limiters.setdefault(model, AdaptiveLimiter(model))
+    return limiter
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    return {model: limiter.stats() for model, limiter in _limiters.items()}
+
+class LimitedLlm(BaseLlm):
+    """Wraps a model: every call holds a slot of the limiter for the model it is sent to"""
+
+    inner: BaseLlm
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        if not MODEL_CONCURRENCY_ENABLED:
+            async for response in self.inner.generate_content_async(llm_request, stream):
+                yield response
+            return
+
+        # Routing may have changed the model after the agent was built
+        limiter = get_model_limiter(llm_request.model or self.model)
+        labels = llm_request.config.labels if llm_request.config and llm_request.config.labels else {}
+        stage = labels.get("adk_agent_name", "unknown")
+        started = await limiter.acquire()
+        failed = finished = False
+        try:
+            async for response in self.inner.generate_content_async(llm_request, stream):
+                failed = failed or bool(response.error_code)
+                yield response
+            finished = True
+        except Exception:
+            failed = True
+            raise
+        finally:
+            limiter.release(started, stage, "error" if failed else "success" if finished else "dropped")
+
+def with_concurrency_limit(model) -> LimitedLlm:
+    """LimitedLlm around a model name or BaseLlm instance"""
+    if isinstance(model, LimitedLlm):
+        return model
+    if isinstance(model, str):
+        from google.adk.models.registry import LLMRegistry
+        model = LLMRegistry.new_llm(model)
+    return LimitedLlm(model=model.model, inner=model)
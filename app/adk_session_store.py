@@ -0,0 +1,461 @@
+# app/adk_session_store.py - Durable SQLite session service for the ADK API surface
+"""
+A BaseSessionService backed by SQLite in WAL mode, used instead of ADK's
+InMemorySessionService when ADK_SESSION_DB is set.
+
+- Connections come from a small pool; every query runs on the shared
+  blocking pool so the event loop never waits on disk.
+- append_event() updates the caller's session immediately and buffers the
+  write. Buffered events are committed together every
+  ADK_SESSION_FLUSH_INTERVAL seconds, or once ADK_SESSION_BATCH_SIZE are
+  queued. Reads, deletes and shutdown flush first, so callers always see
+  their own writes. A crash can lose at most one flush interval of events.
+- Compaction: for sessions idle longer than ADK_SESSION_COMPACT_AFTER_SECONDS,
+  all but the last ADK_SESSION_KEEP_EVENTS events are replaced by a single
+  event whose state_delta holds the final value of every key they wrote
+  (the agents' output_key results). Session state is unchanged.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import queue
+import sqlite3
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.base_session_service import BaseSessionService, GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.session import Session
+from google.adk.sessions.state import State
+
+from agents.tools.offload import run_blocking
+
+ADK_SESSION_DB = os.getenv("ADK_SESSION_DB")
+ADK_SESSION_POOL_SIZE = int(os.getenv("ADK_SESSION_POOL_SIZE", "4"))
+ADK_SESSION_FLUSH_INTERVAL = float(os.getenv("ADK_SESSION_FLUSH_INTERVAL", "0.05"))
+ADK_SESSION_BATCH_SIZE = int(os.getenv("ADK_SESSION_BATCH_SIZE", "64"))
+ADK_SESSION_COMPACT_AFTER_SECONDS = float(os.getenv("ADK_SESSION_COMPACT_AFTER_SECONDS", "3600"))
+ADK_SESSION_KEEP_EVENTS = int(os.getenv("ADK_SESSION_KEEP_EVENTS", "20"))
+ADK_SESSION_COMPACT_INTERVAL = float(os.getenv("ADK_SESSION_COMPACT_INTERVAL", "300"))
+
+COMPACTION_AUTHOR = "session_compactor"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    last_update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (app_name, user_id, session_id, seq);
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+);
+"""
+
+def split_state(state: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """(session, app, user) scoped values; app:/user: prefixes stripped, temp: keys dropped"""
+    session_state, app_state, user_state = {}, {}, {}
+    for key, value in state.items():
+        if key.startswith(State.APP_PREFIX):
+            app_state[key.removeprefix(State.APP_PREFIX)] = value
+        elif key.startswith(State.USER_PREFIX):
+            user_state[key.removeprefix(State.USER_PREFIX)] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session_state[key] = value
+    return session_state, app_state, user_state
+
+class SqliteConnectionPool:
+    """Fixed set of WAL-mode connections, each used by one thread at a time"""
+
+    def __init__(self, path: str, size: int = ADK_SESSION_POOL_SIZE):
+        self.path = path
+        self._connections: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(max(1, size)):
+            connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._connections.put(connection)
+        with self.connection() as connection:
+            connection.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connections.get()
+        try:
+            yield connection
+        finally:
+            self._connections.put(connection)
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self.connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def close(self) -> None:
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+def _merge_json(connection: sqlite3.Connection, select: str, upsert: str, key: Tuple, delta: Dict[str, Any]) -> None:
+    row = connection.execute(select, key).fetchone()
+    state = json.loads(row[0]) if row else {}
+    state.update(delta)
+    connection.execute(upsert, key + (json.dumps(state),))
+
+class SqliteSessionService(BaseSessionService):
+    def __init__(
+        self,
+        path: str,
+        pool_size: int = ADK_SESSION_POOL_SIZE,
+        flush_interval: float = ADK_SESSION_FLUSH_INTERVAL,
+        batch_size: int = ADK_SESSION_BATCH_SIZE
+    ):
+        self.pool = SqliteConnectionPool(path, pool_size)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # (app_name, user_id, session_id, timestamp, event json, session state, app delta, user delta)
+        self._pending: List[Tuple] = []
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self.events_written = 0
+        self.flushes = 0
+        self.events_compacted = 0
+
+    # Reads and writes (run on the blocking pool)
+
+    def _write_batch(self, batch: List[Tuple]) -> None:
+        # Only the newest state snapshot per session needs writing
+        snapshots: Dict[Tuple[str, str, str], Tuple[str, float]] = {}
+        with self.pool.transaction() as connection:
+            for app_name, user_id, session_id, timestamp, data, state, app_delta, user_delta in batch:
+                connection.execute(
+                    "INSERT INTO events (app_name, user_id, session_id, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+                    (app_name, user_id, session_id, timestamp, data)
+                )
+                snapshots[(app_name, user_id, session_id)] = (state, timestamp)
+                if app_delta:
+                    _merge_json(
+                        connection,
+                        "SELECT state FROM app_states WHERE app_name = ?",
+                        "INSERT OR REPLACE INTO app_states (app_name, state) VALUES (?, ?)",
+                        (app_name,), app_delta
+                    )
+                if user_delta:
+                    _merge_json(
+                        connection,
+                        "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?",
+                        "INSERT OR REPLACE INTO user_states (app_name, user_id, state) VALUES (?, ?, ?)",
+                        (app_name, user_id), user_delta
+                    )
+            connection.executemany(
+                "UPDATE sessions SET state = ?, last_update_time = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                [(state, timestamp) + key for key, (state, timestamp) in snapshots.items()]
+            )
+
+    def _insert_session(self, session: Session, app_delta: Dict, user_delta: Dict) -> None:
+        session_state, _, _ = split_state(session.state)
+        with self.pool.transaction() as connection:
+            connection.execute(
+                "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                (session.app_name, session.user_id, session.id)
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO sessions (app_name, user_id, id, state, last_update_time) VALUES (?, ?, ?, ?, ?)",
+                (session.app_name, session.user_id, session.id, json.dumps(session_state), session.last_update_time)
+            )
+            if app_delta:
+                _merge_json(
+                    connection,
+                    "SELECT state FROM app_states WHERE app_name = ?",
+                    "INSERT OR REPLACE INTO app_states (app_name, state) VALUES (?, ?)",
+                    (session.app_name,), app_delta
+                )
+            if user_delta:
+                _merge_json(
+                    connection,
+                    "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?",
+                    "INSERT OR REPLACE INTO user_states (app_name, user_id, state) VALUES (?, ?, ?)",
+                    (session.app_name, session.user_id), user_delta
+                )
+
+    def _scoped_state(self, connection: sqlite3.Connection, app_name: str, user_id: str) -> Dict[str, Any]:
+        state = {}
+        row = connection.execute("SELECT state FROM app_states WHERE app_name = ?", (app_name,)).fetchone()
+        if row:
+            state.update({State.APP_PREFIX + k: v for k, v in json.loads(row[0]).items()})
+        row = connection.execute(
+            "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?", (app_name, user_id)
+        ).fetchone()
+        if row:
+            state.update({State.USER_PREFIX + k: v for k, v in json.loads(row[0]).items()})
+        return state
+
+    def _load_session(self, app_name: str, user_id: str, session_id: str, config: Optional[GetSessionConfig]) -> Optional[Session]:
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                "SELECT state, last_update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id)
+            ).fetchone()
+            if row is None:
+                return None
+            query = "SELECT seq, data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+            params: List[Any] = [app_name, user_id, session_id]
+            if config and config.after_timestamp:
+                query += " AND timestamp >= ?"
+                params.append(config.after_timestamp)
+            if config and config.num_recent_events:
+                query += " ORDER BY seq DESC LIMIT ?"
+                params.append(config.num_recent_events)
+            query = f"SELECT data FROM ({query}) ORDER BY seq"
+            events = [Event.model_validate_json(data) for (data,) in connection.execute(query, params)]
+            state = json.loads(row[0])
+            state.update(self._scoped_state(connection, app_name, user_id))
+        return Session(app_name=app_name, user_id=user_id, id=session_id, state=state, events=events, last_update_time=row[1])
+
+    def _list_sessions(self, app_name: str, user_id: str) -> List[Session]:
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                "SELECT id, last_update_time FROM sessions WHERE app_name = ? AND user_id = ? ORDER BY last_update_time",
+                (app_name, user_id)
+            ).fetchall()
+        return [Session(app_name=app_name, user_id=user_id, id=row[0], last_update_time=row[1]) for row in rows]
+
+    def _delete_session(self, app_name: str, user_id: str, session_id: str) -> None:
+        with self.pool.transaction() as connection:
+            connection.execute(
+                "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?", (app_name, user_id, session_id)
+            )
+            connection.execute(
+                "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", (app_name, user_id, session_id)
+            )
+
+    # BaseSessionService
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None
+    ) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        session = Session(app_name=app_name, user_id=user_id, id=session_id, state=state or {}, last_update_time=time.time())
+        _, app_delta, user_delta = split_state(session.state)
+        await self.flush()
+        await run_blocking(self._insert_session, session, app_delta, user_delta)
+        return await self.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None
+    ) -> Optional[Session]:
+        await self.flush()
+        return await run_blocking(self._load_session, app_name, user_id, session_id, config)
+
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        await self.flush()
+        return ListSessionsResponse(sessions=await run_blocking(self._list_sessions, app_name, user_id))
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await self.flush()
+        await run_blocking(self._delete_session, app_name, user_id, session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+
+        delta = event.actions.state_delta if event.actions and event.actions.state_delta else {}
+        _, app_delta, user_delta = split_state(delta)
+        session_state, _, _ = split_state(session.state)
+        self._pending.append((
+            session.app_name, session.user_id, session.id, event.timestamp,
+            event.model_dump_json(exclude_none=True), json.dumps(session_state), app_delta, user_delta
+        ))
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return event
+
+    # Batching
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Commit every buffered event in one transaction"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            await run_blocking(self._write_batch, batch)
+            self.events_written += len(batch)
+            self.flushes += 1
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        await self.flush()
+        self.pool.close()
+
+    # Compaction
+
+    def _compact(self, idle_before: float, keep_events: int) -> int:
+        compacted = 0
+        with self.pool.connection() as connection:
+            candidates = connection.execute(
+                """
+                SELECT s.app_name, s.user_id, s.id FROM sessions s
+                JOIN events e ON e.app_name = s.app_name AND e.user_id = s.user_id AND e.session_id = s.id
+                WHERE s.last_update_time < ?
+                GROUP BY s.app_name, s.user_id, s.id
+                HAVING COUNT(*) > ?
+                """,
+                (idle_before, keep_events + 1)
+            ).fetchall()
+        for app_name, user_id, session_id in candidates:
+            with self.pool.transaction() as connection:
+                rows = connection.execute(
+                    "SELECT seq, data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? ORDER BY seq",
+                    (app_name, user_id, session_id)
+                ).fetchall()
+                old = rows[:len(rows) - keep_events] if keep_events else rows
+                if len(old) < 2:
+                    continue
+                final_values: Dict[str, Any] = {}
+                last_event = None
+                for _, data in old:
+                    last_event = Event.model_validate_json(data)
+                    if last_event.actions and last_event.actions.state_delta:
+                        final_values.update(last_event.actions.state_delta)
+                summary = Event(
+                    author=COMPACTION_AUTHOR,
+                    invocation_id=last_event.invocation_id,
+                    timestamp=last_event.timestamp,
+                    actions=EventActions(state_delta={
+                        k: v for k, v in final_values.items() if not k.startswith(State.TEMP_PREFIX)
+                    })
+                )
+                connection.execute(
+                    "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? AND seq <= ?",
+                    (app_name, user_id, session_id, old[-1][0])
+                )
+                # Reuse the last compacted seq so the summary sorts before the kept events
+                connection.execute(
+                    "INSERT INTO events (seq, app_name, user_id, session_id, timestamp, data) VALUES (?, ?, ?, ?, ?, ?)",
+                    (old[-1][0], app_name, user_id, session_id, summary.timestamp, summary.model_dump_json(exclude_none=True))
+                )
+                compacted += len(old) - 1
+        return compacted
+
+    async def compact(
+        self,
+        older_than: float = ADK_SESSION_COMPACT_AFTER_SECONDS,
+        keep_events: int = ADK_SESSION_KEEP_EVENTS
+    ) -> int:
+        """Collapse old events of idle sessions; returns how many events were removed"""
+        await self.flush()
+        removed = await run_blocking(self._compact, time.time() - older_than, keep_events)
+        self.events_compacted += removed
+        return removed
+
+    def _counts(self) -> Tuple[int, int]:
+        with self.pool.connection() as connection:
+            sessions = connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            events = connection.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        return sessions, events
+
+    async def stats(self) -> Dict[str, Any]:
+        sessions, events = await run_blocking(self._counts)
+        return {
+            "backend": "sqlite",
+            "path": self.pool.path,
+            "sessions": sessions,
+            "stored_events": events,
+            "pending_events": len(self._pending),
+            "events_written": self.events_written,
+            "flushes": self.flushes,
+            "events_compacted": self.events_compacted
+        }
+
+async def run_session_compaction(service: SqliteSessionService, interval: float = ADK_SESSION_COMPACT_INTERVAL) -> None:
+    """Background task: periodically compact idle ADK sessions"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await service.compact()
+            if removed:
+                print(f"🗜️ Compacted {removed} ADK session events")
+        except Exception as e:
+            print(f"⚠️ ADK session compaction failed: {e}")
+
+@contextlib.contextmanager
+def default_session_service(service: BaseSessionService) -> Iterator[None]:
+    """
+    get_fast_api_app() builds its own session service and only accepts URIs
+    for the ones ADK ships, so swap its default factory while the app is built.
+    This relies on ADK internals (pinned in requirements); check the result
+    with verify_session_service().
+    """
+    from google.adk.cli import fast_api
+    original = fast_api.InMemorySessionService
+    fast_api.InMemorySessionService = lambda: service
+    try:
+        yield
+    finally:
+        fast_api.InMemorySessionService = original
+
+def app_session_service(app: Any) -> Optional[BaseSessionService]:
+    """The session service the ADK routes of app were built with"""
+    for route in getattr(app, "routes", []):
+        endpoint = getattr(route, "endpoint", None)
+        code = getattr(endpoint, "__code__", None)
+        if code is None or "session_service" not in code.co_freevars:
+            continue
+        return endpoint.__closure__[code.co_freevars.index("session_service")].cell_contents
+    return None
+
+def verify_session_service(app: Any, service: BaseSessionService) -> None:
+    """Raise if get_fast_api_app() did not pick up service (e.g. ADK moved its default factory)"""
+    used = app_session_service(app)
+    if used is not service:
+        raise RuntimeError(
+            f"ADK app uses {type(used).__name__} instead of {type(service).__name__}; "
+            "default_session_service() no longer matches this google-adk version"
+        )
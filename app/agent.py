@@ -8,6 +8,14 @@ from agents.automation.implementation_planner import implementation_planner_agen
 from agents.automation.risk_assessor import risk_assessor_agent
 from agents.automation.tech_integrator import tech_integrator_agent
 from agents.automation.business_compiler import business_compiler_agent
+from adaptive_concurrency import with_concurrency_limit
+from cost_ledger import after_model_ledger, before_model_ledger
+from latency_control import deadline_callback, with_deadlines
+from model_cassettes import install_cassette_from_env
+from model_routing import routing_callback
+from observability.hooks import add_agent_callbacks
+from observability.metrics import after_agent_metrics, after_model_metrics, before_agent_metrics
+from observability.tracing import after_model_tracing
 
 # Create multi-agent pipeline
 automation_sequential_agent = SequentialAgent(
@@ -23,5 +31,26 @@ automation_sequential_agent = SequentialAgent(
     description="Comprehensive automation business case generation with multi-agent analysis"
 )
 
+# Per-agent latency/model error metrics, token usage on model call spans,
+# complexity-aware model routing, per-stage deadlines with hedged calls
+# (each request, hedges included, holds an adaptive concurrency slot) and
+# the per-session cost ledger (its clock starts after routing and deadlines)
+for sub_agent in automation_sequential_agent.sub_agents:
+    sub_agent.model = with_deadlines(with_concurrency_limit(sub_agent.model))
+    add_agent_callbacks(
+        sub_agent,
+        before_model_callback=[
+            routing_callback(sub_agent.output_key),
+            deadline_callback(sub_agent.output_key),
+            before_model_ledger,
+        ],
+        before_agent_callback=before_agent_metrics,
+        after_agent_callback=after_agent_metrics,
+        after_model_callback=[after_model_metrics, after_model_tracing, after_model_ledger],
+    )
+
+# MODEL_CASSETTE_MODE replays (or records) model calls for offline runs
+install_cassette_from_env(automation_sequential_agent)
+
 # Required root agent for ADK
 root_agent = automation_sequential_agent
\ No newline at end of file
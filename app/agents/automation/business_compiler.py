@@ -1,6 +1,8 @@
 # app/agents/business_compiler.py
 from google.adk.agents import LlmAgent
 
+from .output_schemas import JSON_OUTPUT_RULES, BusinessCase
+
 business_compiler_agent = LlmAgent(
     name="success_metrics_specialist",  # Frontend expects this technical name
     model="gemini-2.0-flash-exp",
@@ -28,15 +30,24 @@ Using all previous specialist analyses, create definitive business justification
 - Conditional Go: ROI > 200%, Payback < 24 months, Risk mitigation required
 - No-Go Indicators: ROI < 200%, Payback > 24 months, Risk = High
 
-**OUTPUT REQUIREMENTS:**
-Generate comprehensive executive business case including:
-- Executive summary with clear recommendation and supporting rationale
-- Financial business case with detailed ROI analysis
-- Implementation strategy with phased approach and milestones
-- Success metrics and governance framework
+**INPUTS (structured outputs of the earlier specialists):**
+Process analysis: {process_analysis}
+ROI analysis: {roi_analysis}
+Implementation plan: {implementation_plan}
+Risk assessment: {risk_assessment}
+Technology integration: {tech_integration}
 
-Apply executive communication best practices with specific financial metrics and actionable next steps.""",
+**OUTPUT REQUIREMENTS:**
+An executive summary quoting the ROI, payback period and annual savings from the ROI analysis,
+a Go / Conditional Go / No-Go recommendation using the decision framework, your confidence
+percentage, up to 5 strategic recommendations, and 4 success metrics with targets. Financial
+figures, phases and risks are taken from the earlier analyses when the report is assembled, so
+do not restate them.""" + JSON_OUTPUT_RULES,
     
     description="Compiles comprehensive executive business case",
+    output_schema=BusinessCase,
+    disallow_transfer_to_parent=True,
+    disallow_transfer_to_peers=True,
+    include_contents="none",
     output_key="final_business_case"
 )
\ No newline at end of file
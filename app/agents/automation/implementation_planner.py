@@ -1,6 +1,8 @@
 # app/agents/implementation_planner.py
 from google.adk.agents import LlmAgent
 
+from .output_schemas import JSON_OUTPUT_RULES, ImplementationPlan
+
 implementation_planner_agent = LlmAgent(
     name="process_improvement_specialist",  # Frontend expects this technical name
     model="gemini-2.0-flash-exp",
@@ -26,15 +28,18 @@ Using the previous analysis outputs, design comprehensive deployment strategy:
 - Project Manager: $70-140/hour (coordination, planning)
 - Change Management: 10-20% of total project cost
 
-**OUTPUT REQUIREMENTS:**
-Generate comprehensive implementation plan including:
-- Executive implementation summary with timeline and resources
-- Detailed project roadmap with specific phases and milestones
-- Resource and budget planning
-- Change management strategy and stakeholder engagement plan
+**INPUTS (structured outputs of the earlier specialists):**
+Process analysis: {process_analysis}
+ROI analysis: {roi_analysis}
 
-Structure for project sponsor and PMO review with actionable next steps.""",
+**OUTPUT REQUIREMENTS:**
+Three phases, each with its month range in the title, 3-5 concrete actions and the expected
+impact (quote the monthly savings from the ROI analysis where relevant), plus the total months.""" + JSON_OUTPUT_RULES,
     
     description="Creates detailed implementation roadmaps with phased deployment strategies",
+    output_schema=ImplementationPlan,
+    disallow_transfer_to_parent=True,
+    disallow_transfer_to_peers=True,
+    include_contents="none",
     output_key="implementation_plan"
 )
\ No newline at end of file
@@ -0,0 +1,101 @@
+# app/agents/automation/output_schemas.py
+"""
+Structured outputs for the six pipeline agents.
+
+Each LlmAgent replies with JSON matching its schema; ADK validates it and
+stores the dict in session state under the agent's output_key. Later agents
+read those typed fields through {output_key} placeholders instead of the
+whole conversation, and the report is a deterministic merge of the six.
+That is why every agent after the first sets include_contents="none": the
+earlier stages already reach it through state, so replaying the
+conversation would only resend them as extra prompt tokens.
+"""
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+ComplexityLevel = Literal["basic_automation", "process_automation", "integration_automation", "intelligent_automation"]
+
+class ProcessAnalysis(BaseModel):
+    business_scenario: str = Field(description="Short name of the process being analyzed")
+    monthly_volume: int
+    people_involved: int
+    manual_percentage: int
+    minutes_per_transaction: Optional[float] = None
+    error_rate_percentage: Optional[float] = None
+    complexity_level: ComplexityLevel
+    readiness_score: Optional[float] = Field(None, description="Automation readiness, 1-10")
+    pain_points: List[str] = Field(default_factory=list, description="At most 3, one line each")
+    opportunities: List[str] = Field(description="At most 5 automation opportunities, one line each")
+
+class RoiScenario(BaseModel):
+    name: Literal["conservative", "likely", "optimistic"]
+    roi_percentage: float
+    annual_savings: float
+
+class RoiAnalysis(BaseModel):
+    monthly_savings: float
+    annual_savings: float
+    implementation_cost: float
+    roi_percentage: float
+    payback_months: Optional[float] = Field(None, description="Months until savings repay the cost; null if they never do")
+    hours_saved_monthly: Optional[float] = None
+    scenarios: List[RoiScenario] = Field(default_factory=list)
+
+class ImplementationPhase(BaseModel):
+    title: str = Field(description="Phase name with its month range")
+    actions: List[str] = Field(description="3-5 actions, one line each")
+    expected_impact: str
+
+class ImplementationPlan(BaseModel):
+    total_months: Optional[int] = None
+    phases: List[ImplementationPhase]
+
+class Risk(BaseModel):
+    category: Literal["technical", "organizational", "financial", "timeline"]
+    description: str
+    probability: int = Field(ge=1, le=5)
+    impact: int = Field(ge=1, le=5)
+    mitigation: str
+
+class RiskAssessment(BaseModel):
+    overall_risk: Literal["Low", "Medium", "High"]
+    success_probability: float = Field(ge=0, le=100)
+    mitigations: List[str] = Field(description="Headline mitigation strategies, 2-4 short phrases")
+    risks: List[Risk] = Field(default_factory=list)
+
+class TechIntegration(BaseModel):
+    architecture_pattern: str
+    platform_approach: str
+    integrations: List[str] = Field(default_factory=list, description="Systems to connect")
+    recommendations: List[str] = Field(default_factory=list, description="At most 4, one line each")
+
+class SuccessMetric(BaseModel):
+    metric: str
+    target: str
+    timeframe: str
+    measurement: str
+
+class BusinessCase(BaseModel):
+    executive_summary: str = Field(description="3-4 sentences with the key financial figures")
+    recommendation: Literal["Go", "Conditional Go", "No-Go"]
+    confidence_percentage: float = Field(ge=0, le=100)
+    strategic_recommendations: List[str] = Field(description="At most 5, one line each")
+    success_metrics: List[SuccessMetric]
+
+# output_key -> schema, in pipeline order
+STAGE_SCHEMAS = {
+    "process_analysis": ProcessAnalysis,
+    "roi_analysis": RoiAnalysis,
+    "implementation_plan": ImplementationPlan,
+    "risk_assessment": RiskAssessment,
+    "tech_integration": TechIntegration,
+    "final_business_case": BusinessCase
+}
+
+# Appended to every instruction; placeholders are not allowed in the text (ADK
+# treats braces as state references)
+JSON_OUTPUT_RULES = """
+**OUTPUT FORMAT:**
+Reply with JSON only, matching the response schema. Keep every string to one
+line; no markdown, no prose outside the JSON."""
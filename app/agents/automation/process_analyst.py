@@ -1,6 +1,8 @@
 # app/agents/process_analyst.py
 from google.adk.agents import LlmAgent
 
+from .output_schemas import JSON_OUTPUT_RULES, ProcessAnalysis
+
 process_analyst_agent = LlmAgent(
     name="customer_journey_analyst",  # Frontend expects this technical name
     model="gemini-2.0-flash-exp",
@@ -30,14 +32,14 @@ From the user's input, extract and analyze:
    - Intelligent Automation (10+ systems, 10+ decision points, 24-36 week implementation)
 
 **OUTPUT REQUIREMENTS:**
-Generate comprehensive process analysis including:
-- Process overview and current state assessment
-- Automation opportunities identified with complexity classification
-- Baseline metrics (time, volume, costs, errors)
-- Automation readiness score (1-10 scale)
-
-Provide specific, actionable recommendations based on the user's input.""",
+Extract the process figures from the user's input (monthly volume, people involved, manual
+percentage, minutes per transaction and error rate when given), classify the complexity level
+with the framework above, score readiness 1-10, and list the main pain points and automation
+opportunities. Later specialists only see this structured output, so include every figure they need.""" + JSON_OUTPUT_RULES,
     
     description="Analyzes business processes to identify automation opportunities",
+    output_schema=ProcessAnalysis,
+    disallow_transfer_to_parent=True,
+    disallow_transfer_to_peers=True,
     output_key="process_analysis"
 )
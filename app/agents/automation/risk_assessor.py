@@ -1,6 +1,8 @@
 # app/agents/risk_assessor.py
 from google.adk.agents import LlmAgent
 
+from .output_schemas import JSON_OUTPUT_RULES, RiskAssessment
+
 risk_assessor_agent = LlmAgent(
     name="solution_designer",  # Frontend expects this technical name
     model="gemini-2.0-flash-exp",
@@ -26,16 +28,19 @@ Using all previous analysis outputs, conduct systematic risk evaluation:
 - Impact Scale (1-5): Minimal to Critical
 - Risk Priority = Probability × Impact
 
+**INPUTS (structured outputs of the earlier specialists):**
+Process analysis: {process_analysis}
+ROI analysis: {roi_analysis}
+Implementation plan: {implementation_plan}
+
 **OUTPUT REQUIREMENTS:**
-Generate comprehensive risk assessment including:
-- Executive risk summary with overall risk level (Low/Medium/High)
-- Detailed risk analysis across all categories
-- Risk mitigation strategies and contingency plans
-- Risk-adjusted projections with scenarios
-- Success probability assessment with confidence interval
-
-Apply enterprise risk management standards with actionable mitigation recommendations.""",
+Overall risk level (Low/Medium/High), success probability as a percentage, 2-4 headline
+mitigation strategies, and up to 5 scored risks with category, probability, impact and mitigation.""" + JSON_OUTPUT_RULES,
     
     description="Conducts comprehensive risk analysis with mitigation strategies",
+    output_schema=RiskAssessment,
+    disallow_transfer_to_parent=True,
+    disallow_transfer_to_peers=True,
+    include_contents="none",
     output_key="risk_assessment"
 )
\ No newline at end of file
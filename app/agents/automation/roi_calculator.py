@@ -1,6 +1,8 @@
 # app/agents/roi_calculator.py
 from google.adk.agents import LlmAgent
 
+from .output_schemas import JSON_OUTPUT_RULES, RoiAnalysis
+
 roi_calculator_agent = LlmAgent(
     name="data_analytics_specialist",  # Frontend expects this technical name
     model="gemini-2.0-flash-exp",
@@ -26,15 +28,18 @@ Using the previous process analysis output, apply proven ROI calculation methodo
 - Finance Operations: $65-85/hour labor cost, 70-90% automation rate
 - Sales Operations: $75-95/hour labor cost, 60-80% automation rate
 
-**OUTPUT REQUIREMENTS:**
-Generate detailed financial analysis including:
-- Executive financial summary with specific ROI percentage and payback period
-- Current vs future state cost analysis
-- Implementation investment requirements
-- Risk-adjusted scenarios (conservative, likely, optimistic)
+**INPUTS (structured outputs of the earlier specialists):**
+Process analysis: {process_analysis}
 
-Use realistic industry benchmarks and provide specific dollar amounts.""",
+**OUTPUT REQUIREMENTS:**
+Monthly and annual savings, implementation cost, ROI percentage, payback months, hours saved per
+month, and conservative, likely and optimistic scenarios. Use plain numbers without currency
+symbols or units.""" + JSON_OUTPUT_RULES,
     
     description="Generates comprehensive ROI analysis and financial projections",
+    output_schema=RoiAnalysis,
+    disallow_transfer_to_parent=True,
+    disallow_transfer_to_peers=True,
+    include_contents="none",
     output_key="roi_analysis"
 )
\ No newline at end of file
@@ -1,6 +1,8 @@
 # app/agents/tech_integrator.py
 from google.adk.agents import LlmAgent
 
+from .output_schemas import JSON_OUTPUT_RULES, TechIntegration
+
 tech_integrator_agent = LlmAgent(
     name="implementation_strategist",  # Frontend expects this technical name
     model="gemini-2.0-flash-exp",
@@ -27,15 +29,18 @@ Using all previous analysis outputs, design comprehensive technical solution:
 - Enterprise Integration: Central automation hub with 5+ system connections
 - AI-Powered Automation: Automation platform + AI/ML services + data analytics
 
-**OUTPUT REQUIREMENTS:**
-Generate comprehensive technical integration plan including:
-- Executive technical summary with recommended technology stack
-- Detailed technical architecture with component relationships
-- Automation platform strategy and optimization approach
-- Integration architecture with security and performance considerations
+**INPUTS (structured outputs of the earlier specialists):**
+Process analysis: {process_analysis}
+Implementation plan: {implementation_plan}
 
-Structure for CTO and technical architecture committee review with implementable recommendations.""",
+**OUTPUT REQUIREMENTS:**
+The architecture pattern from the list above, the automation platform approach, the systems to
+integrate, and up to 4 technical recommendations.""" + JSON_OUTPUT_RULES,
     
     description="Designs technical architecture and integration strategies",
+    output_schema=TechIntegration,
+    disallow_transfer_to_parent=True,
+    disallow_transfer_to_peers=True,
+    include_contents="none",
     output_key="tech_integration"
 )
\ No newline at end of file
@@ -3,6 +3,10 @@ import json
 import os
 from typing import Dict, List, Optional, Tuple
 
+from .classification import get_complexity_classifier, get_priority_classifier
+from .instrumentation import instrumented_tool
+
+@instrumented_tool
 def load_process_templates() -> Dict:
     """Load process templates from JSON file"""
     try:
@@ -15,6 +19,7 @@ def load_process_templates() -> Dict:
         print(f"Error loading process templates: {e}")
         return {}
 
+@instrumented_tool
 def determine_process_complexity(
     decision_points: int,
     systems_involved: int,
@@ -27,25 +32,16 @@ def determine_process_complexity(
     Returns: basic_automation, process_automation, integration_automation, or intelligent_automation
     """
     
-    # Score each factor (1-4 scale)
-    decision_score = 1 if decision_points <= 1 else 2 if decision_points <= 3 else 3 if decision_points <= 10 else 4
-    systems_score = 1 if systems_involved <= 2 else 2 if systems_involved <= 4 else 3 if systems_involved <= 10 else 4
-    people_score = 1 if people_involved <= 2 else 2 if people_involved <= 5 else 3 if people_involved <= 15 else 4
-    manual_score = 1 if manual_percentage <= 40 else 2 if manual_percentage <= 70 else 3 if manual_percentage <= 80 else 4
-    
-    # Calculate average complexity score
-    avg_score = (decision_score + systems_score + people_score + manual_score) / 4
-    
-    # Map to complexity levels
-    if avg_score <= 1.5:
-        return "basic_automation"
-    elif avg_score <= 2.5:
-        return "process_automation"
-    elif avg_score <= 3.5:
-        return "integration_automation"
-    else:
-        return "intelligent_automation"
+    # Each factor scores 1-4 against the tiers in process_complexity_indicators;
+    # the average score picks the level
+    return get_complexity_classifier().classify(
+        decision_points=decision_points,
+        systems_involved=systems_involved,
+        people_involved=people_involved,
+        manual_percentage=manual_percentage
+    )
 
+@instrumented_tool
 def assess_automation_readiness(
     data_quality: int,
     system_integration: int,
@@ -112,6 +108,7 @@ def get_readiness_recommendations(overall: float, technical: float, process: flo
     
     return recommendations
 
+@instrumented_tool
 def identify_automation_opportunities(
     process_type: str,
     current_time_minutes: int,
@@ -182,23 +179,18 @@ def get_automation_coverage(complexity_level: str) -> str:
     }
     return coverage_map.get(complexity_level, "50-70%")
 
+@instrumented_tool
 def get_implementation_priority(volume: int, time_minutes: int, error_rate: int) -> str:
     """Calculate implementation priority based on impact factors"""
     
-    # Score each factor
-    volume_score = 3 if volume > 500 else 2 if volume > 200 else 1
-    time_score = 3 if time_minutes > 120 else 2 if time_minutes > 30 else 1
-    error_score = 3 if error_rate > 15 else 2 if error_rate > 5 else 1
-    
-    total_score = volume_score + time_score + error_score
-    
-    if total_score >= 8:
-        return "High Priority"
-    elif total_score >= 6:
-        return "Medium Priority"
-    else:
-        return "Low Priority"
+    # Factor tiers and minimum total scores come from implementation_priority_indicators
+    return get_priority_classifier().classify(
+        monthly_volume=volume,
+        current_time_minutes=time_minutes,
+        error_rate_percentage=error_rate
+    )
 
+@instrumented_tool
 def get_process_template_by_type(process_type: str, specific_process: str = None) -> Optional[Dict]:
     """
     Get specific process template from templates database
@@ -218,6 +210,7 @@ def get_process_template_by_type(process_type: str, specific_process: str = None
     
     return None
 
+@instrumented_tool
 def generate_process_analysis_summary(
     complexity_level: str,
     readiness_score: float,
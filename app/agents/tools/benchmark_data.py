@@ -3,6 +3,9 @@ import json
 import os
 from typing import Dict, List, Optional
 
+from .instrumentation import instrumented_tool
+
+@instrumented_tool
 def load_automation_benchmarks() -> Dict:
     """Load automation benchmarks from JSON file"""
     try:
@@ -15,6 +18,7 @@ def load_automation_benchmarks() -> Dict:
         print(f"Error loading automation benchmarks: {e}")
         return {}
 
+@instrumented_tool
 def get_industry_standards(industry_type: str) -> Optional[Dict]:
     """
     Get industry automation standards
@@ -28,6 +32,7 @@ def get_industry_standards(industry_type: str) -> Optional[Dict]:
     industry_standards = benchmarks.get("automation_benchmarks", {}).get("industry_standards", {})
     return industry_standards.get(industry_type)
 
+@instrumented_tool
 def get_complexity_benchmarks(complexity_level: str) -> Optional[Dict]:
     """
     Get benchmarks for specific automation complexity level
@@ -48,6 +53,7 @@ def get_complexity_benchmarks(complexity_level: str) -> Optional[Dict]:
         **roi_data
     }
 
+@instrumented_tool
 def get_automation_efficiency_rate(complexity_level: str) -> float:
     """
     Get automation efficiency rate for complexity level
@@ -60,20 +66,16 @@ def get_automation_efficiency_rate(complexity_level: str) -> float:
     efficiency_rates = benchmarks.get("roi_calculation_models", {}).get("automation_efficiency_rates", {})
     return efficiency_rates.get(complexity_level, 0.7)
 
+@instrumented_tool
 def get_labor_cost_benchmark(industry_type: str) -> Dict:
     """
-    Get labor cost benchmarks for industry
+    Get labor cost benchmarks for industry (industry_labor_costs in the benchmarks)
     """
-    # Standard industry labor costs
-    labor_costs = {
-        "customer_service": {"min": 45, "max": 65, "average": 55},
-        "finance_operations": {"min": 65, "max": 85, "average": 75},
-        "sales_operations": {"min": 75, "max": 95, "average": 85},
-        "it_operations": {"min": 80, "max": 120, "average": 100}
-    }
+    from .industry_adjustments import get_adjustment_table
     
-    return labor_costs.get(industry_type, {"min": 60, "max": 80, "average": 70})
+    return get_adjustment_table().labor_cost(industry_type)
 
+@instrumented_tool
 def compare_to_industry_benchmark(
     user_metrics: Dict,
     industry_type: str,
@@ -108,46 +110,28 @@ def compare_to_industry_benchmark(
     
     return comparison
 
-def get_real_world_examples(complexity_level: str, industry_type: str = None) -> List[Dict]:
-    """
-    Get real-world automation success examples
-    """
-    benchmarks = load_automation_benchmarks()
-    
-    if not benchmarks:
-        return []
-    
-    examples = benchmarks.get("real_world_benchmarks", {})
-    customer_results = examples.get("automation_customer_results", {})
-    enterprise_benchmarks = examples.get("enterprise_automation_benchmarks", {})
-    
-    relevant_examples = []
-    
-    # Filter examples by complexity level
-    for example_name, example_data in customer_results.items():
-        if example_data.get("automation_type") == complexity_level:
-            relevant_examples.append({
-                "company": example_name.replace("_", " ").title(),
-                "industry": example_data.get("industry", "Various"),
-                "result": example_data.get("roi_percentage") or example_data.get("improvement"),
-                "timeframe": example_data.get("timeframe", "Not specified"),
-                "type": "Customer Success"
-            })
-    
-    # Add enterprise benchmarks
-    for study_name, study_data in enterprise_benchmarks.items():
-        if study_data.get("automation_type") == complexity_level:
-            relevant_examples.append({
-                "company": "Enterprise Study",
-                "industry": "Multi-Industry",
-                "result": f"{study_data.get('roi_percentage')} ROI",
-                "timeframe": study_data.get("timeframe"),
-                "additional_benefits": study_data.get("productivity_improvement"),
-                "type": "Industry Study"
-            })
-    
-    return relevant_examples
+@instrumented_tool
+def get_real_world_examples(
+    complexity_level: str,
+    industry_type: str = None,
+    monthly_volume: int = None,
+    k: int = 5
+) -> List[Dict]:
+    """
+    Get the real-world automation examples most similar to the process
+    (benchmark studies plus any uploaded case library), best match first
+    """
+    from .similarity_index import get_example_index
+    
+    return get_example_index().query(
+        k=k,
+        min_similarity=0.01,
+        complexity_level=complexity_level,
+        industry_type=industry_type,
+        monthly_volume=monthly_volume
+    )
 
+@instrumented_tool
 def get_implementation_cost_estimates(complexity_level: str, platform_type: str = "platform_native") -> Dict:
     """
     Get implementation cost estimates based on complexity and platform
@@ -172,6 +156,7 @@ def get_implementation_cost_estimates(complexity_level: str, platform_type: str
     
     return {}
 
+@instrumented_tool
 def get_risk_factors_by_complexity(complexity_level: str) -> Dict:
     """
     Get risk factors and mitigation strategies for complexity level
@@ -195,6 +180,7 @@ def get_risk_factors_by_complexity(complexity_level: str) -> Dict:
         "mitigation_strategies": success_factors.get("mitigation_strategies", [])
     }
 
+@instrumented_tool
 def generate_benchmark_comparison_summary(
     user_process: Dict,
     industry_type: str,
@@ -2,15 +2,26 @@
 import math
 from typing import Dict, List, Tuple
 
+from .industry_adjustments import get_industry_adjustment
+from .instrumentation import instrumented_tool
+
+@instrumented_tool
 def calculate_time_savings(
     monthly_volume: int,
     current_time_minutes: int,
-    automation_efficiency: float
+    automation_efficiency: float,
+    industry_type: str = None,
+    complexity_level: str = None
 ) -> Dict:
     """
     Calculate time savings from automation
+    Pass industry_type and complexity_level to apply the industry efficiency adjustment
     """
     
+    # Industry-specific efficiency adjustment (neutral for unlisted industries)
+    efficiency_multiplier = get_industry_adjustment(industry_type, complexity_level)["efficiency"]
+    automation_efficiency = automation_efficiency * efficiency_multiplier
+    
     # Current monthly time in hours
     current_monthly_hours = (monthly_volume * current_time_minutes) / 60
     
@@ -29,16 +40,21 @@ def calculate_time_savings(
         "automated_monthly_hours": round(automated_monthly_hours, 1),
         "hours_saved_monthly": round(hours_saved_monthly, 1),
         "hours_saved_annually": round(hours_saved_annually, 1),
-        "percentage_time_saved": round(percentage_saved, 1)
+        "percentage_time_saved": round(percentage_saved, 1),
+        "industry_efficiency_multiplier": efficiency_multiplier
     }
 
+@instrumented_tool
 def calculate_cost_savings(
     hours_saved_monthly: float,
     hourly_labor_cost: float,
-    overhead_multiplier: float = 1.3
+    overhead_multiplier: float = 1.3,
+    industry_type: str = None,
+    complexity_level: str = None
 ) -> Dict:
     """
     Calculate cost savings including overhead
+    Pass industry_type and complexity_level for industry risk-adjusted savings
     """
     
     # Direct labor savings
@@ -49,14 +65,21 @@ def calculate_cost_savings(
     total_monthly_savings = direct_monthly_savings * overhead_multiplier
     total_annual_savings = total_monthly_savings * 12
     
+    # Savings discounted by the industry delivery-risk multiplier
+    risk_multiplier = get_industry_adjustment(industry_type, complexity_level)["risk"]
+    risk_adjusted_annual_savings = total_annual_savings / risk_multiplier
+    
     return {
         "direct_monthly_savings": round(direct_monthly_savings, 0),
         "direct_annual_savings": round(direct_annual_savings, 0),
         "total_monthly_savings": round(total_monthly_savings, 0),
         "total_annual_savings": round(total_annual_savings, 0),
-        "overhead_multiplier": overhead_multiplier
+        "overhead_multiplier": overhead_multiplier,
+        "industry_risk_multiplier": risk_multiplier,
+        "risk_adjusted_annual_savings": round(risk_adjusted_annual_savings, 0)
     }
 
+@instrumented_tool
 def calculate_roi_metrics(
     annual_savings: float,
     implementation_cost: float,
@@ -89,6 +112,7 @@ def calculate_roi_metrics(
         "break_even_point": f"{payback_months:.1f} months" if payback_months != float('inf') else "Never"
     }
 
+@instrumented_tool
 def calculate_error_reduction_value(
     monthly_volume: int,
     current_error_rate: float,
@@ -124,6 +148,7 @@ def calculate_error_reduction_value(
         "error_reduction_percentage": round(error_reduction_percentage, 1)
     }
 
+@instrumented_tool
 def generate_scenario_analysis(
     base_annual_savings: float,
     base_implementation_cost: float,
@@ -169,14 +194,17 @@ def generate_scenario_analysis(
     
     return scenarios
 
+@instrumented_tool
 def calculate_implementation_costs(
     complexity_level: str,
     monthly_volume: int,
     systems_involved: int,
-    custom_factors: Dict = None
+    custom_factors: Dict = None,
+    industry_type: str = None
 ) -> Dict:
     """
     Estimate implementation costs based on complexity and scope
+    Pass industry_type to apply the industry cost adjustment
     """
     
     # Base cost ranges by complexity
@@ -199,9 +227,12 @@ def calculate_implementation_costs(
     # Systems complexity multiplier
     systems_multiplier = 1.0 + (systems_involved - 1) * 0.1
     
+    # Industry-specific adjustment (compliance, safety, integration overhead)
+    industry_multiplier = get_industry_adjustment(industry_type, complexity_level)["cost"]
+    
     # Calculate estimated costs
-    min_cost = base_range["min"] * volume_multiplier * systems_multiplier
-    max_cost = base_range["max"] * volume_multiplier * systems_multiplier
+    min_cost = base_range["min"] * volume_multiplier * systems_multiplier * industry_multiplier
+    max_cost = base_range["max"] * volume_multiplier * systems_multiplier * industry_multiplier
     estimated_cost = (min_cost + max_cost) / 2
     
     # Add contingency (15-25%)
@@ -230,10 +261,12 @@ def calculate_implementation_costs(
         "factors_applied": {
             "volume_multiplier": volume_multiplier,
             "systems_multiplier": systems_multiplier,
+            "industry_multiplier": industry_multiplier,
             "contingency_rate": contingency_rate
         }
     }
 
+@instrumented_tool
 def generate_financial_summary(
     time_savings: Dict,
     cost_savings: Dict,
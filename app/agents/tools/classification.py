@@ -0,0 +1,188 @@
+import bisect
+import re
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+
+from .benchmark_data import load_automation_benchmarks
+
+# Complexity levels in ascending order; index matches the vectorized level codes
+COMPLEXITY_LEVELS = [
+    "basic_automation",
+    "process_automation",
+    "integration_automation",
+    "intelligent_automation"
+]
+PRIORITY_LEVELS = ["Low Priority", "Medium Priority", "High Priority"]
+
+# Factors that drive each classification (approval_steps is accepted by
+# determine_process_complexity but has never been scored)
+COMPLEXITY_FACTORS = ["decision_points", "systems_involved", "people_involved", "manual_percentage"]
+PRIORITY_FACTORS = ["monthly_volume", "current_time_minutes", "error_rate_percentage"]
+
+# Used when the data files are missing a factor or describe it inconsistently
+DEFAULT_COMPLEXITY_BREAKPOINTS = {
+    "decision_points": [1, 3, 10],
+    "systems_involved": [2, 4, 10],
+    "people_involved": [2, 5, 15],
+    "manual_percentage": [40, 70, 80]
+}
+DEFAULT_PRIORITY_BREAKPOINTS = {
+    "monthly_volume": [200, 500],
+    "current_time_minutes": [30, 120],
+    "error_rate_percentage": [5, 15]
+}
+DEFAULT_PRIORITY_MINIMUM_SCORES = [6, 8]
+
+# process_complexity_levels names some factors differently
+LEVEL_FIELD_ALIASES = {"manual_percentage": "manual_percentage_range"}
+
+def _upper_bound(tier_range) -> Optional[float]:
+    """Inclusive upper bound of a tier like "4-10" or "40-70%"; None for open-ended "10+" """
+    text = str(tier_range or "")
+    numbers = re.findall(r"\d+(?:\.\d+)?", text)
+    if not numbers or "+" in text:
+        return None
+    return float(numbers[-1])
+
+def _tier_breakpoints(tiers: List[Dict], field: str) -> Optional[List[float]]:
+    """Upper bounds of every tier but the last, or None if they are missing or unsorted"""
+    bounds = [_upper_bound(tier.get(field)) for tier in tiers[:-1]]
+    if len(tiers) < 2 or None in bounds or bounds != sorted(bounds):
+        return None
+    return bounds
+
+class TierClassifier:
+    """
+    Maps process factors to a level through sorted breakpoint arrays.
+    Each factor scores 1 + the number of breakpoints strictly below its value;
+    factor scores are averaged ("mean") or summed ("sum") and the combined
+    score is placed among level_breakpoints. Scalar calls use bisect, batches
+    use numpy.searchsorted over column arrays.
+    """
+
+    def __init__(
+        self,
+        levels: List[str],
+        factor_breakpoints: Dict[str, List[float]],
+        level_breakpoints: List[float],
+        combine: str = "mean",
+        level_side: str = "left"
+    ):
+        self.levels = list(levels)
+        self.factor_breakpoints = {field: list(map(float, bps)) for field, bps in factor_breakpoints.items()}
+        self.level_breakpoints = list(map(float, level_breakpoints))
+        self.combine = combine
+        self.level_side = level_side
+        self._factor_arrays = {field: np.asarray(bps) for field, bps in self.factor_breakpoints.items()}
+        self._level_array = np.asarray(self.level_breakpoints)
+        self._bisect_level = bisect.bisect_left if level_side == "left" else bisect.bisect_right
+
+    def _combine(self, total, count: int):
+        return total / count if self.combine == "mean" else total
+
+    def score(self, **values: float) -> float:
+        total = sum(
+            1 + bisect.bisect_left(bps, values.get(field) or 0)
+            for field, bps in self.factor_breakpoints.items()
+        )
+        return self._combine(total, len(self.factor_breakpoints))
+
+    def classify(self, **values: float) -> str:
+        return self.levels[self._bisect_level(self.level_breakpoints, self.score(**values))]
+
+    def scores(self, columns: Mapping[str, np.ndarray]) -> np.ndarray:
+        total = sum(
+            1 + np.searchsorted(bps, np.asarray(columns[field], dtype=np.float64), side="left")
+            for field, bps in self._factor_arrays.items()
+        )
+        return self._combine(total, len(self._factor_arrays))
+
+    def level_codes(self, scores: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self._level_array, scores, side=self.level_side)
+
+    def codes(self, columns: Mapping[str, np.ndarray]) -> np.ndarray:
+        """Level index per row; columns maps each factor to an array"""
+        return self.level_codes(self.scores(columns))
+
+    def classify_many(self, columns: Mapping[str, np.ndarray]) -> List[str]:
+        return [self.levels[code] for code in self.codes(columns)]
+
+def _level_order(names: List[str], levels_data: Dict) -> List[str]:
+    """Sort by the "Level N" numbering in process_complexity_levels, else keep data order"""
+    def key(name: str) -> float:
+        match = re.search(r"Level\s+(\d+)", str(levels_data.get(name, {}).get("level", "")))
+        return float(match.group(1)) if match else float(names.index(name))
+    return sorted(names, key=key)
+
+def build_complexity_classifier(indicators: Dict, levels_data: Optional[Dict] = None) -> TierClassifier:
+    """
+    Breakpoints from process_complexity_indicators, falling back to the
+    tiers in process_complexity_levels, then to the built-in defaults.
+    """
+    levels_data = levels_data or {}
+    names = _level_order(list(indicators) or list(levels_data), levels_data)
+
+    factor_breakpoints = {}
+    for field in COMPLEXITY_FACTORS:
+        breakpoints = _tier_breakpoints([indicators.get(name, {}) for name in names], field)
+        if breakpoints is None:
+            alias = LEVEL_FIELD_ALIASES.get(field, field)
+            breakpoints = _tier_breakpoints([levels_data.get(name, {}) for name in names], alias)
+        factor_breakpoints[field] = breakpoints
+
+    # Level codes index COMPLEXITY_LEVELS everywhere, so the data must describe those levels in order
+    if names != COMPLEXITY_LEVELS or any(bps is None or len(bps) != len(names) - 1 for bps in factor_breakpoints.values()):
+        names = COMPLEXITY_LEVELS
+        factor_breakpoints = {
+            field: bps if bps is not None and len(bps) == len(names) - 1 else DEFAULT_COMPLEXITY_BREAKPOINTS[field]
+            for field, bps in factor_breakpoints.items()
+        }
+    # Average factor score k.5 separates level k from level k+1
+    level_breakpoints = [tier + 0.5 for tier in range(1, len(names))]
+    return TierClassifier(names, factor_breakpoints, level_breakpoints, combine="mean", level_side="left")
+
+def build_priority_classifier(indicators: Dict) -> TierClassifier:
+    """Breakpoints and minimum total scores from implementation_priority_indicators"""
+    names = list(indicators)
+    tiers = [indicators.get(name, {}) for name in names]
+
+    factor_breakpoints = {}
+    for field in PRIORITY_FACTORS:
+        breakpoints = _tier_breakpoints(tiers, field)
+        factor_breakpoints[field] = breakpoints if breakpoints is not None else DEFAULT_PRIORITY_BREAKPOINTS[field]
+
+    minimum_scores = [tier.get("minimum_score") for tier in tiers[1:]]
+    if names != PRIORITY_LEVELS or None in minimum_scores or minimum_scores != sorted(minimum_scores):
+        names, minimum_scores = PRIORITY_LEVELS, DEFAULT_PRIORITY_MINIMUM_SCORES
+    return TierClassifier(names, factor_breakpoints, minimum_scores, combine="sum", level_side="right")
+
+_complexity_classifier: Optional[TierClassifier] = None
+_priority_classifier: Optional[TierClassifier] = None
+
+def get_complexity_classifier() -> TierClassifier:
+    """Compiled complexity classifier, built from the data files on first use"""
+    global _complexity_classifier
+    if _complexity_classifier is None:
+        # Imported here: automation_tools uses this module for determine_process_complexity
+        from .automation_tools import load_process_templates
+        _complexity_classifier = build_complexity_classifier(
+            load_automation_benchmarks().get("process_complexity_indicators", {}),
+            load_process_templates().get("process_complexity_levels", {})
+        )
+    return _complexity_classifier
+
+def get_priority_classifier() -> TierClassifier:
+    """Compiled implementation priority classifier, built from the data files on first use"""
+    global _priority_classifier
+    if _priority_classifier is None:
+        _priority_classifier = build_priority_classifier(
+            load_automation_benchmarks().get("implementation_priority_indicators", {})
+        )
+    return _priority_classifier
+
+def reload_classifiers() -> None:
+    """Recompile from the data files on next use (after tuning thresholds)"""
+    global _complexity_classifier, _priority_classifier
+    _complexity_classifier = None
+    _priority_classifier = None
@@ -0,0 +1,100 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .benchmark_data import load_automation_benchmarks
+
+# Source: our own calibration, not automation_benchmarks.json. The benchmark
+# complexity_multiplier is quoted per industry with no complexity level, so it
+# is taken at full strength for integration_automation (where compliance and
+# audit integration work sits) and stepped by 0.25 per level either side,
+# so intelligent_automation carries more overhead and basic_automation half.
+COMPLEXITY_SENSITIVITY = {
+    "basic_automation": 0.5,
+    "process_automation": 0.75,
+    "integration_automation": 1.0,
+    "intelligent_automation": 1.25
+}
+# Source: our own calibration. Assumes half of the industry overhead is
+# manual work that stays after automation (compliance checks, audit steps),
+# so efficiency loses half of what cost gains
+EFFICIENCY_DRAG = 0.5
+
+ADJUSTMENT_FIELDS = ("efficiency", "cost", "risk")
+NEUTRAL_ADJUSTMENT = (1.0, 1.0, 1.0)
+DEFAULT_LABOR_COST = {"min": 60, "max": 80, "average": 70}
+
+def _industry_key(industry: Optional[str]) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", (industry or "").lower()).strip("_")
+
+def _percentage(value) -> float:
+    match = re.match(r"\s*(\d+(?:\.\d+)?)", str(value or ""))
+    return float(match.group(1)) / 100 if match else 0.0
+
+class AdjustmentTable:
+    """
+    (industry, complexity_level) -> efficiency, cost and risk multipliers,
+    compiled once from industry_specific_adjustments, plus hourly labor
+    rates from industry_labor_costs.
+    Unknown industries or levels get neutral multipliers and the default rate.
+    The timeline extension feeds the risk multiplier.
+    """
+
+    def __init__(self, industry_adjustments: Dict, labor_costs: Optional[Dict] = None):
+        self._lookup: Dict[Tuple[str, str], Tuple[float, float, float]] = {}
+        self.industries: Dict[str, int] = {}
+        self.considerations: Dict[str, List[str]] = {}
+        self.labor_costs: Dict[str, Dict] = {_industry_key(industry): rates for industry, rates in (labor_costs or {}).items()}
+        self._matrices: Dict[Tuple[str, ...], np.ndarray] = {}
+
+        for industry, data in industry_adjustments.items():
+            key = _industry_key(industry)
+            self.industries[key] = len(self.industries)
+            self.considerations[key] = data.get("additional_considerations", [])
+            overhead = float(data.get("complexity_multiplier", 1.0)) - 1
+            extension = _percentage(data.get("timeline_extension"))
+            for level, sensitivity in COMPLEXITY_SENSITIVITY.items():
+                scaled = overhead * sensitivity
+                self._lookup[(key, level)] = (
+                    round(1 - scaled * EFFICIENCY_DRAG, 4),
+                    round(1 + scaled, 4),
+                    round(1 + scaled + extension * sensitivity, 4)
+                )
+
+    def get(self, industry_type: Optional[str], complexity_level: Optional[str]) -> Dict[str, float]:
+        values = self._lookup.get((_industry_key(industry_type), complexity_level), NEUTRAL_ADJUSTMENT)
+        return dict(zip(ADJUSTMENT_FIELDS, values))
+
+    def labor_cost(self, industry_type: Optional[str]) -> Dict:
+        """Hourly min/max/average rate; a copy, so callers cannot alter the table"""
+        return dict(self.labor_costs.get(_industry_key(industry_type), DEFAULT_LABOR_COST))
+
+    def industry_code(self, industry_type: Optional[str]) -> int:
+        """Row index into matrix(); unknown industries map to the neutral last row"""
+        return self.industries.get(_industry_key(industry_type), len(self.industries))
+
+    def matrix(self, levels: List[str]) -> np.ndarray:
+        """Array of shape (industries + 1, len(levels), 3) for vectorized lookups"""
+        cache_key = tuple(levels)
+        if cache_key not in self._matrices:
+            table = np.ones((len(self.industries) + 1, len(levels), len(ADJUSTMENT_FIELDS)))
+            for industry, row in self.industries.items():
+                for col, level in enumerate(levels):
+                    table[row, col] = self._lookup.get((industry, level), NEUTRAL_ADJUSTMENT)
+            self._matrices[cache_key] = table
+        return self._matrices[cache_key]
+
+_table: Optional[AdjustmentTable] = None
+
+def get_adjustment_table() -> AdjustmentTable:
+    """Compiled adjustment table, built on first use"""
+    global _table
+    if _table is None:
+        benchmarks = load_automation_benchmarks()
+        _table = AdjustmentTable(benchmarks.get("industry_specific_adjustments", {}), benchmarks.get("industry_labor_costs", {}))
+    return _table
+
+def get_industry_adjustment(industry_type: Optional[str], complexity_level: Optional[str]) -> Dict[str, float]:
+    """Efficiency, cost and risk multipliers for an industry and complexity level"""
+    return get_adjustment_table().get(industry_type, complexity_level)
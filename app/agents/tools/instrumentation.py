@@ -0,0 +1,54 @@
+# app/agents/tools/instrumentation.py - Lightweight tool call hooks
+import functools
+import time
+from contextlib import ExitStack
+from typing import Callable, ContextManager, List, Optional
+
+# Observers receive (tool_name, elapsed_seconds, error) after every tool call.
+# Scopes are context manager factories entered around the call (e.g. a span).
+# Kept dependency-free so the tools package never imports the web layer.
+ToolObserver = Callable[[str, float, Optional[BaseException]], None]
+ToolScope = Callable[[str], ContextManager]
+
+_tool_observers: List[ToolObserver] = []
+_tool_scopes: List[ToolScope] = []
+
+def register_tool_observer(observer: ToolObserver) -> None:
+    """Register a callback invoked after each instrumented tool call"""
+    if observer not in _tool_observers:
+        _tool_observers.append(observer)
+
+def register_tool_scope(scope: ToolScope) -> None:
+    """Register a context manager factory wrapped around each tool call"""
+    if scope not in _tool_scopes:
+        _tool_scopes.append(scope)
+
+def instrumented_tool(func: Callable) -> Callable:
+    """
+    Wrap a tool function so registered observers see its latency.
+    With no observers or scopes registered the wrapper is two list checks.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _tool_observers and not _tool_scopes:
+            return func(*args, **kwargs)
+
+        with ExitStack() as stack:
+            for scope in _tool_scopes:
+                stack.enter_context(scope(name))
+
+            start = time.perf_counter()
+            error = None
+            try:
+                return func(*args, **kwargs)
+            except BaseException as exc:
+                error = exc
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                for observer in _tool_observers:
+                    observer(name, elapsed, error)
+
+    return wrapper
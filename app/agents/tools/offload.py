@@ -0,0 +1,79 @@
+# app/agents/tools/offload.py - Run blocking tool calls off the event loop
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+# Tools that read JSON files from disk on every call (directly or through
+# load_automation_benchmarks / load_process_templates)
+BLOCKING_TOOLS = {
+    "load_automation_benchmarks",
+    "load_process_templates",
+    "get_industry_standards",
+    "get_complexity_benchmarks",
+    "get_automation_efficiency_rate",
+    "compare_to_industry_benchmark",
+    "get_implementation_cost_estimates",
+    "get_risk_factors_by_complexity",
+    "generate_benchmark_comparison_summary",
+    "get_process_template_by_type",
+}
+
+OFFLOAD_BLOCKING_TOOLS = os.getenv("OFFLOAD_BLOCKING_TOOLS", "false").lower() == "true"
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "4"))
+# Calls allowed to wait for a pool thread before callers queue on the semaphore
+BLOCKING_POOL_BACKLOG = int(os.getenv("BLOCKING_POOL_BACKLOG", str(BLOCKING_POOL_SIZE * 4)))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+_in_flight = 0
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """Bounded pool shared by every offloaded call"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking-tool")
+    return _executor
+
+def blocking_calls_in_flight() -> int:
+    return _in_flight
+
+async def run_blocking(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """
+    Await a synchronous function on the bounded pool.
+    At most BLOCKING_POOL_BACKLOG calls are submitted at once; further callers
+    wait on the loop without growing the executor's queue.
+    """
+    global _slots, _in_flight
+    if _slots is None:
+        _slots = asyncio.Semaphore(BLOCKING_POOL_BACKLOG)
+
+    async with _slots:
+        _in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(get_blocking_executor(), functools.partial(func, *args, **kwargs))
+        finally:
+            _in_flight -= 1
+
+def offloaded(func: Callable) -> Callable:
+    """Async version of a blocking tool; ADK awaits coroutine tools directly"""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_blocking(func, *args, **kwargs)
+
+    return wrapper
+
+def agent_tool(func: Callable) -> Callable:
+    """Return the function to hand to an LlmAgent, offloading known blocking tools when enabled"""
+    if OFFLOAD_BLOCKING_TOOLS and func.__name__ in BLOCKING_TOOLS:
+        return offloaded(func)
+    return func
+
+def shutdown_blocking_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
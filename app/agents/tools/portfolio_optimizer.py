@@ -0,0 +1,234 @@
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .portfolio_tools import score_portfolio
+
+# Budget is discretized into at least this many units for the exact DP, and
+# finer when the items x units table stays under DP_MAX_CELLS
+MIN_BUDGET_UNITS = 1000
+MAX_BUDGET_UNITS = 20000
+# Largest items x budget-units table solved exactly when method="auto"
+DP_MAX_CELLS = 10_000_000
+CURVE_POINTS = 20
+
+def _lp_relaxation(costs: np.ndarray, values: np.ndarray, budget: float) -> Dict:
+    """
+    Greedy by value density plus the fractional LP bound.
+    Fills with the densest items that fit, then keeps scanning for smaller
+    items that still fit. The best single item is kept if it beats the fill.
+    """
+    order = np.argsort(-(values / costs), kind="stable")
+    cumulative = np.cumsum(costs[order])
+
+    # LP relaxation: whole prefix plus a fraction of the first item that does not fit
+    prefix = int(np.searchsorted(cumulative, budget, side="right"))
+    upper_bound = float(values[order[:prefix]].sum())
+    if prefix < len(order):
+        spent = float(cumulative[prefix - 1]) if prefix else 0.0
+        nxt = order[prefix]
+        upper_bound += float(values[nxt]) * (budget - spent) / float(costs[nxt])
+
+    selected = []
+    remaining = budget
+    for i in order:
+        if costs[i] <= remaining:
+            selected.append(int(i))
+            remaining -= costs[i]
+
+    fill_value = float(values[selected].sum()) if selected else 0.0
+    affordable = np.flatnonzero(costs <= budget)
+    if len(affordable):
+        best_single = int(affordable[np.argmax(values[affordable])])
+        if values[best_single] > fill_value:
+            selected = [best_single]
+
+    return {"selected": selected, "upper_bound": upper_bound}
+
+def _knapsack_dp(costs: np.ndarray, values: np.ndarray, budget: float, units: int) -> Dict:
+    """
+    Exact 0/1 knapsack over a discretized budget.
+    Costs are rounded up to the unit size, so every returned set is feasible
+    at the true costs. Row updates are vectorized across all capacities.
+    The optimality gap is still reported against the LP bound at true costs.
+    """
+    unit = budget / units
+    weights = np.ceil(costs / unit - 1e-9).astype(np.int64)
+    n = len(costs)
+
+    best = np.zeros(units + 1)
+    keep = np.zeros((n, units + 1), dtype=bool)
+    for i in range(n):
+        w = weights[i]
+        if w > units:
+            continue
+        if w == 0:
+            keep[i, :] = True
+            best += values[i]
+            continue
+        candidate = best[:-w] + values[i]
+        better = candidate > best[w:]
+        keep[i, w:] = better
+        best[w:] = np.where(better, candidate, best[w:])
+
+    selected = []
+    capacity = units
+    for i in range(n - 1, -1, -1):
+        if keep[i, capacity]:
+            selected.append(i)
+            capacity -= weights[i]
+    selected.reverse()
+
+    # Optimal value at each budget level falls out of the final DP row
+    levels = np.linspace(0, units, CURVE_POINTS + 1).astype(np.int64)[1:]
+    curve = [
+        {"budget": round(float(level * unit), 0), "optimal_value": round(float(best[level]), 0)}
+        for level in levels
+    ]
+    return {"selected": selected, "budget_value_curve": curve}
+
+def _greedy_budget_curve(costs: np.ndarray, values: np.ndarray, budget: float) -> List[Dict]:
+    """LP-relaxation value at evenly spaced budget levels (piecewise linear in budget)"""
+    order = np.argsort(-(values / costs), kind="stable")
+    cumulative_cost = np.concatenate([[0.0], np.cumsum(costs[order])])
+    cumulative_value = np.concatenate([[0.0], np.cumsum(values[order])])
+    levels = np.linspace(0, budget, CURVE_POINTS + 1)[1:]
+    curve_values = np.interp(levels, cumulative_cost, cumulative_value)
+    return [
+        {"budget": round(float(b), 0), "optimal_value": round(float(v), 0)}
+        for b, v in zip(levels, curve_values)
+    ]
+
+def optimize_budget(
+    costs: np.ndarray,
+    values: np.ndarray,
+    budget: float,
+    payback_months: Optional[np.ndarray] = None,
+    max_payback_months: Optional[float] = None,
+    method: str = "auto",
+    budget_units: Optional[int] = None
+) -> Dict:
+    """
+    Choose the subset of candidates maximizing total value within the budget.
+    Candidates with non-positive value, or a payback beyond max_payback_months,
+    are never selected. method: "dp" (exact), "greedy" (density + LP bound)
+    or "auto" (DP while items x budget_units stays under DP_MAX_CELLS).
+    """
+    if method not in ("auto", "dp", "greedy"):
+        raise ValueError("method must be 'auto', 'dp' or 'greedy'")
+    if budget <= 0:
+        raise ValueError("budget must be positive")
+
+    started = time.perf_counter()
+    costs = np.asarray(costs, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+
+    eligible = (values > 0) & (costs >= 0) & (costs <= budget)
+    excluded_by_timeline = 0
+    if payback_months is not None and max_payback_months is not None:
+        within_timeline = np.asarray(payback_months, dtype=np.float64) <= max_payback_months
+        excluded_by_timeline = int((eligible & ~within_timeline).sum())
+        eligible &= within_timeline
+    pool = np.flatnonzero(eligible)
+    pool_costs = np.maximum(costs[pool], 1e-9)
+    pool_values = values[pool]
+
+    if budget_units is None:
+        budget_units = min(MAX_BUDGET_UNITS, max(MIN_BUDGET_UNITS, DP_MAX_CELLS // max(len(pool), 1)))
+    if method == "auto":
+        method = "dp" if len(pool) * budget_units <= DP_MAX_CELLS else "greedy"
+
+    if len(pool) == 0:
+        solution = {"selected": [], "upper_bound": 0.0, "budget_value_curve": []}
+    else:
+        solution = _lp_relaxation(pool_costs, pool_values, budget)
+        if method == "dp":
+            exact = _knapsack_dp(pool_costs, pool_values, budget, budget_units)
+            # Rounding costs up to whole units can leave budget unused; keep
+            # the greedy fill if it happens to do better at the true costs
+            if pool_values[exact["selected"]].sum() >= pool_values[solution["selected"]].sum():
+                solution["selected"] = exact["selected"]
+            solution["budget_value_curve"] = exact["budget_value_curve"]
+        else:
+            solution["budget_value_curve"] = _greedy_budget_curve(pool_costs, pool_values, budget)
+
+    chosen = pool[solution["selected"]] if solution["selected"] else np.array([], dtype=np.int64)
+    total_cost = float(costs[chosen].sum())
+    total_value = float(values[chosen].sum())
+
+    # Marginal-value curve: chosen items by value density, with running totals
+    marginal_curve = []
+    spent = 0.0
+    accumulated = 0.0
+    for i in chosen[np.argsort(-(values[chosen] / np.maximum(costs[chosen], 1e-9)), kind="stable")]:
+        spent += costs[i]
+        accumulated += values[i]
+        marginal_curve.append({
+            "index": int(i),
+            "marginal_cost": round(float(costs[i]), 0),
+            "marginal_value": round(float(values[i]), 0),
+            "value_per_dollar": round(float(values[i] / max(costs[i], 1e-9)), 3),
+            "cumulative_cost": round(spent, 0),
+            "cumulative_value": round(accumulated, 0)
+        })
+
+    # The LP relaxation bounds any feasible selection
+    upper_bound = max(solution["upper_bound"], total_value)
+    return {
+        "method": method,
+        "budget": budget,
+        "selected_indices": [int(i) for i in chosen],
+        "total_cost": round(total_cost, 0),
+        "total_value": round(total_value, 0),
+        "remaining_budget": round(budget - total_cost, 0),
+        "value_upper_bound": round(upper_bound, 0),
+        "optimality_gap_pct": round((upper_bound - total_value) / upper_bound * 100, 2) if upper_bound > 0 else 0.0,
+        "eligible_candidates": int(len(pool)),
+        "excluded_by_timeline": excluded_by_timeline,
+        "marginal_value_curve": marginal_curve,
+        "budget_value_curve": solution["budget_value_curve"],
+        "solve_time_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+
+def optimize_portfolio(
+    candidates: List[Dict],
+    budget: float,
+    max_payback_months: Optional[float] = None,
+    method: str = "auto",
+    budget_units: Optional[int] = None
+) -> Dict:
+    """
+    Select which candidate processes to fund under a budget (and optional
+    payback timeline). Value is npv_3_years and cost the implementation cost
+    with contingency, as produced by calculate_roi_metrics and
+    calculate_implementation_costs; candidates may also supply
+    implementation_cost, npv_3_years and payback_months directly.
+    """
+    scores = score_portfolio(candidates)
+    costs = scores["implementation_cost"].copy()
+    values = scores["npv_3_years"].copy()
+    payback = scores["payback_months"].copy()
+
+    # Precomputed figures from calculate_roi_metrics take precedence
+    for i, c in enumerate(candidates):
+        if c.get("implementation_cost") is not None:
+            costs[i] = c["implementation_cost"]
+        if c.get("npv_3_years") is not None:
+            values[i] = c["npv_3_years"]
+        if isinstance(c.get("payback_months"), (int, float)):
+            payback[i] = c["payback_months"]
+
+    result = optimize_budget(costs, values, budget, payback, max_payback_months, method, budget_units)
+    result["selected"] = [
+        {
+            "index": i,
+            "process_id": candidates[i].get("process_id") or candidates[i].get("name") or str(i),
+            "implementation_cost": round(float(costs[i]), 0),
+            "npv_3_years": round(float(values[i]), 0),
+            "payback_months": round(float(payback[i]), 1) if np.isfinite(payback[i]) else "N/A"
+        }
+        for i in result["selected_indices"]
+    ]
+    result["candidates_considered"] = len(candidates)
+    return result
@@ -0,0 +1,219 @@
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .benchmark_data import get_labor_cost_benchmark, load_automation_benchmarks
+from .classification import (
+    COMPLEXITY_LEVELS,
+    PRIORITY_LEVELS,
+    get_complexity_classifier,
+    get_priority_classifier,
+)
+from .industry_adjustments import get_adjustment_table
+
+READINESS_LEVELS = ["Low", "Medium", "High"]
+
+READINESS_GROUPS = {
+    "technical": ["data_quality", "system_integration", "infrastructure_stability", "security_framework"],
+    "process": ["process_standardization", "volume_frequency", "rule_based_nature", "exception_handling"],
+    "organizational": ["executive_sponsorship", "change_management", "skills_resources", "budget_timeline"]
+}
+READINESS_WEIGHTS = {"technical": 0.30, "process": 0.35, "organizational": 0.35}
+READINESS_LEVEL_BREAKPOINTS = [6.0, 8.0]
+DEFAULT_READINESS_FACTOR = 5
+
+# Same cost model as calculate_implementation_costs
+BASE_COST_MIDPOINTS = np.array([
+    (15000 + 50000) / 2,
+    (25000 + 100000) / 2,
+    (75000 + 250000) / 2,
+    (150000 + 500000) / 2
+])
+CONTINGENCY_RATE = 0.20
+OVERHEAD_MULTIPLIER = 1.3
+DISCOUNT_RATE = 0.10
+NPV_FACTOR_3_YEARS = sum(1 / ((1 + DISCOUNT_RATE) ** year) for year in range(1, 4))
+
+# Objective -> True when larger is better
+PORTFOLIO_OBJECTIVES = {
+    "npv_3_years": True,
+    "roi_percentage": True,
+    "annual_savings": True,
+    "net_annual_benefit": True,
+    "priority_score": True,
+    "readiness_score": True,
+    "payback_months": False,
+    "implementation_cost": False
+}
+
+def _column(candidates: List[Dict], field: str, default: float = 0) -> np.ndarray:
+    return np.fromiter(
+        (c.get(field) if c.get(field) is not None else default for c in candidates),
+        dtype=np.float64,
+        count=len(candidates)
+    )
+
+def score_portfolio(candidates: List[Dict], benchmarks: Optional[Dict] = None) -> Dict[str, np.ndarray]:
+    """
+    Score complexity, readiness, priority and ROI for every candidate at once.
+    Each candidate is a dict with the same inputs the per-process tools take
+    (decision_points, systems_involved, people_involved, manual_percentage,
+    monthly_volume, current_time_minutes, error_rate_percentage, optional
+    readiness factors, industry_type or hourly_labor_cost, annual_operating_cost).
+    Industry-specific adjustments are applied as in the calculate_* tools.
+    Returns a dict of column arrays aligned with the input order.
+    """
+    n = len(candidates)
+    if benchmarks is None:
+        benchmarks = load_automation_benchmarks()
+
+    # Complexity (determine_process_complexity)
+    complexity = get_complexity_classifier()
+    complexity_avg = complexity.scores({field: _column(candidates, field) for field in complexity.factor_breakpoints})
+    complexity_code = complexity.level_codes(complexity_avg)
+
+    # Readiness (assess_automation_readiness)
+    readiness_score = np.zeros(n)
+    for group, fields in READINESS_GROUPS.items():
+        group_avg = sum(_column(candidates, f, DEFAULT_READINESS_FACTOR) for f in fields) / len(fields)
+        readiness_score += group_avg * READINESS_WEIGHTS[group]
+    readiness_code = np.searchsorted(READINESS_LEVEL_BREAKPOINTS, readiness_score, side="right")
+
+    # Priority (get_implementation_priority)
+    priority = get_priority_classifier()
+    volume = _column(candidates, "monthly_volume")
+    minutes = _column(candidates, "current_time_minutes")
+    priority_columns = {
+        "monthly_volume": volume,
+        "current_time_minutes": minutes,
+        "error_rate_percentage": _column(candidates, "error_rate_percentage")
+    }
+    priority_score = priority.scores(priority_columns)
+    priority_code = priority.level_codes(priority_score)
+
+    # Savings (calculate_time_savings + calculate_cost_savings)
+    efficiency_rates = benchmarks.get("roi_calculation_models", {}).get("automation_efficiency_rates", {})
+    efficiency_by_code = np.array([efficiency_rates.get(level, 0.7) for level in COMPLEXITY_LEVELS])
+
+    # One benchmark and adjustment lookup per distinct industry, not per candidate
+    adjustments = get_adjustment_table()
+    industry_rates = {}
+    industry_codes = {}
+    for c in candidates:
+        industry = c.get("industry_type") or ""
+        if industry not in industry_rates:
+            industry_rates[industry] = get_labor_cost_benchmark(industry)["average"]
+            industry_codes[industry] = adjustments.industry_code(industry)
+    industry_code = np.fromiter((industry_codes[c.get("industry_type") or ""] for c in candidates), dtype=np.int64, count=n)
+    # Columns: efficiency, cost, risk multipliers
+    industry_adjustment = adjustments.matrix(COMPLEXITY_LEVELS)[industry_code, complexity_code]
+
+    efficiency = efficiency_by_code[complexity_code] * industry_adjustment[:, 0]
+    labor_cost = np.fromiter(
+        (c.get("hourly_labor_cost") or industry_rates[c.get("industry_type") or ""] for c in candidates),
+        dtype=np.float64,
+        count=n
+    )
+    hours_saved_monthly = volume * minutes / 60 * efficiency
+    annual_savings = hours_saved_monthly * labor_cost * OVERHEAD_MULTIPLIER * 12
+
+    # Implementation cost (calculate_implementation_costs, with contingency)
+    systems = _column(candidates, "systems_involved", 1)
+    volume_multiplier = np.where(volume > 1000, 1.2, np.where(volume > 500, 1.1, 1.0))
+    systems_multiplier = 1.0 + (systems - 1) * 0.1
+    implementation_cost = (
+        BASE_COST_MIDPOINTS[complexity_code] * volume_multiplier * systems_multiplier
+        * industry_adjustment[:, 1] * (1 + CONTINGENCY_RATE)
+    )
+
+    # ROI (calculate_roi_metrics)
+    net_annual_benefit = annual_savings - _column(candidates, "annual_operating_cost")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi_percentage = np.where(implementation_cost > 0, net_annual_benefit / implementation_cost * 100, 0.0)
+        payback_months = np.where(net_annual_benefit > 0, implementation_cost / (net_annual_benefit / 12), np.inf)
+    npv_3_years = net_annual_benefit * NPV_FACTOR_3_YEARS - implementation_cost
+
+    return {
+        "complexity_code": complexity_code,
+        "complexity_score": complexity_avg,
+        "readiness_score": readiness_score,
+        "readiness_code": readiness_code,
+        "priority_score": priority_score,
+        "priority_code": priority_code,
+        "automation_efficiency": efficiency,
+        "hours_saved_monthly": hours_saved_monthly,
+        "annual_savings": annual_savings,
+        "risk_adjusted_annual_savings": annual_savings / industry_adjustment[:, 2],
+        "implementation_cost": implementation_cost,
+        "net_annual_benefit": net_annual_benefit,
+        "roi_percentage": roi_percentage,
+        "payback_months": payback_months,
+        "npv_3_years": npv_3_years
+    }
+
+def top_k_indices(values: np.ndarray, k: int, descending: bool = True) -> np.ndarray:
+    """
+    Indices of the k best values, best first.
+    Uses argpartition (O(n)) and only sorts the k selected entries.
+    """
+    n = len(values)
+    k = max(0, min(k, n))
+    if k == 0:
+        return np.array([], dtype=np.int64)
+
+    keys = -values if descending else values
+    # NaN never wins
+    keys = np.where(np.isnan(keys), np.inf, keys)
+    if k < n:
+        selected = np.argpartition(keys, k - 1)[:k]
+    else:
+        selected = np.arange(n)
+    return selected[np.argsort(keys[selected], kind="stable")]
+
+def _finite(value: float):
+    return round(float(value), 1) if math.isfinite(value) else "N/A"
+
+def rank_portfolio(candidates: List[Dict], objective: str = "npv_3_years", top_k: int = 10) -> Dict:
+    """
+    Score a whole process inventory and return the top-k by the chosen objective
+    """
+    if objective not in PORTFOLIO_OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}'. Choose from: {', '.join(PORTFOLIO_OBJECTIVES)}")
+
+    scores = score_portfolio(candidates)
+    ranked = top_k_indices(scores[objective], top_k, descending=PORTFOLIO_OBJECTIVES[objective])
+
+    results = []
+    for rank, i in enumerate(ranked, start=1):
+        candidate = candidates[i]
+        results.append({
+            "rank": rank,
+            "index": int(i),
+            "process_id": candidate.get("process_id") or candidate.get("name") or str(i),
+            "complexity_level": COMPLEXITY_LEVELS[scores["complexity_code"][i]],
+            "readiness_score": round(float(scores["readiness_score"][i]), 1),
+            "readiness_level": READINESS_LEVELS[scores["readiness_code"][i]],
+            "implementation_priority": PRIORITY_LEVELS[scores["priority_code"][i]],
+            "annual_savings": round(float(scores["annual_savings"][i]), 0),
+            "implementation_cost": round(float(scores["implementation_cost"][i]), 0),
+            "roi_percentage": round(float(scores["roi_percentage"][i]), 1),
+            "payback_months": _finite(scores["payback_months"][i]),
+            "npv_3_years": round(float(scores["npv_3_years"][i]), 0)
+        })
+
+    complexity_counts = np.bincount(scores["complexity_code"], minlength=len(COMPLEXITY_LEVELS))
+    priority_counts = np.bincount(scores["priority_code"], minlength=len(PRIORITY_LEVELS))
+
+    return {
+        "objective": objective,
+        "candidates_scored": len(candidates),
+        "top_k": results,
+        "portfolio_summary": {
+            "total_annual_savings": round(float(scores["annual_savings"].sum()), 0),
+            "total_implementation_cost": round(float(scores["implementation_cost"].sum()), 0),
+            "positive_npv_count": int((scores["npv_3_years"] > 0).sum()),
+            "complexity_distribution": {level: int(c) for level, c in zip(COMPLEXITY_LEVELS, complexity_counts)},
+            "priority_distribution": {level: int(c) for level, c in zip(PRIORITY_LEVELS, priority_counts)}
+        }
+    }
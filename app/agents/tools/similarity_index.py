@@ -0,0 +1,212 @@
+import math
+import re
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .benchmark_data import load_automation_benchmarks
+from .portfolio_tools import COMPLEXITY_LEVELS, top_k_indices
+
+# Feature weights; a feature only counts when both query and example have it
+FEATURE_WEIGHTS = {
+    "industry": 0.35,
+    "complexity": 0.35,
+    "roi": 0.10,
+    "timeframe": 0.10,
+    "volume": 0.10
+}
+# Log-scale distance at which a numeric feature's similarity falls to 1/e
+LOG_SCALE = 1.0
+
+# Tool-level industry_type values that name an industry in the benchmark data
+INDUSTRY_ALIASES = {
+    "finance_operations": "financial_services",
+    "finance": "financial_services",
+    "banking": "financial_services",
+    "government": "public_sector"
+}
+
+def normalize_industry(industry: Optional[str]) -> str:
+    key = re.sub(r"[^a-z0-9]+", "_", (industry or "").lower()).strip("_")
+    return INDUSTRY_ALIASES.get(key, key)
+
+def parse_percentage(value) -> Optional[float]:
+    """361 or "361%" -> 361.0; ranges and free text without a leading number -> None"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.match(r"\s*(-?\d+(?:\.\d+)?)\s*%?\s*$", str(value or ""))
+    return float(match.group(1)) if match else None
+
+def parse_months(value) -> Optional[float]:
+    """"5 months" / "3 years" / "6 weeks" / 5 -> months"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.match(r"\s*(\d+(?:\.\d+)?)\s*(year|month|week)", str(value or "").lower())
+    if not match:
+        return None
+    amount, unit = float(match.group(1)), match.group(2)
+    return amount * 12 if unit == "year" else amount / 4.33 if unit == "week" else amount
+
+def _log(value: Optional[float]) -> float:
+    return math.log1p(max(value, 0.0)) if value is not None else math.nan
+
+def benchmark_examples(benchmarks: Dict) -> List[Dict]:
+    """Flatten real_world_benchmarks into case records"""
+    examples = benchmarks.get("real_world_benchmarks", {})
+    records = []
+    for name, data in examples.get("automation_customer_results", {}).items():
+        records.append({
+            "company": name.replace("_", " ").title(),
+            "industry": data.get("industry", "Various"),
+            "complexity_level": data.get("automation_type"),
+            "result": data.get("roi_percentage") or data.get("improvement"),
+            "roi_percentage": data.get("roi_percentage"),
+            "timeframe": data.get("timeframe", "Not specified"),
+            "type": "Customer Success"
+        })
+    for name, data in examples.get("enterprise_automation_benchmarks", {}).items():
+        records.append({
+            "company": "Enterprise Study",
+            "industry": "Multi-Industry",
+            "complexity_level": data.get("automation_type"),
+            "result": f"{data.get('roi_percentage')} ROI",
+            "roi_percentage": data.get("roi_percentage"),
+            "timeframe": data.get("timeframe"),
+            "additional_benefits": data.get("productivity_improvement"),
+            "type": "Industry Study"
+        })
+    return records
+
+def _case_record(case: Dict) -> Dict:
+    """Fill the display fields get_real_world_examples callers rely on"""
+    roi = parse_percentage(case.get("roi_percentage"))
+    months = case.get("timeframe_months")
+    return {
+        **case,
+        "company": case.get("company") or case.get("name") or "Past Project",
+        "industry": case.get("industry") or case.get("industry_type") or "Various",
+        "result": case.get("result") or (f"{roi:.0f}% ROI" if roi is not None else "Not specified"),
+        "timeframe": case.get("timeframe") or (f"{months} months" if months is not None else "Not specified"),
+        "type": case.get("type", "Case Library")
+    }
+
+class ExampleIndex:
+    """
+    Feature matrix over case records for k-nearest-neighbour queries.
+    Similarity is the weighted mean of per-feature similarities over the
+    features the query provides; a feature the example lacks scores 0.
+    """
+
+    def __init__(self, records: List[Dict]):
+        self.records = records
+        n = len(records)
+        self.industries: Dict[str, int] = {}
+        industry_codes = np.full(n, -1, dtype=np.int64)
+        complexity = np.full(n, np.nan)
+        log_roi = np.full(n, np.nan)
+        log_months = np.full(n, np.nan)
+        log_volume = np.full(n, np.nan)
+
+        for i, record in enumerate(records):
+            industry = normalize_industry(record.get("industry"))
+            if industry:
+                industry_codes[i] = self.industries.setdefault(industry, len(self.industries))
+            level = record.get("complexity_level") or record.get("automation_type")
+            if level in COMPLEXITY_LEVELS:
+                complexity[i] = COMPLEXITY_LEVELS.index(level)
+            log_roi[i] = _log(parse_percentage(record.get("roi_percentage")))
+            months = record.get("timeframe_months")
+            log_months[i] = _log(months if months is not None else parse_months(record.get("timeframe")))
+            volume = record.get("monthly_volume")
+            log_volume[i] = _log(float(volume)) if volume is not None else math.nan
+
+        self.industry_codes = industry_codes
+        # Missing values are stored as 0 with a presence mask so queries stay branch-free
+        self.complexity, self.has_complexity = np.nan_to_num(complexity), ~np.isnan(complexity)
+        self.log_roi, self.has_roi = np.nan_to_num(log_roi), ~np.isnan(log_roi)
+        self.log_months, self.has_months = np.nan_to_num(log_months), ~np.isnan(log_months)
+        self.log_volume, self.has_volume = np.nan_to_num(log_volume), ~np.isnan(log_volume)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def similarities(
+        self,
+        complexity_level: Optional[str] = None,
+        industry_type: Optional[str] = None,
+        monthly_volume: Optional[float] = None,
+        roi_percentage: Optional[float] = None,
+        timeframe_months: Optional[float] = None
+    ) -> np.ndarray:
+        score = np.zeros(len(self.records))
+        total_weight = 0.0
+
+        if industry_type:
+            weight = FEATURE_WEIGHTS["industry"]
+            code = self.industries.get(normalize_industry(industry_type), -2)
+            score += weight * (self.industry_codes == code)
+            total_weight += weight
+        if complexity_level in COMPLEXITY_LEVELS:
+            weight = FEATURE_WEIGHTS["complexity"]
+            level = COMPLEXITY_LEVELS.index(complexity_level)
+            closeness = 1 - np.abs(self.complexity - level) / (len(COMPLEXITY_LEVELS) - 1)
+            score += weight * closeness * self.has_complexity
+            total_weight += weight
+        for feature, value, column, present in (
+            ("roi", roi_percentage, self.log_roi, self.has_roi),
+            ("timeframe", timeframe_months, self.log_months, self.has_months),
+            ("volume", monthly_volume, self.log_volume, self.has_volume),
+        ):
+            if value is None:
+                continue
+            weight = FEATURE_WEIGHTS[feature]
+            score += weight * np.exp(-np.abs(column - _log(value)) / LOG_SCALE) * present
+            total_weight += weight
+
+        return score / total_weight if total_weight else score
+
+    def query(self, k: int = 5, min_similarity: float = 0.0, **features) -> List[Dict]:
+        """Top-k records by similarity, best first, each with a 'similarity' field"""
+        if not self.records:
+            return []
+        scores = self.similarities(**features)
+        results = []
+        for i in top_k_indices(scores, k):
+            if scores[i] < min_similarity:
+                break
+            results.append({**self.records[i], "similarity": round(float(scores[i]), 3)})
+        return results
+
+_benchmark_records: Optional[List[Dict]] = None
+_case_library: List[Dict] = []
+_index: Optional[ExampleIndex] = None
+# Uploads run on the blocking pool; the lock keeps concurrent appends from losing cases
+_library_lock = threading.Lock()
+
+def _benchmarks(benchmarks: Optional[Dict] = None) -> List[Dict]:
+    """Benchmark example records, parsed once; caller holds _library_lock"""
+    global _benchmark_records
+    if _benchmark_records is None:
+        _benchmark_records = benchmark_examples(benchmarks if benchmarks is not None else load_automation_benchmarks())
+    return _benchmark_records
+
+def get_example_index(benchmarks: Optional[Dict] = None) -> ExampleIndex:
+    """Index over the benchmark examples plus any uploaded case library, built once"""
+    global _index
+    if _index is None:
+        with _library_lock:
+            if _index is None:
+                _index = ExampleIndex(_benchmarks(benchmarks) + _case_library)
+    return _index
+
+def load_case_library(cases: List[Dict], replace: bool = True) -> int:
+    """Add past projects to the searchable examples; returns the library size"""
+    global _case_library, _index
+    records = [_case_record(case) for case in cases]
+    with _library_lock:
+        library = records if replace else _case_library + records
+        # Build the new index before swapping it in so concurrent queries never see a partial one
+        new_index = ExampleIndex(_benchmarks() + library)
+        _case_library, _index = library, new_index
+    return len(library)
@@ -0,0 +1,239 @@
+# app/bulk_import.py - Streaming bulk scoring of process inventories
+"""
+Score process inventories with tens of thousands of rows without holding
+them in memory.
+
+Rows are read lazily from CSV, JSONL or Parquet (Parquet needs pyarrow,
+declared in requirements.txt and as the "parquet" extra). Each row is validated
+against AutomationRequest plus the optional scoring fields below, and valid
+rows are scored a chunk at a time. Output is one JSON line per input row,
+in input order: either the scores or the row's validation errors. A final
+summary line follows.
+
+CLI (run from app/):
+    python bulk_import.py inventory.csv -o scored.jsonl
+    python bulk_import.py inventory.parquet --chunk-size 5000 > scored.jsonl
+"""
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import sys
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError, field_validator
+
+from agents.tools.benchmark_data import load_automation_benchmarks
+from agents.tools.portfolio_tools import COMPLEXITY_LEVELS, PRIORITY_LEVELS, READINESS_LEVELS, score_portfolio
+from schemas import AutomationRequest
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+DEFAULT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "2000"))
+SUPPORTED_FORMATS = ("csv", "jsonl", "parquet")
+# Spreadsheet cells for list fields hold "a; b; c"
+LIST_SEPARATOR = ";"
+
+class BulkProcessRow(AutomationRequest):
+    """One inventory row: the analysis request plus optional scoring inputs"""
+    process_id: str = ""
+    industry_type: str = "customer_service"
+    current_time_minutes: float = 30
+    error_rate_percentage: float = 0
+    decision_points: int = 1
+    systems_involved: int = 1
+    hourly_labor_cost: Optional[float] = None
+    annual_operating_cost: float = 0
+
+    @field_validator("decision_makers", "affected_departments", "cxToolsList", mode="before")
+    @classmethod
+    def split_list_cells(cls, value):
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+        return value
+
+    @field_validator("personasList", mode="before")
+    @classmethod
+    def parse_personas_cell(cls, value):
+        if isinstance(value, str):
+            return json.loads(value) if value.strip() else []
+        return value
+
+def detect_format(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    if extension in ("ndjson", "json"):
+        extension = "jsonl"
+    if extension not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported file type '{extension}'. Use one of: {', '.join(SUPPORTED_FORMATS)}")
+    return extension
+
+# ----------------------------------------------------------------------
+# Readers: each yields one dict per row and never loads the whole file
+# ----------------------------------------------------------------------
+
+def _read_csv(stream: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    for row in csv.DictReader(text):
+        # Empty cells mean "not provided" so model defaults apply
+        yield {key.strip(): value for key, value in row.items() if key and value not in ("", None)}
+
+def _read_jsonl(stream: IO[bytes]) -> Iterator[Any]:
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield ValueError(f"Invalid JSON: {e}")
+
+def format_unavailable(file_format: str) -> Optional[str]:
+    """Why a supported format cannot be read in this install, or None if it can"""
+    if file_format == "parquet" and pq is None:
+        return "Parquet import requires pyarrow (pip install -r requirements.txt)"
+    return None
+
+def _read_parquet(stream: IO[bytes], batch_size: int) -> Iterator[Dict[str, Any]]:
+    if pq is None:
+        raise RuntimeError(format_unavailable("parquet"))
+    for batch in pq.ParquetFile(stream).iter_batches(batch_size=batch_size):
+        for row in batch.to_pylist():
+            yield {key: value for key, value in row.items() if value is not None}
+
+def read_rows(stream: IO[bytes], file_format: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    if file_format == "csv":
+        return _read_csv(stream)
+    if file_format == "jsonl":
+        return _read_jsonl(stream)
+    if file_format == "parquet":
+        return _read_parquet(stream, chunk_size)
+    raise ValueError(f"Unsupported format '{file_format}'. Use one of: {', '.join(SUPPORTED_FORMATS)}")
+
+# ----------------------------------------------------------------------
+# Validation and scoring
+# ----------------------------------------------------------------------
+
+def _validate(raw: Any) -> Tuple[Optional[BulkProcessRow], List[Dict[str, str]]]:
+    if isinstance(raw, Exception):
+        return None, [{"field": "", "message": str(raw)}]
+    if not isinstance(raw, dict):
+        return None, [{"field": "", "message": "Row must be an object"}]
+    try:
+        return BulkProcessRow.model_validate(raw), []
+    except ValidationError as e:
+        return None, [
+            {"field": ".".join(str(part) for part in error["loc"]), "message": error["msg"]}
+            for error in e.errors()
+        ]
+    except ValueError as e:
+        return None, [{"field": "", "message": str(e)}]
+
+def _finite(value: float):
+    return round(float(value), 1) if math.isfinite(value) else "N/A"
+
+def score_chunk(rows: List[Tuple[int, Any]], benchmarks: Dict) -> List[Dict[str, Any]]:
+    """Validate and score one chunk; returns one result per input row, in order"""
+    results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+    valid_positions = []
+    candidates = []
+    for position, (row_number, raw) in enumerate(rows):
+        model, errors = _validate(raw)
+        if model is None:
+            results[position] = {"row": row_number, "status": "invalid", "errors": errors}
+        else:
+            valid_positions.append(position)
+            candidates.append(model.model_dump())
+
+    if candidates:
+        # Same formulas as determine_process_complexity, assess_automation_readiness,
+        # get_implementation_priority and the calculate_* tools, one pass per chunk
+        scores = score_portfolio(candidates, benchmarks)
+        for j, position in enumerate(valid_positions):
+            candidate = candidates[j]
+            results[position] = {
+                "row": rows[position][0],
+                "status": "scored",
+                "process_id": candidate["process_id"] or candidate["business_scenario"],
+                "complexity_level": COMPLEXITY_LEVELS[scores["complexity_code"][j]],
+                "readiness_score": round(float(scores["readiness_score"][j]), 1),
+                "readiness_level": READINESS_LEVELS[scores["readiness_code"][j]],
+                "implementation_priority": PRIORITY_LEVELS[scores["priority_code"][j]],
+                "hours_saved_monthly": round(float(scores["hours_saved_monthly"][j]), 1),
+                "annual_savings": round(float(scores["annual_savings"][j]), 0),
+                "implementation_cost": round(float(scores["implementation_cost"][j]), 0),
+                "roi_percentage": round(float(scores["roi_percentage"][j]), 1),
+                "payback_months": _finite(scores["payback_months"][j]),
+                "npv_3_years": round(float(scores["npv_3_years"][j]), 0)
+            }
+    return results
+
+def score_requests(payloads: List[Dict[str, Any]], benchmarks: Optional[Dict] = None) -> List[Dict[str, Any]]:
+    """Score a list of request dicts in one pass (shared benchmark load and scoring)"""
+    if benchmarks is None:
+        benchmarks = load_automation_benchmarks()
+    return score_chunk(list(enumerate(payloads, start=1)), benchmarks)
+
+def iter_chunks(rows: Iterable[Any], chunk_size: int) -> Iterator[List[Tuple[int, Any]]]:
+    chunk: List[Tuple[int, Any]] = []
+    for row_number, raw in enumerate(rows, start=1):
+        chunk.append((row_number, raw))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def new_summary() -> Dict[str, Any]:
+    return {"rows": 0, "scored": 0, "invalid": 0, "total_annual_savings": 0.0, "total_implementation_cost": 0.0}
+
+def update_summary(summary: Dict[str, Any], results: List[Dict[str, Any]]) -> None:
+    for result in results:
+        summary["rows"] += 1
+        if result["status"] == "scored":
+            summary["scored"] += 1
+            summary["total_annual_savings"] += result["annual_savings"]
+            summary["total_implementation_cost"] += result["implementation_cost"]
+        else:
+            summary["invalid"] += 1
+
+def finish_summary(summary: Dict[str, Any]) -> Dict[str, Any]:
+    summary["total_annual_savings"] = round(summary["total_annual_savings"], 0)
+    summary["total_implementation_cost"] = round(summary["total_implementation_cost"], 0)
+    return summary
+
+def stream_scores(stream: IO[bytes], file_format: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Yield JSONL lines: one per input row, then a summary line"""
+    benchmarks = load_automation_benchmarks()
+    summary = new_summary()
+    for chunk in iter_chunks(read_rows(stream, file_format, chunk_size), chunk_size):
+        results = score_chunk(chunk, benchmarks)
+        update_summary(summary, results)
+        yield "".join(json.dumps(result) + "\n" for result in results)
+    yield json.dumps({"summary": finish_summary(summary)}) + "\n"
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Score a process inventory (CSV, JSONL or Parquet) into JSONL")
+    parser.add_argument("input", help="Inventory file")
+    parser.add_argument("-o", "--output", help="Output JSONL file (default: stdout)")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, help="Input format (default: from file extension)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows scored per chunk")
+    args = parser.parse_args(argv)
+
+    file_format = args.format or detect_format(args.input)
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        with open(args.input, "rb") as stream:
+            for lines in stream_scores(stream, file_format, args.chunk_size):
+                output.write(lines)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+# app/cost_ledger.py - Per-session cost and latency ledger with time-window totals
+"""
+Every analysis session keeps a ledger: per agent, the stage's wall time,
+model time, time spent queued for a model slot, prompt/completion/cached
+tokens, model calls and context-cache hits.
+
+The server-side pipeline records a stage's timings when it finishes. Model
+calls made through ADK inside ledger_scope() add their token usage to the
+scoped ledger through before_model_ledger/after_model_ledger; calls made
+outside a scope (the /run endpoint, adk web) go straight to the windows.
+
+LedgerWindows keeps one bucket of per-agent totals per
+LEDGER_BUCKET_SECONDS for LEDGER_RETENTION_SECONDS, so capacity planning
+can read totals for the last 5 minutes, hour or day. Recording is a few
+field additions per stage or model call and never takes a lock.
+"""
+import contextvars
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+LEDGER_BUCKET_SECONDS = int(os.getenv("LEDGER_BUCKET_SECONDS", "60"))
+LEDGER_RETENTION_SECONDS = int(os.getenv("LEDGER_RETENTION_SECONDS", "86400"))
+LEDGER_WINDOWS = tuple(int(w) for w in os.getenv("LEDGER_WINDOWS", "300,3600,86400").split(","))
+
+@dataclass(slots=True)
+class StageCost:
+    wall_seconds: float = 0.0
+    model_seconds: float = 0.0
+    queue_seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    model_calls: int = 0
+    cache_hits: int = 0
+
+    def add(self, other: "StageCost") -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "wall_seconds": round(self.wall_seconds, 4),
+            "model_seconds": round(self.model_seconds, 4),
+            "queue_seconds": round(self.queue_seconds, 4),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "model_calls": self.model_calls,
+            "cache_hits": self.cache_hits
+        }
+
+    def to_record(self) -> List[Any]:
+        return [getattr(self, f.name) for f in fields(self)]
+
+    @classmethod
+    def from_record(cls, record: List[Any]) -> "StageCost":
+        return cls(*record)
+
+def total_cost(costs: Iterable[StageCost]) -> StageCost:
+    total = StageCost()
+    for cost in costs:
+        total.add(cost)
+    return total
+
+def ledger_as_dict(ledger: Dict[str, StageCost]) -> Dict[str, Any]:
+    """Per-agent costs plus their totals, as returned by the status endpoint"""
+    return {
+        "agents": {agent: cost.to_dict() for agent, cost in ledger.items()},
+        "totals": total_cost(ledger.values()).to_dict()
+    }
+
+class LedgerWindows:
+    """Per-agent cost totals in fixed time buckets, summed over trailing windows"""
+
+    def __init__(self, bucket_seconds: int = LEDGER_BUCKET_SECONDS, retention_seconds: int = LEDGER_RETENTION_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        # (bucket start, sessions finished, agent -> cost); oldest first
+        self._buckets: Deque[Tuple[int, List[int], Dict[str, StageCost]]] = deque(
+            maxlen=max(1, retention_seconds // bucket_seconds)
+        )
+
+    def _bucket(self, at: Optional[float]) -> Tuple[int, List[int], Dict[str, StageCost]]:
+        start = int((time.time() if at is None else at) // self.bucket_seconds) * self.bucket_seconds
+        if not self._buckets or self._buckets[-1][0] < start:
+            self._buckets.append((start, [0], {}))
+        elif self._buckets[-1][0] > start:
+            # Late records land in the oldest bucket that still covers them
+            for bucket in reversed(self._buckets):
+                if bucket[0] <= start:
+                    return bucket
+            return self._buckets[0]
+        return self._buckets[-1]
+
+    def record(self, agent: str, cost: StageCost, at: Optional[float] = None) -> None:
+        costs = self._bucket(at)[2]
+        if agent in costs:
+            costs[agent].add(cost)
+        else:
+            costs[agent] = StageCost(*cost.to_record())
+
+    def record_session(self, at: Optional[float] = None) -> None:
+        self._bucket(at)[1][0] += 1
+
+    def summary(self, window_seconds: int, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        oldest = now - window_seconds
+        sessions = 0
+        agents: Dict[str, StageCost] = {}
+        for start, finished, costs in self._buckets:
+            if start + self.bucket_seconds <= oldest:
+                continue
+            sessions += finished[0]
+            for agent, cost in costs.items():
+                agents.setdefault(agent, StageCost()).add(cost)
+        return {
+            "window_seconds": window_seconds,
+            "sessions": sessions,
+            **ledger_as_dict(agents)
+        }
+
+_windows: Optional[LedgerWindows] = None
+
+def get_ledger_windows() -> LedgerWindows:
+    global _windows
+    if _windows is None:
+        _windows = LedgerWindows()
+    return _windows
+
+_active_ledger: contextvars.ContextVar[Optional[Dict[str, StageCost]]] = contextvars.ContextVar("active_ledger", default=None)
+_model_call_started: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("model_call_started", default=None)
+
+@contextmanager
+def ledger_scope(ledger: Dict[str, StageCost]):
+    """Model calls made inside the block are recorded in ledger"""
+    token = _active_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _active_ledger.reset(token)
+
+def before_model_ledger(callback_context, llm_request) -> None:
+    """before_model_callback: start the model clock (register it last, after routing and deadlines)"""
+    _model_call_started.set(time.perf_counter())
+    return None
+
+def after_model_ledger(callback_context, llm_response) -> None:
+    """after_model_callback: add the call's time and token usage to the active ledger"""
+    started = _model_call_started.get()
+    _model_call_started.set(None)
+    cost = StageCost(model_calls=1)
+    if started is not None:
+        cost.model_seconds = time.perf_counter() - started
+    usage = getattr(llm_response, "usage_metadata", None)
+    if usage is not None:
+        cost.prompt_tokens = usage.prompt_token_count or 0
+        cost.completion_tokens = usage.candidates_token_count or 0
+        cost.cached_tokens = usage.cached_content_token_count or 0
+        cost.cache_hits = int(cost.cached_tokens > 0)
+
+    ledger = _active_ledger.get()
+    if ledger is None:
+        get_ledger_windows().record(callback_context.agent_name, cost)
+    elif callback_context.agent_name in ledger:
+        ledger[callback_context.agent_name].add(cost)
+    else:
+        ledger[callback_context.agent_name] = cost
+    return None
@@ -0,0 +1,279 @@
+# app/eval_runner.py - Parallel offline evaluation of the six-agent pipeline
+"""
+Runs a dataset of AutomationRequests through the ADK pipeline and scores
+each case against its expected outcomes. One JSONL line per case:
+
+    {"id": "invoices-1", "request": {...AutomationRequest fields...},
+     "expected": {"process_analysis.complexity_level": "process_automation",
+                  "roi_analysis.roi_percentage": {"min": 100, "max": 600},
+                  "final_business_case.recommendation": {"one_of": ["Go", "Conditional Go"]}}}
+
+Cases run on a bounded async pool (--concurrency). Model calls go through
+a shared requests-per-minute limiter (--rpm) or a replay cassette
+(--cassette); scoring runs in worker threads while other cases are still
+running. Results are written as JSONL as cases finish, with per-stage
+latency and token usage, and a summary is printed at the end:
+
+    python eval_runner.py cases.jsonl -o results.jsonl --concurrency 32 --rpm 600
+    python eval_runner.py cases.jsonl -o results.jsonl --cassette eval_cassette.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from contextlib import ExitStack
+from statistics import mean
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from agents.automation.output_schemas import STAGE_SCHEMAS
+from model_routing import ROUTING_STATE_KEY, request_complexity
+from schemas import AutomationRequest
+
+DEFAULT_CONCURRENCY = 16
+APP_NAME = "eval_runner"
+
+def request_message(request: Dict[str, Any]) -> str:
+    """The user message the pipeline receives for a request"""
+    lines = [
+        f"Business scenario: {request['business_scenario']}",
+        f"Business challenge: {request['business_challenge']}",
+        f"Current state: {request['current_state']}",
+        f"Success definition: {request['success_definition']}",
+        f"Process frequency: {request['process_frequency']}",
+        f"Monthly volume: {request['monthly_volume']}",
+        f"People involved: {request['people_involved']}",
+        f"Manual effort: {request['manual_percentage']}%"
+    ]
+    if request.get("cxToolsList"):
+        lines.append(f"Systems: {', '.join(request['cxToolsList'])}")
+    if request.get("business_context"):
+        lines.append(f"Context: {request['business_context']}")
+    return "\n".join(lines)
+
+class ModelRateLimiter:
+    """Spaces model calls to at most rpm per minute across all running cases"""
+
+    def __init__(self, rpm: float):
+        self.interval = 60.0 / rpm
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            wait = self._next_slot - loop.time()
+            self._next_slot = max(self._next_slot, loop.time()) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def callback(self):
+        """before_model_callback waiting for a call slot"""
+        async def before_model_rate_limit(callback_context, llm_request) -> None:
+            await self.acquire()
+            return None
+        return before_model_rate_limit
+
+def stage_metrics_collector(agent):
+    """
+    (observe, stages): observe(event) attributes the time since the previous
+    event and the event's token usage to the stage of its author.
+    """
+    output_keys = {sub_agent.name: sub_agent.output_key for sub_agent in agent.sub_agents}
+    stages = {key: {"latency_seconds": 0.0, "input_tokens": 0, "output_tokens": 0} for key in output_keys.values()}
+    last_event_at = [time.perf_counter()]
+
+    def observe(event) -> None:
+        now = time.perf_counter()
+        stage = stages.get(output_keys.get(event.author))
+        if stage is not None:
+            stage["latency_seconds"] += now - last_event_at[0]
+            usage = event.usage_metadata
+            if usage is not None:
+                stage["input_tokens"] += usage.prompt_token_count or 0
+                stage["output_tokens"] += usage.candidates_token_count or 0
+        last_event_at[0] = now
+
+    return observe, stages
+
+async def run_case(runner, agent, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one request through the pipeline; stage outputs and per-stage metrics"""
+    from google.genai import types
+
+    sessions = runner.session_service
+    # Seeding the complexity lets model routing cover the first stage too
+    session = await sessions.create_session(
+        app_name=runner.app_name, user_id="eval", state={ROUTING_STATE_KEY: request_complexity(request)}
+    )
+    observe, stages = stage_metrics_collector(agent)
+    message = types.Content(role="user", parts=[types.Part(text=request_message(request))])
+    try:
+        async for event in runner.run_async(user_id="eval", session_id=session.id, new_message=message):
+            observe(event)
+        session = await sessions.get_session(app_name=runner.app_name, user_id="eval", session_id=session.id)
+        return {"outputs": {key: session.state.get(key) for key in STAGE_SCHEMAS}, "stages": stages}
+    finally:
+        await sessions.delete_session(app_name=runner.app_name, user_id="eval", session_id=session.id)
+
+def _lookup(outputs: Dict[str, Any], path: str) -> Any:
+    value: Any = outputs
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def _matches(actual: Any, expected: Any) -> bool:
+    if isinstance(expected, dict):
+        if actual is None:
+            return False
+        if "one_of" in expected:
+            return actual in expected["one_of"]
+        if "contains" in expected:
+            return isinstance(actual, list) and expected["contains"] in actual
+        if not isinstance(actual, (int, float)):
+            return False
+        return expected.get("min", float("-inf")) <= actual <= expected.get("max", float("inf"))
+    return actual == expected
+
+def score_case(outputs: Dict[str, Any], expected: Dict[str, Any]) -> Dict[str, Any]:
+    """Schema validity of every stage plus one check per expected "<output_key>.<field>" path"""
+    valid_stages = 0
+    for output_key, schema in STAGE_SCHEMAS.items():
+        try:
+            schema.model_validate(outputs.get(output_key))
+            valid_stages += 1
+        except ValidationError:
+            pass
+    checks = {path: _matches(_lookup(outputs, path), value) for path, value in expected.items()}
+    check_score = mean(checks.values()) if checks else 1.0
+    return {
+        "stages_valid": valid_stages / len(STAGE_SCHEMAS),
+        "checks": checks,
+        "score": (valid_stages / len(STAGE_SCHEMAS) + check_score) / 2,
+        "passed": valid_stages == len(STAGE_SCHEMAS) and all(checks.values())
+    }
+
+def load_dataset(path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Cases with a validated request; invalid rows raise with their line number"""
+    cases = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            try:
+                request = AutomationRequest(**row["request"]).model_dump()
+            except (KeyError, ValidationError) as e:
+                raise ValueError(f"{path}:{line_number}: invalid request: {e}") from None
+            cases.append({"id": row.get("id", f"case-{line_number}"), "request": request, "expected": row.get("expected", {})})
+            if limit and len(cases) >= limit:
+                break
+    return cases
+
+async def evaluate_dataset(
+    cases: List[Dict[str, Any]],
+    agent,
+    output,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rate_limiter: Optional[ModelRateLimiter] = None
+) -> Dict[str, Any]:
+    """Run and score every case, writing a JSONL line to output as each finishes; returns the summary"""
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+
+    runner = Runner(agent=agent, app_name=APP_NAME, session_service=InMemorySessionService())
+    slots = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def evaluate(case: Dict[str, Any]) -> None:
+        async with slots:
+            started = time.perf_counter()
+            try:
+                run = await run_case(runner, agent, case["request"])
+                # Scoring stays off the event loop so it overlaps running cases
+                scores = await asyncio.to_thread(score_case, run["outputs"], case["expected"])
+                result = {"id": case["id"], "status": "ok", **scores, "stages": run["stages"], "outputs": run["outputs"]}
+            except Exception as e:
+                result = {"id": case["id"], "status": "error", "error": f"{type(e).__name__}: {e}", "score": 0.0, "passed": False, "stages": {}}
+            result["latency_seconds"] = round(time.perf_counter() - started, 4)
+            result["input_tokens"] = sum(stage["input_tokens"] for stage in result["stages"].values())
+            result["output_tokens"] = sum(stage["output_tokens"] for stage in result["stages"].values())
+        output.write(json.dumps(result) + "\n")
+        results.append(result)
+
+    originals = []
+    if rate_limiter is not None:
+        callback = rate_limiter.callback()
+        for sub_agent in agent.sub_agents:
+            originals.append((sub_agent, sub_agent.before_model_callback))
+            existing = sub_agent.before_model_callback
+            chain = list(existing) if isinstance(existing, list) else [existing] if existing else []
+            # Wait for a slot before any other callback starts the stage clock
+            sub_agent.before_model_callback = [callback, *chain]
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(evaluate(case) for case in cases))
+    finally:
+        for sub_agent, original in originals:
+            sub_agent.before_model_callback = original
+
+    return summarize(results, time.perf_counter() - started)
+
+def summarize(results: List[Dict[str, Any]], elapsed_seconds: float) -> Dict[str, Any]:
+    if not results:
+        return {"cases": 0, "elapsed_seconds": round(elapsed_seconds, 2)}
+    latencies = sorted(result["latency_seconds"] for result in results)
+    stage_latency = {
+        key: round(mean(result["stages"][key]["latency_seconds"] for result in results if key in result["stages"]), 4)
+        for key in STAGE_SCHEMAS
+        if any(key in result["stages"] for result in results)
+    }
+    return {
+        "cases": len(results),
+        "errors": sum(result["status"] == "error" for result in results),
+        "pass_rate": round(mean(result["passed"] for result in results), 4),
+        "mean_score": round(mean(result["score"] for result in results), 4),
+        "latency_p50_seconds": latencies[len(latencies) // 2],
+        "latency_p95_seconds": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+        "mean_stage_latency_seconds": stage_latency,
+        "input_tokens": sum(result["input_tokens"] for result in results),
+        "output_tokens": sum(result["output_tokens"] for result in results),
+        "elapsed_seconds": round(elapsed_seconds, 2)
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Evaluate the automation pipeline on a dataset of requests")
+    parser.add_argument("dataset", help="JSONL of {id, request, expected}")
+    parser.add_argument("-o", "--output", help="Results JSONL (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Cases running at once")
+    parser.add_argument("--rpm", type=float, default=0, help="Model requests per minute across all cases (0: unlimited)")
+    parser.add_argument("--limit", type=int, help="Only the first N cases")
+    parser.add_argument("--cassette", help="Model cassette to replay (or record with --cassette-mode)")
+    parser.add_argument("--cassette-mode", default="replay", choices=["replay", "record", "once"])
+    parser.add_argument("--no-strict", action="store_true", help="Call the model for prompts missing from the cassette")
+    parser.add_argument("--latency", default="none", help="Replay latency: none, recorded or seconds per call")
+    args = parser.parse_args(argv)
+
+    from agent import root_agent
+    from model_cassettes import use_cassette
+
+    cases = load_dataset(args.dataset, args.limit)
+    rate_limiter = ModelRateLimiter(args.rpm) if args.rpm > 0 else None
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        with ExitStack() as stack:
+            if args.cassette:
+                latency = args.latency if args.latency in ("none", "recorded") else float(args.latency)
+                stack.enter_context(use_cassette(root_agent, args.cassette, args.cassette_mode, not args.no_strict, latency))
+            summary = asyncio.run(evaluate_dataset(cases, root_agent, output, args.concurrency, rate_limiter))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    return 0 if summary.get("errors", 0) == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
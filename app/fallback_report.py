@@ -0,0 +1,450 @@
+# app/fallback_report.py - Deterministic business case engine built on the calculation and benchmark tools
+"""
+Computes all six stage outputs without a model call. Each stage is a
+function of the outputs before it (plus the request under REQUEST_KEY when
+it is known), the same shape as the model stages:
+
+- process_analysis: complexity from the request, opportunities and
+  priority from identify_automation_opportunities
+- roi_analysis: time, cost, ROI and scenarios from calculation_tools, with
+  benchmark efficiency rates and labor costs
+- implementation_plan, risk_assessment, tech_integration: benchmark
+  timelines, risk factors, mitigations and platform suitability for the
+  complexity level
+- final_business_case: ROI and payback against the benchmark expectations
+  for the complexity level
+
+A full report takes a few milliseconds. It is the first draft shown while
+the agents run, the report served when the server is overloaded or the
+model path fails, and latency_control's local fallback for a stage that
+runs out of time.
+"""
+import math
+import re
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from agents.automation.output_schemas import (
+    STAGE_SCHEMAS,
+    BusinessCase,
+    ImplementationPhase,
+    ImplementationPlan,
+    ProcessAnalysis,
+    Risk,
+    RiskAssessment,
+    TechIntegration,
+)
+from agents.tools.automation_tools import identify_automation_opportunities
+from agents.tools.benchmark_data import (
+    compare_to_industry_benchmark,
+    get_automation_efficiency_rate,
+    get_implementation_cost_estimates,
+    get_industry_standards,
+    get_labor_cost_benchmark,
+    get_risk_factors_by_complexity,
+    load_automation_benchmarks,
+)
+from agents.tools.calculation_tools import (
+    calculate_cost_savings,
+    calculate_implementation_costs,
+    calculate_roi_metrics,
+    calculate_time_savings,
+    generate_scenario_analysis,
+)
+from model_routing import request_complexity
+from report_builder import merge_business_case
+
+# State key for the AutomationRequest dict when the request is available
+REQUEST_KEY = "request"
+
+# Assumed when neither the request nor an industry benchmark process gives a figure
+DEFAULT_MINUTES_PER_TRANSACTION = 15
+DEFAULT_ERROR_RATE_PERCENTAGE = 5
+
+ENGINE_METHODOLOGY = "Deterministic calculation and benchmark engine"
+
+# Scenario keywords -> industry_standards entry; customer service otherwise
+INDUSTRY_KEYWORDS = {
+    "finance_operations": ("invoice", "payment", "billing", "accounts", "expense", "finance", "payroll", "reconcil"),
+    "sales_operations": ("sales", "lead", "quote", "opportunit", "deal", "crm", "prospect")
+}
+
+OVERALL_RISK = {
+    "basic_automation": "Low",
+    "process_automation": "Medium",
+    "integration_automation": "Medium",
+    "intelligent_automation": "High"
+}
+RISK_PROBABILITY = {
+    "basic_automation": 2,
+    "process_automation": 2,
+    "integration_automation": 3,
+    "intelligent_automation": 4
+}
+# category -> (benchmark risk factor, benchmark mitigation strategy, impact 1-5)
+RISK_CATEGORIES = {
+    "technical": ("Poor data quality", "Implement data quality improvements", 3),
+    "organizational": ("Resistance to change", "Plan for change management", 4),
+    "financial": ("Insufficient budget allocation", "Start with pilot project", 3),
+    "timeline": ("Highly variable process steps", "Set realistic timelines", 2)
+}
+
+ARCHITECTURE_PATTERNS = {
+    "basic_automation": "Platform-Native Workflow",
+    "process_automation": "Multi-System Integration",
+    "integration_automation": "Event-Driven Integration Hub",
+    "intelligent_automation": "AI-Augmented Orchestration"
+}
+# Complexity level -> recommendation_framework entry
+RECOMMENDATION_FRAMEWORK = {
+    "basic_automation": "quick_wins",
+    "process_automation": "strategic_projects",
+    "integration_automation": "transformation_initiatives",
+    "intelligent_automation": "innovation_projects"
+}
+
+# Share of the timeline spent in each phase
+PHASES = [
+    ("Foundation & Planning", 0.25, [
+        "Project charter and stakeholder alignment",
+        "Document the current process and its business rules",
+        "Baseline volume, handling time and error metrics"
+    ]),
+    ("Development & Integration", 0.45, [
+        "Configure {platform} and build the automated workflow",
+        "Integrate {systems}",
+        "User acceptance testing with a pilot group"
+    ]),
+    ("Deployment & Optimization", 0.30, [
+        "Phased production rollout",
+        "Training and adoption program with super users",
+        "Monitor savings against the baseline and tune"
+    ])
+]
+
+def _range(text: Any, default: Tuple[float, float]) -> Tuple[float, float]:
+    """(low, high) from benchmark strings such as "300-600%", "8-16 weeks" or "15%+" """
+    numbers = [float(n) for n in re.findall(r"\d+(?:\.\d+)?", str(text or ""))]
+    if not numbers:
+        return default
+    return numbers[0], numbers[-1]
+
+def _request(state: Mapping[str, Any]) -> Mapping[str, Any]:
+    request = state.get(REQUEST_KEY)
+    return request if isinstance(request, Mapping) else {}
+
+def infer_industry(*texts: str) -> str:
+    """industry_standards key for a scenario description"""
+    text = " ".join(texts).lower()
+    for industry, keywords in INDUSTRY_KEYWORDS.items():
+        if any(keyword in text for keyword in keywords):
+            return industry
+    return "customer_service"
+
+def _benchmark_minutes(industry: str, scenario: str) -> Optional[float]:
+    """Manual handling time of the industry's benchmark process named in the scenario"""
+    scenario = scenario.lower()
+    for process in (get_industry_standards(industry) or {}).get("common_processes", []):
+        if all(word in scenario for word in process["process"].split("_")):
+            if "manual_time_minutes" in process:
+                return float(process["manual_time_minutes"])
+            return float(process.get("manual_time_hours", 0)) * 60 or None
+    return None
+
+def process_stage(state: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+    request = _request(state)
+    if not request:
+        return None
+    scenario = request.get("business_scenario", "")
+    # Negative figures are input errors; count them as none
+    volume = max(0, request.get("monthly_volume") or 0)
+    people = max(0, request.get("people_involved") or 0)
+    manual = min(100, max(0, request.get("manual_percentage") or 0))
+    complexity = request_complexity({**request, "people_involved": people, "manual_percentage": manual})
+    industry = infer_industry(scenario, request.get("business_challenge", ""))
+    minutes = _benchmark_minutes(industry, scenario) or DEFAULT_MINUTES_PER_TRANSACTION
+    found = identify_automation_opportunities(
+        process_type=industry,
+        current_time_minutes=minutes,
+        monthly_volume=volume,
+        error_rate_percentage=DEFAULT_ERROR_RATE_PERCENTAGE,
+        complexity_level=complexity
+    )
+    pain_points = [text for text in (request.get("business_challenge"), request.get("current_state")) if text]
+    return ProcessAnalysis(
+        business_scenario=scenario,
+        monthly_volume=volume,
+        people_involved=people,
+        manual_percentage=manual,
+        minutes_per_transaction=minutes,
+        error_rate_percentage=DEFAULT_ERROR_RATE_PERCENTAGE,
+        complexity_level=complexity,
+        pain_points=pain_points[:3],
+        opportunities=[
+            *found["automation_opportunities"][:4],
+            f"{found['automation_coverage_estimate']} of process steps automatable ({found['implementation_priority'].lower()})"
+        ]
+    ).model_dump(exclude_none=True)
+
+def roi_stage(state: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    ROI from the process analysis with the calculation tools and benchmark
+    efficiency rates. Savings that never repay the cost (no volume or no
+    manual work) give a null payback.
+    """
+    process = state.get("process_analysis")
+    if not isinstance(process, dict):
+        return None
+    complexity = process.get("complexity_level", "process_automation")
+    industry = infer_industry(process.get("business_scenario", ""))
+
+    # Only the manual share of the volume is automated
+    manual_volume = process.get("monthly_volume", 0) * process.get("manual_percentage", 0) / 100
+    time_savings = calculate_time_savings(
+        monthly_volume=manual_volume,
+        current_time_minutes=process.get("minutes_per_transaction") or DEFAULT_MINUTES_PER_TRANSACTION,
+        automation_efficiency=get_automation_efficiency_rate(complexity)
+    )
+    cost_savings = calculate_cost_savings(time_savings["hours_saved_monthly"], get_labor_cost_benchmark(industry)["average"])
+    implementation_cost = calculate_implementation_costs(
+        complexity,
+        process.get("monthly_volume", 0),
+        systems_involved=max(1, len(_request(state).get("cxToolsList") or []))
+    )["total_cost_with_contingency"]
+    roi = calculate_roi_metrics(cost_savings["total_annual_savings"], implementation_cost)
+
+    scenarios = generate_scenario_analysis(cost_savings["total_annual_savings"], implementation_cost)
+    return {
+        "monthly_savings": cost_savings["total_monthly_savings"],
+        "annual_savings": cost_savings["total_annual_savings"],
+        "implementation_cost": implementation_cost,
+        "roi_percentage": roi["roi_percentage"],
+        "payback_months": roi["payback_months"] if isinstance(roi["payback_months"], (int, float)) else None,
+        "hours_saved_monthly": time_savings["hours_saved_monthly"],
+        "scenarios": [
+            {"name": name, "roi_percentage": scenarios[key]["roi_percentage"], "annual_savings": annual}
+            for name, key, annual in [
+                ("conservative", "conservative", cost_savings["total_annual_savings"] * 0.8),
+                ("likely", "most_likely", cost_savings["total_annual_savings"]),
+                ("optimistic", "optimistic", cost_savings["total_annual_savings"] * 1.2)
+            ]
+        ]
+    }
+
+def _complexity(state: Mapping[str, Any]) -> Optional[str]:
+    process = state.get("process_analysis")
+    return process.get("complexity_level") if isinstance(process, dict) else None
+
+def _platform_tools(complexity: str) -> List[str]:
+    return [name.replace("_", " ") for name in get_implementation_cost_estimates(complexity)]
+
+def plan_stage(state: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+    complexity = _complexity(state)
+    roi = state.get("roi_analysis")
+    if complexity is None or not isinstance(roi, dict):
+        return None
+    timeline = load_automation_benchmarks().get("process_complexity_indicators", {}).get(complexity, {}).get("implementation_timeline")
+    total_months = max(3, math.ceil(_range(timeline, (8, 16))[1] / 4.33))
+    tools = _platform_tools(complexity)
+    systems = _request(state).get("cxToolsList") or []
+
+    phases = []
+    first_month = 1
+    for index, (title, share, actions) in enumerate(PHASES):
+        last_month = total_months if index == len(PHASES) - 1 else max(first_month, first_month + round(total_months * share) - 1)
+        months = f"Month {first_month}" if first_month == last_month else f"Months {first_month}-{last_month}"
+        impact = [
+            "Baseline and requirements signed off",
+            f"Pilot live, targeting ${roi['monthly_savings'] * 0.3:,.0f} monthly savings",
+            f"Full automation delivering ${roi['monthly_savings']:,.0f} monthly savings"
+        ][index]
+        phases.append(ImplementationPhase(
+            title=f"{title} ({months})",
+            actions=[
+                action.format(
+                    platform=tools[0] if tools else "the automation platform",
+                    systems=", ".join(systems) if systems else "existing systems through their APIs"
+                )
+                for action in actions
+            ],
+            expected_impact=impact
+        ))
+        first_month = last_month + 1
+    return ImplementationPlan(total_months=total_months, phases=phases).model_dump(exclude_none=True)
+
+def risk_stage(state: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+    complexity = _complexity(state)
+    roi = state.get("roi_analysis")
+    if complexity is None or not isinstance(roi, dict):
+        return None
+    factors = get_risk_factors_by_complexity(complexity)
+    low, high = _range(factors.get("success_rate"), (70, 80))
+
+    overall = OVERALL_RISK.get(complexity, "Medium")
+    payback_high = _range(load_automation_benchmarks().get("roi_calculation_models", {}).get(
+        "roi_expectations_by_complexity", {}
+    ).get(complexity, {}).get("payback_period"), (6, 12))[1]
+    # Slower payback than the benchmark for this level (or none) raises the risk one step
+    if roi.get("payback_months") is None or roi["payback_months"] > payback_high:
+        overall = {"Low": "Medium", "Medium": "High"}.get(overall, overall)
+
+    risks = [
+        Risk(category=category, description=factor, probability=RISK_PROBABILITY.get(complexity, 3), impact=impact, mitigation=mitigation)
+        for category, (factor, mitigation, impact) in RISK_CATEGORIES.items()
+        if factor in factors.get("risk_factors", [])
+    ]
+    return RiskAssessment(
+        overall_risk=overall,
+        success_probability=(low + high) / 2,
+        mitigations=[strategy[0].lower() + strategy[1:] for strategy in factors.get("mitigation_strategies", [])[:3]],
+        risks=risks
+    ).model_dump(exclude_none=True)
+
+def tech_stage(state: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+    complexity = _complexity(state)
+    if complexity is None:
+        return None
+    tools = _platform_tools(complexity)
+    platform = f"Platform-native {', '.join(tools)}" if tools else "Primary automation platform"
+    return TechIntegration(
+        architecture_pattern=ARCHITECTURE_PATTERNS.get(complexity, "Multi-System Integration"),
+        platform_approach=f"{platform} with API connections to existing systems",
+        integrations=list(_request(state).get("cxToolsList") or []),
+        recommendations=[
+            "Reuse platform-native automation before adding custom code",
+            "Validate data at every system boundary",
+            "Log each automated step for audit and monitoring"
+        ]
+    ).model_dump(exclude_none=True)
+
+def business_case_stage(state: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+    complexity = _complexity(state)
+    process, roi, risk = state.get("process_analysis"), state.get("roi_analysis"), state.get("risk_assessment")
+    if complexity is None or not isinstance(roi, dict) or not isinstance(risk, dict):
+        return None
+    industry = infer_industry(process.get("business_scenario", ""))
+    benchmark = compare_to_industry_benchmark({}, industry, complexity)
+    expected_roi = _range(benchmark.get("expected_roi_range"), (200, 400))
+    expected_payback = _range(benchmark.get("expected_payback_period"), (6, 12))
+
+    roi_percentage, payback = roi["roi_percentage"], roi.get("payback_months")
+    if payback is None:
+        recommendation = "No-Go"
+    elif roi_percentage >= expected_roi[0] and payback <= expected_payback[1]:
+        recommendation = "Go"
+    elif roi_percentage >= 100 and payback <= 24:
+        recommendation = "Conditional Go"
+    else:
+        recommendation = "No-Go"
+
+    level = complexity.replace("_", " ")
+    framework = load_automation_benchmarks().get("business_case_templates", {}).get(
+        "recommendation_framework", {}
+    ).get(RECOMMENDATION_FRAMEWORK.get(complexity, ""), {})
+    time_reduction = _range(benchmark.get("industry_time_reduction"), (70, 90))[0]
+    error_reduction = _range(benchmark.get("industry_error_reduction"), (80, 90))[0]
+    return BusinessCase(
+        executive_summary=(
+            f"{process['business_scenario']} handles {process['monthly_volume']:,} transactions a month with "
+            f"{process['people_involved']} people at {process['manual_percentage']}% manual effort. "
+            f"Automating it saves an estimated ${roi['annual_savings']:,.0f} a year for a ${roi['implementation_cost']:,.0f} investment: "
+            f"{roi_percentage:.0f}% ROI with {f'a {payback:.1f} month' if payback is not None else 'no'} payback, against {benchmark.get('expected_roi_range', 'N/A')} ROI "
+            f"and {benchmark.get('expected_payback_period', 'N/A')} payback typical for {level}. "
+            f"Recommendation: {recommendation}."
+        ),
+        recommendation=recommendation,
+        confidence_percentage=risk["success_probability"],
+        strategic_recommendations=[
+            *([framework["recommendation"]] if framework.get("recommendation") else []),
+            *[mitigation[0].upper() + mitigation[1:] for mitigation in risk.get("mitigations", [])],
+            "Track savings against the pre-automation baseline every month"
+        ][:5],
+        success_metrics=[
+            {"metric": "Process Efficiency", "target": f"{time_reduction:.0f}% time reduction", "timeframe": "6 months", "measurement": "Average processing time per transaction"},
+            {"metric": "Cost Savings", "target": f"${roi['annual_savings']:,.0f} annually", "timeframe": "12 months", "measurement": "Monthly cost reduction vs baseline"},
+            {"metric": "Error Reduction", "target": f"{error_reduction:.0f}% fewer errors", "timeframe": "6 months", "measurement": "Error rate monitoring and quality metrics"},
+            {"metric": "User Adoption", "target": "95% automation utilization", "timeframe": "9 months", "measurement": "Transaction volume through automated processes"}
+        ]
+    ).model_dump(exclude_none=True)
+
+# output_key -> stage function of the outputs before it, in pipeline order
+STAGE_ENGINES: Dict[str, Callable[[Mapping[str, Any]], Optional[Dict[str, Any]]]] = {
+    "process_analysis": process_stage,
+    "roi_analysis": roi_stage,
+    "implementation_plan": plan_stage,
+    "risk_assessment": risk_stage,
+    "tech_integration": tech_stage,
+    "final_business_case": business_case_stage
+}
+
+def fallback_stage_outputs(request: Mapping[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """All six schema-valid stage outputs for an AutomationRequest dict, keyed by output_key"""
+    state: Dict[str, Any] = {REQUEST_KEY: request}
+    for output_key, stage in STAGE_ENGINES.items():
+        output = stage(state)
+        state[output_key] = STAGE_SCHEMAS[output_key].model_validate(output).model_dump(exclude_none=True)
+    return {output_key: state[output_key] for output_key in STAGE_ENGINES}
+
+def build_fallback_report(
+    request: Mapping[str, Any],
+    project_id: str,
+    outputs: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """The executive report computed entirely by the engine; pass outputs when they are already computed"""
+    started = time.perf_counter()
+    if outputs is None:
+        outputs = fallback_stage_outputs(request)
+    return merge_business_case(
+        project_id=project_id,
+        stage_outputs=outputs,
+        processing_time_seconds=round(time.perf_counter() - started, 4),
+        methodology=ENGINE_METHODOLOGY
+    )
+
+def request_from_message(message: str) -> Dict[str, Any]:
+    """AutomationRequest-shaped dict from a free-text /run message; unstated figures get defaults"""
+    def number(pattern: str, default: int) -> int:
+        match = re.search(pattern, message, re.IGNORECASE)
+        return int(match.group(1).replace(",", "")) if match else default
+
+    return {
+        "business_challenge": message[:200],
+        "current_state": "",
+        "success_definition": "",
+        "process_frequency": "daily",
+        "monthly_volume": number(r"(\d[\d,]*)\s*(?:monthly|per month|a month|/month|transactions|tickets|requests|cases)", 200),
+        "people_involved": number(r"(\d+)\s*(?:people|staff|employees|agents|team members|FTEs?)", 3),
+        "manual_percentage": min(100, number(r"(\d+)\s*%\s*manual", 75)),
+        "business_scenario": re.split(r"[,.;:\n]", message.strip())[0][:80] or "Business process"
+    }
+
+def render_report_text(report: Dict[str, Any]) -> str:
+    """Plain-text business case for the /run endpoint"""
+    deliverables = report["deliverables"]
+    lines = [
+        "COMPREHENSIVE AUTOMATION BUSINESS CASE ANALYSIS",
+        "",
+        "EXECUTIVE SUMMARY:",
+        deliverables["executive_summary"],
+        "",
+        "KEY FINDINGS:",
+        f"• Financial Impact: {deliverables['annual_savings']} annual savings with {deliverables['estimated_roi']} ROI",
+        f"• Payback: {deliverables['payback_period']}",
+        f"• Complexity: {report['automation_analysis_details']['complexity_level'].replace('_', ' ')}",
+        f"• Risk Assessment: {deliverables['risk_assessment']}",
+        "",
+        "AUTOMATION OPPORTUNITIES:",
+        *[f"{i}. {item}" for i, item in enumerate(deliverables["automation_opportunities"], start=1)],
+        "",
+        "STRATEGIC RECOMMENDATIONS:",
+        *[f"{i}. {item}" for i, item in enumerate(deliverables["strategic_recommendations"], start=1)],
+        "",
+        "IMPLEMENTATION ROADMAP:"
+    ]
+    for phase in deliverables["implementation_roadmap"].values():
+        lines.append(phase["title"])
+        lines.extend(f"- {action}" for action in phase["actions"])
+    lines += ["", "SUCCESS METRICS:"]
+    lines.extend(f"• {metric['metric']}: {metric['target']} within {metric['timeframe']}" for metric in deliverables["success_metrics"])
+    lines += ["", f"Recommendation: {deliverables['recommendation']} ({report['automation_analysis_details']['confidence_score']} confidence)"]
+    return "\n".join(lines)
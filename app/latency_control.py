@@ -0,0 +1,234 @@
+# app/latency_control.py - Stage deadlines, hedged model calls and local stage fallbacks
+"""
+PIPELINE_DEADLINE_SECONDS bounds a whole analysis. Each stage may use a
+share of the time still left, in proportion to STAGE_WEIGHTS, so a slow
+early stage shrinks the later budgets instead of pushing the run past the
+deadline.
+
+Within its budget a model call is hedged. If no response has arrived after
+the stage's HEDGE_PERCENTILE latency (HEDGE_INITIAL_DELAY until enough
+calls have been seen), an identical request is sent; the first response
+wins and the other request is cancelled. When the budget runs out, stages
+the deterministic engine in fallback_report can compute from the earlier
+outputs (LOCAL_FALLBACKS) return that result; the others fail with
+StageDeadlineExceeded.
+"""
+import asyncio
+import contextvars
+import json
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Mapping, Optional, TypeVar
+
+from google.adk.models import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from agents.automation.output_schemas import STAGE_SCHEMAS
+from fallback_report import STAGE_ENGINES
+from observability.metrics import HEDGED_REQUESTS, STAGE_DEADLINES_EXCEEDED
+
+PIPELINE_DEADLINE_SECONDS = float(os.getenv("PIPELINE_DEADLINE_SECONDS", "180"))
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+HEDGE_INITIAL_DELAY = float(os.getenv("HEDGE_INITIAL_DELAY", "15"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MAX_REQUESTS = int(os.getenv("HEDGE_MAX_REQUESTS", "2"))
+HEDGE_WINDOW = 200
+
+# Relative stage durations, matching the pipeline's typical timings
+STAGE_WEIGHTS = {
+    "process_analysis": 8,
+    "roi_analysis": 12,
+    "implementation_plan": 10,
+    "risk_assessment": 9,
+    "tech_integration": 14,
+    "final_business_case": 7
+}
+
+# Session state key: {"invocation_id": ..., "deadline": epoch seconds}
+PIPELINE_DEADLINE_KEY = "pipeline_deadline"
+
+T = TypeVar("T")
+
+class StageDeadlineExceeded(Exception):
+    """A stage ran out of its share of the pipeline deadline with no local fallback"""
+
+def stage_deadline(pipeline_deadline: float, output_key: str, now: Optional[float] = None) -> float:
+    """Epoch time by which output_key must finish, given the pipeline deadline"""
+    now = time.time() if now is None else now
+    stages = list(STAGE_WEIGHTS)
+    remaining_weight = sum(STAGE_WEIGHTS[key] for key in stages[stages.index(output_key):])
+    return now + max(0.0, pipeline_deadline - now) * STAGE_WEIGHTS[output_key] / remaining_weight
+
+class LatencyTracker:
+    """Recent successful call latencies per stage, for the hedge delay"""
+
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self._samples: Dict[str, Deque[float]] = {}
+        self._window = window
+
+    def record(self, output_key: str, seconds: float) -> None:
+        self._samples.setdefault(output_key, deque(maxlen=self._window)).append(seconds)
+
+    def percentile(self, output_key: str, q: float) -> Optional[float]:
+        samples = self._samples.get(output_key)
+        if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def hedge_delay(self, output_key: str) -> float:
+        observed = self.percentile(output_key, HEDGE_PERCENTILE)
+        return HEDGE_INITIAL_DELAY if observed is None else observed
+
+latency_tracker = LatencyTracker()
+
+async def hedged_call(
+    make_call: Callable[[], Awaitable[T]],
+    hedge_delay: float,
+    timeout: float,
+    max_requests: int = HEDGE_MAX_REQUESTS,
+    stage: str = "unknown"
+) -> T:
+    """
+    First successful result of up to max_requests identical calls. A new
+    call starts when the others are slower than hedge_delay or have all
+    failed; the rest are cancelled once one succeeds. Raises
+    StageDeadlineExceeded after timeout, or the last error if every call
+    failed.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    attempts = [asyncio.ensure_future(make_call())]
+    pending = set(attempts)
+    last_error: Optional[BaseException] = None
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise StageDeadlineExceeded(f"{stage} exceeded its {timeout:.1f}s budget")
+            can_hedge = len(attempts) < max_requests
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=min(hedge_delay, remaining) if can_hedge else remaining,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if len(attempts) > 1:
+                        HEDGED_REQUESTS.labels(stage, "primary" if task is attempts[0] else "hedge").inc()
+                    return task.result()
+                last_error = task.exception()
+            if not pending and not can_hedge:
+                raise last_error
+            # Slower than the hedge delay, or every request so far failed
+            if can_hedge:
+                attempt = asyncio.ensure_future(make_call())
+                attempts.append(attempt)
+                pending.add(attempt)
+    finally:
+        for task in pending:
+            task.cancel()
+
+# output_key -> function of the session state returning the stage output, or None if it cannot.
+# The process analysis needs the request, which the model stages never see in state.
+LOCAL_FALLBACKS: Dict[str, Callable[[Mapping[str, Any]], Optional[Dict[str, Any]]]] = {
+    output_key: engine for output_key, engine in STAGE_ENGINES.items() if output_key != "process_analysis"
+}
+
+def local_stage_output(output_key: str, state: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+    """Locally computed, schema-valid output for output_key, or None"""
+    fallback = LOCAL_FALLBACKS.get(output_key)
+    output = fallback(state) if fallback else None
+    return STAGE_SCHEMAS[output_key].model_validate(output).model_dump(exclude_none=True) if output else None
+
+@dataclass
+class StageCall:
+    output_key: str
+    deadline: float
+    state: Dict[str, Any]
+
+# Set by deadline_callback, read by the DeadlineLlm call that follows it
+_stage_call: contextvars.ContextVar[Optional[StageCall]] = contextvars.ContextVar("stage_call", default=None)
+
+def _fallback_response(output_key: str, state: Mapping[str, Any]) -> Optional[LlmResponse]:
+    output = local_stage_output(output_key, state)
+    if output is None:
+        STAGE_DEADLINES_EXCEEDED.labels(output_key, "error").inc()
+        return None
+    STAGE_DEADLINES_EXCEEDED.labels(output_key, "local_fallback").inc()
+    print(f"⏱️ {output_key} over its deadline, using the local calculation")
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=json.dumps(output))]))
+
+def deadline_callback(output_key: str):
+    """
+    before_model_callback giving the agent writing output_key its share of
+    the pipeline deadline. The deadline starts with the first model call of
+    an invocation. A stage whose budget is already gone is answered by its
+    local fallback without calling the model.
+    """
+    def before_model_deadline(callback_context, llm_request) -> Optional[LlmResponse]:
+        state = callback_context.state
+        pipeline = state.get(PIPELINE_DEADLINE_KEY)
+        if not isinstance(pipeline, dict) or pipeline.get("invocation_id") != callback_context.invocation_id:
+            pipeline = {"invocation_id": callback_context.invocation_id, "deadline": time.time() + PIPELINE_DEADLINE_SECONDS}
+            state[PIPELINE_DEADLINE_KEY] = pipeline
+
+        snapshot = {key: state.get(key) for key in STAGE_SCHEMAS}
+        deadline = stage_deadline(pipeline["deadline"], output_key)
+        if deadline <= time.time():
+            return _fallback_response(output_key, snapshot)
+        _stage_call.set(StageCall(output_key, deadline, snapshot))
+        return None
+
+    return before_model_deadline
+
+class DeadlineLlm(BaseLlm):
+    """
+    Wraps the agent's model: non-streaming calls made after deadline_callback
+    are hedged and bounded by the stage deadline. Other calls pass through.
+    """
+
+    inner: BaseLlm
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        call = _stage_call.get()
+        _stage_call.set(None)
+        if stream or call is None:
+            async for response in self.inner.generate_content_async(llm_request, stream):
+                yield response
+            return
+
+        async def attempt():
+            # Each request gets its own copy; the model client appends to the contents
+            request = llm_request.model_copy(deep=True)
+            return [response async for response in self.inner.generate_content_async(request, False)]
+
+        started = time.perf_counter()
+        try:
+            responses = await hedged_call(
+                attempt,
+                latency_tracker.hedge_delay(call.output_key),
+                call.deadline - time.time(),
+                stage=call.output_key
+            )
+        except StageDeadlineExceeded:
+            fallback = _fallback_response(call.output_key, call.state)
+            if fallback is None:
+                raise
+            yield fallback
+            return
+        latency_tracker.record(call.output_key, time.perf_counter() - started)
+        for response in responses:
+            yield response
+
+def with_deadlines(model) -> DeadlineLlm:
+    """DeadlineLlm around a model name or BaseLlm instance"""
+    if isinstance(model, DeadlineLlm):
+        return model
+    if isinstance(model, str):
+        from google.adk.models.registry import LLMRegistry
+        model = LLMRegistry.new_llm(model)
+    return DeadlineLlm(model=model.model, inner=model)
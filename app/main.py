@@ -3,14 +3,65 @@ import os
 import uuid
 import json
 import asyncio
+import hmac
+import sys
+import tempfile
+import time
 import uvicorn
+from contextlib import asynccontextmanager, nullcontext
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from typing import Dict, Any, List, Optional, Tuple
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Response, Depends, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
+from schemas import AutomationRequest
+from request_dedup import MAX_IDEMPOTENCY_KEY_LENGTH, IdempotencyConflict, RequestDeduplicator, request_fingerprint
+from session_archive import SESSION_ARCHIVE_ENABLED, SessionArchive, run_compaction
+from pipeline_checkpoints import (
+    PIPELINE_LEASE_SECONDS,
+    PIPELINE_MAX_RETRIES,
+    PIPELINE_RESUME_ON_STARTUP,
+    PIPELINE_RETRY_BACKOFF,
+    CheckpointStore,
+    completed_prefix,
+)
+from session_models import AnalysisSession, ChatMessage
+from adaptive_concurrency import get_model_limiter, limiter_stats
+from cost_ledger import LEDGER_WINDOWS, StageCost, get_ledger_windows, ledger_as_dict, ledger_scope
+from report_export import EXPORT_FORMATS, ReportExporter, content_hash
+from report_builder import merge_business_case
+from fallback_report import build_fallback_report, fallback_stage_outputs, render_report_text, request_from_message
+from latency_control import PIPELINE_DEADLINE_SECONDS, StageDeadlineExceeded, local_stage_output, stage_deadline
+from model_routing import MODEL_ROUTING_ENABLED, get_model_router, request_complexity
+from bulk_import import DEFAULT_CHUNK_SIZE, SUPPORTED_FORMATS, format_unavailable, score_requests, stream_scores
+from agents.tools.portfolio_tools import PORTFOLIO_OBJECTIVES, PRIORITY_LEVELS, rank_portfolio
+from agents.tools.portfolio_optimizer import optimize_portfolio
+from agents.tools.similarity_index import get_example_index, load_case_library
+from agents.tools.offload import OFFLOAD_BLOCKING_TOOLS, blocking_calls_in_flight, run_blocking, shutdown_blocking_executor
+from observability.loop_monitor import LoopMonitor
+from observability.metrics import (
+    ACTIVE_SESSIONS,
+    AGENT_DURATION,
+    ANALYSIS_DURATION,
+    BLOCKING_POOL_IN_FLIGHT,
+    CONTENT_TYPE_LATEST,
+    MOCK_FALLBACKS,
+    MODEL_ERRORS,
+    PIPELINE_RECOVERIES,
+    PIPELINE_RUNS_AVOIDED,
+    QUEUE_DEPTH,
+    STAGE_DEADLINES_EXCEEDED,
+    STORED_SESSIONS,
+    generate_latest,
+    start_multiprocess_flusher,
+    stop_multiprocess_flusher,
+)
+from observability.profiling import profile_for
+from observability.tracing import configure_tracing, stage_span
+
 # Load environment variables
 load_dotenv()
 
@@ -26,6 +77,22 @@ GOOGLE_GENAI_USE_VERTEXAI = os.getenv("GOOGLE_GENAI_USE_VERTEXAI", "True")  # Us
 # Option 2: Use AI Studio with API Key (Alternative)
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")  # Only needed if using AI Studio instead of Vertex AI
 
+# Admin endpoints (profiling) are disabled unless a token is configured
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+
+# Event loop lag monitor and blocking-call detector
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+
+# Durable ADK sessions: SQLite database path; unset keeps ADK's in-memory session service
+ADK_SESSION_DB = os.getenv("ADK_SESSION_DB")
+
+# Batch submission limits; batch items share one budget of concurrent agent (model) steps
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_MODEL_CONCURRENCY = int(os.getenv("BATCH_MODEL_CONCURRENCY", "16"))
+
+# At this many processing sessions, new analyses get the deterministic report instead of the agents (0: never)
+DEGRADED_MODE_ACTIVE_SESSIONS = int(os.getenv("DEGRADED_MODE_ACTIVE_SESSIONS", "500"))
+
 # Print authentication configuration
 print(f"🔧 Google Cloud Project: {GOOGLE_CLOUD_PROJECT}")
 print(f"🔧 Google Cloud Location: {GOOGLE_CLOUD_LOCATION}")
@@ -58,17 +125,60 @@ ADK_ALLOWED_ORIGINS = [
 
 print(f"🌐 Configured CORS origins: {ADK_ALLOWED_ORIGINS}")
 
+loop_monitor = LoopMonitor()
+adk_session_service = None
+BLOCKING_POOL_IN_FLIGHT.set_function(blocking_calls_in_flight)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background monitors for the lifetime of the server"""
+    start_multiprocess_flusher()
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    archive_task = None
+    if SESSION_ARCHIVE_ENABLED:
+        archive_task = asyncio.create_task(run_compaction(session_archive, analysis_sessions, on_archived=evict_archived_batches))
+    adk_compaction_task = None
+    if adk_session_service is not None:
+        from adk_session_store import run_session_compaction
+        adk_compaction_task = asyncio.create_task(run_session_compaction(adk_session_service))
+    lease_task = None
+    if PIPELINE_RESUME_ON_STARTUP and checkpoint_store.durable:
+        lease_task = asyncio.create_task(run_pipeline_leases())
+    try:
+        yield
+    finally:
+        if archive_task is not None:
+            archive_task.cancel()
+        if lease_task is not None:
+            lease_task.cancel()
+        if adk_compaction_task is not None:
+            adk_compaction_task.cancel()
+            await adk_session_service.close()
+        if LOOP_MONITOR_ENABLED:
+            await loop_monitor.stop()
+        shutdown_blocking_executor()
+        report_exporter.shutdown()
+        stop_multiprocess_flusher()
+
 # Try to create ADK FastAPI app with PROPER CORS configuration
 try:
     from google.adk.cli.fast_api import get_fast_api_app
     
+    if ADK_SESSION_DB:
+        from adk_session_store import SqliteSessionService, default_session_service
+        adk_session_service = SqliteSessionService(ADK_SESSION_DB)
+        print(f"💾 ADK sessions stored in SQLite: {ADK_SESSION_DB}")
+    
     # 🚀 FIXED: Use ADK's built-in CORS parameter
-    app: FastAPI = get_fast_api_app(
-        agents_dir=AGENTS_DIR,
-        allow_origins=ADK_ALLOWED_ORIGINS,  # ✅ Correct ADK CORS configuration
-        web=True,
-        trace_to_cloud=False
-    )
+    with default_session_service(adk_session_service) if adk_session_service else nullcontext():
+        app: FastAPI = get_fast_api_app(
+            agents_dir=AGENTS_DIR,
+            allow_origins=ADK_ALLOWED_ORIGINS,  # ✅ Correct ADK CORS configuration
+            web=True,
+            trace_to_cloud=False,
+            lifespan=lifespan
+        )
     print("✅ ADK FastAPI app created with built-in CORS!")
     ADK_INTEGRATION = True
     
@@ -80,7 +190,7 @@ except Exception as e:
     print("🔄 Falling back to regular FastAPI with manual CORS...")
     
     # Fallback to regular FastAPI with manual CORS
-    app = FastAPI(title="Automation Business Case API - Fallback Mode")
+    app = FastAPI(title="Automation Business Case API - Fallback Mode", lifespan=lifespan)
     ADK_INTEGRATION = False
     
     # 🚀 ONLY add manual CORS middleware in fallback mode
@@ -95,6 +205,14 @@ except Exception as e:
 
 print(f"🔧 ADK Integration: {'✅ Enabled' if ADK_INTEGRATION else '❌ Fallback Mode'}")
 
+# Refuse to start with ADK silently keeping sessions in memory
+if ADK_INTEGRATION and adk_session_service is not None:
+    from adk_session_store import verify_session_service
+    verify_session_service(app, adk_session_service)
+
+# Local OpenTelemetry export (OTLP collector and/or rotating JSONL), off unless TRACE_EXPORTER is set
+TRACING_ENABLED = configure_tracing(app)
+
 # Try to import the automation agent
 try:
     if ADK_INTEGRATION:
@@ -118,39 +236,208 @@ class RunRequest(BaseModel):
     user_id: str
     message: str
 
-class AutomationRequest(BaseModel):
-    business_challenge: str
-    current_state: str
-    success_definition: str
-    process_frequency: str
-    monthly_volume: int
-    people_involved: int
-    manual_percentage: int
-    business_scenario: str
-    decision_makers: List[str] = []
-    affected_departments: List[str] = []
-    business_context: str = ""
-    cx_objective: str = ""
-    personasList: List[dict] = []
-    cxToolsList: List[str] = []
-
 class AnalysisResponse(BaseModel):
     session_id: str
     status: str
     message: str
 
+class BatchAnalysisRequest(BaseModel):
+    requests: List[AutomationRequest]
+
+class PortfolioCandidate(BaseModel):
+    process_id: str = ""
+    industry_type: str = "customer_service"
+    monthly_volume: int
+    current_time_minutes: float
+    error_rate_percentage: float = 0
+    decision_points: int = 1
+    systems_involved: int = 1
+    people_involved: int
+    manual_percentage: int
+    hourly_labor_cost: Optional[float] = None
+    annual_operating_cost: float = 0
+    # Readiness factors (1-10), neutral when unknown
+    data_quality: int = 5
+    system_integration: int = 5
+    infrastructure_stability: int = 5
+    security_framework: int = 5
+    process_standardization: int = 5
+    volume_frequency: int = 5
+    rule_based_nature: int = 5
+    exception_handling: int = 5
+    executive_sponsorship: int = 5
+    change_management: int = 5
+    skills_resources: int = 5
+    budget_timeline: int = 5
+    # Figures from calculate_implementation_costs / calculate_roi_metrics, used by the optimizer when given
+    implementation_cost: Optional[float] = None
+    npv_3_years: Optional[float] = None
+    payback_months: Optional[float] = None
+
+class PortfolioRequest(BaseModel):
+    candidates: List[PortfolioCandidate]
+    objective: str = "npv_3_years"
+    top_k: int = 10
+
+class PortfolioOptimizeRequest(BaseModel):
+    candidates: List[PortfolioCandidate]
+    budget: float
+    max_payback_months: Optional[float] = None
+    method: str = "auto"  # auto, dp or greedy
+
+class SimilarExamplesRequest(BaseModel):
+    complexity_level: Optional[str] = None
+    industry_type: Optional[str] = None
+    monthly_volume: Optional[float] = None
+    roi_percentage: Optional[float] = None
+    timeframe_months: Optional[float] = None
+    k: int = 5
+
+class CaseLibraryRequest(BaseModel):
+    cases: List[Dict[str, Any]]
+    replace: bool = True
+
 # In-memory session storage
-analysis_sessions: Dict[str, Dict[str, Any]] = {}
+analysis_sessions: Dict[str, AnalysisSession] = {}
+STORED_SESSIONS.set_function(lambda: len(analysis_sessions))
+
+# Finished sessions move here (compressed) after SESSION_ARCHIVE_AFTER_SECONDS
+session_archive = SessionArchive()
+
+# Rendered PDF/DOCX/Markdown reports, cached by content hash
+report_exporter = ReportExporter()
+
+# Idempotency-Key replays and identical in-flight requests reuse one session
+request_deduplicator = RequestDeduplicator()
+
+# Stage outputs persisted as each agent completes, for retry and resume
+checkpoint_store = CheckpointStore()
+resume_tasks = set()
+
+# Batch id -> session ids (input order) and the batch's shared precomputed scores
+analysis_batches: Dict[str, Dict[str, Any]] = {}
+batch_tasks = set()
+_batch_model_slots: Optional[asyncio.Semaphore] = None
+
+def get_batch_model_slots() -> asyncio.Semaphore:
+    """Concurrent agent steps allowed across all running batch items"""
+    global _batch_model_slots
+    if _batch_model_slots is None:
+        _batch_model_slots = asyncio.Semaphore(BATCH_MODEL_CONCURRENCY)
+    return _batch_model_slots
+
+def evict_archived_batches() -> int:
+    """Forget batches none of whose sessions are live any more (all archived or expired)"""
+    finished = [
+        batch_id for batch_id, batch in analysis_batches.items()
+        if not any(session_id in analysis_sessions for session_id in batch["session_ids"])
+    ]
+    for batch_id in finished:
+        del analysis_batches[batch_id]
+    return len(finished)
+
+def precompute_batch(payloads: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Dict[str, Any]]]]:
+    """
+    Every item's engine stage outputs (draft and pipeline), and batch scores
+    (ordering and status). Requests carry no handling time or error rate, so
+    scoring takes the engine's benchmark figures for them.
+    """
+    outputs = [fallback_stage_outputs(payload) for payload in payloads]
+    scores = score_requests([
+        {
+            **payload,
+            "current_time_minutes": stages["process_analysis"].get("minutes_per_transaction"),
+            "error_rate_percentage": stages["process_analysis"].get("error_rate_percentage")
+        }
+        for payload, stages in zip(payloads, outputs)
+    ])
+    return scores, outputs
+
+def batch_order(scores: Dict[str, Any]) -> Tuple[float, float]:
+    """Sort key: highest implementation priority first, then largest annual savings"""
+    if scores["status"] != "scored":
+        return (1, 0)
+    return (-PRIORITY_LEVELS.index(scores["implementation_priority"]), -scores["annual_savings"])
+
+def get_session(session_id: str) -> Optional[AnalysisSession]:
+    """Live session, or an archived one rehydrated on demand"""
+    session_data = analysis_sessions.get(session_id)
+    if session_data is None:
+        session_data = session_archive.load(session_id)
+    return session_data
+
+def restore_session(session_id: str) -> Optional[AnalysisSession]:
+    """Session with its checkpointed stages; rebuilt from the checkpoint store after a restart"""
+    session_data = get_session(session_id)
+    if session_data is None:
+        request = checkpoint_store.request(session_id)
+        if request is None:
+            return None
+        session_data = AnalysisSession(request=request, agent_names=AGENT_NAMES, adk_integration=ADK_INTEGRATION)
+    outputs = checkpoint_store.outputs(session_id)
+    session_data.completed_count = completed_prefix(outputs)
+    session_data.stage_outputs = {key: output for index, (key, output) in outputs.items() if index < session_data.completed_count}
+    return session_data
+
+def prepare_resume(session_id: str, session_data: AnalysisSession, trigger: str) -> None:
+    """Put a failed or interrupted session back into processing at its first incomplete stage"""
+    resume_index = session_data.completed_count
+    session_data.status = "processing"
+    session_data.error = None
+    session_data.failed_at = None
+    session_data.current_agent_index = resume_index
+    session_data.attempts += 1
+    analysis_sessions[session_id] = session_data
+    session_archive.discard(session_id)
+    PIPELINE_RECOVERIES.labels(trigger).inc()
+    QUEUE_DEPTH.inc()
+    ACTIVE_SESSIONS.inc()
+    add_chat_message(session_id, ChatMessage(
+        id="system_resume",
+        from_agent="system",
+        to_agent="all",
+        message=f"🔁 Resuming with {AGENT_MAPPING[min(resume_index, 5)]['display_name']}: {resume_index} of 6 stages restored from checkpoints.",
+        type="system"
+    ))
+
+async def resume_interrupted_pipelines() -> int:
+    """Claim runs whose worker stopped renewing their lease and restart them here (durable checkpoint store only)"""
+    resumed = 0
+    for session_id in await run_blocking(checkpoint_store.claim_interrupted):
+        if session_id in analysis_sessions:
+            continue
+        session_data = await run_blocking(restore_session, session_id)
+        if session_data is None:
+            continue
+        prepare_resume(session_id, session_data, "startup")
+        task = asyncio.create_task(process_automation_analysis(session_id, AutomationRequest(**session_data.request)))
+        resume_tasks.add(task)
+        task.add_done_callback(resume_tasks.discard)
+        resumed += 1
+        print(f"🔁 Resuming interrupted analysis {session_id} at stage {session_data.completed_count + 1}/6")
+    return resumed
+
+async def run_pipeline_leases(interval: float = PIPELINE_LEASE_SECONDS / 3) -> None:
+    """Background task: keep this worker's runs leased and pick up runs orphaned by other workers"""
+    while True:
+        try:
+            await run_blocking(checkpoint_store.renew)
+            await resume_interrupted_pipelines()
+        except Exception as e:
+            print(f"⚠️ Pipeline lease renewal failed: {e}")
+        await asyncio.sleep(interval)
 
 # Agent mapping for consistent naming
 AGENT_MAPPING = {
-    0: {"technical_name": "customer_journey_analyst", "display_name": "Process Analysis Specialist", "avatar": "🔍"},
-    1: {"technical_name": "data_analytics_specialist", "display_name": "ROI Calculator", "avatar": "💰"},
-    2: {"technical_name": "process_improvement_specialist", "display_name": "Implementation Planner", "avatar": "📋"},
-    3: {"technical_name": "solution_designer", "display_name": "Risk Assessment Specialist", "avatar": "⚠️"},
-    4: {"technical_name": "implementation_strategist", "display_name": "Technology Integration Specialist", "avatar": "🔧"},
-    5: {"technical_name": "success_metrics_specialist", "display_name": "Business Case Compiler", "avatar": "📊"}
+    0: {"technical_name": "customer_journey_analyst", "display_name": "Process Analysis Specialist", "avatar": "🔍", "output_key": "process_analysis"},
+    1: {"technical_name": "data_analytics_specialist", "display_name": "ROI Calculator", "avatar": "💰", "output_key": "roi_analysis"},
+    2: {"technical_name": "process_improvement_specialist", "display_name": "Implementation Planner", "avatar": "📋", "output_key": "implementation_plan"},
+    3: {"technical_name": "solution_designer", "display_name": "Risk Assessment Specialist", "avatar": "⚠️", "output_key": "risk_assessment"},
+    4: {"technical_name": "implementation_strategist", "display_name": "Technology Integration Specialist", "avatar": "🔧", "output_key": "tech_integration"},
+    5: {"technical_name": "success_metrics_specialist", "display_name": "Business Case Compiler", "avatar": "📊", "output_key": "final_business_case"}
 }
+# Shared by every session; completed_agents is a prefix of this list
+AGENT_NAMES = [sys.intern(AGENT_MAPPING[i]["technical_name"]) for i in range(6)]
 
 # 🚀 ROOT ENDPOINT with authentication info
 @app.get("/")
@@ -165,6 +452,7 @@ async def root():
         "cors_status": "ADK_BUILT_IN" if ADK_INTEGRATION else "MANUAL_FALLBACK",
         "configured_origins": ADK_ALLOWED_ORIGINS,
         "firebase_project": FIREBASE_PROJECT_ID,
+        "tracing_enabled": TRACING_ENABLED,
         "authentication": {
             "google_cloud_project": GOOGLE_CLOUD_PROJECT,
             "google_cloud_location": GOOGLE_CLOUD_LOCATION,
@@ -177,7 +465,14 @@ async def root():
             "health": "/api/v1/health",
             "run": "/run",
             "create_analysis": "/api/v1/cx-analysis/create",
-            "analysis_status": "/api/v1/cx-analysis/status/{session_id}"
+            "analysis_status": "/api/v1/cx-analysis/status/{session_id}",
+            "resume_analysis": "/api/v1/cx-analysis/resume/{session_id}",
+            "export_report": "/api/v1/cx-analysis/export/{session_id}?format=pdf|docx|md",
+            "metrics": "/metrics",
+            "portfolio_score": "/api/v1/portfolio/score",
+            "portfolio_optimize": "/api/v1/portfolio/optimize",
+            "bulk_score": "/api/v1/bulk/score",
+            "similar_examples": "/api/v1/benchmarks/similar"
         }
     }
 
@@ -204,6 +499,38 @@ async def auth_debug():
         }
     }
 
+RUN_APP_NAME = "automation_run"
+
+class AgentRunError(Exception):
+    """A model or agent failed while the pipeline ran, as opposed to the /run plumbing around it"""
+
+async def run_pipeline_for_message(user_id: str, message: str) -> str:
+    """
+    Run the agent pipeline on one message to completion; returns the text
+    of its last response. Failures inside the run raise AgentRunError.
+    """
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from google.genai import types
+
+    sessions = InMemorySessionService()
+    runner = Runner(agent=automation_sequential_agent, app_name=RUN_APP_NAME, session_service=sessions)
+    session = await sessions.create_session(
+        app_name=RUN_APP_NAME,
+        user_id=user_id,
+        state={"user_id": user_id, "request_message": message}
+    )
+    content = ""
+    new_message = types.Content(role="user", parts=[types.Part(text=message)])
+    try:
+        async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=new_message):
+            text = "".join(part.text or "" for part in (event.content.parts or [])) if event.content else ""
+            if text:
+                content = text
+    except Exception as e:
+        raise AgentRunError(str(e)) from e
+    return content
+
 # 🚀 /run ENDPOINT - Main endpoint for React app
 @app.post("/run")
 async def run_agent(request: RunRequest):
@@ -215,26 +542,28 @@ async def run_agent(request: RunRequest):
     
     if not ADK_INTEGRATION:
         print("⚠️ Running in Fallback Mode, returning mock response.")
+        MOCK_FALLBACKS.labels("fallback_mode").inc()
         return {
             "status": "success",
-            "message": generate_mock_automation_response(request.message),
-            "content": generate_mock_automation_response(request.message),
+            "message": generate_fallback_automation_response(request.message),
+            "content": generate_fallback_automation_response(request.message),
             "user_id": request.user_id,
-            "agent_used": "mock_automation_agents",
-            "processing_time": "Mock analysis",
+            "agent_used": "fallback_report_engine",
+            "processing_time": "Deterministic analysis",
             "cors_mode": "manual_fallback",
             "auth_mode": "fallback"
         }
     
     if not AGENT_AVAILABLE:
         print("⚠️ ADK Integration active but agent not available, returning mock response.")
+        MOCK_FALLBACKS.labels("agent_unavailable").inc()
         return {
             "status": "success",
-            "message": generate_mock_automation_response(request.message),
-            "content": generate_mock_automation_response(request.message),
+            "message": generate_fallback_automation_response(request.message),
+            "content": generate_fallback_automation_response(request.message),
             "user_id": request.user_id,
-            "agent_used": "mock_automation_agents",
-            "processing_time": "Mock analysis",
+            "agent_used": "fallback_report_engine",
+            "processing_time": "Deterministic analysis",
             "cors_mode": "adk_built_in",
             "auth_mode": "adc" if not GOOGLE_API_KEY else "api_key"
         }
@@ -242,29 +571,16 @@ async def run_agent(request: RunRequest):
     try:
         print(f"🤖 Processing real ADK /run request from user: {request.user_id}")
         print(f"📝 Message: {request.message[:100]}...")
+        fallback_reason = "agent_error"
         
         # If we have real agents, try to use them
         if automation_sequential_agent and hasattr(automation_sequential_agent, 'run_async'):
             try:
-                # Try to run the real agent
-                from google.adk.core import InvocationContext
-                
-                context = InvocationContext()
-                context.session.state.update({
-                    "user_id": request.user_id,
-                    "request_message": request.message
-                })
-                
-                # Run the agent
-                result = await automation_sequential_agent.run_async(request.message, context)
-                
-                # Extract the response
-                if hasattr(result, 'content'):
-                    content = result.content
-                elif hasattr(result, 'message'):
-                    content = result.message
-                else:
-                    content = str(result)
+                # Run the agent, bounded by the pipeline deadline
+                content = await asyncio.wait_for(
+                    run_pipeline_for_message(request.user_id, request.message),
+                    timeout=PIPELINE_DEADLINE_SECONDS
+                )
                 
                 return {
                     "status": "success",
@@ -277,20 +593,29 @@ async def run_agent(request: RunRequest):
                     "auth_mode": "adc" if not GOOGLE_API_KEY else "api_key"
                 }
                 
-            except Exception as agent_error:
+            except asyncio.TimeoutError:
+                print(f"⏱️ Agent pipeline exceeded {PIPELINE_DEADLINE_SECONDS:.0f}s, using the deterministic report")
+                fallback_reason = "deadline_exceeded"
+            except AgentRunError as agent_error:
                 print(f"⚠️ Real agent execution failed: {agent_error}")
+                MODEL_ERRORS.labels(automation_sequential_agent.name).inc()
                 # Fall through to mock response
+            except Exception as setup_error:
+                # Could not start the run at all; no model call failed
+                print(f"⚠️ Could not start the agent pipeline: {setup_error}")
+                fallback_reason = "agent_setup_error"
         
         # Generate mock comprehensive response based on the message
-        mock_response = generate_mock_automation_response(request.message)
+        MOCK_FALLBACKS.labels(fallback_reason).inc()
+        fallback_response = generate_fallback_automation_response(request.message)
         
         return {
             "status": "success",
-            "content": mock_response,
-            "message": mock_response,
+            "content": fallback_response,
+            "message": fallback_response,
             "user_id": request.user_id,
-            "agent_used": "mock_automation_agents",
-            "processing_time": "Simulated analysis",
+            "agent_used": "fallback_report_engine",
+            "processing_time": "Deterministic analysis",
             "cors_mode": "adk_built_in",
             "auth_mode": "adc" if not GOOGLE_API_KEY else "api_key"
         }
@@ -306,66 +631,10 @@ async def run_agent(request: RunRequest):
             "auth_mode": "adc" if not GOOGLE_API_KEY else "api_key"
         }
 
-def generate_mock_automation_response(message: str) -> str:
-    """Generate a comprehensive mock automation analysis response"""
-    
-    # Extract context from the message
-    volume = "500" if "500" in message else "200"
-    manual_percent = "80" if "80" in message else "75"
-    
-    return f"""
-COMPREHENSIVE AUTOMATION BUSINESS CASE ANALYSIS
-
-EXECUTIVE SUMMARY:
-Based on analysis of your automation request, we've identified significant opportunities for process optimization. With {volume} monthly transactions at {manual_percent}% manual effort, automation can deliver substantial ROI.
-
-KEY FINDINGS:
-• Process Analysis: Current workflow shows 70-85% automation potential
-• Financial Impact: Projected $450,000 annual savings with 285% ROI  
-• Implementation: 3-phase approach over 6-8 months
-• Risk Assessment: Medium complexity with high success probability
-
-AUTOMATION OPPORTUNITIES:
-1. Workflow automation to eliminate manual processing steps
-2. System integration for seamless data flow and error reduction
-3. Process standardization to ensure consistency and quality
-4. Real-time monitoring and automated reporting capabilities
-5. Scalable architecture to handle 3x current volume
-
-STRATEGIC RECOMMENDATIONS:
-1. Execute phased implementation starting with pilot program
-2. Establish comprehensive change management strategy
-3. Deploy performance monitoring and analytics framework
-4. Create automation governance structure for ongoing optimization
-5. Implement user training program with super-user network
-
-IMPLEMENTATION ROADMAP:
-Phase 1 (Months 1-2): Foundation & Planning
-- Project charter and stakeholder alignment
-- Detailed process documentation and requirements
-- Technology evaluation and vendor selection
-
-Phase 2 (Months 3-5): Development & Integration  
-- Automation platform configuration and development
-- System integration and comprehensive testing
-- Training material development and pilot preparation
-
-Phase 3 (Months 6-8): Deployment & Optimization
-- Production deployment with phased rollout
-- User training and adoption program execution
-- Performance monitoring and continuous improvement
-
-SUCCESS METRICS:
-• 75% reduction in processing time within 6 months
-• 90% error reduction through automation
-• $450,000 annual cost savings achievement
-• 95% user adoption of automated processes
-
-RISK MITIGATION:
-Medium risk implementation with comprehensive change management, extensive testing, and phased rollout approach. Success probability: 87%.
-
-This analysis demonstrates strong business justification for automation investment with clear ROI and implementation strategy.
-"""
+def generate_fallback_automation_response(message: str) -> str:
+    """Business case text from the deterministic engine, for when the agents can't run"""
+    report = build_fallback_report(request_from_message(message), project_id=f"AUTO-{uuid.uuid4().hex[:8].upper()}")
+    return render_report_text(report)
 
 @app.get("/api/v1/health")
 async def health_check():
@@ -382,14 +651,40 @@ async def health_check():
             "cors_enabled": True,
             "cors_origins": ADK_ALLOWED_ORIGINS
         },
+        "event_loop": {
+            "monitor_enabled": LOOP_MONITOR_ENABLED,
+            "lag": loop_monitor.stats(),
+            "offload_blocking_tools": OFFLOAD_BLOCKING_TOOLS,
+            "blocking_calls_in_flight": blocking_calls_in_flight()
+        },
+        "sessions": {
+            "active": len(analysis_sessions),
+            "archive": session_archive.stats(),
+            "deduplication": request_deduplicator.stats(),
+            "report_exports": report_exporter.stats(),
+            "adk": await adk_session_service.stats() if adk_session_service else {"backend": "memory"},
+            "checkpoints": await run_blocking(checkpoint_store.stats)
+        },
+        "model_routing": {
+            "enabled": MODEL_ROUTING_ENABLED,
+            "tiers": get_model_router().tiers
+        },
+        "model_concurrency": limiter_stats(),
         "endpoints": {
             "root": "/",
             "run": "/run",
             "create_analysis": "/api/v1/cx-analysis/create",
             "analysis_status": "/api/v1/cx-analysis/status/{session_id}",
+            "metrics": "/metrics",
         }
     }
 
+# 🚀 PROMETHEUS METRICS ENDPOINT
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text-format metrics (merged across workers when configured)"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 # 🚀 CORS DEBUG ENDPOINT
 @app.get("/api/v1/cors-debug")
 async def cors_debug():
@@ -408,28 +703,112 @@ async def cors_debug():
         }
     }
 
+# 🔐 ADMIN: on-demand profiling
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Reject requests without the configured admin token"""
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+def render_profile(profiler, output_format: str):
+    """Return a finished profile as collapsed stacks or speedscope JSON"""
+    if output_format == "speedscope":
+        return profiler.speedscope(name=f"automation-api pid {os.getpid()}")
+    return Response(content=profiler.collapsed(), media_type="text/plain")
+
+@app.post("/api/v1/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_server(
+    seconds: float = 10,
+    interval_ms: float = 5,
+    format: str = "collapsed",
+    functions: str = "",
+    include_threads: bool = True
+):
+    """
+    Sample all threads and asyncio tasks for N seconds.
+    functions narrows task sampling, e.g. "process_automation_analysis,run_agent".
+    """
+    if format not in ("collapsed", "speedscope"):
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'speedscope'")
+    try:
+        profiler = await profile_for(
+            seconds,
+            interval=interval_ms / 1000,
+            target_functions=[f.strip() for f in functions.split(",") if f.strip()],
+            include_threads=include_threads,
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    print(f"🔬 Profile captured: {profiler.summary()}")
+    return render_profile(profiler, format)
+
+@app.post("/api/v1/admin/profile/session/{session_id}", dependencies=[Depends(require_admin)])
+async def profile_session(
+    session_id: str,
+    max_seconds: float = 120,
+    interval_ms: float = 5,
+    format: str = "speedscope",
+    include_threads: bool = False
+):
+    """Sample the tasks working on one analysis session until it finishes"""
+    if session_id not in analysis_sessions:
+        raise HTTPException(status_code=404, detail="Analysis session not found")
+    if format not in ("collapsed", "speedscope"):
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'speedscope'")
+    try:
+        profiler = await profile_for(
+            max_seconds,
+            interval=interval_ms / 1000,
+            session_id=session_id,
+            include_threads=include_threads,
+            until=lambda: getattr(analysis_sessions.get(session_id), "status", None) != "processing",
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    print(f"🔬 Session {session_id} profile captured: {profiler.summary()}")
+    return render_profile(profiler, format)
+
 @app.post("/api/v1/cx-analysis/create", response_model=AnalysisResponse)
-async def create_automation_analysis(request: AutomationRequest, background_tasks: BackgroundTasks):
+async def create_automation_analysis(
+    request: AutomationRequest,
+    background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """Create automation business case analysis"""
     
-    session_id = str(uuid.uuid4())
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_IDEMPOTENCY_KEY_LENGTH} characters")
     
-    # Initialize session with chat support
-    analysis_sessions[session_id] = {
-        "status": "processing",
-        "request": request.dict(),
-        "result": None,
-        "error": None,
-        "started_at": datetime.utcnow(),
-        "current_agent_index": 0,
-        "completed_agents": [],
-        "total_agents": 6,
-        "chat_messages": [],
-        "adk_integration": ADK_INTEGRATION
-    }
+    # Reuse a session for retries and double-submits instead of starting another pipeline
+    fingerprint = request_fingerprint(request.dict())
+    try:
+        existing = request_deduplicator.lookup(idempotency_key, fingerprint)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if existing is not None:
+        existing_id, reason = existing
+        existing_session = get_session(existing_id)
+        if existing_session is not None:
+            PIPELINE_RUNS_AVOIDED.labels(reason).inc()
+            return AnalysisResponse(
+                session_id=existing_id,
+                status=existing_session.status,
+                message="Attached to an existing automation analysis for this request."
+            )
+    
+    session_id = str(uuid.uuid4())
+    fallback_outputs = fallback_stage_outputs(request.dict())
+    session = open_analysis_session(session_id, request.dict(), idempotency_key, fingerprint, fallback_outputs)
+    if session.status == "complete":
+        return AnalysisResponse(
+            session_id=session_id,
+            status="complete",
+            message="Automation analysis calculated from benchmark models (server at capacity)."
+        )
     
     # Start background processing
-    background_tasks.add_task(process_automation_analysis, session_id, request)
+    background_tasks.add_task(process_automation_analysis, session_id, request, fingerprint, fallback_outputs=fallback_outputs)
     
     return AnalysisResponse(
         session_id=session_id,
@@ -437,92 +816,332 @@ async def create_automation_analysis(request: AutomationRequest, background_task
         message=f"Automation analysis started with {6} AI specialists collaborating."
     )
 
-async def process_automation_analysis(session_id: str, request: AutomationRequest):
-    """Process automation analysis with server-side chat generation"""
+def open_analysis_session(
+    session_id: str,
+    payload: Dict[str, Any],
+    idempotency_key: Optional[str],
+    fingerprint: str,
+    fallback_outputs: Dict[str, Dict[str, Any]]
+) -> AnalysisSession:
+    """
+    Register a new session with the engine report as its instant draft. When
+    the server is overloaded the draft becomes the result and the session is
+    complete; otherwise it is queued for the agents.
+    """
+    session = AnalysisSession(
+        request=payload,
+        agent_names=AGENT_NAMES,
+        adk_integration=ADK_INTEGRATION
+    )
+    session.draft = build_fallback_report(payload, project_id=f"AUTO-2024-{session_id[:8].upper()}", outputs=fallback_outputs)
+    analysis_sessions[session_id] = session
+    request_deduplicator.register(session_id, idempotency_key, fingerprint)
+    
+    # Overloaded: the calculated report is the result, no agents run
+    if DEGRADED_MODE_ACTIVE_SESSIONS and ACTIVE_SESSIONS.labels().value >= DEGRADED_MODE_ACTIVE_SESSIONS:
+        MOCK_FALLBACKS.labels("overload").inc()
+        session.result, session.draft = session.draft, None
+        session.status = "complete"
+        session.completed_count = session.total_agents
+        session.current_agent_index = 6
+        session.completed_at = time.time()
+        add_chat_message(session_id, ChatMessage(
+            id="system_degraded",
+            from_agent="system",
+            to_agent="all",
+            message="⚡ High demand: your business case was calculated directly from our benchmark models.",
+            type="completion"
+        ))
+        request_deduplicator.finish(fingerprint, session_id)
+        return session
+    
+    QUEUE_DEPTH.inc()
+    ACTIVE_SESSIONS.inc()
+    return session
+
+@app.post("/api/v1/cx-analysis/batch")
+async def create_analysis_batch(batch: BatchAnalysisRequest):
+    """Submit many analyses at once; items share precomputation and the model-call budget"""
+    
+    if not batch.requests:
+        raise HTTPException(status_code=400, detail="requests must not be empty")
+    if len(batch.requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {BATCH_MAX_ITEMS} requests")
+    
+    batch_id = str(uuid.uuid4())
+    payloads = [item.dict() for item in batch.requests]
+    
+    # One benchmark load and one vectorized scoring pass for the whole batch,
+    # plus the engine outputs each item's draft and pipeline reuse
+    precomputed, fallback_outputs = await run_blocking(precompute_batch, payloads)
+    
+    session_ids = []
+    runs = []
+    seen = {}
+    reused = 0
+    degraded = 0
+    for item, payload, scores, outputs in zip(batch.requests, payloads, precomputed, fallback_outputs):
+        fingerprint = request_fingerprint(payload)
+        existing_id = seen.get(fingerprint)
+        if existing_id is None:
+            existing = request_deduplicator.lookup(None, fingerprint)
+            # A session that has since expired cannot be attached to; run the item afresh
+            if existing is not None and get_session(existing[0]) is not None:
+                existing_id = existing[0]
+        if existing_id is not None:
+            PIPELINE_RUNS_AVOIDED.labels("batch_duplicate").inc()
+            session_ids.append(existing_id)
+            seen[fingerprint] = existing_id
+            reused += 1
+            continue
+        
+        session_id = str(uuid.uuid4())
+        session = open_analysis_session(session_id, payload, None, fingerprint, outputs)
+        seen[fingerprint] = session_id
+        session_ids.append(session_id)
+        if session.status == "complete":
+            degraded += 1
+            continue
+        runs.append((session_id, item, fingerprint, scores, outputs))
+    
+    # Highest implementation priority first, so they get the shared budget first
+    runs.sort(key=lambda run: batch_order(run[3]))
+    
+    analysis_batches[batch_id] = {
+        "session_ids": session_ids,
+        "precomputed": precomputed,
+        "created_at": time.time()
+    }
+    task = asyncio.create_task(process_analysis_batch(batch_id, runs))
+    batch_tasks.add(task)
+    task.add_done_callback(batch_tasks.discard)
+    
+    return {
+        "batch_id": batch_id,
+        "session_ids": session_ids,
+        "pipelines_started": len(runs),
+        "duplicates_attached": reused,
+        "calculated_without_agents": degraded,
+        "status_url": f"/api/v1/cx-analysis/batch/{batch_id}"
+    }
+
+async def process_analysis_batch(batch_id: str, runs: List):
+    """Run all new batch items concurrently under the shared model-call budget"""
+    
+    print(f"📦 Batch {batch_id}: running {len(runs)} analyses ({BATCH_MODEL_CONCURRENCY} concurrent agent steps)")
+    slots = get_batch_model_slots()
+    await asyncio.gather(*(
+        process_automation_analysis(session_id, request, fingerprint, model_slots=slots, fallback_outputs=outputs)
+        for session_id, request, fingerprint, _, outputs in runs
+    ))
+    print(f"📦 Batch {batch_id} finished")
+
+def batch_status(batch_id: str) -> Dict[str, Any]:
+    batch = analysis_batches[batch_id]
+    items = []
+    counts = {"processing": 0, "complete": 0, "error": 0}
+    completed_steps = 0
+    for session_id, scores in zip(batch["session_ids"], batch["precomputed"]):
+        session = get_session(session_id)
+        status = session.status if session is not None else "expired"
+        counts[status] = counts.get(status, 0) + 1
+        completed = session.completed_count if session is not None else 0
+        completed_steps += completed
+        items.append({
+            "session_id": session_id,
+            "status": status,
+            "progress_percentage": int(completed / 6 * 100),
+            "complexity_level": scores.get("complexity_level"),
+            "implementation_priority": scores.get("implementation_priority")
+        })
+    total = len(items)
+    return {
+        "batch_id": batch_id,
+        "status": "processing" if counts["processing"] else "complete",
+        "total": total,
+        "counts": counts,
+        "progress_percentage": int(completed_steps / (total * 6) * 100) if total else 100,
+        "items": items
+    }
+
+@app.get("/api/v1/cx-analysis/batch/{batch_id}")
+async def get_batch_status(batch_id: str):
+    """Aggregated progress for every analysis in a batch"""
+    
+    if batch_id not in analysis_batches:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch_status(batch_id)
+
+@app.get("/api/v1/cx-analysis/batch/{batch_id}/stream")
+async def stream_batch_status(batch_id: str, interval: float = 1.0):
+    """NDJSON progress snapshots for a batch, emitted on change until it completes"""
+    
+    if batch_id not in analysis_batches:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    interval = max(0.25, interval)
+    
+    async def body():
+        last = None
+        while True:
+            snapshot = batch_status(batch_id)
+            summary = (snapshot["counts"], snapshot["progress_percentage"])
+            if summary != last:
+                last = summary
+                yield json.dumps({key: value for key, value in snapshot.items() if key != "items"}) + "\n"
+            if snapshot["status"] == "complete":
+                break
+            await asyncio.sleep(interval)
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+async def process_automation_analysis(
+    session_id: str,
+    request: AutomationRequest,
+    fingerprint: Optional[str] = None,
+    model_slots: Optional[asyncio.Semaphore] = None,
+    fallback_outputs: Optional[Dict[str, Dict[str, Any]]] = None
+):
+    """Process automation analysis with server-side chat generation; fallback_outputs are the request's engine outputs, if already computed"""
+    
+    if fallback_outputs is None:
+        fallback_outputs = await run_blocking(fallback_stage_outputs, request.dict())
+    QUEUE_DEPTH.dec()
+    analysis_started = time.perf_counter()
+    # Retries share the run's deadline
+    pipeline_deadline = time.time() + PIPELINE_DEADLINE_SECONDS
+    await run_blocking(checkpoint_store.start, session_id, request.dict())
     
     try:
         print(f"🚀 Starting automation analysis for session {session_id}")
         
         # Add initial system message
-        add_chat_message(session_id, {
-            "id": "system_start",
-            "from_agent": "system",
-            "to_agent": "all",
-            "message": "🤖 AI automation specialists are collaborating on your business case...",
-            "type": "system",
-            "timestamp": datetime.utcnow().isoformat()
-        })
+        if analysis_sessions[session_id].completed_count == 0:
+            add_chat_message(session_id, ChatMessage(
+                id="system_start",
+                from_agent="system",
+                to_agent="all",
+                message="🤖 AI automation specialists are collaborating on your business case...",
+                type="system"
+            ))
         
-        # Process each agent sequentially with server-side chat
-        await process_agents_with_chat(session_id, request)
+        # Process each agent sequentially with server-side chat; a failed stage
+        # is retried from the first stage without a checkpoint
+        retries = 0
+        while True:
+            try:
+                with stage_span("automation_pipeline", session_id=session_id, attempt=retries + 1):
+                    await process_agents_with_chat(session_id, request, model_slots, pipeline_deadline, fallback_outputs)
+                break
+            except Exception as e:
+                if retries >= PIPELINE_MAX_RETRIES or isinstance(e, StageDeadlineExceeded):
+                    raise
+                retries += 1
+                session = analysis_sessions[session_id]
+                failed_agent = AGENT_MAPPING[session.current_agent_index]
+                MODEL_ERRORS.labels(failed_agent["technical_name"]).inc()
+                PIPELINE_RECOVERIES.labels("retry").inc()
+                print(f"🔁 Retrying session {session_id} from {failed_agent['display_name']} ({retries}/{PIPELINE_MAX_RETRIES}): {e}")
+                add_chat_message(session_id, ChatMessage(
+                    id="system_retry",
+                    from_agent="system",
+                    to_agent="all",
+                    message=f"🔁 {failed_agent['display_name']} hit a problem, retrying from its checkpoint ({retries}/{PIPELINE_MAX_RETRIES})...",
+                    type="system"
+                ))
+                await asyncio.sleep(PIPELINE_RETRY_BACKOFF * 2 ** (retries - 1))
         
-        # Generate final comprehensive report
-        final_report = generate_automation_report(session_id, request)
+        # Generate final comprehensive report (off the event loop when offloading is enabled)
+        with stage_span("generate_automation_report", session_id=session_id):
+            if OFFLOAD_BLOCKING_TOOLS:
+                final_report = await run_blocking(generate_automation_report, session_id, request, fallback_outputs)
+            else:
+                final_report = generate_automation_report(session_id, request, fallback_outputs)
         
         # Add final completion message
-        add_chat_message(session_id, {
-            "id": "system_complete",
-            "from_agent": "system", 
-            "to_agent": "all",
-            "message": "✅ Collaboration complete! Professional automation business case ready for executive review.",
-            "type": "completion",
-            "timestamp": datetime.utcnow().isoformat()
-        })
+        add_chat_message(session_id, ChatMessage(
+            id="system_complete",
+            from_agent="system",
+            to_agent="all",
+            message="✅ Collaboration complete! Professional automation business case ready for executive review.",
+            type="completion"
+        ))
         
         # Update session with final results
-        analysis_sessions[session_id].update({
-            "status": "complete",
-            "result": final_report,
-            "completed_agents": [AGENT_MAPPING[i]["technical_name"] for i in range(6)],
-            "current_agent_index": 6,
-            "completed_at": datetime.utcnow(),
-        })
+        session = analysis_sessions[session_id]
+        session.status = "complete"
+        session.result = final_report
+        session.draft = None
+        session.completed_count = session.total_agents
+        session.current_agent_index = 6
+        session.completed_at = time.time()
+        await run_blocking(checkpoint_store.finish, session_id, "complete")
         
         print(f"✅ Analysis complete for session {session_id}")
+        ANALYSIS_DURATION.labels("complete").observe(time.perf_counter() - analysis_started)
         
     except Exception as e:
         error_message = f"Analysis failed: {str(e)}"
         print(f"❌ {error_message}")
         
         # Add error message to chat
-        add_chat_message(session_id, {
-            "id": "system_error",
-            "from_agent": "system",
-            "to_agent": "all", 
-            "message": f"❌ Analysis encountered an error: {error_message}",
-            "type": "error",
-            "timestamp": datetime.utcnow().isoformat()
-        })
+        add_chat_message(session_id, ChatMessage(
+            id="system_error",
+            from_agent="system",
+            to_agent="all",
+            message=f"❌ Analysis encountered an error: {error_message}",
+            type="error"
+        ))
         
-        analysis_sessions[session_id].update({
-            "status": "error",
-            "error": error_message,
-            "current_agent_index": 6,
-            "failed_at": datetime.utcnow()
-        })
+        session = analysis_sessions[session_id]
+        session.status = "error"
+        session.error = error_message
+        session.current_agent_index = 6
+        session.failed_at = time.time()
+        await run_blocking(checkpoint_store.finish, session_id, "error")
+        ANALYSIS_DURATION.labels("error").observe(time.perf_counter() - analysis_started)
+    
+    finally:
+        if fingerprint is not None:
+            request_deduplicator.finish(fingerprint, session_id)
+        get_ledger_windows().record_session()
+        ACTIVE_SESSIONS.dec()
 
-async def process_agents_with_chat(session_id: str, request: AutomationRequest):
-    """Process agents sequentially with server-generated chat messages"""
+async def process_agents_with_chat(
+    session_id: str,
+    request: AutomationRequest,
+    model_slots: Optional[asyncio.Semaphore] = None,
+    pipeline_deadline: Optional[float] = None,
+    fallback_outputs: Optional[Dict[str, Dict[str, Any]]] = None
+):
+    """Process agents sequentially with server-generated chat messages; each stage gets its share of pipeline_deadline"""
+    
+    if pipeline_deadline is None:
+        pipeline_deadline = time.time() + PIPELINE_DEADLINE_SECONDS
     
-    # Calculate context for realistic messages
+    # Engine outputs stand in for the agents' and give the chat messages their figures
+    stage_outputs = fallback_outputs if fallback_outputs is not None else fallback_stage_outputs(request.dict())
     context = {
         "volume": request.monthly_volume,
         "manual_percent": request.manual_percentage,
         "people": request.people_involved,
         "scenario": request.business_scenario,
-        "savings": request.monthly_volume * 45
+        "savings": stage_outputs["roi_analysis"]["monthly_savings"],
+        "roi": stage_outputs["roi_analysis"]["roi_percentage"]
     }
     
     # Agent processing times (realistic durations)
     agent_timings = [8, 12, 10, 9, 14, 7]  # seconds per agent (faster for demo)
+    complexity = request_complexity(request.dict())
     
-    for i in range(6):
+    # Stages before completed_count were restored from checkpoints
+    for i in range(analysis_sessions[session_id].completed_count, 6):
         agent_info = AGENT_MAPPING[i]
         technical_name = agent_info["technical_name"]
         display_name = agent_info["display_name"]
         
         # Set current agent
-        analysis_sessions[session_id]["current_agent_index"] = i
+        analysis_sessions[session_id].current_agent_index = i
+        agent_started = time.perf_counter()
         
         print(f"🤖 Agent {i+1}/6 started: {display_name} ({technical_name})")
         
@@ -530,20 +1149,57 @@ async def process_agents_with_chat(session_id: str, request: AutomationRequest):
         start_message = generate_agent_start_message(i, context, agent_info)
         add_chat_message(session_id, start_message)
         
-        # Simulate agent processing time
-        await asyncio.sleep(agent_timings[i])
+        # Simulate agent processing time, bounded by the stage deadline
+        output_key = agent_info["output_key"]
+        budget = max(0.0, stage_deadline(pipeline_deadline, output_key) - time.time())
+        # This attempt's costs; ADK model calls inside the scope add their tokens
+        attempt_ledger = {technical_name: StageCost()}
+        stage_cost = attempt_ledger[technical_name]
         
-        # Mark agent as completed
-        completed_agents = [AGENT_MAPPING[j]["technical_name"] for j in range(i + 1)]
-        analysis_sessions[session_id]["completed_agents"] = completed_agents
+        # Every session's stage waits for the adaptive limit of the model it is routed to
+        model_limiter = get_model_limiter(get_model_router().model(complexity, output_key))
         
-        # Add agent completion message
+        async def run_stage():
+            queued = time.perf_counter()
+            async with model_slots or nullcontext(), model_limiter.slot(technical_name):
+                stage_cost.queue_seconds += time.perf_counter() - queued
+                # The sleep stands in for the agent's model call
+                model_started = time.perf_counter()
+                try:
+                    await asyncio.sleep(agent_timings[i])
+                finally:
+                    stage_cost.model_seconds += time.perf_counter() - model_started
+                    stage_cost.model_calls += 1
+        
+        with stage_span(f"agent_run [{technical_name}]", session_id=session_id, agent_index=i), ledger_scope(attempt_ledger):
+            try:
+                await asyncio.wait_for(run_stage(), timeout=budget)
+                stage_output = stage_outputs[output_key]
+            except asyncio.TimeoutError:
+                stage_output = local_stage_output(output_key, analysis_sessions[session_id].stage_outputs)
+                if stage_output is None:
+                    STAGE_DEADLINES_EXCEEDED.labels(output_key, "error").inc()
+                    raise StageDeadlineExceeded(f"{display_name} exceeded its {budget:.1f}s budget")
+                STAGE_DEADLINES_EXCEEDED.labels(output_key, "local_fallback").inc()
+                print(f"⏱️ {display_name} over its deadline, using the local calculation")
+            finally:
+                stage_cost.wall_seconds = time.perf_counter() - agent_started
+                record_stage_cost(session_id, attempt_ledger)
+        
+        # Checkpoint the stage output, then mark agent as completed
         completion_message = generate_agent_completion_message(i, context, agent_info)
+        await run_blocking(checkpoint_store.save, session_id, i, agent_info["output_key"], stage_output)
+        session = analysis_sessions[session_id]
+        session.stage_outputs[agent_info["output_key"]] = stage_output
+        session.completed_count = i + 1
+        
+        # Add agent completion message
         add_chat_message(session_id, completion_message)
+        AGENT_DURATION.labels(technical_name).observe(time.perf_counter() - agent_started)
         
         print(f"✅ Agent {i+1}/6 completed: {display_name}")
 
-def generate_agent_start_message(agent_index: int, context: Dict, agent_info: Dict) -> Dict:
+def generate_agent_start_message(agent_index: int, context: Dict, agent_info: Dict) -> ChatMessage:
     """Generate contextual start message for each agent"""
     
     messages = {
@@ -552,195 +1208,174 @@ def generate_agent_start_message(agent_index: int, context: Dict, agent_info: Di
         2: f"Developing implementation strategy for {context['volume']:,} transaction volume. Planning phased deployment approach.",
         3: f"Evaluating implementation risks for {'high-volume' if context['volume'] > 1000 else 'standard'} automation project. Assessing change management needs.",
         4: f"Designing technical architecture for {context['scenario']} automation. Planning system integration approach.", 
-        5: f"Compiling executive business case with {((context['savings'] * 12) / max(50000, context['volume'] * 150) * 100):.0f}% ROI projection and implementation roadmap."
+        5: f"Compiling executive business case with {context['roi']:.0f}% ROI projection and implementation roadmap."
     }
     
-    return {
-        "id": f"start_{agent_index}",
-        "from_agent": agent_info["technical_name"],
-        "to_agent": "all",
-        "message": messages.get(agent_index, f"Starting {agent_info['display_name']} analysis..."),
-        "type": "start",
-        "timestamp": datetime.utcnow().isoformat()
-    }
+    return ChatMessage(
+        id=f"start_{agent_index}",
+        from_agent=agent_info["technical_name"],
+        to_agent="all",
+        message=messages.get(agent_index, f"Starting {agent_info['display_name']} analysis..."),
+        type="start"
+    )
 
-def generate_agent_completion_message(agent_index: int, context: Dict, agent_info: Dict) -> Dict:
+def generate_agent_completion_message(agent_index: int, context: Dict, agent_info: Dict) -> ChatMessage:
     """Generate contextual completion message for each agent"""
     
     messages = {
         0: f"✅ Process analysis complete. Identified {context['manual_percent']}% automation opportunity with significant efficiency gains.",
-        1: f"✅ Financial projections complete. Calculated ${context['savings']:,} monthly savings with strong ROI fundamentals.",
+        1: f"✅ Financial projections complete. Calculated ${context['savings']:,.0f} monthly savings with strong ROI fundamentals.",
         2: f"✅ Implementation roadmap developed. Created 3-phase deployment strategy optimized for {context['people']} team members.",
         3: f"✅ Risk assessment complete. Identified {'medium-high' if context['volume'] > 1000 else 'medium'} complexity with mitigation strategies.",
         4: f"✅ Technology integration planned. Designed scalable architecture compatible with existing systems.",
         5: f"✅ Executive business case compiled. Generated comprehensive analysis ready for C-level presentation."
     }
     
-    return {
-        "id": f"complete_{agent_index}",
-        "from_agent": agent_info["technical_name"],
-        "to_agent": "all", 
-        "message": messages.get(agent_index, f"✅ {agent_info['display_name']} analysis complete."),
-        "type": "completion",
-        "timestamp": datetime.utcnow().isoformat()
-    }
+    return ChatMessage(
+        id=f"complete_{agent_index}",
+        from_agent=agent_info["technical_name"],
+        to_agent="all",
+        message=messages.get(agent_index, f"✅ {agent_info['display_name']} analysis complete."),
+        type="completion"
+    )
+
+def record_stage_cost(session_id: str, attempt_ledger: Dict[str, StageCost]) -> None:
+    """Add one stage attempt's costs to the session ledger and the time windows"""
+    session = analysis_sessions.get(session_id)
+    windows = get_ledger_windows()
+    for agent, cost in attempt_ledger.items():
+        if session is not None:
+            session.ledger.setdefault(agent, StageCost()).add(cost)
+        windows.record(agent, cost)
 
-def add_chat_message(session_id: str, message: Dict):
+def add_chat_message(session_id: str, message: ChatMessage):
     """Add a chat message to the session"""
-    if session_id in analysis_sessions:
-        analysis_sessions[session_id]["chat_messages"].append(message)
+    session = analysis_sessions.get(session_id)
+    if session is not None:
+        session.add_message(message)
 
-def generate_automation_report(session_id: str, request: AutomationRequest) -> Dict[str, Any]:
-    """Generate comprehensive automation business case report"""
-    
-    # Calculate realistic metrics
-    monthly_savings = request.monthly_volume * 45
-    annual_savings = monthly_savings * 12
-    implementation_cost = max(75000, min(300000, request.monthly_volume * 200))
-    roi_percentage = (annual_savings / implementation_cost) * 100
-    payback_months = implementation_cost / monthly_savings
-    
-    return {
-        "project_id": f"AUTO-2024-{session_id[:8].upper()}",
-        "processing_time_seconds": 60,
-        "analysis_complete": True,
-        
-        "deliverables": {
-            "executive_summary": f"Comprehensive automation analysis for {request.business_scenario} reveals significant opportunity with {request.monthly_volume:,} monthly transactions involving {request.people_involved} staff members at {request.manual_percentage}% manual effort. Projected ROI of {roi_percentage:.0f}% with {payback_months:.1f} month payback period supports strong business case for automation investment.",
-            
-            "automation_opportunities": [
-                "Workflow automation to eliminate manual processing steps and reduce cycle time by 70-85%",
-                "System integration for seamless data flow between platforms, reducing errors by 90%", 
-                "Process standardization to ensure consistency and eliminate process variations",
-                "Real-time monitoring and automated reporting for complete process visibility",
-                "Scalable architecture to handle 3x current volume without additional staff"
-            ],
-            
-            "strategic_recommendations": [
-                "Execute phased implementation starting with pilot program to minimize risk",
-                "Establish comprehensive change management program with stakeholder engagement",
-                "Deploy performance monitoring and analytics dashboard for optimization",
-                "Create automation governance framework for ongoing management",
-                "Implement user training program with super-user network for adoption success"
-            ],
-            
-            "estimated_roi": f"{roi_percentage:.0f}%",
-            "payback_period": f"{payback_months:.1f} months", 
-            "annual_savings": f"${annual_savings:,.0f}",
-            
-            "implementation_roadmap": {
-                "phase_1": {
-                    "title": "Foundation & Planning (Months 1-2)",
-                    "actions": [
-                        "Project charter and stakeholder alignment",
-                        "Detailed process documentation and requirements gathering", 
-                        "Technology evaluation and vendor selection",
-                        "Change management strategy development"
-                    ],
-                    "expected_impact": "Project foundation established with clear roadmap"
-                },
-                "phase_2": {
-                    "title": "Development & Integration (Months 3-5)",
-                    "actions": [
-                        "Automation platform configuration and workflow development",
-                        "System integration and API development",
-                        "Comprehensive testing including user acceptance testing", 
-                        "Training material development and pilot preparation"
-                    ],
-                    "expected_impact": f"Functional solution ready, targeting ${monthly_savings * 0.3:,.0f} monthly savings"
-                },
-                "phase_3": {
-                    "title": "Deployment & Optimization (Months 6-8)",
-                    "actions": [
-                        "Production deployment with phased rollout",
-                        "User training and adoption program execution",
-                        "Performance monitoring and optimization",
-                        "Continuous improvement and scaling planning"
-                    ],
-                    "expected_impact": f"Full automation delivering ${monthly_savings:,.0f} monthly savings"
-                }
-            },
-            
-            "success_metrics": [
-                {
-                    "metric": "Process Efficiency",
-                    "target": "75% time reduction",
-                    "timeframe": "6 months",
-                    "measurement": "Average processing time per transaction"
-                },
-                {
-                    "metric": "Cost Savings", 
-                    "target": f"${annual_savings:,.0f} annually",
-                    "timeframe": "12 months",
-                    "measurement": "Monthly cost reduction vs baseline"
-                },
-                {
-                    "metric": "Error Reduction",
-                    "target": "90% fewer errors",
-                    "timeframe": "6 months", 
-                    "measurement": "Error rate monitoring and quality metrics"
-                },
-                {
-                    "metric": "User Adoption",
-                    "target": "95% automation utilization",
-                    "timeframe": "9 months",
-                    "measurement": "Transaction volume through automated processes"
-                }
-            ],
-            
-            "risk_assessment": f"Medium risk implementation with {payback_months:.1f} month payback. Mitigation strategies include comprehensive change management and phased rollout. Success probability: 87%."
-        },
-        
-        "automation_analysis_details": {
-            "scenario_analyzed": request.business_scenario,
-            "complexity_level": "process_automation",
-            "confidence_score": "94%",
-            "methodology": "Server-Side Multi-Agent Sequential Analysis with Real-time Chat",
-            "agents_executed": 6,
-            "chat_enabled": True
-        }
-    }
+def generate_automation_report(
+    session_id: str,
+    request: AutomationRequest,
+    fallback_outputs: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """Merge the typed stage outputs into the executive business case report"""
+    session = analysis_sessions.get(session_id)
+    return merge_business_case(
+        project_id=f"AUTO-2024-{session_id[:8].upper()}",
+        stage_outputs=session.stage_outputs if session is not None else {},
+        # Checkpoints written before stages were typed are recomputed by the engine
+        fallback_outputs=fallback_outputs if fallback_outputs is not None else fallback_stage_outputs(request.dict())
+    )
 
 @app.get("/api/v1/cx-analysis/status/{session_id}")
-async def get_analysis_status(session_id: str):
-    """Get analysis status with server-generated chat messages"""
+async def get_analysis_status(session_id: str, include: str = ""):
+    """Get analysis status with server-generated chat messages; include=ledger adds the cost ledger"""
     
-    if session_id not in analysis_sessions:
+    session_data = get_session(session_id)
+    if session_data is None:
         raise HTTPException(status_code=404, detail="Analysis session not found")
     
-    session_data = analysis_sessions[session_id]
-    
     # Get current state
-    current_agent_index = session_data.get("current_agent_index", 0)
-    completed_agents = session_data.get("completed_agents", [])
+    current_agent_index = session_data.current_agent_index
+    completed_agents = session_data.completed_agents
     progress_percentage = (len(completed_agents) / 6) * 100
     
     # Determine current agent
     current_agent = None
-    if session_data["status"] == "processing" and current_agent_index < 6:
+    if session_data.status == "processing" and current_agent_index < 6:
         current_agent = AGENT_MAPPING[current_agent_index]["technical_name"]
     
+    complexity = request_complexity(session_data.request)
+    
     # Return complete status with chat messages
-    return {
-        "status": session_data["status"],
+    status = {
+        "status": session_data.status,
         "completed_agents": completed_agents,
         "current_agent": current_agent,
         "progress_percentage": int(progress_percentage),
         "total_agents": 6,
-        "chat_messages": session_data.get("chat_messages", []),
-        "result": session_data.get("result"),
-        "error": session_data.get("error")
+        "chat_messages": session_data.messages_as_dicts(),
+        "checkpointed_stages": list(session_data.stage_outputs),
+        "attempts": session_data.attempts,
+        "model_routing": {
+            "complexity": complexity,
+            "models": get_model_router().plan(
+                complexity, [agent_info["output_key"] for agent_info in AGENT_MAPPING.values()]
+            )
+        },
+        "draft": session_data.draft,
+        "result": session_data.result,
+        "error": session_data.error
     }
+    if "ledger" in include.split(","):
+        status["ledger"] = ledger_as_dict(session_data.ledger)
+    return status
+
+@app.get("/api/v1/cx-analysis/ledger")
+async def get_cost_ledger(window: Optional[int] = None):
+    """Time and token totals per agent over trailing windows, for capacity planning"""
+    windows = get_ledger_windows()
+    return {"windows": [windows.summary(seconds) for seconds in ([window] if window else LEDGER_WINDOWS)]}
+
+@app.get("/api/v1/cx-analysis/export/{session_id}")
+async def export_analysis_report(
+    session_id: str,
+    format: str = "pdf",
+    if_none_match: Optional[str] = Header(None)
+):
+    """Download the finished report as PDF, DOCX or Markdown (ETag-cached)"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {sorted(EXPORT_FORMATS)}")
+
+    session_data = get_session(session_id)
+    if session_data is None:
+        raise HTTPException(status_code=404, detail="Analysis session not found")
+    if session_data.status != "complete" or not session_data.result:
+        raise HTTPException(status_code=409, detail=f"Analysis is {session_data.status}; no report to export yet")
+
+    key = content_hash(session_data.result, format)
+    etag = f'"{key[:32]}"'
+    media_type, extension = EXPORT_FORMATS[format]
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    _, body = await report_exporter.export(session_data.result, format, key)
+    headers["Content-Disposition"] = f'attachment; filename="automation-report-{session_id[:8]}.{extension}"'
+    return Response(content=body, media_type=media_type, headers=headers)
+
+@app.post("/api/v1/cx-analysis/resume/{session_id}", response_model=AnalysisResponse)
+async def resume_automation_analysis(session_id: str, background_tasks: BackgroundTasks):
+    """Restart a failed or interrupted analysis from its first incomplete stage"""
+    
+    live_session = analysis_sessions.get(session_id)
+    if live_session is not None and live_session.status == "processing":
+        raise HTTPException(status_code=409, detail="Analysis is still running")
+    
+    session_data = restore_session(session_id)
+    if session_data is None:
+        raise HTTPException(status_code=404, detail="Analysis session not found")
+    if session_data.status == "complete":
+        raise HTTPException(status_code=409, detail="Analysis is already complete")
+    
+    prepare_resume(session_id, session_data, "resume")
+    background_tasks.add_task(process_automation_analysis, session_id, AutomationRequest(**session_data.request))
+    
+    return AnalysisResponse(
+        session_id=session_id,
+        status="processing",
+        message=f"Resuming automation analysis at stage {session_data.completed_count + 1} of 6."
+    )
 
 @app.post("/api/v1/cx-analysis/refine/{session_id}")
 async def refine_automation_analysis(session_id: str, refinement_request: dict):
     """Refine automation business case"""
     
-    if session_id not in analysis_sessions:
+    session_data = get_session(session_id)
+    if session_data is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    session_data = analysis_sessions[session_id]
-    original_result = session_data.get("result")
+    original_result = session_data.result
     
     if not original_result:
         raise HTTPException(status_code=400, detail="No analysis to refine")
@@ -768,6 +1403,106 @@ async def refine_automation_analysis(session_id: str, refinement_request: dict):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Refinement failed: {str(e)}")
 
+@app.post("/api/v1/portfolio/score")
+async def score_process_portfolio(request: PortfolioRequest):
+    """Score an entire process inventory in one pass and return the top-k"""
+    
+    if request.objective not in PORTFOLIO_OBJECTIVES:
+        raise HTTPException(status_code=400, detail=f"objective must be one of: {', '.join(PORTFOLIO_OBJECTIVES)}")
+    if request.top_k < 1:
+        raise HTTPException(status_code=400, detail="top_k must be at least 1")
+    
+    candidates = [candidate.dict() for candidate in request.candidates]
+    started = time.perf_counter()
+    result = await run_blocking(rank_portfolio, candidates, request.objective, request.top_k)
+    result["processing_time_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+@app.post("/api/v1/portfolio/optimize")
+async def optimize_process_portfolio(request: PortfolioOptimizeRequest):
+    """Choose which processes to fund under a budget and optional payback timeline"""
+    
+    if request.budget <= 0:
+        raise HTTPException(status_code=400, detail="budget must be positive")
+    if request.method not in ("auto", "dp", "greedy"):
+        raise HTTPException(status_code=400, detail="method must be one of: auto, dp, greedy")
+    
+    candidates = [candidate.dict() for candidate in request.candidates]
+    started = time.perf_counter()
+    result = await run_blocking(optimize_portfolio, candidates, request.budget, request.max_payback_months, request.method)
+    result["processing_time_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+@app.post("/api/v1/benchmarks/similar")
+async def find_similar_examples(request: SimilarExamplesRequest):
+    """Nearest real-world examples and past projects for a process profile"""
+    
+    if request.k < 1:
+        raise HTTPException(status_code=400, detail="k must be at least 1")
+    
+    index = get_example_index()
+    started = time.perf_counter()
+    examples = index.query(
+        k=request.k,
+        complexity_level=request.complexity_level,
+        industry_type=request.industry_type,
+        monthly_volume=request.monthly_volume,
+        roi_percentage=request.roi_percentage,
+        timeframe_months=request.timeframe_months
+    )
+    return {
+        "examples": examples,
+        "indexed_examples": len(index),
+        "query_time_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+
+@app.post("/api/v1/benchmarks/cases")
+async def upload_case_library(request: CaseLibraryRequest):
+    """Load our own past projects into the similarity index"""
+    
+    library_size = await run_blocking(load_case_library, request.cases, request.replace)
+    return {"case_library_size": library_size, "indexed_examples": len(get_example_index())}
+
+# Uploads larger than this spill from memory to a temporary file
+BULK_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+@app.post("/api/v1/bulk/score")
+async def bulk_score_inventory(request: Request, format: str = "csv", chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Score a CSV/JSONL/Parquet process inventory sent as the raw request body.
+    Streams back one JSON line per row (scores or validation errors) and a summary line.
+    """
+    
+    if format not in SUPPORTED_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(SUPPORTED_FORMATS)}")
+    unavailable = format_unavailable(format)
+    if unavailable:
+        raise HTTPException(status_code=400, detail=unavailable)
+    if chunk_size < 1:
+        raise HTTPException(status_code=400, detail="chunk_size must be at least 1")
+    
+    upload = tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_MAX_MEMORY)
+    async for block in request.stream():
+        upload.write(block)
+    upload.seek(0)
+    
+    lines = stream_scores(upload, format, chunk_size)
+    
+    async def body():
+        try:
+            # Each chunk is parsed and scored on the blocking pool, never on the loop
+            while True:
+                chunk = await run_blocking(next, lines, None)
+                if chunk is None:
+                    break
+                yield chunk
+        except RuntimeError as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            upload.close()
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
 # 🚀 EXPLICIT OPTIONS HANDLER for CORS preflight
 @app.options("/{path:path}")
 async def handle_options(path: str):
@@ -0,0 +1,246 @@
+# app/model_cassettes.py - Record/replay of model calls for offline tests and benchmarks
+"""
+A cassette is a JSON file of model interactions keyed by a fingerprint of
+the request (model, system instruction, contents, response schema and
+tools). CassetteLlm wraps an agent's model:
+
+- record: call the real model and store the responses and latency
+- replay: answer from the cassette; with strict, an unrecorded request
+  raises CassetteMiss, otherwise it goes to the real model
+- once: replay if the cassette file exists, record it otherwise
+
+Replayed calls can wait for the recorded latency, a fixed number of seconds
+(synthetic latency for benchmarks) or not at all.
+
+Set MODEL_CASSETTE_MODE (with MODEL_CASSETTE_PATH, MODEL_CASSETTE_STRICT
+and MODEL_CASSETTE_LATENCY) to run the whole app against a cassette, or
+wrap one pipeline with use_cassette in tests. A use_cassette scope takes
+the place of the app-wide cassette while it is open.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from google.adk.models import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from pydantic import BaseModel, PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ("off", "record", "replay", "once")
+CASSETTE_VERSION = 1
+
+MODEL_CASSETTE_MODE = os.getenv("MODEL_CASSETTE_MODE", "off")
+MODEL_CASSETTE_PATH = os.getenv("MODEL_CASSETTE_PATH", "model_cassette.json")
+MODEL_CASSETTE_STRICT = os.getenv("MODEL_CASSETTE_STRICT", "true").lower() == "true"
+# "recorded", "none" or a number of seconds per replayed call
+MODEL_CASSETTE_LATENCY = os.getenv("MODEL_CASSETTE_LATENCY", "none")
+
+class CassetteMiss(Exception):
+    """Strict replay met a request that is not in the cassette"""
+
+def _without_call_ids(value: Any) -> Any:
+    """Drop the random ids ADK gives function calls so recordings match across runs"""
+    if isinstance(value, dict):
+        return {
+            key: _without_call_ids(item) for key, item in value.items()
+            if not (key == "id" and ("name" in value and ("args" in value or "response" in value)))
+        }
+    if isinstance(value, list):
+        return [_without_call_ids(item) for item in value]
+    return value
+
+def _schema_name(schema: Any) -> Optional[str]:
+    if schema is None:
+        return None
+    return getattr(schema, "__name__", None) or json.dumps(
+        schema.model_dump(mode="json", exclude_none=True) if isinstance(schema, BaseModel) else schema,
+        sort_keys=True,
+        default=str
+    )
+
+def request_fingerprint(llm_request) -> str:
+    """Stable hash of everything that determines the model's answer"""
+    config = llm_request.config
+    instruction = config.system_instruction if config else None
+    if isinstance(instruction, BaseModel):
+        instruction = instruction.model_dump(mode="json", exclude_none=True)
+    tools = sorted(
+        declaration.name
+        for tool in (config.tools or [] if config else [])
+        for declaration in (getattr(tool, "function_declarations", None) or [])
+    )
+    payload = {
+        "model": llm_request.model,
+        "system_instruction": instruction,
+        "contents": _without_call_ids([content.model_dump(mode="json", exclude_none=True) for content in llm_request.contents]),
+        "response_schema": _schema_name(config.response_schema if config else None),
+        "tools": tools
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+def _request_excerpt(llm_request, limit: int = 160) -> str:
+    for content in reversed(llm_request.contents):
+        for part in content.parts or []:
+            if part.text:
+                return part.text[:limit]
+    return ""
+
+class Cassette:
+    """Interactions by fingerprint, saved atomically after every recording"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.interactions: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.interactions = {entry["fingerprint"]: entry for entry in data.get("interactions", [])}
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def lookup(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        return self.interactions.get(fingerprint)
+
+    def record(self, fingerprint: str, llm_request, responses: List[LlmResponse], latency_seconds: float) -> None:
+        labels = llm_request.config.labels if llm_request.config and llm_request.config.labels else {}
+        with self._lock:
+            self.interactions[fingerprint] = {
+                "fingerprint": fingerprint,
+                "agent": labels.get("adk_agent_name"),
+                "model": llm_request.model,
+                "request_excerpt": _request_excerpt(llm_request),
+                "latency_seconds": round(latency_seconds, 4),
+                "responses": [response.model_dump(mode="json", exclude_none=True) for response in responses]
+            }
+            self.save()
+
+    def save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        data = {"version": CASSETTE_VERSION, "interactions": list(self.interactions.values())}
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=1)
+        os.replace(temp_path, self.path)
+
+class CassetteLlm(BaseLlm):
+    """Records the wrapped model's responses, or replays them from the cassette"""
+
+    inner: BaseLlm
+    mode: str = "replay"
+    strict: bool = True
+    latency: Union[str, float] = "none"
+    _cassette: Cassette = PrivateAttr()
+
+    def __init__(self, cassette: Cassette, **data: Any):
+        super().__init__(**data)
+        if self.mode not in CASSETTE_MODES[1:]:
+            raise ValueError(f"Unknown cassette mode: {self.mode}")
+        self._cassette = cassette
+        # "once" is decided when the cassette is opened, not per call
+        if self.mode == "once":
+            self.mode = "replay" if cassette.exists else "record"
+
+    async def _replay_delay(self, entry: Dict[str, Any]) -> None:
+        if self.latency == "recorded":
+            delay = entry.get("latency_seconds", 0.0)
+        elif self.latency == "none":
+            delay = 0.0
+        else:
+            delay = float(self.latency)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        fingerprint = request_fingerprint(llm_request)
+        if self.mode == "replay":
+            entry = self._cassette.lookup(fingerprint)
+            if entry is not None:
+                await self._replay_delay(entry)
+                for response in entry["responses"]:
+                    yield LlmResponse.model_validate(response)
+                return
+            if self.strict:
+                raise CassetteMiss(
+                    f"No recording of {fingerprint[:12]} ({_request_excerpt(llm_request, 60)!r}) in {self._cassette.path}; "
+                    "re-record with MODEL_CASSETTE_MODE=record"
+                )
+            async for response in self.inner.generate_content_async(llm_request, stream):
+                yield response
+            return
+
+        started = time.perf_counter()
+        responses = []
+        async for response in self.inner.generate_content_async(llm_request, stream):
+            responses.append(response)
+            yield response
+        self._cassette.record(fingerprint, llm_request, responses, time.perf_counter() - started)
+
+def _llm_agents(agent) -> Iterator[Any]:
+    if hasattr(agent, "canonical_model"):
+        yield agent
+    for sub_agent in getattr(agent, "sub_agents", None) or []:
+        yield from _llm_agents(sub_agent)
+
+def wrap_models(agent, cassette: Cassette, mode: str, strict: bool, latency: Union[str, float]) -> List[Tuple[Any, str, Any]]:
+    """
+    Put a CassetteLlm around the innermost model of agent and its
+    sub-agents, so routing, deadlines and hedging still run in front of it.
+    A CassetteLlm already in the chain is replaced rather than wrapped.
+    Returns (holder, field, original) entries for restoring.
+    """
+    swapped = []
+    for llm_agent in _llm_agents(agent):
+        holder, field = llm_agent, "model"
+        model = llm_agent.canonical_model
+        # Wrappers such as DeadlineLlm keep the real model in .inner
+        while isinstance(getattr(model, "inner", None), BaseLlm):
+            if isinstance(model, CassetteLlm):
+                model = model.inner
+                break
+            holder, field, model = model, "inner", model.inner
+        original = getattr(holder, field)
+        setattr(holder, field, CassetteLlm(
+            cassette, model=model.model, inner=model, mode=mode, strict=strict, latency=latency
+        ))
+        swapped.append((holder, field, original))
+    return swapped
+
+@contextmanager
+def use_cassette(
+    agent,
+    path: str,
+    mode: str = "once",
+    strict: bool = True,
+    latency: Union[str, float] = "none"
+):
+    """Route every model call of agent and its sub-agents through the cassette at path; yields the Cassette"""
+    cassette = Cassette(path)
+    swapped = wrap_models(agent, cassette, mode, strict, latency)
+    try:
+        yield cassette
+    finally:
+        for holder, field, original in reversed(swapped):
+            setattr(holder, field, original)
+
+def install_cassette_from_env(agent) -> None:
+    """Apply MODEL_CASSETTE_* to agent for the life of the process (no-op when off)"""
+    if MODEL_CASSETTE_MODE == "off":
+        return
+    latency = MODEL_CASSETTE_LATENCY if MODEL_CASSETTE_LATENCY in ("recorded", "none") else float(MODEL_CASSETTE_LATENCY)
+    wrap_models(agent, Cassette(MODEL_CASSETTE_PATH), MODEL_CASSETTE_MODE, MODEL_CASSETTE_STRICT, latency)
+    logger.info(
+        "Model cassette: %s %s (strict=%s, latency=%s)",
+        MODEL_CASSETTE_MODE, MODEL_CASSETTE_PATH, MODEL_CASSETTE_STRICT, latency
+    )
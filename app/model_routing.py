@@ -0,0 +1,142 @@
+# app/model_routing.py - Complexity-aware model selection for the pipeline stages
+"""
+Every stage used to run on the same model. The router classifies the
+request with determine_process_complexity and picks a model tier per stage:
+fast models for basic processes and for the report compilation stage, the
+strong model only where the analysis needs it (risk for intelligent
+automation).
+
+The table maps complexity level -> output_key -> tier, with "*" as the
+default for a level. MODEL_ROUTING_CONFIG may point to a JSON file with
+"tiers" (tier -> model name) and/or "routes" (same shape as the table);
+its entries override the defaults. Check changes with routing_eval.py
+before rolling them out.
+"""
+import json
+import os
+from typing import Any, Dict, Mapping, Optional
+
+from agents.tools.automation_tools import determine_process_complexity
+from agents.tools.classification import COMPLEXITY_LEVELS
+from observability.metrics import MODEL_ROUTES
+
+MODEL_ROUTING_ENABLED = os.getenv("MODEL_ROUTING_ENABLED", "true").lower() == "true"
+MODEL_ROUTING_CONFIG = os.getenv("MODEL_ROUTING_CONFIG", "")
+
+MODEL_TIERS = {
+    "fast": os.getenv("MODEL_TIER_FAST", "gemini-2.0-flash-lite"),
+    "standard": os.getenv("MODEL_TIER_STANDARD", "gemini-2.0-flash-exp"),
+    "strong": os.getenv("MODEL_TIER_STRONG", "gemini-2.5-pro")
+}
+DEFAULT_TIER = "standard"
+
+# final_business_case only writes the narrative; figures are merged from earlier stages
+DEFAULT_ROUTING_TABLE = {
+    "basic_automation": {"*": "fast"},
+    "process_automation": {"*": "standard", "final_business_case": "fast"},
+    "integration_automation": {"*": "standard", "final_business_case": "fast"},
+    "intelligent_automation": {"*": "standard", "risk_assessment": "strong", "final_business_case": "fast"}
+}
+
+# Session state key holding the complexity the routes were chosen for
+ROUTING_STATE_KEY = "routing_complexity"
+
+def request_complexity(request: Mapping[str, Any]) -> str:
+    """
+    Complexity level of an AutomationRequest-shaped dict. The request has no
+    decision point or system counts, so decision makers and CX tools stand in
+    for them.
+    """
+    return determine_process_complexity(
+        decision_points=max(1, len(request.get("decision_makers") or [])),
+        systems_involved=max(1, len(request.get("cxToolsList") or [])),
+        people_involved=request.get("people_involved") or 0,
+        manual_percentage=request.get("manual_percentage") or 0
+    )
+
+class ModelRouter:
+    """Resolves (complexity level, stage output_key) to a tier and model name"""
+
+    def __init__(
+        self,
+        table: Optional[Dict[str, Dict[str, str]]] = None,
+        tiers: Optional[Dict[str, str]] = None,
+        default_tier: str = DEFAULT_TIER
+    ):
+        self.table = {level: dict(routes) for level, routes in (table or DEFAULT_ROUTING_TABLE).items()}
+        self.tiers = dict(tiers or MODEL_TIERS)
+        self.default_tier = default_tier
+        used = {tier for routes in self.table.values() for tier in routes.values()} | {default_tier}
+        if used - set(self.tiers):
+            raise ValueError(f"Routing table uses undefined tiers: {sorted(used - set(self.tiers))}")
+
+    def tier(self, complexity: Optional[str], output_key: str) -> str:
+        routes = self.table.get(complexity or "", {})
+        return routes.get(output_key, routes.get("*", self.default_tier))
+
+    def model(self, complexity: Optional[str], output_key: str) -> str:
+        return self.tiers[self.tier(complexity, output_key)]
+
+    def plan(self, complexity: Optional[str], output_keys) -> Dict[str, str]:
+        """output_key -> model for every stage of one run"""
+        return {output_key: self.model(complexity, output_key) for output_key in output_keys}
+
+    @classmethod
+    def uniform(cls, tier: str, tiers: Optional[Dict[str, str]] = None) -> "ModelRouter":
+        """Router sending every stage to one tier (the pre-routing baseline)"""
+        return cls({level: {"*": tier} for level in COMPLEXITY_LEVELS}, tiers, default_tier=tier)
+
+def load_router(path: str = MODEL_ROUTING_CONFIG) -> ModelRouter:
+    """Default table and tiers, overridden by the JSON file at path if given"""
+    table = {level: dict(routes) for level, routes in DEFAULT_ROUTING_TABLE.items()}
+    tiers = dict(MODEL_TIERS)
+    if path:
+        with open(path) as f:
+            config = json.load(f)
+        tiers.update(config.get("tiers", {}))
+        for level, routes in config.get("routes", {}).items():
+            table.setdefault(level, {}).update(routes)
+    return ModelRouter(table, tiers)
+
+_router: Optional[ModelRouter] = None
+
+def get_model_router() -> ModelRouter:
+    """Router built from MODEL_ROUTING_CONFIG on first use"""
+    global _router
+    if _router is None:
+        _router = load_router()
+        print(f"🔀 Model routing: {'enabled' if MODEL_ROUTING_ENABLED else 'disabled'} (tiers: {_router.tiers})")
+    return _router
+
+def set_model_router(router: Optional[ModelRouter]) -> None:
+    """Install a router (e.g. to record a fixed tier); None reloads the configured one on next use"""
+    global _router
+    _router = router
+
+def routing_callback(output_key: str):
+    """
+    before_model_callback for the agent writing output_key. The complexity
+    comes from session state: ROUTING_STATE_KEY if the caller seeded it,
+    otherwise the process analyst's complexity_level. Calls made before
+    either is known keep the agent's own model.
+    """
+    def before_model_routing(callback_context, llm_request) -> None:
+        if not MODEL_ROUTING_ENABLED:
+            return None
+        state = callback_context.state
+        complexity = state.get(ROUTING_STATE_KEY)
+        if complexity is None:
+            process_analysis = state.get("process_analysis")
+            if isinstance(process_analysis, dict):
+                complexity = process_analysis.get("complexity_level")
+            if complexity is None:
+                return None
+            state[ROUTING_STATE_KEY] = complexity
+
+        router = get_model_router()
+        tier = router.tier(complexity, output_key)
+        llm_request.model = router.tiers[tier]
+        MODEL_ROUTES.labels(output_key, tier).inc()
+        return None
+
+    return before_model_routing
@@ -0,0 +1,2 @@
+# app/observability/__init__.py
+# Keep this file minimal - modules are imported directly by main.py and agent.py
@@ -0,0 +1,38 @@
+# app/observability/hooks.py - Attach instrumentation callbacks to ADK agents
+from typing import Any, Callable, List, Optional, Union
+
+_CALLBACK_FIELDS = (
+    "before_agent_callback",
+    "after_agent_callback",
+    "before_model_callback",
+    "after_model_callback",
+    "before_tool_callback",
+    "after_tool_callback",
+)
+
+def add_agent_callbacks(agent: Any, **callbacks: Optional[Union[Callable, List[Callable]]]) -> None:
+    """
+    Append callbacks to an agent without replacing the ones already set.
+    Keyword names match the ADK fields, e.g. after_model_callback=fn or a
+    list of functions.
+    Fields the agent type does not support (model/tool callbacks on a
+    SequentialAgent) are skipped.
+    """
+    for field, callback in callbacks.items():
+        if field not in _CALLBACK_FIELDS:
+            raise ValueError(f"Unknown agent callback field: {field}")
+        if callback is None or field not in type(agent).model_fields:
+            continue
+
+        existing = getattr(agent, field, None)
+        if existing is None:
+            chain = []
+        elif isinstance(existing, list):
+            chain = list(existing)
+        else:
+            chain = [existing]
+
+        for fn in callback if isinstance(callback, list) else [callback]:
+            if fn not in chain:
+                chain.append(fn)
+        setattr(agent, field, chain)
@@ -0,0 +1,120 @@
+# app/observability/loop_monitor.py - Event loop lag and blocking detector
+"""
+Detects work that blocks the asyncio loop serving status polls.
+
+- A heartbeat coroutine sleeps LOOP_MONITOR_INTERVAL seconds and records how
+  late it woke up (scheduling lag) into a histogram, plus p50/p90/p99/max
+  over a rolling window as gauges.
+- A watchdog thread checks the heartbeat. If the loop has not run for
+  LOOP_BLOCK_THRESHOLD seconds, it captures the loop thread's stack and
+  logs it once per stall, naming the callback that is hogging the loop.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Optional
+
+from observability.metrics import Counter, Gauge, Histogram
+
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.1"))
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.25"))
+LOOP_LAG_WINDOW = int(os.getenv("LOOP_LAG_WINDOW", "600"))
+
+LOOP_LAG = Histogram(
+    "automation_event_loop_lag_seconds",
+    "Delay between when the loop heartbeat was due and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_LAG_QUANTILES = Gauge(
+    "automation_event_loop_lag_quantile_seconds",
+    "Event loop lag percentiles over the recent monitoring window",
+    ["quantile"],
+)
+SLOW_CALLBACKS = Counter(
+    "automation_event_loop_blocked_total",
+    "Times the event loop was blocked longer than LOOP_BLOCK_THRESHOLD",
+)
+
+def _percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class LoopMonitor:
+    """Measures scheduling lag and reports callbacks that block the loop"""
+
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL, block_threshold: float = LOOP_BLOCK_THRESHOLD, window: int = LOOP_LAG_WINDOW):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.lags: Deque[float] = deque(maxlen=window)
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start monitoring the running loop (call from inside the loop)"""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat_loop())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        print(f"⏱️ Event loop monitor started (interval {self.interval}s, block threshold {self.block_threshold}s)")
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _heartbeat_loop(self) -> None:
+        ticks = 0
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - expected)
+            self.lags.append(lag)
+            LOOP_LAG.observe(lag)
+            ticks += 1
+            if ticks % 10 == 0:
+                self._publish_quantiles()
+
+    def _publish_quantiles(self) -> None:
+        values = sorted(self.lags)
+        for label, fraction in (("0.5", 0.5), ("0.9", 0.9), ("0.99", 0.99), ("1", 1.0)):
+            LOOP_LAG_QUANTILES.labels(label).set(_percentile(values, fraction))
+
+    def _watch(self) -> None:
+        reported_heartbeat = None
+        while not self._stop.wait(self.block_threshold / 2):
+            heartbeat = self._heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+            if blocked_for < self.block_threshold or heartbeat == reported_heartbeat:
+                continue
+            # Report each stall once, with the stack that is running right now
+            reported_heartbeat = heartbeat
+            SLOW_CALLBACKS.inc()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame, limit=30)) if frame is not None else "<loop thread stack unavailable>\n"
+            print(f"🐢 Event loop blocked for >{blocked_for:.3f}s; current loop stack:\n{stack}")
+
+    def stats(self) -> dict:
+        values = sorted(self.lags)
+        return {
+            "samples": len(values),
+            "p50_seconds": round(_percentile(values, 0.5), 4),
+            "p90_seconds": round(_percentile(values, 0.9), 4),
+            "p99_seconds": round(_percentile(values, 0.99), 4),
+            "max_seconds": round(values[-1], 4) if values else 0.0,
+        }
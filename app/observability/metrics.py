@@ -0,0 +1,478 @@
+# app/observability/metrics.py - Prometheus-style metrics registry
+"""
+Minimal Prometheus text-format metrics for the automation API.
+
+Updates are plain attribute writes on per-label child objects, so recording
+never takes a lock. With METRICS_MULTIPROC_DIR (or PROMETHEUS_MULTIPROC_DIR)
+set, every worker periodically snapshots its values into that directory and
+/metrics merges the snapshots of all workers. Snapshots of exited workers,
+or ones not refreshed for METRICS_SNAPSHOT_STALE_SECONDS, are deleted when
+read. The app lifespan starts and stops the flusher thread.
+"""
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from agents.tools.instrumentation import register_tool_observer
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+TOOL_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or os.getenv("PROMETHEUS_MULTIPROC_DIR")
+FLUSH_INTERVAL_SECONDS = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+SNAPSHOT_STALE_SECONDS = float(os.getenv("METRICS_SNAPSHOT_STALE_SECONDS", str(3 * FLUSH_INTERVAL_SECONDS)))
+
+class _CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+class _GaugeValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+class _HistogramValue:
+    __slots__ = ("upper_bounds", "counts", "sum")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        # Non-cumulative per-bucket counts; the last slot is +Inf
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+
+class Metric:
+    """Base class for a named metric family with optional labels"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["MetricsRegistry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        if not self.labelnames:
+            self._default = self._children.setdefault((), self._new_child())
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any) -> Any:
+        """Return the child for the given label values, creating it on first use"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            # setdefault is atomic, so concurrent first use never loses a child
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def children(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        return list(self._children.items())
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterValue:
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        self._function: Optional[Callable[[], float]] = None
+        super().__init__(*args, **kwargs)
+
+    def _new_child(self) -> _GaugeValue:
+        return _GaugeValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Compute the unlabelled value at scrape time instead of on the hot path"""
+        self._function = function
+
+    def children(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        if self._function is not None:
+            try:
+                self._default.set(self._function())
+            except Exception as e:
+                print(f"⚠️ Gauge {self.name} callback failed: {e}")
+        return super().children()
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS, registry: Optional["MetricsRegistry"] = None):
+        self.upper_bounds = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def time(self, *label_values: Any) -> "_Timer":
+        """Context manager observing the elapsed wall time of its block"""
+        return _Timer(self.labels(*label_values) if label_values else self._default)
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: _HistogramValue):
+        self._child = child
+        self._start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._child.observe(time.perf_counter() - self._start)
+
+class MetricsRegistry:
+    """Holds metric families and renders them in Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric name: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serializable view of every metric in this process"""
+        families = {}
+        for metric in list(self._metrics.values()):
+            samples = []
+            for labels, child in metric.children():
+                if metric.kind == "histogram":
+                    samples.append([list(labels), {"counts": list(child.counts), "sum": child.sum}])
+                else:
+                    samples.append([list(labels), child.value])
+            families[metric.name] = {
+                "type": metric.kind,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "upper_bounds", ())),
+                "samples": samples,
+            }
+        return {"pid": os.getpid(), "written_at": time.time(), "metrics": families}
+
+    def render(self) -> str:
+        """Render this process (or all workers in multi-process mode) as text"""
+        if MULTIPROC_DIR:
+            write_snapshot(self)
+            return render_snapshots(read_snapshots(MULTIPROC_DIR))
+        return render_snapshots([self.snapshot()])
+
+REGISTRY = MetricsRegistry()
+
+# ---------------------------------------------------------------------------
+# Text exposition and multi-process merging
+# ---------------------------------------------------------------------------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def render_snapshots(snapshots: List[Dict[str, Any]]) -> str:
+    """
+    Merge per-process snapshots and render them.
+    Counters and histograms are summed across all workers; gauges only
+    across workers that are still alive.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snap in snapshots:
+        alive = _pid_alive(snap.get("pid", 0))
+        for name, family in snap.get("metrics", {}).items():
+            target = merged.setdefault(name, {**family, "samples": {}})
+            if family["type"] == "gauge" and not alive:
+                continue
+            for labels, value in family["samples"]:
+                key = tuple(labels)
+                if family["type"] == "histogram":
+                    current = target["samples"].setdefault(key, {"counts": [0] * len(value["counts"]), "sum": 0.0})
+                    current["counts"] = [a + b for a, b in zip(current["counts"], value["counts"])]
+                    current["sum"] += value["sum"]
+                else:
+                    target["samples"][key] = target["samples"].get(key, 0.0) + value
+
+    lines = []
+    for name in sorted(merged):
+        family = merged[name]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        labelnames = family["labelnames"]
+        for labels, value in sorted(family["samples"].items()):
+            if family["type"] == "histogram":
+                cumulative = 0
+                bounds = list(family["buckets"]) + [math.inf]
+                for bound, count in zip(bounds, value["counts"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labelnames, labels, ('le', _format_value(bound)))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {_format_value(value['sum'])}")
+                lines.append(f"{name}_count{_format_labels(labelnames, labels)} {cumulative}")
+            else:
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"metrics_{pid}.json")
+
+def write_snapshot(registry: MetricsRegistry, directory: Optional[str] = None) -> None:
+    """Atomically write this worker's snapshot into the shared directory"""
+    directory = directory or MULTIPROC_DIR
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    path = _snapshot_path(directory, os.getpid())
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp_path, path)
+
+def read_snapshots(directory: str, stale_after: float = SNAPSHOT_STALE_SECONDS) -> List[Dict[str, Any]]:
+    """Load live worker snapshots; delete those of exited workers or older than stale_after"""
+    snapshots = []
+    cutoff = time.time() - stale_after
+    for filename in sorted(os.listdir(directory)):
+        if not (filename.startswith("metrics_") and filename.endswith(".json")):
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            pid = int(filename[len("metrics_"):-len(".json")])
+            if pid != os.getpid() and (not _pid_alive(pid) or os.path.getmtime(path) < cutoff):
+                os.remove(path)
+                continue
+            with open(path, "r") as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Skipping unreadable metrics snapshot {filename}: {e}")
+    return snapshots
+
+_flusher: Optional[threading.Thread] = None
+_flusher_directory: Optional[str] = None
+_flusher_stop = threading.Event()
+
+def start_multiprocess_flusher(registry: Optional[MetricsRegistry] = None, directory: Optional[str] = None) -> bool:
+    """Start a daemon thread that snapshots this worker every few seconds; False if not in multi-process mode"""
+    global _flusher, _flusher_directory
+    directory = directory or MULTIPROC_DIR
+    if not directory or _flusher is not None:
+        return False
+    registry = registry or REGISTRY
+    _flusher_directory = directory
+    _flusher_stop.clear()
+
+    def flush_until_stopped():
+        while True:
+            try:
+                write_snapshot(registry, directory)
+            except Exception as e:
+                print(f"⚠️ Metrics snapshot failed: {e}")
+            if _flusher_stop.wait(FLUSH_INTERVAL_SECONDS):
+                return
+
+    _flusher = threading.Thread(target=flush_until_stopped, name="metrics-flusher", daemon=True)
+    _flusher.start()
+    return True
+
+def stop_multiprocess_flusher() -> None:
+    """Stop the flusher and remove this worker's snapshot"""
+    global _flusher
+    if _flusher is None:
+        return
+    _flusher_stop.set()
+    _flusher.join()
+    _flusher = None
+    try:
+        os.remove(_snapshot_path(_flusher_directory, os.getpid()))
+    except OSError:
+        pass
+
+def generate_latest(registry: Optional[MetricsRegistry] = None) -> str:
+    """Render the default registry in Prometheus text format"""
+    return (registry or REGISTRY).render()
+
+# ---------------------------------------------------------------------------
+# Application metrics
+# ---------------------------------------------------------------------------
+
+AGENT_DURATION = Histogram(
+    "automation_agent_duration_seconds",
+    "Wall time spent in each pipeline agent, keyed by AGENT_MAPPING technical name",
+    ["agent"],
+)
+ANALYSIS_DURATION = Histogram(
+    "automation_analysis_duration_seconds",
+    "End-to-end duration of a background automation analysis",
+    ["status"],
+)
+TOOL_CALL_DURATION = Histogram(
+    "automation_tool_call_duration_seconds",
+    "Latency of calculation, benchmark and automation tool functions",
+    ["tool", "outcome"],
+    buckets=TOOL_BUCKETS,
+)
+ACTIVE_SESSIONS = Gauge(
+    "automation_active_sessions",
+    "Analysis sessions currently processing",
+)
+QUEUE_DEPTH = Gauge(
+    "automation_analysis_queue_depth",
+    "Analyses accepted but not yet started by the background worker",
+)
+STORED_SESSIONS = Gauge(
+    "automation_analysis_sessions",
+    "Number of entries held in analysis_sessions",
+)
+MOCK_FALLBACKS = Counter(
+    "automation_mock_fallbacks_total",
+    "Requests served by the deterministic fallback report engine instead of the agents",
+    ["reason"],
+)
+BLOCKING_POOL_IN_FLIGHT = Gauge(
+    "automation_blocking_pool_in_flight",
+    "Blocking tool/report calls currently submitted to the offload thread pool",
+)
+MODEL_ERRORS = Counter(
+    "automation_model_errors_total",
+    "Model or agent execution errors",
+    ["agent"],
+)
+PIPELINE_RUNS_AVOIDED = Counter(
+    "automation_pipeline_runs_avoided_total",
+    "Create requests served by an existing session instead of a new pipeline run",
+    ["reason"],
+)
+PIPELINE_RECOVERIES = Counter(
+    "automation_pipeline_recoveries_total",
+    "Pipeline runs restarted from their checkpoints instead of from the first agent",
+    ["trigger"],
+)
+MODEL_ROUTES = Counter(
+    "automation_model_routes_total",
+    "Model calls by pipeline stage and the tier the router picked",
+    ["stage", "tier"],
+)
+HEDGED_REQUESTS = Counter(
+    "automation_hedged_requests_total",
+    "Model calls that sent a hedged duplicate request, by which request answered first",
+    ["stage", "winner"],
+)
+STAGE_DEADLINES_EXCEEDED = Counter(
+    "automation_stage_deadlines_exceeded_total",
+    "Pipeline stages that ran out of their deadline budget, by how the stage was resolved",
+    ["stage", "resolution"],
+)
+MODEL_CONCURRENCY_LIMIT = Gauge(
+    "automation_model_concurrency_limit",
+    "Current adaptive limit on concurrent calls to each model",
+    ["model"],
+)
+MODEL_CALLS_IN_FLIGHT = Gauge(
+    "automation_model_calls_in_flight",
+    "Model calls currently holding an adaptive limiter slot",
+    ["model"],
+)
+MODEL_LIMITER_REJECTIONS = Counter(
+    "automation_model_limiter_rejections_total",
+    "Model calls the adaptive limiter turned away, by reason",
+    ["model", "reason"],
+)
+
+def _observe_tool_call(tool_name: str, elapsed: float, error: Optional[BaseException]) -> None:
+    TOOL_CALL_DURATION.labels(tool_name, "error" if error else "ok").observe(elapsed)
+
+# ---------------------------------------------------------------------------
+# ADK agent callbacks
+# ---------------------------------------------------------------------------
+
+_agent_started_at: Dict[Tuple[str, str], float] = {}
+
+def before_agent_metrics(callback_context) -> None:
+    """before_agent_callback: remember when this agent started"""
+    _agent_started_at[(callback_context.invocation_id, callback_context.agent_name)] = time.perf_counter()
+    return None
+
+def after_agent_metrics(callback_context) -> None:
+    """after_agent_callback: observe the agent's wall time"""
+    started = _agent_started_at.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    if started is not None:
+        AGENT_DURATION.labels(callback_context.agent_name).observe(time.perf_counter() - started)
+    return None
+
+def after_model_metrics(callback_context, llm_response) -> None:
+    """after_model_callback: count responses the model returned as errors"""
+    if getattr(llm_response, "error_code", None):
+        MODEL_ERRORS.labels(callback_context.agent_name).inc()
+    return None
+
+register_tool_observer(_observe_tool_call)
@@ -0,0 +1,232 @@
+# app/observability/profiling.py - On-demand sampling profiler
+"""
+Wall-clock sampling profiler for live diagnosis of slow analyses.
+
+While a profile is running, a daemon thread wakes every `interval` seconds
+and records:
+- the Python stack of every thread (event loop thread and worker threads),
+  via sys._current_frames();
+- the logical await chain of asyncio tasks on the served loop, so time a
+  coroutine spends suspended (model calls, sleeps) is attributed to it.
+  Task sampling can be narrowed to coroutines running named functions
+  (e.g. process_automation_analysis, run_agent) or to one session_id.
+
+Nothing is installed when no profile is running, so requests pay nothing
+while profiling is off. Results render as collapsed stacks (flamegraph.pl /
+speedscope import) or as speedscope's native JSON.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_INTERVAL_SECONDS = 0.005
+MAX_PROFILE_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "300"))
+
+Frame = Tuple[str, str, int]  # (function, filename, first line)
+
+def _frame_key(frame) -> Frame:
+    code = frame.f_code
+    return (code.co_name, code.co_filename, code.co_firstlineno)
+
+def _thread_stack(frame) -> Tuple[Frame, ...]:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_key(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+def _task_stack(task: "asyncio.Task", want_locals: bool = False) -> Tuple[Tuple[Frame, ...], List[Dict[str, Any]]]:
+    """Walk a task's coroutine await chain from outermost to innermost"""
+    stack: List[Frame] = []
+    frame_locals: List[Dict[str, Any]] = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(_frame_key(frame))
+        if want_locals:
+            frame_locals.append(frame.f_locals)
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return tuple(stack), frame_locals
+
+class SamplingProfiler:
+    """Collects wall-clock stack samples until stopped"""
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL_SECONDS,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        target_functions: Iterable[str] = (),
+        session_id: Optional[str] = None,
+        include_threads: bool = True,
+        exclude_task: Optional["asyncio.Task"] = None,
+    ):
+        self.interval = max(0.001, interval)
+        self.loop = loop
+        self.target_functions = set(target_functions)
+        self.session_id = session_id
+        self.include_threads = include_threads
+        self.exclude_task = exclude_task
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped_at = time.perf_counter()
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        thread_names = {}
+        while not self._stop.wait(self.interval):
+            if self.include_threads:
+                for ident, frame in sys._current_frames().items():
+                    if ident == own_ident:
+                        continue
+                    name = thread_names.get(ident)
+                    if name is None:
+                        thread = threading._active.get(ident)
+                        name = thread_names[ident] = f"thread:{thread.name if thread else ident}"
+                    self.samples[(name,) + tuple(f"{fn} ({os.path.basename(path)}:{line})" for fn, path, line in _thread_stack(frame))] += 1
+            if self.loop is not None:
+                self._sample_tasks()
+            self.sample_count += 1
+
+    def _sample_tasks(self) -> None:
+        try:
+            tasks = list(asyncio.all_tasks(self.loop))
+        except RuntimeError:
+            # Task set changed while copying; skip this tick
+            return
+        for task in tasks:
+            if task is self.exclude_task:
+                continue
+            stack, frame_locals = _task_stack(task, want_locals=self.session_id is not None)
+            if not stack:
+                continue
+            if self.session_id is not None and not any(l.get("session_id") == self.session_id for l in frame_locals):
+                continue
+            # Group by the first targeted function on the chain (or the task root)
+            group = next((fn for fn, _, _ in stack if fn in self.target_functions), None)
+            if self.target_functions and group is None:
+                continue
+            self.samples[(f"task:{group or stack[0][0]}",) + tuple(f"{fn} ({os.path.basename(path)}:{line})" for fn, path, line in stack)] += 1
+
+    # ------------------------------------------------------------------
+    # Output formats
+    # ------------------------------------------------------------------
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack format: one 'a;b;c count' per line"""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+    def speedscope(self, name: str = "automation-api") -> Dict[str, Any]:
+        """speedscope file-format JSON with one sampled profile per thread/task group"""
+        frame_index: Dict[str, int] = {}
+        frames: List[Dict[str, Any]] = []
+        groups: Dict[str, Dict[str, List]] = {}
+
+        for stack, count in self.samples.items():
+            group = groups.setdefault(stack[0], {"samples": [], "weights": []})
+            indices = []
+            for label in stack[1:]:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    fn, _, location = label.partition(" (")
+                    frames.append({"name": fn, "file": location.rstrip(")")})
+                indices.append(frame_index[label])
+            group["samples"].append(indices)
+            group["weights"].append(count)
+
+        duration = max(0.0, (self.stopped_at or time.perf_counter()) - self.started_at)
+        # Weight each sample by the measured tick length rather than the nominal interval
+        tick = duration / self.sample_count if self.sample_count else self.interval
+        for group in groups.values():
+            group["weights"] = [round(count * tick, 6) for count in group["weights"]]
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "automation-api sampling profiler",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": group_name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": round(duration, 6),
+                    "samples": group["samples"],
+                    "weights": group["weights"],
+                }
+                for group_name, group in sorted(groups.items())
+            ],
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval,
+            "ticks": self.sample_count,
+            "distinct_stacks": len(self.samples),
+            "duration_seconds": round(max(0.0, (self.stopped_at or time.perf_counter()) - self.started_at), 3),
+        }
+
+_active_profiler: Optional[SamplingProfiler] = None
+
+async def profile_for(
+    seconds: float,
+    interval: float = DEFAULT_INTERVAL_SECONDS,
+    target_functions: Iterable[str] = (),
+    session_id: Optional[str] = None,
+    until: Optional[Any] = None,
+    include_threads: bool = True,
+) -> SamplingProfiler:
+    """
+    Profile the running loop and all threads for up to `seconds`.
+    If `until` is given, it is polled and profiling stops as soon as it
+    returns True (used to follow one session to completion).
+    Raises RuntimeError if another profile is already running.
+    """
+    global _active_profiler
+    if _active_profiler is not None:
+        raise RuntimeError("A profiling session is already running")
+
+    profiler = SamplingProfiler(
+        interval=interval,
+        loop=asyncio.get_running_loop(),
+        target_functions=target_functions,
+        session_id=session_id,
+        include_threads=include_threads,
+        exclude_task=asyncio.current_task(),
+    )
+    _active_profiler = profiler
+    profiler.start()
+    try:
+        deadline = time.monotonic() + min(seconds, MAX_PROFILE_SECONDS)
+        while time.monotonic() < deadline:
+            if until is not None and until():
+                break
+            await asyncio.sleep(min(0.25, max(0.0, deadline - time.monotonic())))
+    finally:
+        profiler.stop()
+        _active_profiler = None
+    return profiler
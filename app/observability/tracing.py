@@ -0,0 +1,223 @@
+# app/observability/tracing.py - Local OpenTelemetry tracing
+"""
+Local trace export for the automation API.
+
+get_fast_api_app() always installs a TracerProvider and ADK already emits
+"agent_run [...]", "call_llm" and "execute_tool" spans, but with
+trace_to_cloud=False nothing is exported. This module adds:
+
+- a span per HTTP request (pure ASGI middleware, ended when the last body
+  chunk is sent so background work shows up as child spans),
+- spans for each simulated pipeline stage and each instrumented tool call,
+- token usage attributes on ADK's call_llm spans,
+- export to an OTLP collector and/or a size-rotated JSONL file.
+
+Export runs on BatchSpanProcessor's worker thread, so the request path only
+pays for span creation. Sampling is a consistent per-trace ratio applied
+before export, which also works on the provider ADK has already created.
+
+Configuration (environment):
+    TRACE_EXPORTER          comma list of "otlp" and/or "jsonl" (unset = off)
+    TRACE_SAMPLE_RATIO      fraction of traces exported, default 1.0
+    TRACE_JSONL_PATH        default "traces/spans.jsonl"
+    TRACE_JSONL_MAX_BYTES   rotate after this size, default 50 MB
+    TRACE_JSONL_BACKUPS     rotated files kept, default 5
+    OTEL_EXPORTER_OTLP_ENDPOINT   collector URL for the "otlp" exporter
+"""
+import json
+import logging
+import os
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from agents.tools.instrumentation import register_tool_scope
+
+TRACER_NAME = "automation.api"
+
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "")
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", "1.0"))
+TRACE_JSONL_PATH = os.getenv("TRACE_JSONL_PATH", os.path.join("traces", "spans.jsonl"))
+TRACE_JSONL_MAX_BYTES = int(os.getenv("TRACE_JSONL_MAX_BYTES", str(50 * 1024 * 1024)))
+TRACE_JSONL_BACKUPS = int(os.getenv("TRACE_JSONL_BACKUPS", "5"))
+
+tracer = trace.get_tracer(TRACER_NAME)
+
+_TRACE_ID_LIMIT = (1 << 64) - 1
+
+class JsonlSpanExporter(SpanExporter):
+    """Writes one JSON object per finished span to a size-rotated file"""
+
+    def __init__(self, path: str, max_bytes: int = TRACE_JSONL_MAX_BYTES, backup_count: int = TRACE_JSONL_BACKUPS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        for span in spans:
+            record = logging.makeLogRecord({"msg": json.dumps(span_to_dict(span), default=str)})
+            self._handler.emit(record)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        self._handler.close()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        self._handler.flush()
+        return True
+
+class SampledExporter(SpanExporter):
+    """
+    Forwards only spans whose trace id falls under the sample ratio.
+    The decision depends on the trace id alone, so a trace is either
+    exported completely or not at all.
+    """
+
+    def __init__(self, exporter: SpanExporter, ratio: float):
+        self._exporter = exporter
+        self._bound = int(max(0.0, min(1.0, ratio)) * _TRACE_ID_LIMIT)
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        sampled = [s for s in spans if (s.context.trace_id & _TRACE_ID_LIMIT) <= self._bound]
+        if not sampled:
+            return SpanExportResult.SUCCESS
+        return self._exporter.export(sampled)
+
+    def shutdown(self) -> None:
+        self._exporter.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._exporter.force_flush(timeout_millis)
+
+def span_to_dict(span: ReadableSpan) -> Dict[str, Any]:
+    """Flatten a finished span into a JSON-friendly dict"""
+    context = span.get_span_context()
+    return {
+        "name": span.name,
+        "trace_id": f"{context.trace_id:032x}",
+        "span_id": f"{context.span_id:016x}",
+        "parent_span_id": f"{span.parent.span_id:016x}" if span.parent else None,
+        "kind": span.kind.name if span.kind else None,
+        "start_time_unix_nano": span.start_time,
+        "end_time_unix_nano": span.end_time,
+        "duration_ms": round((span.end_time - span.start_time) / 1e6, 3) if span.end_time and span.start_time else None,
+        "status": span.status.status_code.name,
+        "attributes": dict(span.attributes or {}),
+    }
+
+def _build_exporters(names: List[str]) -> List[SpanExporter]:
+    exporters: List[SpanExporter] = []
+    for name in names:
+        if name == "jsonl":
+            exporters.append(JsonlSpanExporter(TRACE_JSONL_PATH))
+            print(f"🔭 Tracing: JSONL export to {TRACE_JSONL_PATH}")
+        elif name == "otlp":
+            try:
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            except ImportError:
+                print("⚠️ Tracing: opentelemetry-exporter-otlp-proto-http not installed, skipping OTLP export")
+                continue
+            exporters.append(OTLPSpanExporter())
+            print(f"🔭 Tracing: OTLP export to {os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT', 'http://localhost:4318')}")
+        else:
+            print(f"⚠️ Tracing: unknown exporter '{name}'")
+    return exporters
+
+def configure_tracing(app: Any, exporter_names: Optional[str] = None, sample_ratio: Optional[float] = None) -> bool:
+    """
+    Attach local exporters to the active TracerProvider and add request spans.
+    Returns False (and changes nothing) when no exporter is configured.
+    """
+    names = [n.strip().lower() for n in (exporter_names if exporter_names is not None else TRACE_EXPORTER).split(",") if n.strip()]
+    if not names:
+        return False
+
+    ratio = TRACE_SAMPLE_RATIO if sample_ratio is None else sample_ratio
+    exporters = _build_exporters(names)
+    if not exporters:
+        return False
+
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        # Fallback mode: ADK did not install a provider, so sample at creation
+        provider = TracerProvider(sampler=ParentBased(TraceIdRatioBased(ratio)))
+        trace.set_tracer_provider(provider)
+
+    for exporter in exporters:
+        provider.add_span_processor(BatchSpanProcessor(SampledExporter(exporter, ratio)))
+
+    app.add_middleware(TracingMiddleware)
+    register_tool_scope(tool_span)
+    print(f"🔭 Tracing enabled (sample ratio {ratio})")
+    return True
+
+class TracingMiddleware:
+    """ASGI middleware creating one server span per HTTP request"""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        span = tracer.start_span(
+            f"{scope['method']} {scope['path']}",
+            kind=SpanKind.SERVER,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]},
+        )
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    span.set_status(Status(StatusCode.ERROR))
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Response is out; background tasks continue as child spans
+                span.end()
+
+        with trace.use_span(span, end_on_exit=False):
+            try:
+                await self.app(scope, receive, send_wrapper)
+            except Exception as exc:
+                span.record_exception(exc)
+                span.set_status(Status(StatusCode.ERROR))
+                raise
+            finally:
+                if span.is_recording():
+                    span.end()
+
+@contextmanager
+def stage_span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Span around one pipeline stage or other unit of work"""
+    with tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield span
+
+@contextmanager
+def tool_span(tool_name: str) -> Iterator[Any]:
+    """Tool scope registered with agents.tools.instrumentation"""
+    with tracer.start_as_current_span(f"tool {tool_name}", attributes={"tool.name": tool_name}) as span:
+        yield span
+
+def after_model_tracing(callback_context, llm_response) -> None:
+    """after_model_callback: record token usage on ADK's call_llm span"""
+    usage = getattr(llm_response, "usage_metadata", None)
+    if usage is None:
+        return None
+    span = trace.get_current_span()
+    if span.is_recording():
+        span.set_attribute("gen_ai.usage.input_tokens", usage.prompt_token_count or 0)
+        span.set_attribute("gen_ai.usage.output_tokens", usage.candidates_token_count or 0)
+        span.set_attribute("gen_ai.usage.total_tokens", usage.total_token_count or 0)
+        span.set_attribute("automation.agent", callback_context.agent_name)
+    return None
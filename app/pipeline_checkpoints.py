@@ -0,0 +1,200 @@
+# app/pipeline_checkpoints.py - Per-stage checkpoints for the six-agent analysis pipeline
+"""
+Each agent's output is stored under its output_key as soon as the stage
+completes, together with the original request. A failed or interrupted run
+can then restart from the first stage without a checkpoint instead of
+rerunning all six.
+
+PIPELINE_CHECKPOINT_DB is a SQLite path (WAL mode). The default ":memory:"
+survives failures inside the process (automatic retry and the resume
+endpoint) but not a restart; set a file path to also resume runs that were
+interrupted by a crash or redeploy.
+
+Several workers may share one durable database. Every run is leased to the
+worker that started it (owner, lease_until); that worker renews its leases
+while it is alive, and other workers only take over runs whose lease has
+lapsed, each run claimed by exactly one of them.
+
+A completed run's rows are deleted when it finishes. Failed runs are kept
+for the resume endpoint for PIPELINE_CHECKPOINT_TTL_SECONDS.
+
+The store is synchronous; the server calls it through run_blocking.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+PIPELINE_CHECKPOINT_DB = os.getenv("PIPELINE_CHECKPOINT_DB", ":memory:")
+PIPELINE_MAX_RETRIES = int(os.getenv("PIPELINE_MAX_RETRIES", "2"))
+PIPELINE_RETRY_BACKOFF = float(os.getenv("PIPELINE_RETRY_BACKOFF", "1.0"))
+PIPELINE_RESUME_ON_STARTUP = os.getenv("PIPELINE_RESUME_ON_STARTUP", "true").lower() == "true"
+PIPELINE_CHECKPOINT_TTL_SECONDS = int(os.getenv("PIPELINE_CHECKPOINT_TTL_SECONDS", "86400"))
+PIPELINE_LEASE_SECONDS = float(os.getenv("PIPELINE_LEASE_SECONDS", "60"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pipelines (
+    session_id TEXT PRIMARY KEY,
+    request TEXT NOT NULL,
+    status TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    owner TEXT,
+    lease_until REAL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    session_id TEXT NOT NULL,
+    stage_index INTEGER NOT NULL,
+    output_key TEXT NOT NULL,
+    output TEXT NOT NULL,
+    completed_at REAL NOT NULL,
+    PRIMARY KEY (session_id, stage_index)
+);
+"""
+
+LEASE_COLUMNS = (("owner", "TEXT"), ("lease_until", "REAL"))
+
+def worker_id() -> str:
+    """Identifies this process among the workers sharing a checkpoint database"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+class CheckpointStore:
+    """Small, write-per-stage store; one connection guarded by a lock"""
+
+    def __init__(
+        self,
+        path: str = PIPELINE_CHECKPOINT_DB,
+        ttl_seconds: int = PIPELINE_CHECKPOINT_TTL_SECONDS,
+        lease_seconds: float = PIPELINE_LEASE_SECONDS,
+        owner: Optional[str] = None
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.owner = owner or worker_id()
+        self.durable = path != ":memory:"
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if self.durable:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        # Databases created before leases existed get the columns added in place
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(pipelines)")}
+        for name, kind in LEASE_COLUMNS:
+            if name not in columns:
+                self._connection.execute(f"ALTER TABLE pipelines ADD COLUMN {name} {kind}")
+
+    def _execute(self, query: str, params: Tuple = ()) -> List[Tuple]:
+        with self._lock:
+            return self._connection.execute(query, params).fetchall()
+
+    def start(self, session_id: str, request: Dict[str, Any]) -> None:
+        """Record (or re-open) a pipeline run leased to this worker; existing checkpoints are kept"""
+        now = time.time()
+        self._execute(
+            """
+            INSERT INTO pipelines (session_id, request, status, updated_at, owner, lease_until) VALUES (?, ?, 'processing', ?, ?, ?)
+            ON CONFLICT (session_id) DO UPDATE SET
+                status = 'processing', updated_at = excluded.updated_at,
+                owner = excluded.owner, lease_until = excluded.lease_until
+            """,
+            (session_id, json.dumps(request), now, self.owner, now + self.lease_seconds)
+        )
+
+    def save(self, session_id: str, stage_index: int, output_key: str, output: Any) -> None:
+        self._execute(
+            "INSERT OR REPLACE INTO checkpoints (session_id, stage_index, output_key, output, completed_at) VALUES (?, ?, ?, ?, ?)",
+            (session_id, stage_index, output_key, json.dumps(output), time.time())
+        )
+
+    def _delete(self, where: str, params: Tuple) -> None:
+        """Delete matching pipelines and their checkpoints in one transaction"""
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.execute(f"DELETE FROM checkpoints WHERE session_id IN (SELECT session_id FROM pipelines WHERE {where})", params)
+                self._connection.execute(f"DELETE FROM pipelines WHERE {where}", params)
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def finish(self, session_id: str, status: str) -> None:
+        """A completed run has nothing to resume and is deleted; a failed one is kept until its TTL"""
+        now = time.time()
+        if status == "complete":
+            self._delete("session_id = ?", (session_id,))
+        else:
+            self._execute(
+                "UPDATE pipelines SET status = ?, updated_at = ? WHERE session_id = ?",
+                (status, now, session_id)
+            )
+        self._delete("status != 'processing' AND updated_at < ?", (now - self.ttl_seconds,))
+
+    def request(self, session_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._execute("SELECT request FROM pipelines WHERE session_id = ?", (session_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def outputs(self, session_id: str) -> Dict[int, Tuple[str, Any]]:
+        """stage_index -> (output_key, output) for every completed stage"""
+        rows = self._execute(
+            "SELECT stage_index, output_key, output FROM checkpoints WHERE session_id = ? ORDER BY stage_index",
+            (session_id,)
+        )
+        return {index: (key, json.loads(output)) for index, key, output in rows}
+
+    def interrupted(self) -> List[str]:
+        """Runs still marked processing, whoever holds them"""
+        return [row[0] for row in self._execute("SELECT session_id FROM pipelines WHERE status = 'processing'")]
+
+    def renew(self) -> int:
+        """Extend the lease on every run this worker is processing; returns how many"""
+        with self._lock:
+            return self._connection.execute(
+                "UPDATE pipelines SET lease_until = ? WHERE status = 'processing' AND owner = ?",
+                (time.time() + self.lease_seconds, self.owner)
+            ).rowcount
+
+    def claim_interrupted(self) -> List[str]:
+        """
+        Take over processing runs whose lease has lapsed (their worker
+        stopped renewing it) and return only the ones this worker now holds.
+        BEGIN IMMEDIATE serializes claims across processes, so two workers
+        never resume the same run.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                claimed = [row[0] for row in self._connection.execute(
+                    "SELECT session_id FROM pipelines WHERE status = 'processing' AND (lease_until IS NULL OR lease_until < ?)",
+                    (now,)
+                )]
+                self._connection.executemany(
+                    "UPDATE pipelines SET owner = ?, lease_until = ? WHERE session_id = ?",
+                    [(self.owner, now + self.lease_seconds, session_id) for session_id in claimed]
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+        return claimed
+
+    def stats(self) -> Dict[str, Any]:
+        by_status = dict(self._execute("SELECT status, COUNT(*) FROM pipelines GROUP BY status"))
+        return {
+            "storage": self.path if self.durable else "memory",
+            "pipelines": by_status,
+            "checkpoints": self._execute("SELECT COUNT(*) FROM checkpoints")[0][0]
+        }
+
+def completed_prefix(outputs: Dict[int, Tuple[str, Any]]) -> int:
+    """Number of leading stages with a checkpoint; the pipeline resumes at this index"""
+    count = 0
+    while count in outputs:
+        count += 1
+    return count
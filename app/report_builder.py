@@ -0,0 +1,99 @@
+# app/report_builder.py - Deterministic assembly of the business case report from stage outputs
+"""
+The six agents each produce a typed output (agents/automation/output_schemas.py).
+The executive report is a plain merge of those fields: financials come
+from roi_analysis, phases from implementation_plan, risk from
+risk_assessment, narrative and metrics from final_business_case. No model
+call is needed to assemble it.
+"""
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from agents.automation.output_schemas import STAGE_SCHEMAS
+
+def parse_stage_output(output_key: str, output: Any) -> Optional[BaseModel]:
+    """Typed stage output, or None if it is missing or does not match the schema"""
+    if not isinstance(output, dict):
+        return None
+    try:
+        return STAGE_SCHEMAS[output_key].model_validate(output)
+    except ValidationError:
+        return None
+
+def _join_phrases(phrases) -> str:
+    phrases = list(phrases)
+    if len(phrases) <= 1:
+        return "".join(phrases)
+    return f"{', '.join(phrases[:-1])} and {phrases[-1]}"
+
+def merge_business_case(
+    project_id: str,
+    stage_outputs: Dict[str, Any],
+    fallback_outputs: Optional[Dict[str, Any]] = None,
+    processing_time_seconds: float = 60,
+    methodology: str = "Server-Side Multi-Agent Sequential Analysis with Real-time Chat"
+) -> Dict[str, Any]:
+    """
+    Build the report from stage outputs keyed by output_key. Stages that are
+    missing or invalid are taken from fallback_outputs; raises ValueError if
+    a stage is unavailable in both.
+    """
+    fallback_outputs = fallback_outputs or {}
+    typed = {}
+    for output_key in STAGE_SCHEMAS:
+        parsed = parse_stage_output(output_key, stage_outputs.get(output_key))
+        if parsed is None:
+            parsed = parse_stage_output(output_key, fallback_outputs.get(output_key))
+        if parsed is None:
+            raise ValueError(f"No valid '{output_key}' output to build the report from")
+        typed[output_key] = parsed
+
+    process = typed["process_analysis"]
+    roi = typed["roi_analysis"]
+    plan = typed["implementation_plan"]
+    risk = typed["risk_assessment"]
+    tech = typed["tech_integration"]
+    business_case = typed["final_business_case"]
+
+    return {
+        "project_id": project_id,
+        "processing_time_seconds": processing_time_seconds,
+        "analysis_complete": True,
+
+        "deliverables": {
+            "executive_summary": business_case.executive_summary,
+            "recommendation": business_case.recommendation,
+            "automation_opportunities": process.opportunities,
+            "strategic_recommendations": business_case.strategic_recommendations,
+
+            "estimated_roi": f"{roi.roi_percentage:.0f}%",
+            "payback_period": f"{roi.payback_months:.1f} months" if roi.payback_months is not None else "N/A",
+            "annual_savings": f"${roi.annual_savings:,.0f}",
+
+            "implementation_roadmap": {
+                f"phase_{i}": phase.model_dump(exclude_none=True)
+                for i, phase in enumerate(plan.phases, start=1)
+            },
+
+            "technical_approach": tech.model_dump(exclude_none=True),
+
+            "success_metrics": [metric.model_dump() for metric in business_case.success_metrics],
+
+            "risk_assessment": (
+                f"{risk.overall_risk} risk implementation with "
+                f"{f'{roi.payback_months:.1f} month' if roi.payback_months is not None else 'no'} payback. "
+                f"Mitigation strategies include {_join_phrases(risk.mitigations)}. "
+                f"Success probability: {risk.success_probability:.0f}%."
+            )
+        },
+
+        "automation_analysis_details": {
+            "scenario_analyzed": process.business_scenario,
+            "complexity_level": process.complexity_level,
+            "confidence_score": f"{business_case.confidence_percentage:.0f}%",
+            "methodology": methodology,
+            "agents_executed": len(STAGE_SCHEMAS),
+            "chat_enabled": True
+        }
+    }
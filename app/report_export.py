@@ -0,0 +1,115 @@
+# app/report_export.py - Markdown, PDF and DOCX export of analysis reports
+"""
+Renders the nested report JSON into downloadable documents (see
+report_render for the formats).
+
+Rendering runs in a process pool so it never holds the event loop or the
+GIL. Output is cached by a hash of the report content, the format and
+RENDERER_VERSION; the hash doubles as the ETag.
+"""
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from report_render import RENDERER_VERSION, RENDERERS, render_report
+
+EXPORT_POOL_WORKERS = int(os.getenv("EXPORT_POOL_WORKERS", "2"))
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Never fork: the server has live threads (loop monitor, metrics flusher, thread pools)
+EXPORT_POOL_START_METHOD = os.getenv(
+    "EXPORT_POOL_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+EXPORT_FORMATS = {
+    "md": ("text/markdown; charset=utf-8", "md"),
+    "pdf": ("application/pdf", "pdf"),
+    "docx": ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", "docx"),
+}
+
+def content_hash(report: Dict[str, Any], export_format: str) -> str:
+    canonical = json.dumps(report, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{RENDERER_VERSION}:{export_format}:{canonical}".encode()).hexdigest()
+
+class ReportExporter:
+    """
+    Process-pool renderer with a byte-bounded LRU cache keyed by content hash.
+    Concurrent requests for the same artifact share one render.
+    """
+
+    def __init__(self, workers: int = EXPORT_POOL_WORKERS, max_cache_bytes: int = EXPORT_CACHE_MAX_BYTES):
+        self.workers = workers
+        self.max_cache_bytes = max_cache_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cache_bytes = 0
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.renders = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            context = multiprocessing.get_context(EXPORT_POOL_START_METHOD)
+            if EXPORT_POOL_START_METHOD == "forkserver":
+                # The fork server only needs the stdlib renderers, not the app
+                context.set_forkserver_preload(["report_render"])
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._executor
+
+    def cached(self, key: str) -> Optional[bytes]:
+        body = self._cache.get(key)
+        if body is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+        return body
+
+    def _store(self, key: str, body: bytes) -> None:
+        if len(body) > self.max_cache_bytes:
+            return
+        self._cache[key] = body
+        self._cache_bytes += len(body)
+        while self._cache_bytes > self.max_cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
+
+    async def export(self, report: Dict[str, Any], export_format: str, key: Optional[str] = None) -> Tuple[str, bytes]:
+        """(content hash, rendered bytes), from cache when possible"""
+        if export_format not in RENDERERS:
+            raise ValueError(f"Unsupported export format '{export_format}'")
+        key = key or content_hash(report, export_format)
+        body = self.cached(key)
+        if body is not None:
+            return key, body
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            return key, await asyncio.shield(pending)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), render_report, report, export_format)
+        self._pending[key] = future
+        try:
+            body = await asyncio.shield(future)
+            self.renders += 1
+            self._store(key, body)
+        finally:
+            self._pending.pop(key, None)
+        return key, body
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached_artifacts": len(self._cache),
+            "cache_bytes": self._cache_bytes,
+            "cache_hits": self.hits,
+            "renders": self.renders
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,195 @@
+# app/report_render.py - Document renderers run inside the export worker processes
+"""
+Markdown, PDF and DOCX rendering of analysis reports.
+
+The report is first flattened into a list of blocks (heading, field,
+paragraph, bullet) and every format is written from those blocks. PDF and
+DOCX are produced with the standard library only: a single-font text PDF
+and a minimal WordprocessingML package, which is all the reports need.
+
+Export workers import only this module, so it must stay stdlib-only.
+"""
+import textwrap
+import zipfile
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+# Bump when rendering output changes so cached artifacts and ETags roll over
+RENDERER_VERSION = "1"
+
+Block = Tuple[str, int, str]  # (kind, level, text)
+
+def _label(key: str) -> str:
+    label = key.replace("_", " ").strip()
+    return label[:1].upper() + label[1:]
+
+def _scalar(value: Any) -> str:
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    return str(value)
+
+def _walk(data: Dict[str, Any], level: int, blocks: List[Block]) -> None:
+    for key, value in data.items():
+        if isinstance(value, dict):
+            blocks.append(("heading", level, _scalar(value.get("title", _label(key)))))
+            _walk({k: v for k, v in value.items() if k != "title"}, min(level + 1, 3), blocks)
+        elif isinstance(value, list):
+            blocks.append(("heading", level, _label(key)))
+            for item in value:
+                if isinstance(item, dict):
+                    blocks.append(("bullet", 0, " | ".join(f"{_label(k)}: {_scalar(v)}" for k, v in item.items())))
+                else:
+                    blocks.append(("bullet", 0, _scalar(item)))
+        elif isinstance(value, str) and len(value) > 80:
+            blocks.append(("heading", level, _label(key)))
+            blocks.append(("paragraph", 0, value))
+        else:
+            blocks.append(("field", 0, f"{_label(key)}: {_scalar(value)}"))
+
+def report_blocks(report: Dict[str, Any]) -> List[Block]:
+    """Flatten a report into document blocks, keeping the report's key order"""
+    title = "Automation Business Case"
+    if report.get("project_id"):
+        title = f"{title} - {report['project_id']}"
+    blocks: List[Block] = [("heading", 1, title)]
+    _walk({k: v for k, v in report.items() if k != "project_id"}, 2, blocks)
+    return blocks
+
+def render_markdown(blocks: List[Block]) -> bytes:
+    lines = []
+    for kind, level, text in blocks:
+        if kind == "heading":
+            if lines and lines[-1]:
+                lines.append("")
+            lines.extend([f"{'#' * level} {text}", ""])
+        elif kind == "field":
+            label, _, value = text.partition(": ")
+            lines.append(f"- **{label}:** {value}")
+        elif kind == "bullet":
+            lines.append(f"- {text}")
+        else:
+            lines.extend([text, ""])
+    return ("\n".join(lines).strip() + "\n").encode("utf-8")
+
+# PDF: US Letter, Helvetica, WinAnsi text
+PDF_PAGE_WIDTH, PDF_PAGE_HEIGHT, PDF_MARGIN = 612, 792, 54
+PDF_FONT_SIZES = {1: 18, 2: 14, 3: 12}
+PDF_BODY_SIZE = 10
+
+def _pdf_text(text: str) -> str:
+    text = text.replace("•", "-").replace("–", "-").replace("—", "-")
+    text = text.encode("cp1252", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def _pdf_lines(blocks: List[Block]) -> List[Tuple[str, int, str, int]]:
+    """(font, size, text, space_before) per output line, wrapped to the page width"""
+    lines = []
+    for kind, level, text in blocks:
+        bold = kind == "heading"
+        size = PDF_FONT_SIZES.get(level, 12) if bold else PDF_BODY_SIZE
+        # Helvetica averages about half an em per character
+        width = int((PDF_PAGE_WIDTH - 2 * PDF_MARGIN) / (size * 0.5))
+        prefix = "- " if kind in ("bullet", "field") else ""
+        wrapped = textwrap.wrap(text, width - len(prefix)) or [""]
+        for i, line in enumerate(wrapped):
+            space = (size if bold else 4) if i == 0 else 0
+            lines.append(("F2" if bold else "F1", size, (prefix if i == 0 else " " * len(prefix)) + line, space))
+    return lines
+
+def render_pdf(blocks: List[Block]) -> bytes:
+    pages: List[List[str]] = [[]]
+    y = PDF_PAGE_HEIGHT - PDF_MARGIN
+    for font, size, text, space in _pdf_lines(blocks):
+        y -= space + size * 1.3
+        if y < PDF_MARGIN:
+            pages.append([])
+            y = PDF_PAGE_HEIGHT - PDF_MARGIN - size * 1.3
+        pages[-1].append(f"BT /{font} {size} Tf {PDF_MARGIN} {y:.1f} Td ({_pdf_text(text)}) Tj ET")
+
+    # Objects: 1 catalog, 2 page tree, 3-4 fonts, then a page and a content stream per page
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for commands in pages:
+        stream = "\n".join(commands).encode("latin-1")
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PDF_PAGE_WIDTH} {PDF_PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {page_id + 1} 0 R >>"
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode())
+        out.write(body if isinstance(body, bytes) else body.encode("latin-1"))
+        out.write(b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+# Half-points
+DOCX_HEADING_SIZES = {1: 36, 2: 28, 3: 24}
+
+def _docx_paragraph(text: str, bold: bool = False, size: Optional[int] = None, indent: int = 0) -> str:
+    props = f'<w:pPr><w:ind w:left="{indent}"/></w:pPr>' if indent else ""
+    run_props = ("<w:b/>" if bold else "") + (f'<w:sz w:val="{size}"/>' if size else "")
+    run_props = f"<w:rPr>{run_props}</w:rPr>" if run_props else ""
+    return f'<w:p>{props}<w:r>{run_props}<w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+def render_docx(blocks: List[Block]) -> bytes:
+    paragraphs = []
+    for kind, level, text in blocks:
+        if kind == "heading":
+            paragraphs.append(_docx_paragraph(text, bold=True, size=DOCX_HEADING_SIZES.get(level, 24)))
+        elif kind in ("bullet", "field"):
+            paragraphs.append(_docx_paragraph(f"• {text}", indent=360))
+        else:
+            paragraphs.append(_docx_paragraph(text))
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{"".join(paragraphs)}</w:body></w:document>'
+    )
+    out = BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", DOCX_CONTENT_TYPES)
+        package.writestr("_rels/.rels", DOCX_RELS)
+        package.writestr("word/document.xml", document)
+    return out.getvalue()
+
+RENDERERS = {"md": render_markdown, "pdf": render_pdf, "docx": render_docx}
+
+def render_report(report: Dict[str, Any], export_format: str) -> bytes:
+    """Render a report in one format; runs inside the export worker processes"""
+    return RENDERERS[export_format](report_blocks(report))
@@ -0,0 +1,91 @@
+# app/request_dedup.py - Idempotency keys and in-flight coalescing for analysis creation
+"""
+Two ways a create call can reuse an existing session instead of starting
+another six-agent pipeline:
+
+- Idempotency-Key header: the first request with a key creates the session;
+  repeats within IDEMPOTENCY_TTL_SECONDS return the same session. Reusing a
+  key with a different request body is rejected.
+- Single-flight coalescing: a request whose normalized body matches a
+  session that is still processing attaches to that session.
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+COALESCE_IN_FLIGHT = os.getenv("COALESCE_IN_FLIGHT", "true").lower() == "true"
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+class IdempotencyConflict(Exception):
+    """An Idempotency-Key was reused with a different request body"""
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    return value
+
+def request_fingerprint(payload: Dict[str, Any]) -> str:
+    """Stable hash of a request body, ignoring case and whitespace differences"""
+    canonical = json.dumps(_normalize(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class RequestDeduplicator:
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL_SECONDS, coalesce: bool = COALESCE_IN_FLIGHT):
+        self.ttl = ttl
+        self.coalesce = coalesce
+        # key -> (session_id, fingerprint, expires_at)
+        self._keys: Dict[str, Tuple[str, str, float]] = {}
+        # fingerprint -> session_id, only while the session is processing
+        self._in_flight: Dict[str, str] = {}
+        self._next_sweep = 0.0
+
+    def _sweep(self, now: float) -> None:
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + min(60.0, self.ttl)
+        for key in [k for k, (_, _, expires_at) in self._keys.items() if expires_at <= now]:
+            del self._keys[key]
+
+    def lookup(self, idempotency_key: Optional[str], fingerprint: str) -> Optional[Tuple[str, str]]:
+        """
+        Return (session_id, reason) for a session this request should reuse,
+        or None if a new pipeline should start.
+        Raises IdempotencyConflict when the key was used for a different body.
+        """
+        now = time.monotonic()
+        self._sweep(now)
+        if idempotency_key:
+            entry = self._keys.get(idempotency_key)
+            if entry is not None and entry[2] > now:
+                if entry[1] != fingerprint:
+                    raise IdempotencyConflict("Idempotency-Key was already used with a different request")
+                return entry[0], "idempotency_key"
+        if self.coalesce:
+            session_id = self._in_flight.get(fingerprint)
+            if session_id is not None:
+                if idempotency_key:
+                    self._keys[idempotency_key] = (session_id, fingerprint, now + self.ttl)
+                return session_id, "coalesced"
+        return None
+
+    def register(self, session_id: str, idempotency_key: Optional[str], fingerprint: str) -> None:
+        """Record a newly started session"""
+        if idempotency_key:
+            self._keys[idempotency_key] = (session_id, fingerprint, time.monotonic() + self.ttl)
+        if self.coalesce:
+            self._in_flight[fingerprint] = session_id
+
+    def finish(self, fingerprint: str, session_id: str) -> None:
+        """The session stopped processing; later identical requests start fresh"""
+        if self._in_flight.get(fingerprint) == session_id:
+            del self._in_flight[fingerprint]
+
+    def stats(self) -> Dict[str, int]:
+        return {"idempotency_keys": len(self._keys), "in_flight_fingerprints": len(self._in_flight)}
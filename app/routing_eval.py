@@ -0,0 +1,214 @@
+# app/routing_eval.py - Offline evaluation of model routing tables against recorded pipeline runs
+"""
+A fixture file holds, per case, the request and one recording of every
+stage for each model that was run on it:
+
+    {
+      "pricing": {"<model>": {"input_per_million": 0.1, "output_per_million": 0.4}},
+      "cases": [{
+        "id": "invoices-small",
+        "request": {...AutomationRequest fields...},
+        "reference": {"<output_key>": {...}},          # optional, reviewed outputs
+        "recordings": {"<model>": {"<output_key>": {
+            "latency_seconds": 2.1, "input_tokens": 1800, "output_tokens": 350, "output": {...}
+        }}}
+      }]
+    }
+
+evaluate compares a routing table with the baseline (every stage on the
+standard tier) using only those recordings: mean pipeline latency, mean
+cost, and a quality score of each stage output against the reference (the
+baseline's own output when no reference is recorded). Recording needs the
+real models:
+
+    python routing_eval.py record requests.jsonl -o fixtures.json --models gemini-2.0-flash-lite gemini-2.0-flash-exp
+    python routing_eval.py evaluate fixtures.json [--config routing.json]
+"""
+import argparse
+import asyncio
+import json
+import sys
+from statistics import mean
+from typing import Any, Dict, Iterable, List, Optional
+
+from pydantic import ValidationError
+
+from agents.automation.output_schemas import STAGE_SCHEMAS
+from eval_runner import run_case
+from model_routing import DEFAULT_TIER, ModelRouter, load_router, request_complexity, set_model_router
+
+# USD per million tokens; fixture "pricing" entries take precedence
+MODEL_PRICING = {
+    "gemini-2.0-flash-lite": {"input_per_million": 0.075, "output_per_million": 0.30},
+    "gemini-2.0-flash-exp": {"input_per_million": 0.10, "output_per_million": 0.40},
+    "gemini-2.0-flash": {"input_per_million": 0.10, "output_per_million": 0.40},
+    "gemini-2.5-pro": {"input_per_million": 1.25, "output_per_million": 10.00}
+}
+
+# Fields that must match the reference exactly; other strings only need to be present
+CATEGORICAL_FIELDS = {"complexity_level", "overall_risk", "recommendation", "architecture_pattern"}
+NUMERIC_TOLERANCE = 0.15
+MAX_QUALITY_DROP = 0.02
+
+def load_fixtures(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+def _field_score(field: str, candidate: Any, reference: Any) -> float:
+    if isinstance(reference, bool) or reference is None:
+        return float(candidate == reference)
+    if isinstance(reference, (int, float)):
+        if not isinstance(candidate, (int, float)):
+            return 0.0
+        scale = max(abs(reference), 1e-9)
+        return float(abs(candidate - reference) / scale <= NUMERIC_TOLERANCE)
+    if isinstance(reference, str):
+        if field in CATEGORICAL_FIELDS:
+            return float(candidate == reference)
+        return float(isinstance(candidate, str) and bool(candidate.strip()))
+    if isinstance(reference, list):
+        return float(not reference or (isinstance(candidate, list) and bool(candidate)))
+    return float(candidate is not None)
+
+def stage_quality(output_key: str, candidate: Any, reference: Dict[str, Any]) -> float:
+    """0-1 agreement of a stage output with the reference; 0 if it fails the stage schema"""
+    try:
+        STAGE_SCHEMAS[output_key].model_validate(candidate)
+    except ValidationError:
+        return 0.0
+    fields = [field for field, value in reference.items() if value is not None]
+    if not fields:
+        return 1.0
+    return mean(_field_score(field, candidate.get(field), reference[field]) for field in fields)
+
+def _stage_cost(recording: Dict[str, Any], pricing: Dict[str, float]) -> float:
+    return (
+        recording.get("input_tokens", 0) * pricing.get("input_per_million", 0.0)
+        + recording.get("output_tokens", 0) * pricing.get("output_per_million", 0.0)
+    ) / 1_000_000
+
+def _recording(case: Dict[str, Any], model: str, output_key: str) -> Dict[str, Any]:
+    try:
+        return case["recordings"][model][output_key]
+    except KeyError:
+        raise ValueError(
+            f"Case '{case.get('id')}' has no recording of {output_key} on {model}; record it before evaluating this table"
+        ) from None
+
+def evaluate_router(fixtures: Dict[str, Any], router: ModelRouter, reference_router: ModelRouter) -> Dict[str, Any]:
+    """Per-case and mean latency, cost and quality of the stages router would run"""
+    pricing = {**MODEL_PRICING, **fixtures.get("pricing", {})}
+    cases = []
+    for case in fixtures["cases"]:
+        complexity = request_complexity(case["request"])
+        plan = router.plan(complexity, STAGE_SCHEMAS)
+        latency = cost = 0.0
+        qualities = []
+        for output_key, model in plan.items():
+            recording = _recording(case, model, output_key)
+            reference = case.get("reference", {}).get(output_key)
+            if reference is None:
+                reference = _recording(case, reference_router.model(complexity, output_key), output_key)["output"]
+            # Stages run sequentially, so pipeline latency is the sum
+            latency += recording.get("latency_seconds", 0.0)
+            cost += _stage_cost(recording, pricing.get(model, {}))
+            qualities.append(stage_quality(output_key, recording.get("output"), reference))
+        cases.append({
+            "id": case.get("id"),
+            "complexity": complexity,
+            "models": plan,
+            "latency_seconds": latency,
+            "cost_usd": cost,
+            "quality": mean(qualities)
+        })
+    return {
+        "cases": cases,
+        "mean_latency_seconds": mean(case["latency_seconds"] for case in cases),
+        "mean_cost_usd": mean(case["cost_usd"] for case in cases),
+        "mean_quality": mean(case["quality"] for case in cases)
+    }
+
+def compare_routers(
+    fixtures: Dict[str, Any],
+    router: ModelRouter,
+    baseline: Optional[ModelRouter] = None,
+    max_quality_drop: float = MAX_QUALITY_DROP
+) -> Dict[str, Any]:
+    """
+    Routed vs baseline results. Passes when mean quality drops by at most
+    max_quality_drop and neither mean latency nor mean cost goes up.
+    """
+    baseline = baseline or ModelRouter.uniform(DEFAULT_TIER, router.tiers)
+    routed_result = evaluate_router(fixtures, router, baseline)
+    baseline_result = evaluate_router(fixtures, baseline, baseline)
+    passed = (
+        routed_result["mean_quality"] >= baseline_result["mean_quality"] - max_quality_drop
+        and routed_result["mean_latency_seconds"] <= baseline_result["mean_latency_seconds"]
+        and routed_result["mean_cost_usd"] <= baseline_result["mean_cost_usd"]
+    )
+    return {"baseline": baseline_result, "routed": routed_result, "passed": passed}
+
+async def record_case(case_id: str, request: Dict[str, Any], models: Iterable[str]) -> Dict[str, Any]:
+    """Run the real pipeline once per model (every stage on that model) and record each stage"""
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+
+    from agent import root_agent
+
+    recordings = {}
+    try:
+        for model in models:
+            set_model_router(ModelRouter.uniform("recorded", {"recorded": model}))
+            runner = Runner(agent=root_agent, app_name="routing_eval", session_service=InMemorySessionService())
+            run = await run_case(runner, root_agent, request)
+            recordings[model] = {
+                output_key: {**stage, "output": run["outputs"].get(output_key)}
+                for output_key, stage in run["stages"].items()
+            }
+            print(f"🎙️ Recorded {case_id} on {model}")
+    finally:
+        set_model_router(None)
+    return {"id": case_id, "request": request, "recordings": recordings}
+
+def _print_comparison(result: Dict[str, Any]) -> None:
+    for name in ("baseline", "routed"):
+        summary = result[name]
+        print(
+            f"{name:>9}: latency {summary['mean_latency_seconds']:.2f}s  "
+            f"cost ${summary['mean_cost_usd']:.5f}  quality {summary['mean_quality']:.3f}"
+        )
+    print("✅ Routing table passes" if result["passed"] else "❌ Routing table regresses against the baseline")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Evaluate model routing tables against recorded pipeline runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    evaluate = commands.add_parser("evaluate", help="Compare a routing table with the standard-tier baseline")
+    evaluate.add_argument("fixtures", help="Recorded fixture JSON")
+    evaluate.add_argument("--config", default="", help="Routing config JSON (default: MODEL_ROUTING_CONFIG)")
+    evaluate.add_argument("--max-quality-drop", type=float, default=MAX_QUALITY_DROP)
+
+    record = commands.add_parser("record", help="Record fixture cases by running the real models")
+    record.add_argument("requests", help="JSONL of AutomationRequest bodies, optionally with an \"id\"")
+    record.add_argument("-o", "--output", required=True, help="Fixture JSON to write")
+    record.add_argument("--models", nargs="+", required=True, help="Models to record every stage on")
+    args = parser.parse_args(argv)
+
+    if args.command == "evaluate":
+        router = load_router(args.config) if args.config else load_router()
+        result = compare_routers(load_fixtures(args.fixtures), router, max_quality_drop=args.max_quality_drop)
+        _print_comparison(result)
+        return 0 if result["passed"] else 1
+
+    with open(args.requests) as f:
+        requests = [json.loads(line) for line in f if line.strip()]
+    cases = [
+        asyncio.run(record_case(request.pop("id", f"case-{index + 1}"), request, args.models))
+        for index, request in enumerate(requests)
+    ]
+    with open(args.output, "w") as f:
+        json.dump({"pricing": {model: MODEL_PRICING[model] for model in args.models if model in MODEL_PRICING}, "cases": cases}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+# app/schemas.py - Request models shared by the API and offline tools
+from typing import List
+
+from pydantic import BaseModel
+
+class AutomationRequest(BaseModel):
+    business_challenge: str
+    current_state: str
+    success_definition: str
+    process_frequency: str
+    monthly_volume: int
+    people_involved: int
+    manual_percentage: int
+    business_scenario: str
+    decision_makers: List[str] = []
+    affected_departments: List[str] = []
+    business_context: str = ""
+    cx_objective: str = ""
+    personasList: List[dict] = []
+    cxToolsList: List[str] = []
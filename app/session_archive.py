@@ -0,0 +1,268 @@
+# app/session_archive.py - Compressed archival tier for finished analysis sessions
+"""
+Completed and failed sessions keep their request, chat log and report as
+live Python objects. Once they are older than SESSION_ARCHIVE_AFTER_SECONDS,
+they are serialized, compressed (zstd via the zstandard requirement, zlib
+if it is missing) and moved out of analysis_sessions. Blobs stay in memory,
+or are written to SESSION_ARCHIVE_DIR when that is set; the server's
+compaction task does that work on the blocking pool. Archived sessions
+are dropped after SESSION_ARCHIVE_TTL_SECONDS, and the oldest go first once
+more than SESSION_ARCHIVE_MAX_ENTRIES are held.
+
+get_session() looks in the live dict first and transparently decompresses
+archived sessions, so read-only endpoints see the same session as before.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from agents.tools.offload import run_blocking
+from observability.metrics import Gauge
+from session_models import AnalysisSession
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SESSION_ARCHIVE_ENABLED = os.getenv("SESSION_ARCHIVE_ENABLED", "true").lower() == "true"
+SESSION_ARCHIVE_AFTER_SECONDS = float(os.getenv("SESSION_ARCHIVE_AFTER_SECONDS", "900"))
+SESSION_ARCHIVE_INTERVAL = float(os.getenv("SESSION_ARCHIVE_INTERVAL", "60"))
+SESSION_ARCHIVE_DIR = os.getenv("SESSION_ARCHIVE_DIR")
+SESSION_ARCHIVE_LEVEL = int(os.getenv("SESSION_ARCHIVE_LEVEL", "6"))
+SESSION_ARCHIVE_TTL_SECONDS = float(os.getenv("SESSION_ARCHIVE_TTL_SECONDS", str(7 * 24 * 3600)))
+SESSION_ARCHIVE_MAX_ENTRIES = int(os.getenv("SESSION_ARCHIVE_MAX_ENTRIES", "10000"))
+
+FINISHED_STATUSES = ("complete", "error")
+
+ARCHIVED_SESSIONS = Gauge(
+    "automation_archived_sessions",
+    "Finished analysis sessions held in the compressed archive",
+)
+ARCHIVE_BYTES_SAVED = Gauge(
+    "automation_session_archive_bytes_saved",
+    "Estimated resident bytes released by archiving sessions",
+)
+
+def deep_sizeof(value: Any) -> int:
+    """Approximate resident size of an object graph of containers and slotted records"""
+    seen = set()
+    stack = [value]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+        elif hasattr(type(item), "__slots__"):
+            stack.extend(getattr(item, name) for name in type(item).__slots__)
+    return total
+
+class Codec:
+    """zstd when available, zlib as the always-present fallback"""
+
+    def __init__(self, level: int = SESSION_ARCHIVE_LEVEL):
+        if zstandard is not None:
+            self.name = "zstd"
+            self._compressor = zstandard.ZstdCompressor(level=level)
+            self._decompressor = zstandard.ZstdDecompressor()
+        else:
+            self.name = "zlib"
+            self.level = min(level, 9)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.name == "zstd":
+            return self._compressor.compress(data)
+        return zlib.compress(data, self.level)
+
+    def decompress(self, blob: bytes, codec: str) -> bytes:
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("Session was archived with zstd but zstandard is not installed")
+            return self._decompressor.decompress(blob)
+        return zlib.decompress(blob)
+
+class ArchivedSession:
+    __slots__ = ("codec", "blob", "path", "resident_bytes", "stored_bytes", "archived_at")
+
+    def __init__(self, codec: str, blob: Optional[bytes], path: Optional[str], resident_bytes: int, stored_bytes: int):
+        self.codec = codec
+        self.blob = blob
+        self.path = path
+        self.resident_bytes = resident_bytes
+        self.stored_bytes = stored_bytes
+        self.archived_at = time.time()
+
+class SessionArchive:
+    def __init__(
+        self,
+        archive_dir: Optional[str] = SESSION_ARCHIVE_DIR,
+        level: int = SESSION_ARCHIVE_LEVEL,
+        ttl_seconds: float = SESSION_ARCHIVE_TTL_SECONDS,
+        max_entries: int = SESSION_ARCHIVE_MAX_ENTRIES
+    ):
+        self.codec = Codec(level)
+        self.archive_dir = archive_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: Dict[str, ArchivedSession] = {}
+        self.bytes_saved = 0
+        if archive_dir:
+            os.makedirs(archive_dir, exist_ok=True)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def archive(self, session_id: str, session: AnalysisSession) -> ArchivedSession:
+        return self._admit(session_id, self._pack(session_id, session))
+
+    def _pack(self, session_id: str, session: AnalysisSession) -> ArchivedSession:
+        """Measure, compress and (with an archive dir) write one session; touches no shared state"""
+        resident_bytes = deep_sizeof(session)
+        blob = self.codec.compress(json.dumps(session.to_record(), separators=(",", ":")).encode())
+        path = None
+        if self.archive_dir:
+            path = os.path.join(self.archive_dir, f"{session_id}.{self.codec.name}")
+            with open(path, "wb") as f:
+                f.write(blob)
+        return ArchivedSession(self.codec.name, None if path else blob, path, resident_bytes, len(blob))
+
+    def _admit(self, session_id: str, entry: ArchivedSession) -> ArchivedSession:
+        # Re-archiving moves the session to the end of the archive order
+        previous = self.entries.pop(session_id, None)
+        if previous is not None:
+            if previous.path and previous.path != entry.path:
+                with contextlib.suppress(OSError):
+                    os.remove(previous.path)
+            self.bytes_saved -= previous.resident_bytes - (0 if previous.path else previous.stored_bytes)
+        self.entries[session_id] = entry
+        # On-disk blobs free everything; in-memory blobs still cost their own size
+        self.bytes_saved += entry.resident_bytes - (0 if entry.path else entry.stored_bytes)
+        self._publish()
+        return entry
+
+    def load(self, session_id: str) -> Optional[AnalysisSession]:
+        entry = self.entries.get(session_id)
+        if entry is None:
+            return None
+        if entry.blob is not None:
+            blob = entry.blob
+        else:
+            with open(entry.path, "rb") as f:
+                blob = f.read()
+        return AnalysisSession.from_record(json.loads(self.codec.decompress(blob, entry.codec)))
+
+    def discard(self, session_id: str) -> None:
+        """Drop an archived copy, e.g. when a failed session is resumed"""
+        entry = self.entries.pop(session_id, None)
+        if entry is None:
+            return
+        if entry.path:
+            with contextlib.suppress(OSError):
+                os.remove(entry.path)
+        self.bytes_saved -= entry.resident_bytes - (0 if entry.path else entry.stored_bytes)
+        self._publish()
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop entries older than ttl_seconds, then the oldest beyond max_entries; returns how many went"""
+        cutoff = (time.time() if now is None else now) - self.ttl_seconds
+        # Entries are held in archive order, so the oldest come first
+        order = list(self.entries)
+        stale = sum(1 for session_id in order if self.entries[session_id].archived_at <= cutoff)
+        expired = order[:max(stale, len(order) - self.max_entries)]
+        for session_id in expired:
+            self.discard(session_id)
+        return len(expired)
+
+    def _due(self, sessions: Dict[str, AnalysisSession], older_than: float) -> Iterator[Tuple[str, AnalysisSession]]:
+        cutoff = time.time() - older_than
+        for session_id, session in list(sessions.items()):
+            if session.status not in FINISHED_STATUSES:
+                continue
+            finished_at = session.finished_at
+            if finished_at is None or finished_at > cutoff:
+                continue
+            yield session_id, session
+
+    def compact(self, sessions: Dict[str, AnalysisSession], older_than: float = SESSION_ARCHIVE_AFTER_SECONDS) -> int:
+        """Archive finished sessions older than `older_than` seconds; returns how many moved"""
+        moved = 0
+        for session_id, session in self._due(sessions, older_than):
+            self.archive(session_id, session)
+            del sessions[session_id]
+            moved += 1
+        return moved
+
+    async def compact_off_loop(self, sessions: Dict[str, AnalysisSession], older_than: float = SESSION_ARCHIVE_AFTER_SECONDS) -> int:
+        """
+        compact() for the running server: each session is packed on the
+        blocking pool, while the archive and session dicts only change on
+        the event loop between those calls.
+        """
+        moved = 0
+        for session_id, session in self._due(sessions, older_than):
+            entry = await run_blocking(self._pack, session_id, session)
+            # The session may have been resumed or replaced while it was packed
+            if sessions.get(session_id) is not session or session.status not in FINISHED_STATUSES:
+                if entry.path and session_id not in self.entries:
+                    with contextlib.suppress(OSError):
+                        os.remove(entry.path)
+                continue
+            self._admit(session_id, entry)
+            del sessions[session_id]
+            moved += 1
+        return moved
+
+    def _publish(self) -> None:
+        ARCHIVED_SESSIONS.set(len(self.entries))
+        ARCHIVE_BYTES_SAVED.set(self.bytes_saved)
+
+    def stats(self) -> Dict[str, Any]:
+        resident = sum(e.resident_bytes for e in self.entries.values())
+        stored = sum(e.stored_bytes for e in self.entries.values())
+        return {
+            "codec": self.codec.name,
+            "archived_sessions": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "storage": "disk" if self.archive_dir else "memory",
+            "resident_bytes_before": resident,
+            "compressed_bytes": stored,
+            "bytes_saved": self.bytes_saved,
+            "compression_ratio": round(resident / stored, 1) if stored else None
+        }
+
+async def run_compaction(
+    archive: SessionArchive,
+    sessions: Dict[str, AnalysisSession],
+    interval: float = SESSION_ARCHIVE_INTERVAL,
+    on_archived: Optional[Callable[[], None]] = None
+) -> None:
+    """Background task: periodically move old finished sessions into the archive, expire old entries, then call on_archived"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            moved = await archive.compact_off_loop(sessions)
+            expired = archive.expire()
+            if moved:
+                print(f"🗜️ Archived {moved} finished sessions ({archive.stats()['bytes_saved']:,} bytes saved)")
+            if expired:
+                print(f"🗑️ Expired {expired} archived sessions")
+            if (moved or expired) and on_archived is not None:
+                on_archived()
+        except Exception as e:
+            print(f"⚠️ Session archival failed: {e}")
@@ -0,0 +1,122 @@
+# app/session_models.py - Compact records for analysis sessions and chat messages
+"""
+Slotted dataclasses for the records every session keeps.
+
+Repeated strings (agent names, message ids and types) are interned so all
+sessions share one copy. Timestamps are epoch floats. Dicts and ISO
+strings are only built when a response or archive record is serialized.
+"""
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from cost_ledger import StageCost
+
+def _iso(timestamp: float) -> str:
+    """Naive UTC ISO string, matching datetime.utcnow().isoformat()"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None).isoformat()
+
+@dataclass(slots=True)
+class ChatMessage:
+    id: str
+    from_agent: str
+    to_agent: str
+    message: str
+    type: str
+    timestamp: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        self.id = sys.intern(self.id)
+        self.from_agent = sys.intern(self.from_agent)
+        self.to_agent = sys.intern(self.to_agent)
+        self.type = sys.intern(self.type)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "from_agent": self.from_agent,
+            "to_agent": self.to_agent,
+            "message": self.message,
+            "type": self.type,
+            "timestamp": _iso(self.timestamp)
+        }
+
+    def to_record(self) -> List[Any]:
+        return [self.id, self.from_agent, self.to_agent, self.message, self.type, self.timestamp]
+
+    @classmethod
+    def from_record(cls, record: List[Any]) -> "ChatMessage":
+        return cls(*record)
+
+@dataclass(slots=True)
+class AnalysisSession:
+    request: Dict[str, Any]
+    agent_names: List[str]
+    status: str = "processing"
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    completed_at: Optional[float] = None
+    failed_at: Optional[float] = None
+    current_agent_index: int = 0
+    # completed_agents is always a prefix of agent_names, so only the count is stored
+    completed_count: int = 0
+    chat_messages: List[ChatMessage] = field(default_factory=list)
+    adk_integration: bool = False
+    # output_key -> stage output, mirrored into the checkpoint store
+    stage_outputs: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 1
+    # agent name -> time and tokens spent on it, across attempts
+    ledger: Dict[str, StageCost] = field(default_factory=dict)
+    # Deterministic report shown until the agents finish
+    draft: Optional[Dict[str, Any]] = None
+
+    @property
+    def total_agents(self) -> int:
+        return len(self.agent_names)
+
+    @property
+    def completed_agents(self) -> List[str]:
+        return self.agent_names[:self.completed_count]
+
+    @property
+    def finished_at(self) -> Optional[float]:
+        return self.completed_at or self.failed_at
+
+    def add_message(self, message: ChatMessage) -> None:
+        self.chat_messages.append(message)
+
+    def messages_as_dicts(self) -> List[Dict[str, Any]]:
+        return [message.to_dict() for message in self.chat_messages]
+
+    def to_record(self) -> Dict[str, Any]:
+        """JSON-ready record for archival; from_record() restores it exactly"""
+        return {
+            "request": self.request,
+            "agent_names": self.agent_names,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            "failed_at": self.failed_at,
+            "current_agent_index": self.current_agent_index,
+            "completed_count": self.completed_count,
+            "chat_messages": [message.to_record() for message in self.chat_messages],
+            "adk_integration": self.adk_integration,
+            "stage_outputs": self.stage_outputs,
+            "attempts": self.attempts,
+            "ledger": {agent: cost.to_record() for agent, cost in self.ledger.items()},
+            "draft": self.draft
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "AnalysisSession":
+        fields = dict(record)
+        fields["agent_names"] = [sys.intern(name) for name in fields["agent_names"]]
+        fields["chat_messages"] = [ChatMessage.from_record(m) for m in fields["chat_messages"]]
+        # Records archived before the ledger existed have none
+        fields["ledger"] = {agent: StageCost.from_record(cost) for agent, cost in fields.get("ledger", {}).items()}
+        return cls(**fields)
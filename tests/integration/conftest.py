@@ -0,0 +1,39 @@
+"""
+Model calls in the integration tests go through per-test cassettes in
+tests/integration/cassettes. By default ("once") a missing cassette is
+recorded against the live model and replayed on every later run. CI sets
+MODEL_CASSETTE_MODE=replay so an unrecorded prompt fails the test instead
+of calling the model; MODEL_CASSETTE_MODE=record refreshes the recordings
+and "off" runs live.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from model_cassettes import use_cassette
+
+CASSETTE_DIR = Path(__file__).parent / "cassettes"
+
+
+@pytest.fixture(autouse=True)
+def model_cassette(request: pytest.FixtureRequest):
+    """Wrap the pipeline's models in this test's cassette."""
+    mode = os.getenv("MODEL_CASSETTE_MODE", "once")
+    if mode == "off":
+        yield None
+        return
+
+    from app.agent import root_agent
+
+    path = CASSETTE_DIR / f"{request.node.module.__name__.rsplit('.', 1)[-1]}.{request.node.name}.json"
+    latency = os.getenv("MODEL_CASSETTE_LATENCY", "none")
+    with use_cassette(
+        root_agent,
+        str(path),
+        mode=mode,
+        strict=os.getenv("MODEL_CASSETTE_STRICT", "true").lower() == "true",
+        latency=latency if latency in ("recorded", "none") else float(latency),
+    ) as cassette:
+        yield cassette
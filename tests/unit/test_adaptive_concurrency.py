@@ -0,0 +1,118 @@
+"""Unit tests for the adaptive model concurrency limiter."""
+
+import asyncio
+
+import pytest
+from google.adk.models import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+import adaptive_concurrency
+from adaptive_concurrency import AdaptiveLimiter, ConcurrencyLimitRejected, LimitedLlm, get_model_limiter
+from observability.metrics import MODEL_CONCURRENCY_LIMIT, MODEL_LIMITER_REJECTIONS
+
+
+class QuotaLlm(BaseLlm):
+    """Turns calls away like a quota error while capacity calls are already in flight."""
+
+    capacity: int = 8
+    active: int = 0
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        if self.active >= self.capacity:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED")
+        self.active += 1
+        try:
+            await asyncio.sleep(0.002)
+        finally:
+            self.active -= 1
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="ok")]))
+
+
+def test_limit_tracks_what_the_model_sustains(monkeypatch) -> None:
+    """Quota errors cut the limit, successes grow it back, and the limit and calls in flight are exported."""
+    monkeypatch.setattr(adaptive_concurrency, "_limiters", {})
+    inner = QuotaLlm(model="quota-model")
+    llm = LimitedLlm(model="quota-model", inner=inner)
+
+    async def call() -> bool:
+        request = LlmRequest(model="quota-model", contents=[types.Content(role="user", parts=[types.Part(text="hi")])])
+        try:
+            async for _ in llm.generate_content_async(request):
+                pass
+            return True
+        except RuntimeError:
+            return False
+
+    async def workers(count: int, calls: int):
+        async def worker():
+            return [await call() for _ in range(calls)]
+        return [ok for results in await asyncio.gather(*(worker() for _ in range(count))) for ok in results]
+
+    limiter = get_model_limiter("quota-model")
+    limiter.limit = 32.0
+    results = asyncio.run(workers(64, 15))
+    # One overload costs one cut; the limit settles near the model's capacity
+    assert limiter.min_limit <= limiter.limit <= 2 * inner.capacity
+    assert sum(results) > 0.85 * len(results)
+    assert limiter.in_flight == 0 and limiter.queued == 0
+    assert MODEL_CONCURRENCY_LIMIT.labels("quota-model").value == int(limiter.limit)
+
+    # With a quiet model, sustained use grows the limit again
+    inner.capacity = 1000
+    before = limiter.limit
+    asyncio.run(workers(32, 20))
+    assert limiter.limit > before
+
+
+def test_latency_inflation_cuts_once_per_event() -> None:
+    """A stage far slower than its baseline halves the limit once, not once per call in flight."""
+    limiter = AdaptiveLimiter("inflation-model", initial=16, backoff=0.5, tolerance=1.5)
+    now = [0.0]
+    clock = lambda: now[0]
+
+    def finish(started: float, seconds: float) -> None:
+        # Released from a fully used limit
+        now[0] = started + seconds
+        limiter.in_flight = int(limiter.limit)
+        limiter.release(started, "solution_designer", "success")
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(adaptive_concurrency.time, "perf_counter", clock)
+        for _ in range(20):
+            finish(now[0], 1.0)
+        assert limiter.limit > 16
+
+        grown = limiter.limit
+        started = now[0]
+        for _ in range(4):
+            finish(started, 6.0)
+        assert limiter.limit == pytest.approx(grown * 0.5)
+
+
+def test_rejects_when_queue_is_full_or_wait_too_long() -> None:
+    """Callers beyond the queue or past max_wait are rejected and counted; cancelled waiters leak no slots."""
+    limiter = AdaptiveLimiter("busy-model", initial=1, max_queue=1, max_wait=0.05)
+
+    async def scenario():
+        started = await limiter.acquire()
+        queued = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(ConcurrencyLimitRejected, match="queue_full"):
+            await limiter.acquire()
+        with pytest.raises(ConcurrencyLimitRejected, match="timeout"):
+            await queued
+
+        cancelled = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        limiter.release(started, "stage", "dropped")
+        async with limiter.slot("stage"):
+            assert limiter.in_flight == 1
+
+    asyncio.run(scenario())
+    assert limiter.in_flight == 0 and limiter.queued == 0
+    assert MODEL_LIMITER_REJECTIONS.labels("busy-model", "queue_full").value == 1
+    assert MODEL_LIMITER_REJECTIONS.labels("busy-model", "timeout").value == 1
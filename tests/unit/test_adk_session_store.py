@@ -0,0 +1,84 @@
+"""Unit tests for the SQLite-backed ADK session service."""
+
+import asyncio
+
+import pytest
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+
+from adk_session_store import COMPACTION_AUTHOR, SqliteSessionService
+
+
+def _event(i: int) -> Event:
+    return Event(
+        author="process_analyst",
+        invocation_id="inv-1",
+        actions=EventActions(state_delta={"process_analysis": f"draft {i}", "temp:scratch": i, "user:runs": i}),
+    )
+
+
+def test_batched_events_survive_a_new_service_instance(tmp_path) -> None:
+    """Buffered writes are flushed and readable from a fresh connection pool."""
+    path = str(tmp_path / "adk.db")
+
+    async def run():
+        service = SqliteSessionService(path, flush_interval=60, batch_size=8)
+        session = await service.create_session(app_name="automation", user_id="u1", state={"app:tier": "pro"})
+        for i in range(20):
+            await service.append_event(session, _event(i))
+        flushes_before_close = service.flushes
+        await service.close()
+        reopened = SqliteSessionService(path)
+        loaded = await reopened.get_session(app_name="automation", user_id="u1", session_id=session.id)
+        await reopened.close()
+        return flushes_before_close, loaded
+
+    flushes, loaded = asyncio.run(run())
+    assert flushes == 2
+    assert len(loaded.events) == 20
+    assert loaded.state == {"process_analysis": "draft 19", "app:tier": "pro", "user:runs": 19}
+
+
+def test_compaction_keeps_final_state_values(tmp_path) -> None:
+    """Old events collapse into one event carrying the last value of each key."""
+
+    async def run():
+        service = SqliteSessionService(str(tmp_path / "adk.db"))
+        session = await service.create_session(app_name="automation", user_id="u1")
+        for i in range(12):
+            await service.append_event(session, _event(i))
+        removed = await service.compact(older_than=0, keep_events=3)
+        loaded = await service.get_session(app_name="automation", user_id="u1", session_id=session.id)
+        await service.close()
+        return removed, loaded
+
+    removed, loaded = asyncio.run(run())
+    assert removed == 8
+    assert len(loaded.events) == 4
+    summary = loaded.events[0]
+    assert summary.author == COMPACTION_AUTHOR
+    assert summary.actions.state_delta == {"process_analysis": "draft 8", "user:runs": 8}
+    assert loaded.state["process_analysis"] == "draft 11"
+
+
+def test_adk_app_uses_the_sqlite_service(tmp_path) -> None:
+    """The ADK app built under default_session_service serves this store; any other service is refused."""
+    from google.adk.cli.fast_api import get_fast_api_app
+    from google.adk.sessions import InMemorySessionService
+
+    from adk_session_store import default_session_service, verify_session_service
+
+    service = SqliteSessionService(str(tmp_path / "adk.db"))
+    with default_session_service(service):
+        app = get_fast_api_app(agents_dir=str(tmp_path), web=False)
+    verify_session_service(app, service)
+    with pytest.raises(RuntimeError, match="InMemorySessionService"):
+        verify_session_service(get_fast_api_app(agents_dir=str(tmp_path), web=False), service)
+
+    async def stats():
+        await service.create_session(app_name="automation", user_id="u1")
+        result = await service.stats()
+        await service.close()
+        return result
+
+    assert asyncio.run(stats())["sessions"] == 1
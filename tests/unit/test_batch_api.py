@@ -0,0 +1,138 @@
+"""API tests for batch analysis submission."""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from request_dedup import RequestDeduplicator
+from session_archive import SessionArchive
+
+BASE = {
+    "business_challenge": "Manual work",
+    "current_state": "Spreadsheets",
+    "success_definition": "Faster turnaround",
+    "process_frequency": "daily",
+    "people_involved": 4,
+    "manual_percentage": 80
+}
+CLAIMS = {**BASE, "business_scenario": "Claims", "monthly_volume": 100}
+INVOICES = {**BASE, "business_scenario": "Invoice processing", "monthly_volume": 2000}
+LEADS = {**BASE, "business_scenario": "Sales lead qualification", "monthly_volume": 5000}
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Client over fresh session state; pipelines are recorded in start order and left processing."""
+    started = []
+
+    async def record_pipeline(session_id, request, fingerprint=None, model_slots=None, fallback_outputs=None):
+        main.QUEUE_DEPTH.dec()
+        started.append((session_id, request.business_scenario, fallback_outputs))
+
+    monkeypatch.setattr(main, "analysis_sessions", {})
+    monkeypatch.setattr(main, "analysis_batches", {})
+    monkeypatch.setattr(main, "request_deduplicator", RequestDeduplicator())
+    monkeypatch.setattr(main, "session_archive", SessionArchive(archive_dir=None))
+    monkeypatch.setattr(main, "process_automation_analysis", record_pipeline)
+    with TestClient(main.app) as client:
+        yield client, started
+    # Release the gauge for pipelines the fake left running
+    for session in main.analysis_sessions.values():
+        if session.status == "processing":
+            main.ACTIVE_SESSIONS.dec()
+
+
+def _wait_for(started: list, count: int) -> None:
+    """The batch runs as a background task after the response"""
+    deadline = time.time() + 5
+    while len(started) < count and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def _complete(session_id: str) -> None:
+    session = main.analysis_sessions[session_id]
+    session.status = "complete"
+    session.completed_count = session.total_agents
+    session.completed_at = time.time() - 3600
+    main.request_deduplicator.finish(main.request_fingerprint(session.request), session_id)
+    main.ACTIVE_SESSIONS.dec()
+
+
+def test_batch_runs_by_priority_and_attaches_duplicates(api) -> None:
+    """Items start highest priority first with their precomputed outputs; repeats attach to running sessions."""
+    client, started = api
+    response = client.post("/api/v1/cx-analysis/batch", json={"requests": [CLAIMS, LEADS, CLAIMS, INVOICES]})
+    assert response.status_code == 200
+    batch = response.json()
+    assert (batch["pipelines_started"], batch["duplicates_attached"], batch["calculated_without_agents"]) == (3, 1, 0)
+    claims_id, leads_id, duplicate_id, invoices_id = batch["session_ids"]
+    assert duplicate_id == claims_id
+
+    # Medium before low priority; the larger savings first within a level
+    _wait_for(started, 3)
+    assert [scenario for _, scenario, _ in started] == ["Sales lead qualification", "Invoice processing", "Claims"]
+    for session_id, _, outputs in started:
+        assert outputs["roi_analysis"]["monthly_savings"] > 0
+        assert main.analysis_sessions[session_id].draft["deliverables"]["annual_savings"] == \
+            f"${outputs['roi_analysis']['annual_savings']:,.0f}"
+
+    # Another batch repeating a running item attaches to it
+    again = client.post("/api/v1/cx-analysis/batch", json={"requests": [INVOICES]}).json()
+    assert again["session_ids"] == [invoices_id] and again["pipelines_started"] == 0
+
+
+def test_batch_status_aggregates_and_expires(api, monkeypatch) -> None:
+    """Status sums item progress; finished batches are evicted once their sessions are archived."""
+    client, _ = api
+    batch = client.post("/api/v1/cx-analysis/batch", json={"requests": [CLAIMS, INVOICES]}).json()
+    url = f"/api/v1/cx-analysis/batch/{batch['batch_id']}"
+    status = client.get(url).json()
+    assert (status["status"], status["counts"]["processing"], status["progress_percentage"]) == ("processing", 2, 0)
+
+    _complete(batch["session_ids"][0])
+    status = client.get(url).json()
+    assert status["counts"] == {"processing": 1, "complete": 1, "error": 0}
+    assert status["progress_percentage"] == 50
+    _complete(batch["session_ids"][1])
+    assert client.get(url).json()["status"] == "complete"
+
+    main.session_archive.compact(main.analysis_sessions, older_than=60)
+    assert main.evict_archived_batches() == 1
+    assert client.get(url).status_code == 404
+
+    # Under overload items are calculated directly instead of queued
+    monkeypatch.setattr(main, "DEGRADED_MODE_ACTIVE_SESSIONS", 1)
+    main.ACTIVE_SESSIONS.inc()
+    try:
+        degraded = client.post("/api/v1/cx-analysis/batch", json={"requests": [LEADS]}).json()
+    finally:
+        main.ACTIVE_SESSIONS.dec()
+    assert degraded["calculated_without_agents"] == 1 and degraded["pipelines_started"] == 0
+    assert main.get_session(degraded["session_ids"][0]).result["deliverables"]["recommendation"]
+
+
+def test_empty_and_oversized_batches_are_rejected(api, monkeypatch) -> None:
+    """Batches must hold between one and BATCH_MAX_ITEMS requests."""
+    client, started = api
+    assert client.post("/api/v1/cx-analysis/batch", json={"requests": []}).status_code == 400
+    monkeypatch.setattr(main, "BATCH_MAX_ITEMS", 2)
+    response = client.post("/api/v1/cx-analysis/batch", json={"requests": [CLAIMS, INVOICES, LEADS]})
+    assert response.status_code == 400 and "at most 2" in response.json()["detail"]
+    assert started == [] and main.analysis_sessions == {}
+
+
+def test_batch_item_for_a_vanished_session_runs_afresh(api) -> None:
+    """A dedup entry whose session is gone starts a new pipeline instead of attaching to a dead id."""
+    client, started = api
+    first = client.post("/api/v1/cx-analysis/batch", json={"requests": [CLAIMS]}).json()
+    gone_id, = first["session_ids"]
+    # Still registered as in flight, but the session itself is no longer held
+    del main.analysis_sessions[gone_id]
+    main.ACTIVE_SESSIONS.dec()
+
+    again = client.post("/api/v1/cx-analysis/batch", json={"requests": [CLAIMS]}).json()
+    assert (again["pipelines_started"], again["duplicates_attached"]) == (1, 0)
+    assert again["session_ids"] != [gone_id]
+    assert main.get_session(again["session_ids"][0]) is not None
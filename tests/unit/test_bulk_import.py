@@ -0,0 +1,60 @@
+"""Unit tests for streaming bulk inventory scoring."""
+
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+import bulk_import
+import main
+from bulk_import import stream_scores
+
+CSV_HEADER = (
+    "process_id,business_challenge,current_state,success_definition,process_frequency,"
+    "monthly_volume,people_involved,manual_percentage,business_scenario,decision_makers\n"
+)
+
+
+def _lines(data: bytes, file_format: str, chunk_size: int = 2) -> list:
+    text = "".join(stream_scores(io.BytesIO(data), file_format, chunk_size))
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_csv_rows_are_scored_in_order_with_per_row_errors() -> None:
+    """Invalid rows report their fields and do not stop the rest of the file."""
+    data = (
+        CSV_HEADER
+        + "a,c,s,d,daily,600,4,80,invoices,CFO; COO\n"
+        + "b,c,s,d,daily,lots,4,80,invoices,\n"
+        + "c,c,s,d,daily,50,1,20,refunds,\n"
+    ).encode()
+    lines = _lines(data, "csv")
+    assert [line.get("row") for line in lines[:-1]] == [1, 2, 3]
+    assert lines[0]["status"] == "scored" and lines[0]["process_id"] == "a"
+    assert lines[1]["status"] == "invalid"
+    assert lines[1]["errors"][0]["field"] == "monthly_volume"
+    assert lines[2]["status"] == "scored"
+    assert lines[-1]["summary"]["scored"] == 2 and lines[-1]["summary"]["invalid"] == 1
+
+
+def test_jsonl_bad_lines_are_reported() -> None:
+    """Malformed JSON and missing required fields become per-row errors."""
+    row = {
+        "business_challenge": "c", "current_state": "s", "success_definition": "d",
+        "process_frequency": "daily", "monthly_volume": 300, "people_involved": 3,
+        "manual_percentage": 60, "business_scenario": "onboarding",
+    }
+    data = (json.dumps(row) + "\nnot json\n" + json.dumps({"monthly_volume": 1}) + "\n").encode()
+    lines = _lines(data, "jsonl")
+    assert [line["status"] for line in lines[:-1]] == ["scored", "invalid", "invalid"]
+    assert lines[1]["errors"][0]["message"].startswith("Invalid JSON")
+
+
+def test_parquet_without_pyarrow_is_rejected_before_upload(monkeypatch) -> None:
+    """A missing optional reader is a 400 naming the requirement, not an error line mid-stream."""
+    monkeypatch.setattr(bulk_import, "pq", None)
+    with TestClient(main.app) as client:
+        response = client.post("/api/v1/bulk/score?format=parquet", content=b"PAR1")
+        assert response.status_code == 400 and "pyarrow" in response.json()["detail"]
+        scored = client.post("/api/v1/bulk/score?format=csv", content=(CSV_HEADER + "a,c,s,d,daily,600,4,80,invoices,\n").encode())
+        assert json.loads(scored.text.splitlines()[-1])["summary"]["scored"] == 1
@@ -0,0 +1,52 @@
+"""Unit tests for the data-driven complexity and priority classifiers."""
+
+import numpy as np
+
+from agents.tools.classification import (
+    COMPLEXITY_LEVELS,
+    build_complexity_classifier,
+    build_priority_classifier,
+    get_complexity_classifier,
+)
+
+
+def test_breakpoints_compile_from_indicator_tiers() -> None:
+    """Upper bounds of each tier but the last become the breakpoints."""
+    classifier = get_complexity_classifier()
+    assert classifier.levels == COMPLEXITY_LEVELS
+    assert classifier.factor_breakpoints["decision_points"] == [1, 3, 10]
+    assert classifier.factor_breakpoints["manual_percentage"] == [40, 70, 80]
+    assert classifier.level_breakpoints == [1.5, 2.5, 3.5]
+
+
+def test_scalar_and_batch_classification_agree() -> None:
+    """bisect on one process and searchsorted on columns give the same levels."""
+    classifier = get_complexity_classifier()
+    rng = np.random.default_rng(7)
+    columns = {
+        "decision_points": rng.integers(0, 15, 500),
+        "systems_involved": rng.integers(0, 15, 500),
+        "people_involved": rng.integers(0, 20, 500),
+        "manual_percentage": rng.integers(0, 101, 500),
+    }
+    batch = classifier.classify_many(columns)
+    for i in range(500):
+        row = {field: int(values[i]) for field, values in columns.items()}
+        assert classifier.classify(**row) == batch[i]
+
+
+def test_thresholds_are_tuned_through_data() -> None:
+    """Changing a tier in the data moves the threshold; bad data falls back to defaults."""
+    indicators = {
+        "Low Priority": {"monthly_volume": "0-1000", "minimum_score": 3},
+        "Medium Priority": {"monthly_volume": "1001-5000", "minimum_score": 6},
+        "High Priority": {"monthly_volume": "5000+", "minimum_score": 8},
+    }
+    tuned = build_priority_classifier(indicators)
+    assert tuned.factor_breakpoints["monthly_volume"] == [1000, 5000]
+    assert tuned.factor_breakpoints["error_rate_percentage"] == [5, 15]
+    assert tuned.classify(monthly_volume=900, current_time_minutes=200, error_rate_percentage=20) == "Medium Priority"
+
+    fallback = build_complexity_classifier({"basic_automation": {"decision_points": "0-1"}})
+    assert fallback.levels == COMPLEXITY_LEVELS
+    assert fallback.factor_breakpoints["systems_involved"] == [2, 4, 10]
@@ -0,0 +1,104 @@
+"""Unit tests for the per-session cost and latency ledger."""
+
+import asyncio
+import json
+
+import pytest
+from google.adk.models import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+import cost_ledger
+from agent import root_agent
+from agents.automation.output_schemas import STAGE_SCHEMAS
+from cost_ledger import LedgerWindows, StageCost, get_ledger_windows, ledger_as_dict, ledger_scope
+from session_models import AnalysisSession
+
+STAGE_OUTPUT = {
+    "process_analysis": {
+        "business_scenario": "Claims", "monthly_volume": 900, "people_involved": 4,
+        "manual_percentage": 80, "complexity_level": "process_automation", "opportunities": ["Automate intake"]
+    },
+    "roi_analysis": {
+        "monthly_savings": 9000, "annual_savings": 108000, "implementation_cost": 90000,
+        "roi_percentage": 120, "payback_months": 10
+    },
+    "implementation_plan": {"phases": [{"title": "Pilot", "actions": ["Configure"], "expected_impact": "Live"}]},
+    "risk_assessment": {"overall_risk": "Medium", "success_probability": 85, "mitigations": ["pilot first"]},
+    "tech_integration": {"architecture_pattern": "Hub", "platform_approach": "iPaaS"},
+    "final_business_case": {
+        "executive_summary": "Good case.", "recommendation": "Go", "confidence_percentage": 90,
+        "strategic_recommendations": ["Pilot"], "success_metrics": []
+    }
+}
+OUTPUT_BY_SCHEMA = {schema: STAGE_OUTPUT[key] for key, schema in STAGE_SCHEMAS.items()}
+
+
+class ScriptedLlm(BaseLlm):
+    """Answers each stage with its canned output and usage; the ROI stage hits the context cache."""
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        await asyncio.sleep(0.01)
+        schema = llm_request.config.response_schema
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=json.dumps(OUTPUT_BY_SCHEMA[schema]))]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=300, candidates_token_count=50,
+                cached_content_token_count=200 if schema is STAGE_SCHEMAS["roi_analysis"] else None
+            )
+        )
+
+
+def _run_pipeline() -> None:
+    async def run():
+        sessions = InMemorySessionService()
+        runner = Runner(agent=root_agent, app_name="ledger", session_service=sessions)
+        session = await sessions.create_session(app_name="ledger", user_id="test")
+        content = types.Content(role="user", parts=[types.Part(text="Claims intake, 900 a month")])
+        async for _ in runner.run_async(user_id="test", session_id=session.id, new_message=content):
+            pass
+
+    asyncio.run(run())
+
+
+def test_model_calls_are_recorded_in_the_scoped_ledger(monkeypatch) -> None:
+    """Calls inside ledger_scope land in that ledger per agent; calls outside go to the time windows."""
+    for sub_agent in root_agent.sub_agents:
+        monkeypatch.setattr(sub_agent.model, "inner", ScriptedLlm(model="scripted"))
+    monkeypatch.setattr(cost_ledger, "_windows", LedgerWindows())
+
+    ledger = {}
+    with ledger_scope(ledger):
+        _run_pipeline()
+    assert set(ledger) == {sub_agent.name for sub_agent in root_agent.sub_agents}
+    roi = ledger["data_analytics_specialist"]
+    assert (roi.model_calls, roi.prompt_tokens, roi.completion_tokens, roi.cached_tokens, roi.cache_hits) == (1, 300, 50, 200, 1)
+    assert roi.model_seconds >= 0.01
+    totals = ledger_as_dict(ledger)["totals"]
+    assert totals["prompt_tokens"] == 300 * len(STAGE_SCHEMAS) and totals["cache_hits"] == 1
+    assert get_ledger_windows().summary(60)["totals"]["model_calls"] == 0
+
+    _run_pipeline()
+    assert get_ledger_windows().summary(60)["totals"]["model_calls"] == len(STAGE_SCHEMAS)
+    assert ledger_as_dict(ledger)["totals"]["model_calls"] == len(STAGE_SCHEMAS)
+
+
+def test_windows_and_session_records() -> None:
+    """Window totals only include recent buckets, and the ledger survives archival round trips."""
+    windows = LedgerWindows(bucket_seconds=60, retention_seconds=3600)
+    windows.record("solution_designer", StageCost(wall_seconds=9.0, queue_seconds=1.0, prompt_tokens=100), at=1_000.0)
+    windows.record("solution_designer", StageCost(wall_seconds=8.0, prompt_tokens=50), at=2_000.0)
+    windows.record_session(at=2_000.0)
+    recent = windows.summary(300, now=2_010.0)
+    assert recent["sessions"] == 1
+    assert recent["agents"]["solution_designer"]["prompt_tokens"] == 50
+    assert windows.summary(3600, now=2_010.0)["totals"]["wall_seconds"] == pytest.approx(17.0)
+
+    session = AnalysisSession(request={"monthly_volume": 900}, agent_names=["solution_designer"])
+    session.ledger["solution_designer"] = StageCost(wall_seconds=9.0, model_seconds=7.5, prompt_tokens=100, model_calls=1)
+    record = json.loads(json.dumps(session.to_record()))
+    assert AnalysisSession.from_record(record).ledger == session.ledger
+    del record["ledger"]
+    assert AnalysisSession.from_record(record).ledger == {}
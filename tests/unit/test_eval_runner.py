@@ -0,0 +1,115 @@
+"""Unit tests for the parallel offline evaluation runner."""
+
+import asyncio
+import io
+import json
+
+import pytest
+from google.adk.models import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+import latency_control
+from agent import root_agent
+from agents.automation.output_schemas import STAGE_SCHEMAS
+from eval_runner import ModelRateLimiter, evaluate_dataset, load_dataset, score_case
+
+REQUEST = {
+    "business_challenge": "Slow intake", "current_state": "Email and spreadsheets", "success_definition": "Same-day intake",
+    "process_frequency": "daily", "monthly_volume": 900, "people_involved": 4, "manual_percentage": 80,
+    "business_scenario": "Claims intake"
+}
+STAGE_OUTPUT = {
+    "process_analysis": {
+        "business_scenario": "Claims intake", "monthly_volume": 900, "people_involved": 4,
+        "manual_percentage": 80, "complexity_level": "process_automation", "opportunities": ["Automate intake"]
+    },
+    "roi_analysis": {
+        "monthly_savings": 9000, "annual_savings": 108000, "implementation_cost": 90000,
+        "roi_percentage": 120, "payback_months": 10
+    },
+    "implementation_plan": {"phases": [{"title": "Pilot", "actions": ["Configure"], "expected_impact": "Live"}]},
+    "risk_assessment": {"overall_risk": "Medium", "success_probability": 85, "mitigations": ["pilot first"]},
+    "tech_integration": {"architecture_pattern": "Hub", "platform_approach": "iPaaS"},
+    "final_business_case": {
+        "executive_summary": "Good case.", "recommendation": "Go", "confidence_percentage": 90,
+        "strategic_recommendations": ["Pilot"], "success_metrics": []
+    }
+}
+OUTPUT_BY_SCHEMA = {schema: STAGE_OUTPUT[key] for key, schema in STAGE_SCHEMAS.items()}
+
+
+class ScriptedLlm(BaseLlm):
+    """Answers each stage with its canned output after a short delay, tracking concurrent calls."""
+
+    active: int = 0
+    max_active: int = 0
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.active -= 1
+        output = OUTPUT_BY_SCHEMA[llm_request.config.response_schema]
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=json.dumps(output))]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(prompt_token_count=100, candidates_token_count=20)
+        )
+
+
+def test_dataset_runs_on_bounded_pool_with_stage_metrics(tmp_path, monkeypatch) -> None:
+    """Every case gets a JSONL result with per-stage tokens, and no more than --concurrency run at once."""
+    model = ScriptedLlm(model="scripted")
+    for sub_agent in root_agent.sub_agents:
+        monkeypatch.setattr(sub_agent.model, "inner", model)
+    # Once enough fast calls are recorded, hedged duplicate calls would exceed the bound
+    monkeypatch.setattr(latency_control.latency_tracker, "hedge_delay", lambda output_key: 60.0)
+
+    dataset = tmp_path / "cases.jsonl"
+    rows = [
+        {"id": f"case-{i}", "request": dict(REQUEST, monthly_volume=900 + i),
+         "expected": {"roi_analysis.roi_percentage": {"min": 100, "max": 150}, "final_business_case.recommendation": "Go"}}
+        for i in range(30)
+    ]
+    rows[0]["expected"]["risk_assessment.overall_risk"] = "Low"
+    dataset.write_text("\n".join(json.dumps(row) for row in rows))
+
+    output = io.StringIO()
+    summary = asyncio.run(evaluate_dataset(load_dataset(str(dataset)), root_agent, output, concurrency=4))
+    results = {result["id"]: result for result in map(json.loads, output.getvalue().splitlines())}
+
+    assert len(results) == 30 and summary["cases"] == 30 and summary["errors"] == 0
+    assert model.max_active <= 4
+    assert results["case-0"]["passed"] is False
+    assert results["case-0"]["checks"]["risk_assessment.overall_risk"] is False
+    assert all(results[f"case-{i}"]["passed"] for i in range(1, 30))
+    assert summary["pass_rate"] == pytest.approx(29 / 30, abs=1e-4)
+    assert results["case-1"]["stages"]["roi_analysis"]["input_tokens"] == 100
+    assert results["case-1"]["output_tokens"] == 20 * len(STAGE_SCHEMAS)
+
+
+def test_scoring_dataset_validation_and_rate_limit(tmp_path) -> None:
+    """Invalid stages and unmet expectations lower the score; bad rows and call bursts are handled."""
+    outputs = dict(STAGE_OUTPUT, tech_integration={"architecture_pattern": "Hub"})
+    scores = score_case(outputs, {"process_analysis.complexity_level": {"one_of": ["process_automation"]},
+                                  "roi_analysis.payback_months": {"max": 6}})
+    assert scores["stages_valid"] == pytest.approx(5 / 6)
+    assert scores["checks"] == {"process_analysis.complexity_level": True, "roi_analysis.payback_months": False}
+    assert not scores["passed"]
+
+    dataset = tmp_path / "bad.jsonl"
+    dataset.write_text(json.dumps({"request": REQUEST}) + "\n" + json.dumps({"request": {"monthly_volume": 5}}) + "\n")
+    with pytest.raises(ValueError, match="bad.jsonl:2"):
+        load_dataset(str(dataset))
+
+    async def burst():
+        limiter = ModelRateLimiter(rpm=1200)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.gather(*(limiter.acquire() for _ in range(5)))
+        return loop.time() - started
+
+    # 1200 rpm is one call per 50ms: the fifth call waits ~200ms
+    assert asyncio.run(burst()) >= 0.19
@@ -0,0 +1,82 @@
+"""Unit tests for the deterministic fallback report engine."""
+
+import json
+import time
+
+import pytest
+
+from agents.automation.output_schemas import STAGE_SCHEMAS
+from fallback_report import build_fallback_report, fallback_stage_outputs, render_report_text, request_from_message
+from latency_control import LOCAL_FALLBACKS
+from session_models import AnalysisSession
+
+REQUEST = {
+    "business_challenge": "Invoices are keyed in by hand",
+    "current_state": "Three clerks re-type every invoice into the ERP",
+    "success_definition": "Invoices posted the same day",
+    "process_frequency": "daily",
+    "monthly_volume": 2500,
+    "people_involved": 3,
+    "manual_percentage": 90,
+    "business_scenario": "Invoice processing"
+}
+
+
+def test_engine_builds_a_schema_valid_report_quickly() -> None:
+    """Every stage output validates, the recommendation follows the ROI, and later stages have local fallbacks."""
+    started = time.perf_counter()
+    report = build_fallback_report(REQUEST, project_id="AUTO-TEST")
+    assert time.perf_counter() - started < 0.05
+
+    outputs = fallback_stage_outputs(REQUEST)
+    assert set(outputs) == set(STAGE_SCHEMAS)
+    for output_key, output in outputs.items():
+        STAGE_SCHEMAS[output_key].model_validate(output)
+    roi, case = outputs["roi_analysis"], outputs["final_business_case"]
+    assert roi["payback_months"] > 0 and roi["annual_savings"] == roi["monthly_savings"] * 12
+    viable = roi["roi_percentage"] >= 100 and roi["payback_months"] <= 24
+    assert (case["recommendation"] != "No-Go") == viable
+    assert report["deliverables"]["recommendation"] == case["recommendation"]
+
+    # A stage that runs out of time is filled from the outputs before it
+    state = {key: outputs[key] for key in ("process_analysis", "roi_analysis")}
+    for output_key in ("implementation_plan", "risk_assessment", "tech_integration"):
+        STAGE_SCHEMAS[output_key].model_validate(LOCAL_FALLBACKS[output_key](state))
+    assert "process_analysis" not in LOCAL_FALLBACKS
+
+
+@pytest.mark.parametrize("figures", [
+    {"monthly_volume": 0},
+    {"manual_percentage": 0},
+    {"monthly_volume": -500, "people_involved": -2},
+    {"manual_percentage": -30}
+])
+def test_processes_that_never_pay_back_get_a_no_go(figures) -> None:
+    """No volume or no manual work still yields a schema-valid report: 0% ROI, no payback and a No-Go."""
+    outputs = fallback_stage_outputs({**REQUEST, **figures})
+    for output_key, output in outputs.items():
+        STAGE_SCHEMAS[output_key].model_validate(output)
+    assert outputs["roi_analysis"]["roi_percentage"] == 0 and "payback_months" not in outputs["roi_analysis"]
+    assert outputs["process_analysis"]["monthly_volume"] >= 0 and outputs["process_analysis"]["manual_percentage"] >= 0
+    assert outputs["final_business_case"]["recommendation"] == "No-Go"
+
+    deliverables = build_fallback_report({**REQUEST, **figures}, project_id="AUTO-ZERO")["deliverables"]
+    assert (deliverables["payback_period"], deliverables["estimated_roi"]) == ("N/A", "0%")
+
+
+def test_free_text_requests_and_rendered_text() -> None:
+    """Figures in a /run message are parsed, the text covers the report, and old session records still load."""
+    request = request_from_message("Support ticket triage, 4,000 tickets a month, 12 agents, 70% manual")
+    assert (request["monthly_volume"], request["people_involved"], request["manual_percentage"]) == (4000, 12, 70)
+    assert request["business_scenario"] == "Support ticket triage"
+
+    text = render_report_text(build_fallback_report(request, project_id="AUTO-RUN"))
+    for section in ("EXECUTIVE SUMMARY:", "IMPLEMENTATION ROADMAP:", "SUCCESS METRICS:", "Recommendation:"):
+        assert section in text
+
+    session = AnalysisSession(request=REQUEST, agent_names=["solution_designer"])
+    session.draft = build_fallback_report(REQUEST, project_id="AUTO-DRAFT")
+    record = json.loads(json.dumps(session.to_record()))
+    assert AnalysisSession.from_record(record).draft == session.draft
+    del record["draft"]
+    assert AnalysisSession.from_record(record).draft is None
@@ -0,0 +1,155 @@
+"""Unit tests for stage deadlines, hedged model calls and local stage fallbacks."""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.adk.models import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+import main
+from agent import root_agent
+from latency_control import (
+    PIPELINE_DEADLINE_KEY,
+    DeadlineLlm,
+    StageDeadlineExceeded,
+    deadline_callback,
+    hedged_call,
+    local_stage_output,
+    stage_deadline,
+)
+from observability.metrics import MOCK_FALLBACKS, MODEL_ERRORS
+from test_cost_ledger import ScriptedLlm
+
+PROCESS_ANALYSIS = {
+    "business_scenario": "Invoice processing", "monthly_volume": 2000, "people_involved": 4,
+    "manual_percentage": 80, "complexity_level": "process_automation", "opportunities": ["Automate entry"]
+}
+
+
+class SlowLlm(BaseLlm):
+    """Answers after a fixed delay."""
+
+    delay: float
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        await asyncio.sleep(self.delay)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="{}")]))
+
+
+def test_hedged_call_returns_first_response_and_cancels_the_other() -> None:
+    """A slow primary is overtaken by the hedge; no response within the budget raises."""
+    delays = iter([1.0, 0.01])
+    cancelled = []
+
+    async def call():
+        delay = next(delays)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return delay
+
+    async def run():
+        winner = await hedged_call(call, hedge_delay=0.02, timeout=2.0, stage="roi_analysis")
+        await asyncio.sleep(0)
+        with pytest.raises(StageDeadlineExceeded):
+            await hedged_call(lambda: asyncio.sleep(1.0), hedge_delay=0.01, timeout=0.05)
+        return winner
+
+    assert asyncio.run(run()) == 0.01
+    assert cancelled == [1.0]
+
+
+def test_stage_budgets_and_local_roi_fallback() -> None:
+    """Budgets split the remaining time by stage weight; ROI can be computed without the model."""
+    # 60s left over the last two stages (weights 14 and 7)
+    assert stage_deadline(1060.0, "tech_integration", now=1000.0) == pytest.approx(1040.0)
+    assert stage_deadline(1060.0, "final_business_case", now=1000.0) == pytest.approx(1060.0)
+    assert stage_deadline(900.0, "roi_analysis", now=1000.0) == 1000.0
+
+    roi = local_stage_output("roi_analysis", {"process_analysis": PROCESS_ANALYSIS})
+    assert roi["annual_savings"] == roi["monthly_savings"] * 12
+    assert roi["payback_months"] > 0
+    assert [scenario["name"] for scenario in roi["scenarios"]] == ["conservative", "likely", "optimistic"]
+    assert local_stage_output("roi_analysis", {}) is None
+    assert local_stage_output("risk_assessment", {"process_analysis": PROCESS_ANALYSIS}) is None
+
+
+def test_model_over_budget_is_replaced_by_local_fallback() -> None:
+    """A stage whose model call outlives the deadline returns the locally computed output."""
+    state = {"process_analysis": PROCESS_ANALYSIS}
+    context = SimpleNamespace(state=state, invocation_id="inv-1")
+    llm = DeadlineLlm(model="slow", inner=SlowLlm(model="slow", delay=1.0))
+
+    async def run(output_key):
+        request = LlmRequest(model="slow")
+        # 50ms left in this invocation's pipeline deadline
+        state[PIPELINE_DEADLINE_KEY] = {"invocation_id": "inv-1", "deadline": time.time() + 0.05}
+        assert deadline_callback(output_key)(context, request) is None
+        return [response async for response in llm.generate_content_async(request)]
+
+    (response,) = asyncio.run(run("roi_analysis"))
+    assert json.loads(response.content.parts[0].text) == local_stage_output("roi_analysis", state)
+
+    with pytest.raises(StageDeadlineExceeded):
+        asyncio.run(run("risk_assessment"))
+
+
+def test_run_endpoint_is_bounded_by_the_pipeline_deadline(monkeypatch) -> None:
+    """/run drains the agent's events; a hung model hits the deadline and the deterministic report answers."""
+    monkeypatch.setattr(main, "ADK_INTEGRATION", True)
+    monkeypatch.setattr(main, "AGENT_AVAILABLE", True)
+    monkeypatch.setattr(main, "automation_sequential_agent", root_agent)
+    request = main.RunRequest(message="Invoice processing, 2,000 a month, 4 people, 80% manual", user_id="test")
+
+    for sub_agent in root_agent.sub_agents:
+        monkeypatch.setattr(sub_agent.model, "inner", ScriptedLlm(model="scripted"))
+    answered = asyncio.run(main.run_agent(request))
+    assert answered["agent_used"] == root_agent.name
+    assert json.loads(answered["content"])["recommendation"] == "Go"
+
+    for sub_agent in root_agent.sub_agents:
+        monkeypatch.setattr(sub_agent.model, "inner", SlowLlm(model="slow", delay=30))
+    monkeypatch.setattr(main, "PIPELINE_DEADLINE_SECONDS", 0.3)
+    timeouts = MOCK_FALLBACKS.labels("deadline_exceeded").value
+    started = time.perf_counter()
+    bounded = asyncio.run(main.run_agent(request))
+    assert time.perf_counter() - started < 2
+    assert bounded["status"] == "success" and bounded["agent_used"] == "fallback_report_engine"
+    assert "Recommendation:" in bounded["content"]
+    assert MOCK_FALLBACKS.labels("deadline_exceeded").value == timeouts + 1
+
+
+def test_run_endpoint_counts_only_agent_failures_as_model_errors(monkeypatch) -> None:
+    """A failing model is a model error; a pipeline that cannot be started is only a fallback."""
+    monkeypatch.setattr(main, "ADK_INTEGRATION", True)
+    monkeypatch.setattr(main, "AGENT_AVAILABLE", True)
+    monkeypatch.setattr(main, "automation_sequential_agent", root_agent)
+    request = main.RunRequest(message="Claims intake, 900 a month", user_id="test")
+    model_errors = MODEL_ERRORS.labels(root_agent.name)
+
+    class BrokenLlm(BaseLlm):
+        async def generate_content_async(self, llm_request, stream: bool = False):
+            raise RuntimeError("model unavailable")
+            yield
+
+    for sub_agent in root_agent.sub_agents:
+        monkeypatch.setattr(sub_agent.model, "inner", BrokenLlm(model="broken"))
+    errors, fallbacks = model_errors.value, MOCK_FALLBACKS.labels("agent_error").value
+    assert asyncio.run(main.run_agent(request))["agent_used"] == "fallback_report_engine"
+    assert (model_errors.value, MOCK_FALLBACKS.labels("agent_error").value) == (errors + 1, fallbacks + 1)
+
+    async def cannot_start(user_id, message):
+        raise ImportError("runner missing")
+
+    monkeypatch.setattr(main, "run_pipeline_for_message", cannot_start)
+    setup_errors = MOCK_FALLBACKS.labels("agent_setup_error").value
+    assert asyncio.run(main.run_agent(request))["agent_used"] == "fallback_report_engine"
+    assert model_errors.value == errors + 1
+    assert MOCK_FALLBACKS.labels("agent_setup_error").value == setup_errors + 1
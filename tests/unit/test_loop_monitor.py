@@ -0,0 +1,94 @@
+"""Unit tests for the blocking-call offload pool and the event loop monitor."""
+
+import asyncio
+import threading
+import time
+
+from agents.tools import offload
+from agents.tools.offload import blocking_calls_in_flight, run_blocking
+from observability.loop_monitor import SLOW_CALLBACKS, LoopMonitor
+
+
+def test_run_blocking_stays_off_the_loop_within_its_bounds(monkeypatch) -> None:
+    """Blocking calls run on at most BLOCKING_POOL_SIZE threads, never the loop's, and the loop keeps ticking."""
+    monkeypatch.setattr(offload, "_executor", None)
+    monkeypatch.setattr(offload, "_slots", None)
+    monkeypatch.setattr(offload, "BLOCKING_POOL_SIZE", 2)
+    monkeypatch.setattr(offload, "BLOCKING_POOL_BACKLOG", 3)
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0, "in_flight": 0}
+    threads = set()
+
+    def blocking_call(i: int) -> int:
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            running["in_flight"] = max(running["in_flight"], blocking_calls_in_flight())
+            threads.add(threading.get_ident())
+        time.sleep(0.03)
+        with lock:
+            running["now"] -= 1
+        return i * i
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        results = await asyncio.gather(*(run_blocking(blocking_call, i) for i in range(8)))
+        ticking.cancel()
+        return results, ticks, threading.get_ident()
+
+    try:
+        results, ticks, loop_thread = asyncio.run(scenario())
+    finally:
+        offload.shutdown_blocking_executor()
+    assert results == [i * i for i in range(8)]
+    assert running["peak"] == 2 and running["in_flight"] <= 3
+    assert loop_thread not in threads and len(threads) <= 2
+    # Four rounds of 30 ms: a loop that was blocked would not have ticked
+    assert ticks >= 10
+    assert blocking_calls_in_flight() == 0
+
+
+def test_monitor_records_lag_and_reports_a_blocked_loop(capsys) -> None:
+    """Blocking the loop shows up as heartbeat lag, and the watchdog reports the stall once with its stack."""
+    monitor = LoopMonitor(interval=0.01, block_threshold=0.05)
+    reported_before = SLOW_CALLBACKS.labels().value
+
+    def hog_the_loop() -> None:
+        time.sleep(0.25)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        hog_the_loop()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+    assert max(monitor.lags) >= 0.2
+    assert monitor.stats()["max_seconds"] >= 0.2
+    assert SLOW_CALLBACKS.labels().value == reported_before + 1
+    output = capsys.readouterr().out
+    assert "Event loop blocked" in output and "hog_the_loop" in output
+
+
+def test_quiet_loop_reports_nothing() -> None:
+    """A loop that only awaits stays under the threshold and is never reported."""
+    monitor = LoopMonitor(interval=0.01, block_threshold=0.1)
+    reported_before = SLOW_CALLBACKS.labels().value
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.3)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+    assert monitor.stats()["samples"] >= 10
+    assert SLOW_CALLBACKS.labels().value == reported_before
@@ -0,0 +1,101 @@
+"""Unit tests for the Prometheus-style metrics registry."""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from observability.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    read_snapshots,
+    render_snapshots,
+    start_multiprocess_flusher,
+    stop_multiprocess_flusher,
+    write_snapshot,
+)
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    """Buckets are cumulative and _count matches the number of observations."""
+    registry = MetricsRegistry()
+    histogram = Histogram("agent_seconds", "Agent time", ["agent"], buckets=(0.1, 1.0), registry=registry)
+    histogram.labels("solution_designer").observe(0.05)
+    histogram.labels("solution_designer").observe(0.5)
+    histogram.labels("solution_designer").observe(5)
+
+    text = registry.render()
+    assert 'agent_seconds_bucket{agent="solution_designer",le="0.1"} 1' in text
+    assert 'agent_seconds_bucket{agent="solution_designer",le="1"} 2' in text
+    assert 'agent_seconds_bucket{agent="solution_designer",le="+Inf"} 3' in text
+    assert 'agent_seconds_count{agent="solution_designer"} 3' in text
+    assert "# TYPE agent_seconds histogram" in text
+
+
+def test_gauge_function_is_evaluated_at_scrape_time() -> None:
+    """set_function gauges reflect the callback value when rendered."""
+    registry = MetricsRegistry()
+    sessions: dict = {}
+    gauge = Gauge("sessions", "Stored sessions", registry=registry)
+    gauge.set_function(lambda: len(sessions))
+    sessions["a"] = {}
+    sessions["b"] = {}
+    assert "sessions 2" in registry.render()
+
+
+def test_snapshots_merge_across_workers(tmp_path) -> None:
+    """Counters from several worker snapshots are summed."""
+    registry = MetricsRegistry()
+    counter = Counter("fallbacks_total", "Fallbacks", ["reason"], registry=registry)
+    counter.labels("agent_error").inc(2)
+    write_snapshot(registry, str(tmp_path))
+
+    other_worker = registry.snapshot()
+    other_worker["pid"] = 1
+    snapshots = read_snapshots(str(tmp_path)) + [other_worker]
+
+    assert 'fallbacks_total{reason="agent_error"} 4' in render_snapshots(snapshots)
+
+
+def test_snapshots_of_exited_or_silent_workers_are_pruned(tmp_path) -> None:
+    """A dead PID's file and one not refreshed within stale_after are deleted; this worker's stays."""
+    registry = MetricsRegistry()
+    Counter("fallbacks_total", "Fallbacks", registry=registry).inc()
+    write_snapshot(registry, str(tmp_path))
+    own = tmp_path / f"metrics_{os.getpid()}.json"
+
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    (tmp_path / f"metrics_{exited.pid}.json").write_text(own.read_text())
+    silent = tmp_path / f"metrics_{os.getppid()}.json"
+    silent.write_text(own.read_text())
+    os.utime(silent, (time.time() - 60, time.time() - 60))
+    os.utime(own, (time.time() - 60, time.time() - 60))
+
+    snapshots = read_snapshots(str(tmp_path), stale_after=30)
+    assert [snap["pid"] for snap in snapshots] == [os.getpid()]
+    assert sorted(path.name for path in tmp_path.iterdir()) == [own.name]
+    assert "fallbacks_total 1" in render_snapshots(snapshots)
+
+
+def test_flusher_runs_only_between_start_and_stop(tmp_path) -> None:
+    """Importing starts nothing; the flusher writes this worker's snapshot and removes it on stop."""
+    def flushers():
+        return [thread for thread in threading.enumerate() if thread.name == "metrics-flusher"]
+
+    assert flushers() == []
+    registry = MetricsRegistry()
+    assert start_multiprocess_flusher(registry, str(tmp_path)) is True
+    try:
+        assert start_multiprocess_flusher(registry, str(tmp_path)) is False
+        own = tmp_path / f"metrics_{os.getpid()}.json"
+        deadline = time.time() + 5
+        while not own.exists() and time.time() < deadline:
+            time.sleep(0.01)
+        assert own.exists() and len(flushers()) == 1
+    finally:
+        stop_multiprocess_flusher()
+    assert flushers() == [] and list(tmp_path.iterdir()) == []
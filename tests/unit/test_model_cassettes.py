@@ -0,0 +1,133 @@
+"""Unit tests for model call record/replay cassettes."""
+
+import asyncio
+import json
+import time
+
+import pytest
+from google.adk.models import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from agent import root_agent
+from agents.automation.output_schemas import STAGE_SCHEMAS
+from model_cassettes import CassetteMiss, use_cassette
+
+STAGE_OUTPUT = {
+    "process_analysis": {
+        "business_scenario": "Claims", "monthly_volume": 900, "people_involved": 4,
+        "manual_percentage": 80, "complexity_level": "process_automation", "opportunities": ["Automate intake"]
+    },
+    "roi_analysis": {
+        "monthly_savings": 9000, "annual_savings": 108000, "implementation_cost": 90000,
+        "roi_percentage": 120, "payback_months": 10
+    },
+    "implementation_plan": {"phases": [{"title": "Pilot", "actions": ["Configure"], "expected_impact": "Live"}]},
+    "risk_assessment": {"overall_risk": "Medium", "success_probability": 85, "mitigations": ["pilot first"]},
+    "tech_integration": {"architecture_pattern": "Hub", "platform_approach": "iPaaS"},
+    "final_business_case": {
+        "executive_summary": "Good case.", "recommendation": "Go", "confidence_percentage": 90,
+        "strategic_recommendations": ["Pilot"], "success_metrics": []
+    }
+}
+OUTPUT_BY_SCHEMA = {schema: STAGE_OUTPUT[key] for key, schema in STAGE_SCHEMAS.items()}
+
+
+class ScriptedLlm(BaseLlm):
+    """Answers each stage with its canned output, or fails every call."""
+
+    calls: int = 0
+    fail: bool = False
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("live model called")
+        output = OUTPUT_BY_SCHEMA[llm_request.config.response_schema]
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=json.dumps(output))]))
+
+
+def _use_model(monkeypatch: pytest.MonkeyPatch, model: BaseLlm) -> None:
+    for sub_agent in root_agent.sub_agents:
+        monkeypatch.setattr(sub_agent.model, "inner", model)
+
+
+def _run_pipeline(message: str = "Claims intake, 900 a month, 4 people, 80% manual") -> dict:
+    async def run():
+        sessions = InMemorySessionService()
+        runner = Runner(agent=root_agent, app_name="cassette", session_service=sessions)
+        session = await sessions.create_session(app_name="cassette", user_id="test")
+        content = types.Content(role="user", parts=[types.Part(text=message)])
+        async for _ in runner.run_async(user_id="test", session_id=session.id, new_message=content):
+            pass
+        session = await sessions.get_session(app_name="cassette", user_id="test", session_id=session.id)
+        return {key: session.state.get(key) for key in STAGE_SCHEMAS}
+
+    return asyncio.run(run())
+
+
+def test_pipeline_replays_from_cassette_without_the_model(tmp_path, monkeypatch) -> None:
+    """A recorded six-agent run replays to the same state with the live model failing every call."""
+    path = str(tmp_path / "pipeline.json")
+    live = ScriptedLlm(model="scripted")
+    _use_model(monkeypatch, live)
+    with use_cassette(root_agent, path, mode="once") as cassette:
+        recorded = _run_pipeline()
+    assert live.calls == len(STAGE_SCHEMAS)
+    assert len(cassette.interactions) == len(STAGE_SCHEMAS)
+
+    offline = ScriptedLlm(model="scripted", fail=True)
+    _use_model(monkeypatch, offline)
+    with use_cassette(root_agent, path, mode="once", strict=True):
+        started = time.perf_counter()
+        replayed = _run_pipeline()
+        elapsed = time.perf_counter() - started
+    assert replayed == recorded
+    assert replayed["roi_analysis"]["roi_percentage"] == 120
+    assert offline.calls == 0
+    assert elapsed < 2.0
+    # The wrappers are removed again on exit
+    assert all(sub_agent.model.inner is offline for sub_agent in root_agent.sub_agents)
+
+
+def test_strict_replay_rejects_unrecorded_prompts(tmp_path, monkeypatch) -> None:
+    """A new prompt fails in strict mode and falls through to the model otherwise; latency can be simulated."""
+    path = str(tmp_path / "pipeline.json")
+    _use_model(monkeypatch, ScriptedLlm(model="scripted"))
+    with use_cassette(root_agent, path, mode="record"):
+        _run_pipeline()
+
+    with use_cassette(root_agent, path, mode="replay", strict=True):
+        with pytest.raises(CassetteMiss):
+            _run_pipeline("A different process entirely")
+
+    live = ScriptedLlm(model="scripted")
+    _use_model(monkeypatch, live)
+    with use_cassette(root_agent, path, mode="replay", strict=False, latency=0.05):
+        started = time.perf_counter()
+        _run_pipeline()
+        assert time.perf_counter() - started >= 0.05 * len(STAGE_SCHEMAS)
+        assert live.calls == 0
+        _run_pipeline("A different process entirely")
+    assert live.calls == 1
+
+
+def test_scoped_cassette_takes_the_place_of_the_app_wide_one(tmp_path, monkeypatch) -> None:
+    """A test's cassette replaces an installed app-wide cassette instead of sitting behind it, then restores it."""
+    path = str(tmp_path / "pipeline.json")
+    _use_model(monkeypatch, ScriptedLlm(model="scripted"))
+    with use_cassette(root_agent, path, mode="record"):
+        recorded = _run_pipeline()
+
+    offline = ScriptedLlm(model="scripted", fail=True)
+    _use_model(monkeypatch, offline)
+    # Stands in for install_cassette_from_env with an empty strict cassette
+    with use_cassette(root_agent, str(tmp_path / "model_cassette.json"), mode="replay", strict=True) as app_wide:
+        installed = [sub_agent.model.inner for sub_agent in root_agent.sub_agents]
+        with use_cassette(root_agent, path, mode="replay", strict=True):
+            assert _run_pipeline() == recorded
+            assert all(sub_agent.model.inner.inner is offline for sub_agent in root_agent.sub_agents)
+        assert all(sub_agent.model.inner is model for sub_agent, model in zip(root_agent.sub_agents, installed))
+        assert app_wide.interactions == {}
@@ -0,0 +1,117 @@
+"""Unit tests for complexity-aware model routing and its offline evaluation."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from agents.automation.output_schemas import STAGE_SCHEMAS
+from model_routing import ROUTING_STATE_KEY, ModelRouter, load_router, routing_callback, set_model_router
+from routing_eval import compare_routers
+
+TIERS = {"fast": "small-model", "standard": "default-model", "strong": "large-model"}
+BASIC_REQUEST = {"people_involved": 1, "manual_percentage": 30}
+INTELLIGENT_REQUEST = {
+    "people_involved": 20,
+    "manual_percentage": 95,
+    "decision_makers": [f"approver-{i}" for i in range(12)],
+    "cxToolsList": [f"system-{i}" for i in range(12)]
+}
+STAGE_OUTPUT = {
+    "process_analysis": {
+        "business_scenario": "Claims", "monthly_volume": 900, "people_involved": 4, "manual_percentage": 80,
+        "complexity_level": "process_automation", "opportunities": ["Automate intake"]
+    },
+    "roi_analysis": {
+        "monthly_savings": 9000, "annual_savings": 108000, "implementation_cost": 90000,
+        "roi_percentage": 120, "payback_months": 10
+    },
+    "implementation_plan": {"phases": [{"title": "Pilot", "actions": ["Configure"], "expected_impact": "Live"}]},
+    "risk_assessment": {"overall_risk": "Medium", "success_probability": 85, "mitigations": ["pilot first"]},
+    "tech_integration": {"architecture_pattern": "Hub", "platform_approach": "iPaaS"},
+    "final_business_case": {
+        "executive_summary": "Good case.", "recommendation": "Go", "confidence_percentage": 90,
+        "strategic_recommendations": ["Pilot"], "success_metrics": []
+    }
+}
+
+
+def _recording(latency: float, tokens: int, **overrides) -> dict:
+    return {
+        key: {
+            "latency_seconds": latency, "input_tokens": tokens, "output_tokens": tokens // 4,
+            "output": {**output, **overrides.get(key, {})}
+        }
+        for key, output in STAGE_OUTPUT.items()
+    }
+
+
+def test_routes_follow_complexity_and_config_overrides(tmp_path) -> None:
+    """Basic processes run on the fast tier; only intelligent risk analysis gets the strong model."""
+    router = ModelRouter(tiers=TIERS)
+    assert set(router.plan("basic_automation", STAGE_SCHEMAS).values()) == {"small-model"}
+    intelligent = router.plan("intelligent_automation", STAGE_SCHEMAS)
+    assert intelligent["risk_assessment"] == "large-model"
+    assert intelligent["final_business_case"] == "small-model"
+    assert intelligent["roi_analysis"] == "default-model"
+    assert router.model(None, "roi_analysis") == "default-model"
+
+    config = tmp_path / "routing.json"
+    config.write_text(json.dumps({"tiers": {"fast": "tiny"}, "routes": {"process_automation": {"roi_analysis": "fast"}}}))
+    overridden = load_router(str(config))
+    assert overridden.model("process_automation", "roi_analysis") == "tiny"
+    assert overridden.model("process_automation", "risk_assessment") == overridden.tiers["standard"]
+
+    with pytest.raises(ValueError):
+        ModelRouter({"basic_automation": {"*": "turbo"}}, TIERS)
+
+
+def test_callback_rewrites_model_once_complexity_is_known() -> None:
+    """The first stage keeps its own model; later stages route on the analyst's complexity."""
+    set_model_router(ModelRouter(tiers=TIERS))
+    try:
+        state = {}
+        request = SimpleNamespace(model="pinned-model")
+        routing_callback("process_analysis")(SimpleNamespace(state=state), request)
+        assert request.model == "pinned-model"
+
+        state["process_analysis"] = {"complexity_level": "intelligent_automation"}
+        routing_callback("risk_assessment")(SimpleNamespace(state=state), request)
+        assert request.model == "large-model"
+        assert state[ROUTING_STATE_KEY] == "intelligent_automation"
+    finally:
+        set_model_router(None)
+
+
+def test_evaluation_flags_quality_regressions() -> None:
+    """Routing passes when fast-tier outputs match the baseline and fails when they drift."""
+    fixtures = {
+        "pricing": {
+            "small-model": {"input_per_million": 0.1, "output_per_million": 0.4},
+            "default-model": {"input_per_million": 1.0, "output_per_million": 4.0},
+            "large-model": {"input_per_million": 5.0, "output_per_million": 20.0}
+        },
+        "cases": [
+            {
+                "id": case_id,
+                "request": request,
+                "recordings": {
+                    "small-model": _recording(1.0, 1000),
+                    "default-model": _recording(3.0, 1000),
+                    "large-model": _recording(8.0, 1000)
+                }
+            }
+            for case_id, request in [("basic", BASIC_REQUEST), ("intelligent", INTELLIGENT_REQUEST)]
+        ]
+    }
+    router = ModelRouter(tiers=TIERS)
+    result = compare_routers(fixtures, router)
+    assert result["passed"]
+    assert result["routed"]["mean_latency_seconds"] < result["baseline"]["mean_latency_seconds"]
+    assert result["routed"]["mean_cost_usd"] < result["baseline"]["mean_cost_usd"]
+    assert result["routed"]["mean_quality"] == 1.0
+
+    # The fast model gets the ROI figures wrong on the basic case
+    wrong_roi = {"annual_savings": 300000, "roi_percentage": 400, "payback_months": 3}
+    fixtures["cases"][0]["recordings"]["small-model"] = _recording(1.0, 1000, roi_analysis=wrong_roi)
+    assert not compare_routers(fixtures, router)["passed"]
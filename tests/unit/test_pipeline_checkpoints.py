@@ -0,0 +1,93 @@
+"""Unit tests for pipeline stage checkpoints."""
+
+from pipeline_checkpoints import CheckpointStore, completed_prefix
+
+
+def test_resume_point_is_first_stage_without_checkpoint() -> None:
+    """Gaps after the first missing stage do not count as completed."""
+    store = CheckpointStore(":memory:")
+    store.start("s1", {"business_scenario": "invoices"})
+    for index, key in [(0, "process_analysis"), (1, "roi_analysis"), (3, "risk_assessment")]:
+        store.save("s1", index, key, {"summary": key})
+    outputs = store.outputs("s1")
+    assert completed_prefix(outputs) == 2
+    assert outputs[1] == ("roi_analysis", {"summary": "roi_analysis"})
+    assert completed_prefix({}) == 0
+
+
+def test_durable_store_lists_interrupted_runs(tmp_path) -> None:
+    """Runs still processing when the store is reopened are reported for resume."""
+    path = str(tmp_path / "checkpoints.db")
+    store = CheckpointStore(path)
+    store.start("running", {"monthly_volume": 500})
+    store.start("done", {"monthly_volume": 800})
+    store.save("running", 0, "process_analysis", {"summary": "ok"})
+    store.finish("done", "complete")
+
+    reopened = CheckpointStore(path)
+    assert reopened.durable
+    assert reopened.interrupted() == ["running"]
+    assert reopened.request("running") == {"monthly_volume": 500}
+    assert completed_prefix(reopened.outputs("running")) == 1
+    # Re-starting keeps existing checkpoints
+    reopened.start("running", {"monthly_volume": 500})
+    assert completed_prefix(reopened.outputs("running")) == 1
+
+
+def test_finished_runs_do_not_accumulate(monkeypatch) -> None:
+    """A completed run is deleted at once; a failed one stays resumable until its TTL."""
+    import pipeline_checkpoints
+
+    store = CheckpointStore(":memory:", ttl_seconds=60)
+    for session_id in ("done", "failed"):
+        store.start(session_id, {"monthly_volume": 500})
+        store.save(session_id, 0, "process_analysis", {"summary": "ok"})
+    store.finish("done", "complete")
+    store.finish("failed", "error")
+    assert store.request("done") is None and store.outputs("done") == {}
+    assert completed_prefix(store.outputs("failed")) == 1
+
+    now = pipeline_checkpoints.time.time()
+    monkeypatch.setattr(pipeline_checkpoints.time, "time", lambda: now + 61)
+    store.start("later", {"monthly_volume": 900})
+    store.finish("later", "error")
+    assert store.request("failed") is None and store.outputs("failed") == {}
+    assert store.stats()["pipelines"] == {"error": 1} and store.stats()["checkpoints"] == 0
+
+
+def test_shared_store_resumes_each_orphaned_run_once(tmp_path, monkeypatch) -> None:
+    """Workers sharing a database only claim runs whose lease lapsed, and never the same one twice."""
+    import pipeline_checkpoints
+
+    path = str(tmp_path / "checkpoints.db")
+    crashed = CheckpointStore(path, lease_seconds=30, owner="crashed")
+    live = CheckpointStore(path, lease_seconds=30, owner="live")
+    crashed.start("orphaned", {"monthly_volume": 500})
+    live.start("running", {"monthly_volume": 800})
+    first = CheckpointStore(path, lease_seconds=30, owner="first")
+    second = CheckpointStore(path, lease_seconds=30, owner="second")
+    assert first.claim_interrupted() == [] and second.claim_interrupted() == []
+
+    now = pipeline_checkpoints.time.time()
+    monkeypatch.setattr(pipeline_checkpoints.time, "time", lambda: now + 20)
+    assert live.renew() == 1
+    monkeypatch.setattr(pipeline_checkpoints.time, "time", lambda: now + 31)
+    assert first.claim_interrupted() == ["orphaned"]
+    assert second.claim_interrupted() == []
+    assert sorted(second.interrupted()) == ["orphaned", "running"]
+
+
+def test_lease_columns_are_added_to_an_existing_database(tmp_path) -> None:
+    """A database written before leases existed still opens, and its runs are claimable."""
+    import sqlite3
+
+    path = str(tmp_path / "checkpoints.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE pipelines (session_id TEXT PRIMARY KEY, request TEXT NOT NULL, status TEXT NOT NULL, updated_at REAL NOT NULL)")
+    connection.execute("INSERT INTO pipelines VALUES ('old', '{}', 'processing', 0)")
+    connection.commit()
+    connection.close()
+
+    store = CheckpointStore(path, owner="upgraded")
+    assert store.claim_interrupted() == ["old"]
+    assert store.claim_interrupted() == []
@@ -0,0 +1,51 @@
+"""Unit tests for the budget-constrained portfolio optimizer."""
+
+import itertools
+
+import numpy as np
+
+from agents.tools.portfolio_optimizer import optimize_budget
+
+
+def _brute_force(costs: np.ndarray, values: np.ndarray, budget: float) -> float:
+    best = 0.0
+    for size in range(1, len(costs) + 1):
+        for subset in itertools.combinations(range(len(costs)), size):
+            chosen = list(subset)
+            if costs[chosen].sum() <= budget:
+                best = max(best, values[chosen].sum())
+    return best
+
+
+def test_dp_matches_brute_force_on_small_instances() -> None:
+    """With integer costs and one unit per dollar the DP is exact."""
+    rng = np.random.default_rng(3)
+    for _ in range(25):
+        costs = rng.integers(1, 100, 10).astype(float)
+        values = rng.uniform(-20, 100, 10)
+        result = optimize_budget(costs, values, 200, method="dp", budget_units=200)
+        assert result["total_cost"] <= 200
+        assert abs(result["total_value"] - _brute_force(costs, values, 200)) <= 1
+
+
+def test_greedy_respects_budget_and_bound() -> None:
+    """The heuristic stays within budget and never beats the LP upper bound."""
+    rng = np.random.default_rng(5)
+    costs = rng.uniform(10_000, 500_000, 5000)
+    values = rng.uniform(-100_000, 2_000_000, 5000)
+    result = optimize_budget(costs, values, 10_000_000, method="greedy")
+    assert result["total_cost"] <= 10_000_000
+    assert result["total_value"] <= result["value_upper_bound"]
+    assert result["optimality_gap_pct"] < 5
+    curve = result["marginal_value_curve"]
+    assert [p["cumulative_cost"] for p in curve] == sorted(p["cumulative_cost"] for p in curve)
+
+
+def test_payback_timeline_excludes_slow_candidates() -> None:
+    """Candidates whose payback exceeds the timeline are never funded."""
+    costs = np.array([100.0, 100.0, 100.0])
+    values = np.array([500.0, 400.0, 300.0])
+    payback = np.array([30.0, 6.0, np.inf])
+    result = optimize_budget(costs, values, 1000, payback, max_payback_months=12)
+    assert result["selected_indices"] == [1]
+    assert result["excluded_by_timeline"] == 2
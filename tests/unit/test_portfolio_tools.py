@@ -0,0 +1,117 @@
+"""Unit tests for vectorized portfolio scoring."""
+
+import random
+
+import numpy as np
+
+from agents.tools.automation_tools import (
+    assess_automation_readiness,
+    determine_process_complexity,
+    get_implementation_priority,
+)
+from agents.tools.calculation_tools import (
+    calculate_cost_savings,
+    calculate_implementation_costs,
+    calculate_roi_metrics,
+    calculate_time_savings,
+)
+from agents.tools.benchmark_data import get_automation_efficiency_rate, get_labor_cost_benchmark
+from agents.tools.portfolio_tools import (
+    COMPLEXITY_LEVELS,
+    PRIORITY_LEVELS,
+    READINESS_LEVELS,
+    rank_portfolio,
+    score_portfolio,
+    top_k_indices,
+)
+
+
+def _random_candidates(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "process_id": f"p{i}",
+            "industry_type": rng.choice(["customer_service", "finance_operations", "healthcare", "manufacturing", "other"]),
+            "monthly_volume": rng.randint(10, 3000),
+            "current_time_minutes": rng.randint(1, 240),
+            "error_rate_percentage": rng.randint(0, 30),
+            "decision_points": rng.randint(0, 15),
+            "systems_involved": rng.randint(1, 12),
+            "people_involved": rng.randint(1, 20),
+            "manual_percentage": rng.randint(0, 100),
+            "data_quality": rng.randint(1, 10),
+            "executive_sponsorship": rng.randint(1, 10),
+        }
+        for i in range(n)
+    ]
+
+
+def test_vectorized_scores_match_single_process_tools() -> None:
+    """Every column agrees with the per-process tool functions."""
+    candidates = _random_candidates(300)
+    scores = score_portfolio(candidates)
+
+    for i, c in enumerate(candidates):
+        complexity = determine_process_complexity(
+            c["decision_points"], c["systems_involved"], c["people_involved"], c["manual_percentage"]
+        )
+        assert COMPLEXITY_LEVELS[scores["complexity_code"][i]] == complexity
+
+        priority = get_implementation_priority(c["monthly_volume"], c["current_time_minutes"], c["error_rate_percentage"])
+        assert PRIORITY_LEVELS[scores["priority_code"][i]] == priority
+
+        readiness = assess_automation_readiness(
+            c["data_quality"], 5, 5, 5, 5, 5, 5, 5, c["executive_sponsorship"], 5, 5, 5
+        )
+        assert READINESS_LEVELS[scores["readiness_code"][i]] == readiness["readiness_level"]
+
+        time_savings = calculate_time_savings(
+            c["monthly_volume"], c["current_time_minutes"], get_automation_efficiency_rate(complexity),
+            industry_type=c["industry_type"], complexity_level=complexity
+        )
+        cost_savings = calculate_cost_savings(
+            time_savings["hours_saved_monthly"], get_labor_cost_benchmark(c["industry_type"])["average"],
+            industry_type=c["industry_type"], complexity_level=complexity
+        )
+        costs = calculate_implementation_costs(
+            complexity, c["monthly_volume"], c["systems_involved"], industry_type=c["industry_type"]
+        )
+        roi = calculate_roi_metrics(cost_savings["total_annual_savings"], costs["total_cost_with_contingency"])
+
+        # The scalar tools round intermediate values, so compare with a tolerance
+        assert np.isclose(scores["implementation_cost"][i], costs["total_cost_with_contingency"], atol=1)
+        assert np.isclose(scores["annual_savings"][i], cost_savings["total_annual_savings"], rtol=0.01, atol=20)
+        assert np.isclose(
+            scores["risk_adjusted_annual_savings"][i], cost_savings["risk_adjusted_annual_savings"], rtol=0.01, atol=20
+        )
+        assert np.isclose(scores["roi_percentage"][i], roi["roi_percentage"], rtol=0.01, atol=0.2)
+
+
+def test_top_k_indices_matches_full_sort() -> None:
+    """Partial selection returns the same order as a full sort."""
+    values = np.array([5.0, 1.0, 9.0, 3.0, 7.0, np.nan, 8.0])
+    assert list(top_k_indices(values, 3)) == [2, 6, 4]
+    assert list(top_k_indices(values, 2, descending=False)) == [1, 3]
+    assert list(top_k_indices(values, 0)) == []
+
+
+def test_rank_portfolio_returns_top_k_by_objective() -> None:
+    """Results are ordered by the objective and summary covers all candidates."""
+    candidates = _random_candidates(2000)
+    result = rank_portfolio(candidates, objective="roi_percentage", top_k=25)
+
+    rois = [item["roi_percentage"] for item in result["top_k"]]
+    assert len(rois) == 25
+    assert rois == sorted(rois, reverse=True)
+    assert result["candidates_scored"] == 2000
+    assert sum(result["portfolio_summary"]["complexity_distribution"].values()) == 2000
+
+
+def test_labor_cost_benchmark_reads_the_shared_table() -> None:
+    """Rates come from industry_labor_costs; unlisted industries get the default rate."""
+    from agents.tools.benchmark_data import load_automation_benchmarks
+
+    rates = load_automation_benchmarks()["industry_labor_costs"]
+    assert get_labor_cost_benchmark("finance_operations") == rates["finance_operations"]
+    assert get_labor_cost_benchmark("Finance Operations") == rates["finance_operations"]
+    assert get_labor_cost_benchmark("healthcare") == {"min": 60, "max": 80, "average": 70}
@@ -0,0 +1,90 @@
+"""Unit tests for the on-demand sampling profiler and its admin endpoints."""
+
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from observability import profiling
+from observability.profiling import SamplingProfiler, profile_for
+from session_models import AnalysisSession
+
+
+def _profiler_threads() -> list:
+    return [thread for thread in threading.enumerate() if thread.name == "sampling-profiler"]
+
+
+def test_profiler_samples_between_start_and_stop_only() -> None:
+    """Samples name the busy function; stop joins the thread and leaves no hooks or active profile behind."""
+    done = threading.Event()
+
+    def busy_worker() -> None:
+        while not done.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_worker, name="busy")
+    worker.start()
+    profiler = SamplingProfiler(interval=0.002)
+    try:
+        profiler.start()
+        assert profiler.running
+        time.sleep(0.1)
+        profiler.stop()
+    finally:
+        done.set()
+        worker.join()
+
+    assert not profiler.running and _profiler_threads() == []
+    assert profiler.summary()["ticks"] > 5
+    assert "thread:busy" in profiler.collapsed() and "busy_worker" in profiler.collapsed()
+    speedscope = profiler.speedscope()
+    assert any(profile["name"] == "thread:busy" for profile in speedscope["profiles"])
+
+    # A second profile can't start while one runs
+    async def overlapping():
+        first = asyncio.ensure_future(profile_for(0.1))
+        await asyncio.sleep(0.01)
+        with pytest.raises(RuntimeError, match="already running"):
+            await profile_for(0.1)
+        await first
+
+    asyncio.run(overlapping())
+    assert profiling._active_profiler is None
+
+
+def test_disabled_profiling_installs_nothing(monkeypatch) -> None:
+    """Without an admin token the endpoints are hidden, and no thread, trace or profile hook is installed."""
+    monkeypatch.setattr(main, "ADMIN_API_TOKEN", None)
+    with TestClient(main.app) as client:
+        assert client.post("/api/v1/admin/profile?seconds=0.1").status_code == 404
+        assert client.post("/api/v1/admin/profile/session/any").status_code == 404
+    assert _profiler_threads() == [] and profiling._active_profiler is None
+    assert sys.getprofile() is None and threading.getprofile() is None
+
+
+def test_session_profile_requires_the_admin_token(monkeypatch) -> None:
+    """A bad token is refused; the right one samples the session's tasks until the session finishes."""
+    monkeypatch.setattr(main, "ADMIN_API_TOKEN", "secret")
+    monkeypatch.setattr(main, "analysis_sessions", {})
+    session_id = "profiled-session"
+    main.analysis_sessions[session_id] = AnalysisSession(request={}, agent_names=["solution_designer"])
+
+    async def slow_analysis(session_id: str) -> None:
+        for _ in range(30):
+            await asyncio.sleep(0.01)
+        main.analysis_sessions[session_id].status = "complete"
+
+    url = f"/api/v1/admin/profile/session/{session_id}?format=collapsed&interval_ms=2"
+    with TestClient(main.app) as client:
+        assert client.post(url).status_code == 403
+        assert client.post(url, headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+        client.portal.start_task_soon(slow_analysis, session_id)
+        response = client.post(url, headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert "slow_analysis" in response.text
+    assert main.analysis_sessions[session_id].status == "complete"
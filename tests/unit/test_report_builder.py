@@ -0,0 +1,63 @@
+"""Unit tests for the structured stage outputs and the report merge."""
+
+import pytest
+
+from agents.automation.output_schemas import STAGE_SCHEMAS
+from report_builder import merge_business_case, parse_stage_output
+
+STAGE_OUTPUTS = {
+    "process_analysis": {
+        "business_scenario": "Invoice processing",
+        "monthly_volume": 1000,
+        "people_involved": 3,
+        "manual_percentage": 85,
+        "complexity_level": "integration_automation",
+        "opportunities": ["Automate data entry"]
+    },
+    "roi_analysis": {
+        "monthly_savings": 10000,
+        "annual_savings": 120000,
+        "implementation_cost": 60000,
+        "roi_percentage": 200,
+        "payback_months": 6
+    },
+    "implementation_plan": {
+        "phases": [{"title": "Pilot (Months 1-2)", "actions": ["Configure"], "expected_impact": "Pilot live"}]
+    },
+    "risk_assessment": {"overall_risk": "Low", "success_probability": 91.4, "mitigations": ["pilot first"]},
+    "tech_integration": {"architecture_pattern": "Hub", "platform_approach": "iPaaS"},
+    "final_business_case": {
+        "executive_summary": "Strong case.",
+        "recommendation": "Go",
+        "confidence_percentage": 88,
+        "strategic_recommendations": ["Start with a pilot"],
+        "success_metrics": [{"metric": "Cost", "target": "$120,000", "timeframe": "12 months", "measurement": "Ledger"}]
+    }
+}
+
+
+def test_report_is_merged_from_typed_fields() -> None:
+    """Financials, phases and risk come straight from the stage outputs."""
+    report = merge_business_case("AUTO-2024-TEST", STAGE_OUTPUTS)
+    deliverables = report["deliverables"]
+    assert deliverables["estimated_roi"] == "200%"
+    assert deliverables["payback_period"] == "6.0 months"
+    assert deliverables["annual_savings"] == "$120,000"
+    assert deliverables["implementation_roadmap"]["phase_1"]["title"] == "Pilot (Months 1-2)"
+    assert deliverables["risk_assessment"].startswith("Low risk implementation with 6.0 month payback.")
+    assert deliverables["risk_assessment"].endswith("Success probability: 91%.")
+    assert report["automation_analysis_details"]["complexity_level"] == "integration_automation"
+    assert report["automation_analysis_details"]["agents_executed"] == len(STAGE_SCHEMAS)
+
+
+def test_invalid_or_legacy_stage_outputs_use_fallback() -> None:
+    """Free-text checkpoints are replaced by the fallback; with none, the merge fails loudly."""
+    legacy = dict(STAGE_OUTPUTS, roi_analysis={"agent": "roi_calculator", "summary": "ROI looks great"})
+    assert parse_stage_output("roi_analysis", legacy["roi_analysis"]) is None
+
+    fallback = {"roi_analysis": dict(STAGE_OUTPUTS["roi_analysis"], roi_percentage=350)}
+    report = merge_business_case("AUTO-2024-TEST", legacy, fallback_outputs=fallback)
+    assert report["deliverables"]["estimated_roi"] == "350%"
+
+    with pytest.raises(ValueError):
+        merge_business_case("AUTO-2024-TEST", legacy)
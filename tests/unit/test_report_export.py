@@ -0,0 +1,61 @@
+"""Unit tests for report export rendering and caching."""
+
+import asyncio
+import io
+import zipfile
+
+from report_export import ReportExporter, content_hash
+from report_render import render_report
+
+REPORT = {
+    "project_id": "AUTO-2024-ABCD1234",
+    "deliverables": {
+        "executive_summary": "Automating invoice intake (with OCR) removes most manual keying " * 3,
+        "automation_opportunities": ["Workflow automation", "System integration"],
+        "estimated_roi": "250%",
+        "implementation_roadmap": {"phase_1": {"title": "Foundation (Months 1-2)", "actions": ["Charter"]}},
+        "success_metrics": [{"metric": "Cost Savings", "target": "$120,000 annually"}],
+    },
+}
+
+
+def test_markdown_keeps_report_structure() -> None:
+    """Nested sections become headings, lists become bullets."""
+    text = render_report(REPORT, "md").decode()
+    assert text.startswith("# Automation Business Case - AUTO-2024-ABCD1234")
+    assert "### Foundation (Months 1-2)" in text
+    assert "- **Estimated roi:** 250%" in text
+    assert "- Metric: Cost Savings | Target: $120,000 annually" in text
+
+
+def test_pdf_and_docx_are_well_formed() -> None:
+    """PDF has a valid trailer and escaped text; DOCX is a readable package."""
+    pdf = render_report(REPORT, "pdf")
+    assert pdf.startswith(b"%PDF-1.4") and pdf.rstrip().endswith(b"%%EOF")
+    assert b"\\(with OCR\\)" in pdf
+    xref = int(pdf.rsplit(b"startxref\n", 1)[1].split(b"\n")[0])
+    assert pdf[xref:].startswith(b"xref")
+
+    package = zipfile.ZipFile(io.BytesIO(render_report(REPORT, "docx")))
+    assert {"[Content_Types].xml", "_rels/.rels", "word/document.xml"} <= set(package.namelist())
+    assert "Foundation (Months 1-2)" in package.read("word/document.xml").decode()
+
+
+def test_exporter_renders_once_per_content_hash() -> None:
+    """Repeated exports of an unchanged report are served from the cache; workers are never forked."""
+    exporter = ReportExporter(workers=1)
+    assert exporter._get_executor()._mp_context.get_start_method() in ("forkserver", "spawn")
+
+    async def run():
+        first = await exporter.export(REPORT, "md")
+        second = await exporter.export(dict(REPORT), "md")
+        return first, second
+
+    try:
+        (key, body), (second_key, second_body) = asyncio.run(run())
+    finally:
+        exporter.shutdown()
+    assert key == second_key == content_hash(REPORT, "md")
+    assert body == second_body
+    assert exporter.renders == 1 and exporter.hits == 1
+    assert content_hash(REPORT, "pdf") != key
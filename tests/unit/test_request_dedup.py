@@ -0,0 +1,41 @@
+"""Unit tests for idempotency keys and in-flight request coalescing."""
+
+import pytest
+
+from request_dedup import IdempotencyConflict, RequestDeduplicator, request_fingerprint
+
+BODY = {"business_scenario": "Invoice processing", "monthly_volume": 900, "decision_makers": ["CFO"]}
+
+
+def test_fingerprint_ignores_case_and_whitespace() -> None:
+    """Cosmetic differences do not change the fingerprint; content does."""
+    same = {**BODY, "business_scenario": "  invoice   PROCESSING "}
+    assert request_fingerprint(same) == request_fingerprint(BODY)
+    assert request_fingerprint({**BODY, "monthly_volume": 901}) != request_fingerprint(BODY)
+
+
+def test_identical_requests_coalesce_only_while_in_flight() -> None:
+    """A duplicate attaches to the running session and starts fresh once it finishes."""
+    dedup = RequestDeduplicator(ttl=60)
+    fingerprint = request_fingerprint(BODY)
+    assert dedup.lookup(None, fingerprint) is None
+    dedup.register("s1", None, fingerprint)
+    assert dedup.lookup(None, fingerprint) == ("s1", "coalesced")
+    dedup.finish(fingerprint, "s1")
+    assert dedup.lookup(None, fingerprint) is None
+
+
+def test_idempotency_key_replays_and_rejects_different_body() -> None:
+    """Keys outlive the run until their TTL and are bound to one request body."""
+    dedup = RequestDeduplicator(ttl=60)
+    fingerprint = request_fingerprint(BODY)
+    dedup.register("s1", "key-1", fingerprint)
+    dedup.finish(fingerprint, "s1")
+    assert dedup.lookup("key-1", fingerprint) == ("s1", "idempotency_key")
+    with pytest.raises(IdempotencyConflict):
+        dedup.lookup("key-1", request_fingerprint({**BODY, "monthly_volume": 5}))
+
+    expired = RequestDeduplicator(ttl=0)
+    expired.register("s2", "key-2", fingerprint)
+    expired.finish(fingerprint, "s2")
+    assert expired.lookup("key-2", fingerprint) is None
@@ -0,0 +1,105 @@
+"""Unit tests for session records and the compressed session archive."""
+
+import asyncio
+import threading
+import time
+
+from session_archive import SessionArchive
+from session_models import AnalysisSession, ChatMessage
+
+
+def _session(status: str, finished_minutes_ago: float) -> AnalysisSession:
+    finished = time.time() - finished_minutes_ago * 60
+    return AnalysisSession(
+        request={"business_scenario": "invoices", "monthly_volume": 800},
+        agent_names=["analyst", "calculator"],
+        status=status,
+        result={"deliverables": {"estimated_roi": "250%"}},
+        started_at=finished - 60,
+        completed_at=finished,
+        completed_count=2,
+        chat_messages=[
+            ChatMessage(f"start_{i}", "analyst", "all", "Starting analysis " * 10, "start", finished)
+            for i in range(14)
+        ],
+    )
+
+
+def test_compact_moves_only_old_finished_sessions() -> None:
+    """Processing and recent sessions stay live; old ones rehydrate unchanged."""
+    sessions = {
+        "old": _session("complete", 60),
+        "recent": _session("complete", 1),
+        "running": _session("processing", 60),
+    }
+    original = sessions["old"]
+    archive = SessionArchive(archive_dir=None)
+
+    assert archive.compact(sessions, older_than=600) == 1
+    assert set(sessions) == {"recent", "running"}
+    assert archive.load("old") == original
+    assert archive.stats()["bytes_saved"] > 0
+
+
+def test_server_compaction_packs_off_the_loop(tmp_path) -> None:
+    """Packing runs on the blocking pool; a session resumed meanwhile stays live and leaves no file."""
+    sessions = {"old": _session("complete", 60), "resumed": _session("error", 60)}
+    archive = SessionArchive(archive_dir=str(tmp_path))
+    pack = archive._pack
+    packed_on = []
+
+    def pack_and_resume(session_id, session):
+        packed_on.append(threading.current_thread())
+        entry = pack(session_id, session)
+        if session_id == "resumed":
+            session.status = "processing"
+        return entry
+
+    archive._pack = pack_and_resume
+    assert asyncio.run(archive.compact_off_loop(sessions, older_than=600)) == 1
+    assert threading.main_thread() not in packed_on and len(packed_on) == 2
+    assert set(sessions) == {"resumed"} and list(archive.entries) == ["old"]
+    assert [p.name for p in tmp_path.iterdir()] == [f"old.{archive.codec.name}"]
+    assert archive.load("old").status == "complete"
+
+
+def test_disk_storage_keeps_no_blob_in_memory(tmp_path) -> None:
+    """With an archive directory the compressed blob lives only on disk."""
+    archive = SessionArchive(archive_dir=str(tmp_path))
+    archive.archive("s1", _session("error", 30))
+    assert archive.entries["s1"].blob is None
+    assert archive.load("s1").status == "error"
+    assert archive.load("missing") is None
+
+
+def test_expire_drops_old_entries_then_the_oldest_beyond_the_bound(tmp_path) -> None:
+    """Entries past the TTL go first, then the oldest until max_entries remain, files included."""
+    archive = SessionArchive(archive_dir=str(tmp_path), ttl_seconds=3600, max_entries=2)
+    for session_id in ("a", "b", "c", "d"):
+        archive.archive(session_id, _session("complete", 30))
+    archive.entries["a"].archived_at -= 7200
+    assert archive.expire() == 2
+    assert list(archive.entries) == ["c", "d"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"c.{archive.codec.name}", f"d.{archive.codec.name}"]
+    assert archive.load("a") is None and archive.stats()["archived_sessions"] == 2
+
+    # Re-archiving a session makes it the newest
+    archive.archive("c", _session("error", 5))
+    archive.archive("e", _session("complete", 5))
+    assert archive.expire() == 1 and list(archive.entries) == ["c", "e"]
+    assert archive.load("c").status == "error"
+    assert archive.expire(now=time.time() + 3601) == 2 and len(archive) == 0
+    assert archive.bytes_saved == 0
+
+
+def test_chat_message_serializes_lazily() -> None:
+    """Messages keep epoch floats and render the original dict shape on demand."""
+    message = ChatMessage("start_0", "analyst", "all", "Starting", "start", 0.0)
+    assert message.to_dict() == {
+        "id": "start_0",
+        "from_agent": "analyst",
+        "to_agent": "all",
+        "message": "Starting",
+        "type": "start",
+        "timestamp": "1970-01-01T00:00:00",
+    }
@@ -0,0 +1,39 @@
+"""Unit tests for the nearest-example similarity index."""
+
+from agents.tools.similarity_index import ExampleIndex, parse_months, parse_percentage
+
+
+def test_parsers_handle_benchmark_strings() -> None:
+    """ROI and timeframe strings from the benchmark JSON become numbers."""
+    assert parse_percentage("361%") == 361.0
+    assert parse_percentage("82-94% case closure rate") is None
+    assert parse_months("5 months") == 5.0
+    assert parse_months("3 years") == 36.0
+
+
+def test_query_ranks_closest_example_first() -> None:
+    """Industry, complexity and volume all pull the best match to the top."""
+    index = ExampleIndex([
+        {"company": "a", "industry": "Healthcare", "complexity_level": "basic_automation", "monthly_volume": 100},
+        {"company": "b", "industry": "Healthcare", "complexity_level": "process_automation", "monthly_volume": 5000},
+        {"company": "c", "industry": "Healthcare", "complexity_level": "process_automation", "monthly_volume": 900},
+        {"company": "d", "industry": "Retail", "complexity_level": "process_automation", "monthly_volume": 900},
+    ])
+    results = index.query(k=3, complexity_level="process_automation", industry_type="healthcare", monthly_volume=1000)
+    assert [r["company"] for r in results] == ["c", "b", "a"]
+    assert results[0]["similarity"] > results[1]["similarity"]
+
+
+def test_concurrent_case_library_appends_keep_every_case(monkeypatch) -> None:
+    """Appends racing on the blocking pool all land in the library."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from agents.tools import similarity_index
+
+    monkeypatch.setattr(similarity_index, "_case_library", [])
+    monkeypatch.setattr(similarity_index, "_index", None)
+    cases = [{"company": f"case-{i}", "industry": "Retail", "monthly_volume": 100 + i} for i in range(40)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda case: similarity_index.load_case_library([case], replace=False), cases))
+    assert sorted(case["company"] for case in similarity_index._case_library) == sorted(case["company"] for case in cases)
+    assert len(similarity_index.get_example_index()) == len(similarity_index._benchmarks()) + 40
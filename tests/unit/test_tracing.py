@@ -0,0 +1,125 @@
+"""Unit tests for pipeline tracing."""
+
+import pytest
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.testclient import TestClient
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from agent import root_agent
+from agents.tools import instrumentation
+from observability.tracing import SampledExporter, TracingMiddleware, configure_tracing, stage_span, tool_span
+from test_cost_ledger import ScriptedLlm, _run_pipeline
+
+
+@pytest.fixture
+def spans():
+    """In-memory exporter on the active provider; installs an SDK provider when ADK has not."""
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        provider = TracerProvider()
+        trace.set_tracer_provider(provider)
+    exporter = InMemorySpanExporter()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    yield exporter
+    # Processors cannot be detached; a shut down exporter drops later spans
+    exporter.shutdown()
+
+
+def _ancestors(span, finished) -> list:
+    by_id = {other.context.span_id: other for other in finished}
+    chain = []
+    while span.parent is not None:
+        span = by_id[span.parent.span_id]
+        chain.append(span)
+    return chain
+
+
+def test_pipeline_run_nests_agent_and_model_spans(spans, monkeypatch) -> None:
+    """One run gives pipeline -> agent_run per stage -> call_llm with token usage, and tool spans nest too."""
+    for sub_agent in root_agent.sub_agents:
+        monkeypatch.setattr(sub_agent.model, "inner", ScriptedLlm(model="scripted"))
+
+    with stage_span("automation_pipeline", session_id="trace-1", attempt=1):
+        _run_pipeline()
+        with tool_span("calculate_roi"):
+            pass
+
+    finished = spans.get_finished_spans()
+    pipeline, = [span for span in finished if span.name == "automation_pipeline"]
+    assert pipeline.parent is None
+    assert dict(pipeline.attributes) == {"session_id": "trace-1", "attempt": 1}
+    assert {span.context.trace_id for span in finished} == {pipeline.context.trace_id}
+
+    stage_names = [sub_agent.name for sub_agent in root_agent.sub_agents]
+    for name in stage_names:
+        stage, = [span for span in finished if span.name == f"agent_run [{name}]"]
+        assert _ancestors(stage, finished)[-1] is pipeline
+        call, = [span for span in finished if span.parent and span.parent.span_id == stage.context.span_id]
+        assert call.name == "call_llm"
+        assert call.attributes["automation.agent"] == name
+        assert (call.attributes["gen_ai.usage.input_tokens"], call.attributes["gen_ai.usage.output_tokens"]) == (300, 50)
+
+    tool, = [span for span in finished if span.name == "tool calculate_roi"]
+    assert tool.attributes["tool.name"] == "calculate_roi"
+    assert tool.parent.span_id == pipeline.context.span_id
+
+
+def test_request_span_parents_background_work(spans) -> None:
+    """The server span ends with the response; a background stage still joins its trace as a child."""
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+
+    def background_stage() -> None:
+        with stage_span("generate_automation_report", session_id="trace-2"):
+            pass
+
+    @app.post("/analyze")
+    async def analyze(background_tasks: BackgroundTasks):
+        background_tasks.add_task(background_stage)
+        return {"ok": True}
+
+    with TestClient(app) as client:
+        assert client.post("/analyze").status_code == 200
+
+    finished = spans.get_finished_spans()
+    request, = [span for span in finished if span.attributes.get("http.target") == "/analyze"]
+    report, = [span for span in finished if span.name == "generate_automation_report"]
+    assert (request.name, request.kind) == ("POST /analyze", trace.SpanKind.SERVER)
+    assert (request.attributes["http.method"], request.attributes["http.status_code"]) == ("POST", 200)
+    assert request in _ancestors(report, finished)
+    assert report.attributes["session_id"] == "trace-2"
+    assert request.end_time <= report.end_time
+
+
+def test_tracing_is_a_no_op_when_disabled(monkeypatch) -> None:
+    """No exporter means no middleware, processors or tool scope; sampling drops whole traces."""
+    class App:
+        def __init__(self):
+            self.middleware = []
+
+        def add_middleware(self, middleware_class, **options):
+            self.middleware.append(middleware_class)
+
+    monkeypatch.setattr(instrumentation, "_tool_scopes", [])
+    provider = trace.get_tracer_provider()
+    processors = getattr(getattr(provider, "_active_span_processor", None), "_span_processors", None)
+    app = App()
+    assert configure_tracing(app, exporter_names="") is False
+    assert configure_tracing(app, exporter_names=" , ") is False
+    assert configure_tracing(app, exporter_names="unknown") is False
+    assert app.middleware == [] and instrumentation._tool_scopes == []
+    assert trace.get_tracer_provider() is provider
+    assert getattr(getattr(provider, "_active_span_processor", None), "_span_processors", None) == processors
+
+    provider = TracerProvider()
+    kept, dropped = InMemorySpanExporter(), InMemorySpanExporter()
+    provider.add_span_processor(SimpleSpanProcessor(SampledExporter(kept, 1.0)))
+    provider.add_span_processor(SimpleSpanProcessor(SampledExporter(dropped, 0.0)))
+    tracer = provider.get_tracer("test")
+    with tracer.start_as_current_span("automation_pipeline"):
+        with tracer.start_as_current_span("agent_run [solution_designer]"):
+            pass
+    assert len(kept.get_finished_spans()) == 2 and dropped.get_finished_spans() == ()